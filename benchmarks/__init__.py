@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Outils de mesure de performance (jeu de données « soirée de gala », plans de requêtes...).
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Mesure l'import CSV massif (``import_csv.import_csv``) sur un fichier synthétique.
+
+Le fichier est construit à partir des lignes de ``in.csv`` (en-têtes réels du
+formulaire), recopiées avec un nom d'entreprise unique jusqu'à ``--rows`` lignes.
+
+Usage:
+    python -m benchmarks.import_bulk [--rows 5000] [--source in.csv] [--workdir /tmp/gala_import]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from import_csv import COMPANY_FIELD_MAP, import_csv
+from models.init_db import SCHEMA_SQL, apply_migrations
+
+NAME_COLUMN = next(col for col, field in COMPANY_FIELD_MAP.items() if field == "nom")
+
+
+def build_csv(source: Path, target: Path, rows: int) -> int:
+    with open(source, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        headers = reader.fieldnames or []
+        templates = [row for row in reader if row.get(NAME_COLUMN)]
+    if not templates:
+        raise SystemExit(f"Aucune ligne exploitable dans {source}")
+
+    with open(target, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        for index in range(rows):
+            row = dict(templates[index % len(templates)])
+            row[NAME_COLUMN] = f"{row[NAME_COLUMN]} #{index:05d}"
+            writer.writerow(row)
+    return rows
+
+
+def fresh_database(db_path: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    apply_migrations(conn)
+    conn.close()
+
+
+def main(argv: Optional[list] = None) -> None:
+    ap = argparse.ArgumentParser(description="Chronomètre l'import CSV massif.")
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--source", type=Path, default=Path("in.csv"))
+    ap.add_argument("--workdir", type=Path)
+    args = ap.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="gala_import_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    csv_path = workdir / "candidatures.csv"
+    db_path = workdir / "gala.db"
+
+    build_csv(args.source, csv_path, args.rows)
+    fresh_database(db_path)
+
+    for label in ("premier import", "ré-import (idempotent)"):
+        started = time.perf_counter()
+        import_csv(db_path, csv_path, "Gala Bench", 2025, "Portneuf", "2025-11-15")
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  {label}: {args.rows} candidatures en {elapsed:.2f}s ({args.rows / elapsed:,.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()
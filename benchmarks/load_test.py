@@ -0,0 +1,574 @@
+# -*- coding: utf-8 -*-
+"""
+Test de charge « soirée de gala » : juges et admins simultanés.
+
+Le script génère une base (``benchmarks.seed``), puis lance un fil par juge :
+connexion, tableau de bord, liste des participants de chaque catégorie, fiche
+de chaque participant, notes enregistrées par rafales (``PATCH .../notes``) et
+soumission finale. Pendant ce temps, des admins relisent les résultats en
+boucle (avec ``If-None-Match``, comme le navigateur).
+
+Rapport : p50/p95/p99 par route, débit, erreurs, et attentes de verrou SQLite.
+Une sonde tente ``BEGIN IMMEDIATE`` sans délai d'attente à intervalle régulier :
+la part des essais refusés estime le temps pendant lequel le verrou d'écriture
+est tenu. Les erreurs « database is locked » renvoyées par l'application sont
+comptées à part.
+
+Cibles :
+    client     client de test Flask dans ce processus (défaut) ;
+    gunicorn   vrai serveur WSGI (``gunicorn.conf.py``) lancé sur la base générée.
+
+Usage:
+    python -m benchmarks.load_test [--target gunicorn] [--judges 40] [--json rapport.json]
+    python -m benchmarks.load_test --compare HEAD~3 HEAD [options...]
+
+``--compare`` exécute la même charge sur deux commits (``.`` = arbre de travail),
+chacun dans un ``git worktree`` temporaire, puis affiche l'écart par route.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.seed import BENCH_PASSWORD, SeedSummary, seed_database
+
+ROOT = Path(__file__).resolve().parent.parent
+
+Response = Tuple[int, bytes, Dict[str, str]]
+
+
+# ==============================
+# 🔌 Transports (client de test / HTTP)
+# ==============================
+class FlaskClientSession:
+    """Session d'un utilisateur sur le client de test Flask (cookies propres)."""
+
+    def __init__(self, app) -> None:
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, payload: Any = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        try:
+            response = self._client.open(path, method=method, json=payload, headers=headers or {})
+        except Exception as exc:  # TESTING propage les exceptions des routes
+            return 500, repr(exc).encode("utf-8"), {}
+        return response.status_code, response.get_data(), dict(response.headers)
+
+    def close(self) -> None:
+        pass
+
+
+class HttpSession:
+    """Session HTTP keep-alive (une connexion par utilisateur simulé)."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._cookies: Dict[str, str] = {}
+
+    def request(self, method: str, path: str, payload: Any = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        body = None
+        all_headers = dict(headers or {})
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            all_headers["Content-Type"] = "application/json"
+        if self._cookies:
+            all_headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self._cookies.items())
+
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=60)
+            try:
+                self._conn.request(method, path, body=body, headers=all_headers)
+                response = self._conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # Connexion keep-alive fermée par le serveur : on rouvre une fois.
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+        for header in response.headers.get_all("Set-Cookie") or []:
+            cookie = SimpleCookie()
+            cookie.load(header)
+            for name, morsel in cookie.items():
+                self._cookies[name] = morsel.value
+        return response.status, data, dict(response.headers)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+
+# ==============================
+# 📊 Mesures
+# ==============================
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile au rang le plus proche (valeurs déjà triées)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class Recorder:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    statuses: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    lock_errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def call(self, session, label: str, method: str, path: str, payload: Any = None,
+             headers: Optional[Dict[str, str]] = None, expected: Tuple[int, ...] = (200,)) -> Response:
+        started = time.perf_counter()
+        status, body, response_headers = session.request(method, path, payload, headers)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies.setdefault(label, []).append(elapsed_ms)
+            by_status = self.statuses.setdefault(label, {})
+            by_status[status] = by_status.get(status, 0) + 1
+            if status not in expected:
+                self.errors[label] = self.errors.get(label, 0) + 1
+                if b"database is locked" in body:
+                    self.lock_errors += 1
+        return status, body, response_headers
+
+    def report(self, elapsed_s: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for label in sorted(self.latencies):
+            values = sorted(self.latencies[label])
+            total += len(values)
+            endpoints[label] = {
+                "count": len(values),
+                "errors": self.errors.get(label, 0),
+                "statuses": {str(code): count for code, count in sorted(self.statuses[label].items())},
+                "rps": round(len(values) / elapsed_s, 1) if elapsed_s else 0.0,
+                "mean_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+            }
+        return {
+            "elapsed_s": round(elapsed_s, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed_s, 1) if elapsed_s else 0.0,
+            "errors": sum(self.errors.values()),
+            "app_lock_errors": self.lock_errors,
+            "endpoints": endpoints,
+        }
+
+
+class LockProbe(threading.Thread):
+    """Sonde du verrou d'écriture SQLite (``BEGIN IMMEDIATE`` sans attente)."""
+
+    def __init__(self, db_path: Path, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.samples = 0
+        self.busy = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=0, isolation_level=None, check_same_thread=False)
+        try:
+            while not self._stop_event.wait(self.interval):
+                self.samples += 1
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                except sqlite3.OperationalError:
+                    self.busy += 1
+                else:
+                    conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop_event.set()
+        self.join()
+        return {
+            "probe_samples": self.samples,
+            "probe_busy": self.busy,
+            "write_lock_busy_ratio": round(self.busy / self.samples, 4) if self.samples else 0.0,
+        }
+
+
+# ==============================
+# 🎭 Scénarios
+# ==============================
+def _json(body: bytes) -> Any:
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        return None
+
+
+def _login(recorder: Recorder, session, username: str, attempts: int = 8) -> bool:
+    # Comme le navigateur : un 503 (file de hachage pleine) est réessayé après Retry-After.
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        status, _, headers = recorder.call(
+            session, "auth.login", "POST", "/auth/login", {"username": username, "password": BENCH_PASSWORD},
+            expected=(200,) if last else (200, 503),
+        )
+        if status != 503 or last:
+            return status == 200
+        time.sleep(float(headers.get("Retry-After") or 1) * random.uniform(1.0, 1.5))
+    return False
+
+
+def judge_scenario(recorder: Recorder, session, username: str, burst: int, think_ms: int, rng: random.Random) -> None:
+    def think() -> None:
+        if think_ms:
+            time.sleep(rng.uniform(0, think_ms) / 1000)
+
+    if not _login(recorder, session, username):
+        return
+    _, body, _ = recorder.call(session, "judge.galas", "GET", "/judge/api/galas")
+    galas = (_json(body) or {}).get("galas") or []
+    if not galas:
+        return
+    gala = galas[0]  # édition la plus récente
+    gala_id = gala["id"]
+
+    for category in gala["categories"]:
+        base = f"/judge/api/galas/{gala_id}/categories/{category['id']}/participants"
+        _, body, _ = recorder.call(session, "judge.participants", "GET", base)
+        participants = (_json(body) or {}).get("participants") or []
+        for participant in participants:
+            think()
+            status, body, _ = recorder.call(session, "judge.participant_detail", "GET", f"{base}/{participant['id']}")
+            if status != 200:
+                continue
+            pending = [
+                {
+                    "question_id": question["id"],
+                    "target_participant_id": question.get("scope_participant_id") or participant["id"],
+                    "valeur": rng.randint(1, 6),
+                }
+                for question in (_json(body) or {}).get("questions", [])
+                if question.get("note") is None
+            ]
+            # Sauvegarde automatique : quelques notes à la fois, au fil de la saisie.
+            for start in range(0, len(pending), burst):
+                recorder.call(
+                    session, "judge.notes", "PATCH", f"{base}/{participant['id']}/notes",
+                    {"notes": pending[start:start + burst]},
+                )
+        recorder.call(session, "judge.participants", "GET", base)
+
+    recorder.call(session, "judge.galas", "GET", "/judge/api/galas")
+    recorder.call(session, "judge.submit", "POST", f"/judge/api/galas/{gala_id}/submit")
+
+
+def admin_scenario(recorder: Recorder, session, username: str, gala_id: int, interval: float, done: threading.Event) -> None:
+    if not _login(recorder, session, username):
+        return
+    etag: Optional[str] = None
+    path = f"/admin/api/results?gala_id={gala_id}"
+    while not done.is_set():
+        headers = {"If-None-Match": etag} if etag else {}
+        _, _, response_headers = recorder.call(session, "admin.results", "GET", path, headers=headers, expected=(200, 304))
+        etag = response_headers.get("ETag") or etag
+        done.wait(interval)
+
+
+def run_load(
+    summary: SeedSummary,
+    session_factory: Callable[[], Any],
+    admins: int,
+    burst: int,
+    think_ms: int,
+    admin_interval: float,
+    probe_interval: float,
+    seed: int,
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    probe = LockProbe(summary.db_path, probe_interval)
+    done = threading.Event()
+    sessions: List[Any] = []
+
+    def spawn(target, *args) -> threading.Thread:
+        session = session_factory()
+        sessions.append(session)
+        thread = threading.Thread(target=target, args=(recorder, session, *args), daemon=True)
+        thread.start()
+        return thread
+
+    started = time.perf_counter()
+    probe.start()
+    admin_threads = [
+        spawn(admin_scenario, summary.admin_username, summary.gala_ids[0], admin_interval, done)
+        for _ in range(admins)
+    ]
+    judge_threads = [
+        spawn(judge_scenario, username, burst, think_ms, random.Random(seed + index))
+        for index, username in enumerate(summary.judge_usernames)
+    ]
+    for thread in judge_threads:
+        thread.join()
+    done.set()
+    for thread in admin_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    lock_report = probe.stop()
+    for session in sessions:
+        session.close()
+
+    report = recorder.report(elapsed)
+    report["sqlite_lock"] = lock_report
+    return report
+
+
+# ==============================
+# 🚀 Cibles
+# ==============================
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_server(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn s'est arrêté (code {process.returncode}).")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn ne répond pas.")
+
+
+def run_with_client(summary: SeedSummary, options: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.query_plans import build_app
+    from models import db as db_module
+    from models import note_queue
+
+    app = build_app(summary.db_path)
+    app.config["DB_POOL_SIZE"] = options.pool_size
+    # Tous les juges virtuels partagent la même IP.
+    app.config["AUTH_RATE_LIMIT_ENABLED"] = False
+    app.config["NOTE_WRITE_BEHIND"] = options.write_behind
+    try:
+        report = run_load(summary, lambda: FlaskClientSession(app), **_load_kwargs(options))
+        report["pool"] = db_module.get_pool(app).stats()
+        queue = note_queue.get_queue(app)
+        if queue is not None:
+            report["note_queue"] = queue.stats()
+            queue.shutdown()
+    finally:
+        db_module.get_pool(app).close_all()
+    return report
+
+
+def run_with_gunicorn(summary: SeedSummary, options: argparse.Namespace) -> Dict[str, Any]:
+    # gunicorn travaille dans le dossier de la base : data/gala.db y est relatif.
+    workdir = summary.db_path.parent.parent
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+        GALA_BIND=f"127.0.0.1:{port}",
+        GALA_WORKERS=str(options.workers),
+        GALA_THREADS=str(options.threads),
+        SECRET_KEY="bench-secret",
+        GALA_AUTH_RATE_LIMIT="0",
+        GALA_NOTE_WRITE_BEHIND="1" if options.write_behind else "0",
+    )
+    log_path = workdir / "gunicorn.log"
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", str(ROOT / "gunicorn.conf.py"),
+             "--access-logfile", os.devnull, "run:create_app()"],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            _wait_for_server(port, process)
+            report = run_load(summary, lambda: HttpSession("127.0.0.1", port), **_load_kwargs(options))
+        finally:
+            process.terminate()
+            process.wait(timeout=15)
+    report["server_log"] = str(log_path)
+    return report
+
+
+def _load_kwargs(options: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "admins": options.admins,
+        "burst": options.burst,
+        "think_ms": options.think_ms,
+        "admin_interval": options.admin_interval,
+        "probe_interval": options.probe_interval,
+        "seed": options.seed,
+    }
+
+
+# ==============================
+# 🔀 Comparaison de deux commits
+# ==============================
+def _run_revision(rev: str, forwarded: List[str], workdir: Path) -> Dict[str, Any]:
+    """Lance la charge sur ``rev`` (sous-processus) et retourne son rapport JSON."""
+    out = workdir / f"report-{len(list(workdir.glob('report-*.json')))}.json"
+    if rev == ".":
+        tree, cleanup = ROOT, None
+    else:
+        tree = workdir / f"tree-{rev.replace('/', '_').replace('~', '_').replace('^', '_')}"
+        subprocess.run(["git", "-C", str(ROOT), "worktree", "add", "--detach", str(tree), rev], check=True,
+                       stdout=subprocess.DEVNULL)
+        # Même scénario et même jeu de données partout : seul le code de l'application change.
+        (tree / "benchmarks").mkdir(exist_ok=True)
+        for name in ("__init__.py", "seed.py", "query_plans.py", "load_test.py"):
+            shutil.copy2(ROOT / "benchmarks" / name, tree / "benchmarks" / name)
+        cleanup = tree
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.load_test", *forwarded, "--json", str(out)],
+            cwd=tree, env=dict(os.environ, PYTHONPATH=str(tree)), check=True,
+        )
+    finally:
+        if cleanup is not None:
+            subprocess.run(["git", "-C", str(ROOT), "worktree", "remove", "--force", str(cleanup)], check=False)
+    return json.loads(out.read_text(encoding="utf-8"))
+
+
+def _print_comparison(rev_a: str, a: Dict[str, Any], rev_b: str, b: Dict[str, Any]) -> None:
+    def delta(before: float, after: float) -> str:
+        if not before:
+            return "   n/a"
+        return f"{(after - before) / before * 100:+6.1f}%"
+
+    print(f"\n=== {rev_a} → {rev_b} ===")
+    print(f"{'route':<26}{'p50 (ms)':>22}{'p95 (ms)':>22}{'p99 (ms)':>22}")
+    for label in sorted(set(a["endpoints"]) | set(b["endpoints"])):
+        ea, eb = a["endpoints"].get(label), b["endpoints"].get(label)
+        if not ea or not eb:
+            print(f"{label:<26}{'(absente d’un côté)':>22}")
+            continue
+        cells = [
+            f"{ea[key]:>7.1f}→{eb[key]:<7.1f}{delta(ea[key], eb[key])}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{label:<26}" + "".join(f"{cell:>22}" for cell in cells))
+    print(
+        f"débit : {a['throughput_rps']} → {b['throughput_rps']} req/s ({delta(a['throughput_rps'], b['throughput_rps'])}) ; "
+        f"verrou occupé : {a['sqlite_lock']['write_lock_busy_ratio']:.1%} → {b['sqlite_lock']['write_lock_busy_ratio']:.1%}"
+    )
+
+
+# ==============================
+# 🖨️ Rapport
+# ==============================
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'route':<26}{'n':>7}{'err':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for label, stats in report["endpoints"].items():
+        print(
+            f"{label:<26}{stats['count']:>7}{stats['errors']:>6}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}"
+        )
+    lock = report["sqlite_lock"]
+    print(
+        f"\n⏱️  {report['requests']} requêtes en {report['elapsed_s']}s — {report['throughput_rps']} req/s, "
+        f"{report['errors']} erreur(s)"
+    )
+    print(
+        f"🔒 Verrou d'écriture occupé : {lock['probe_busy']}/{lock['probe_samples']} sondes "
+        f"({lock['write_lock_busy_ratio']:.1%}) ; erreurs « database is locked » : {report['app_lock_errors']}"
+    )
+    pool = report.get("pool")
+    if pool:
+        print(f"🔌 Pool : {pool['waits']} attente(s), {pool['wait_time_total_ms']} ms au total, {pool['timeouts']} délai(s) dépassé(s)")
+    queue = report.get("note_queue")
+    if queue:
+        print(
+            f"📨 File des notes : {queue['accepted']} acceptée(s), {queue['applied']} appliquée(s) en {queue['batches']} lot(s) "
+            f"(max {queue['batch_max']}), {queue['barrier_flushes']} barrière(s), {queue['rejected']} écartée(s), "
+            f"{queue['backpressure_drains']} contre-pression(s)"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Test de charge « soirée de gala ».")
+    ap.add_argument("--target", choices=("client", "gunicorn"), default="client")
+    ap.add_argument("--workdir", type=Path, help="Dossier de la base générée (défaut : temporaire)")
+    ap.add_argument("--galas", type=int, default=2)
+    ap.add_argument("--participants", type=int, default=20, help="Participants par catégorie")
+    ap.add_argument("--judges", type=int, default=40)
+    ap.add_argument("--categories-per-judge", type=int, default=3)
+    ap.add_argument("--fill", type=float, default=0.6, help="Proportion de notes déjà saisies")
+    ap.add_argument("--admins", type=int, default=2, help="Admins qui relisent les résultats")
+    ap.add_argument("--admin-interval", type=float, default=0.5, help="Secondes entre deux relectures admin")
+    ap.add_argument("--burst", type=int, default=3, help="Notes par requête de sauvegarde")
+    ap.add_argument("--think-ms", type=int, default=0, help="Pause max entre deux fiches (ms)")
+    ap.add_argument("--probe-interval", type=float, default=0.005, help="Intervalle de la sonde de verrou (s)")
+    ap.add_argument("--pool-size", type=int, default=8, help="Taille du pool (cible client)")
+    ap.add_argument("--workers", type=int, default=2, help="Processus gunicorn")
+    ap.add_argument("--threads", type=int, default=4, help="Fils par processus gunicorn")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--write-behind", action="store_true", help="File d'écriture différée des notes (NOTE_WRITE_BEHIND)")
+    ap.add_argument("--json", type=Path, help="Écrit le rapport complet en JSON")
+    ap.add_argument("--compare", nargs=2, metavar=("REV_A", "REV_B"), help="Compare deux commits (. = arbre de travail)")
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    options = build_parser().parse_args(argv)
+
+    if options.compare:
+        forwarded = list(argv)
+        index = forwarded.index("--compare")
+        del forwarded[index:index + 3]
+        workdir = Path(tempfile.mkdtemp(prefix="gala_compare_"))
+        rev_a, rev_b = options.compare
+        report_a = _run_revision(rev_a, forwarded, workdir)
+        report_b = _run_revision(rev_b, forwarded, workdir)
+        _print_comparison(rev_a, report_a, rev_b, report_b)
+        if options.json:
+            options.json.write_text(json.dumps({rev_a: report_a, rev_b: report_b}, indent=2), encoding="utf-8")
+        return 0
+
+    workdir = options.workdir or Path(tempfile.mkdtemp(prefix="gala_load_"))
+    summary = seed_database(
+        workdir / "data" / "gala.db",
+        galas=options.galas,
+        participants_per_category=options.participants,
+        judges=options.judges,
+        categories_per_judge=options.categories_per_judge,
+        fill_ratio=options.fill,
+        seed=options.seed,
+    )
+    print(f"🎭 {options.judges} juge(s), {options.admins} admin(s) — cible : {options.target} — base : {summary.db_path}")
+    runner = run_with_gunicorn if options.target == "gunicorn" else run_with_client
+    report = runner(summary, options)
+    report["config"] = {key: str(value) for key, value in vars(options).items()}
+    print_report(report)
+    if options.json:
+        options.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Vérifie les plans d'exécution (EXPLAIN QUERY PLAN) des routes juge et résultats.
+
+Le script génère une base « soirée de gala », appelle les routes via le client de
+test Flask en capturant chaque requête SQL réellement exécutée
+(``set_trace_callback``), puis rejoue ``EXPLAIN QUERY PLAN`` sur chacune.
+Un « full scan » est une ligne ``SCAN <table>`` sans index sur une table volumineuse.
+
+Usage:
+    python -m benchmarks.query_plans [--db /tmp/gala_plans.db] [--compare]
+
+``--compare`` mesure aussi la base sans les index secondaires (état d'avant la
+migration 2) afin d'afficher l'écart.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from benchmarks.seed import SeedSummary, seed_database
+from models import db as db_module
+from models import init_db
+from models.init_db import INDEX_SQL
+
+# Tables dont un parcours complet coûte cher un soir de gala.
+LARGE_TABLES = {
+    "note",
+    "participant",
+    "question",
+    "juge",
+    "juge_gala_categorie",
+    "gala_categorie",
+    "reponse_participant",
+    "coup_de_coeur",
+    "juge_gala_submission",
+    "score_aggregate",
+    "judge_workload",
+}
+
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_]*))?", re.I)
+_SQL_KEYWORDS = {"on", "where", "join", "left", "inner", "group", "order", "limit", "using", "cross", "natural"}
+
+
+@dataclass
+class StatementPlan:
+    sql: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EndpointPlans:
+    name: str
+    url: str
+    statements: List[StatementPlan] = field(default_factory=list)
+
+    @property
+    def full_scans(self) -> List[Tuple[str, str]]:
+        return [(scan, stmt.sql) for stmt in self.statements for scan in stmt.full_scans]
+
+
+def _alias_map(sql: str) -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    for table, alias in _ALIAS_RE.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def find_full_scans(sql: str, plan: List[str]) -> List[str]:
+    aliases = _alias_map(sql)
+    scans: List[str] = []
+    for detail in plan:
+        match = re.match(r"SCAN (\w+)(.*)$", detail)
+        if not match:
+            continue
+        target, rest = match.group(1).lower(), match.group(2)
+        if "INDEX" in rest.upper():
+            continue
+        table = aliases.get(target, target)
+        if table in LARGE_TABLES:
+            scans.append(f"SCAN {table}" + (f" ({target})" if target != table else ""))
+    return scans
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+def build_app(db_path: Path) -> Flask:
+    """Application de production (``run.create_app``) branchée sur ``db_path``."""
+    db_module.DB_PATH = Path(db_path)
+    init_db.DB_FILE = Path(db_path)
+    from run import create_app
+
+    return create_app({"SECRET_KEY": "bench-secret", "TESTING": True})
+
+
+def _session_user(user_id: int, username: str, role: str) -> Dict[str, object]:
+    return {"id": user_id, "username": username, "prenom": username, "nom": "Bench", "role": role}
+
+
+def bench_endpoints(summary: SeedSummary) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Retourne (routes juge, routes admin) à inspecter pour le jeu de données donné."""
+    gala_id = summary.gala_ids[0]
+    judge_user_id = summary.judge_user_ids[0]
+    category_id = summary.assignments[judge_user_id][0]
+    participant_id = summary.participants_by_category[category_id][0]
+    judge_routes = [
+        ("judge.galas", "/judge/api/galas"),
+        ("judge.participants", f"/judge/api/galas/{gala_id}/categories/{category_id}/participants"),
+        (
+            "judge.participant_detail",
+            f"/judge/api/galas/{gala_id}/categories/{category_id}/participants/{participant_id}",
+        ),
+    ]
+    admin_routes = [
+        ("admin.results", f"/admin/api/results?gala_id={gala_id}"),
+        ("admin.results_category", f"/admin/api/results?gala_id={gala_id}&categorie_id={category_id}"),
+    ]
+    return judge_routes, admin_routes
+
+
+def capture_plans(db_path: Path, summary: SeedSummary) -> List[EndpointPlans]:
+    app = build_app(db_path)
+    captured: List[str] = []
+    db_module.get_pool(app).add_connect_hook(lambda conn: conn.set_trace_callback(captured.append))
+
+    judge_routes, admin_routes = bench_endpoints(summary)
+    judge_user_id = summary.judge_user_ids[0]
+    results: List[EndpointPlans] = []
+
+    plan_conn = sqlite3.connect(db_path)
+    try:
+        for role, user_id, username, routes in (
+            ("juge", judge_user_id, summary.judge_usernames[0], judge_routes),
+            ("admin", summary.admin_user_id, summary.admin_username, admin_routes),
+        ):
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["user"] = _session_user(user_id, username, role)
+            for name, url in routes:
+                captured.clear()
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name}: statut HTTP {response.status_code}")
+                endpoint = EndpointPlans(name=name, url=url)
+                for sql in captured:
+                    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                        continue
+                    plan = explain(plan_conn, sql)
+                    endpoint.statements.append(StatementPlan(sql=sql, plan=plan, full_scans=find_full_scans(sql, plan)))
+                results.append(endpoint)
+    finally:
+        plan_conn.close()
+        db_module.get_pool(app).close_all()
+    return results
+
+
+def drop_secondary_indexes(db_path: Path) -> None:
+    names = re.findall(r"CREATE INDEX IF NOT EXISTS (\w+)", INDEX_SQL)
+    conn = sqlite3.connect(db_path)
+    try:
+        for name in names:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _print_report(label: str, plans: List[EndpointPlans]) -> None:
+    print(f"\n=== {label} ===")
+    for endpoint in plans:
+        scans = endpoint.full_scans
+        print(f"{endpoint.name:<28} requêtes:{len(endpoint.statements):>3}  full scans:{len(scans):>3}")
+        for scan, sql in scans:
+            print(f"    - {scan}: {' '.join(sql.split())[:110]}…")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Plans d'exécution des routes juge/résultats.")
+    ap.add_argument("--db", type=Path, help="Base générée (par défaut : fichier temporaire)")
+    # Deux galas (édition courante + archive) : avec un seul gala, chaque filtre
+    # sur gala_id couvre toute la table et le planificateur préfère un SCAN.
+    ap.add_argument("--galas", type=int, default=2)
+    ap.add_argument("--participants", type=int, default=40)
+    ap.add_argument("--judges", type=int, default=40)
+    ap.add_argument("--compare", action="store_true", help="Comparer avec la base sans index secondaires")
+    args = ap.parse_args(argv)
+
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="gala_plans_")) / "gala.db"
+    summary = seed_database(
+        db_path, galas=args.galas, participants_per_category=args.participants, judges=args.judges
+    )
+
+    after = capture_plans(db_path, summary)
+    if args.compare:
+        drop_secondary_indexes(db_path)
+        before = capture_plans(db_path, summary)
+        _print_report("Sans index secondaires", before)
+    _print_report("Avec index secondaires", after)
+
+    total = sum(len(endpoint.full_scans) for endpoint in after)
+    print(f"\n{'✅' if total == 0 else '❌'} Full scans restants : {total}")
+    return 0 if total == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
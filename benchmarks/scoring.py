@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Compare le calcul des classements : chemin SQL + Python actuel et ``models.scoring``.
+
+Chemins mesurés sur un gala généré (``benchmarks.seed``) :
+    sql_aggregat      lecture de ``score_aggregate`` + ratio et rang en Python
+                      (ce que fait ``/admin/api/results``) ;
+    sql_group_by      agrégation des notes brutes par ``GROUP BY`` (sans la table
+                      matérialisée : c'est ce que coûte un recalcul « et si » en SQL) ;
+    matrice           chargement de ``NoteMatrix`` seul ;
+    matrice_cache     ``cached_matrix`` quand les notes n'ont pas changé ;
+    <stratégie>       chaque stratégie sur la matrice déjà chargée, rang compris.
+
+Le script vérifie aussi que la moyenne pondérée de la matrice est identique à
+``score_aggregate``.
+
+Usage:
+    python -m benchmarks.scoring [--participants 80] [--judges 60] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.seed import seed_database
+from models import scoring
+
+AGGREGATE_SQL = """
+    SELECT p.id, p.gala_categorie_id, comp.nom,
+           COALESCE(sa.weighted_sum, 0) AS weighted_sum,
+           COALESCE(sa.answered_weight, 0) AS answered_weight
+    FROM participant AS p
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+    LEFT JOIN score_aggregate AS sa ON sa.participant_id = p.id
+    WHERE gc.gala_id = ?
+"""
+
+GROUP_BY_SQL = """
+    SELECT p.id, p.gala_categorie_id, comp.nom,
+           COALESCE(SUM(n.valeur * q.ponderation), 0) AS weighted_sum,
+           COALESCE(SUM(CASE WHEN n.valeur IS NOT NULL THEN q.ponderation END), 0) AS answered_weight
+    FROM participant AS p
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+    LEFT JOIN note AS n ON n.participant_id = p.id
+    LEFT JOIN question AS q ON q.id = n.question_id AND q.gala_categorie_id = p.gala_categorie_id
+    WHERE gc.gala_id = ?
+    GROUP BY p.id
+"""
+
+PARTICIPANTS_SQL = """
+    SELECT p.id, p.gala_categorie_id, comp.nom
+    FROM participant AS p
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+    WHERE gc.gala_id = ?
+"""
+
+
+def _rank_by_category(rows: List[sqlite3.Row], scores: Dict[int, Optional[float]]) -> int:
+    by_category: Dict[int, List[sqlite3.Row]] = {}
+    for row in rows:
+        by_category.setdefault(row[1], []).append(row)
+    ranked = 0
+    for participants in by_category.values():
+        ranked += len(scoring.ranked(participants, score=lambda row: scores.get(row[0]), name=lambda row: row[2]))
+    return ranked
+
+
+def _sql_path(sql: str) -> Callable[[sqlite3.Connection, int], Dict[int, Optional[float]]]:
+    def run(conn: sqlite3.Connection, gala_id: int) -> Dict[int, Optional[float]]:
+        rows = conn.execute(sql, (gala_id,)).fetchall()
+        scores = {row[0]: row[3] / row[4] if row[4] > 0 else None for row in rows}
+        _rank_by_category(rows, scores)
+        return scores
+
+    return run
+
+
+def _timed(func: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Chemins de calcul des classements.")
+    ap.add_argument("--db", type=Path, help="Base générée (par défaut : fichier temporaire)")
+    ap.add_argument("--participants", type=int, default=80, help="Participants par catégorie")
+    ap.add_argument("--judges", type=int, default=60)
+    ap.add_argument("--fill", type=float, default=0.9, help="Part des notes saisies")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="gala_scoring_")) / "gala.db"
+    summary = seed_database(
+        db_path, participants_per_category=args.participants, judges=args.judges, fill_ratio=args.fill
+    )
+    gala_id = summary.gala_ids[0]
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+
+    official = _sql_path(AGGREGATE_SQL)(conn, gala_id)
+    matrix = scoring.load_matrix(conn, gala_id)
+    weighted = scoring.compute_scores(matrix)
+    mismatches = [
+        participant_id
+        for participant_id, score in official.items()
+        if (score is None) != (weighted.get(participant_id) is None)
+        or (score is not None and abs(score - weighted[participant_id]) > 1e-9)
+    ]
+    participant_rows = conn.execute(PARTICIPANTS_SQL, (gala_id,)).fetchall()
+
+    timings = {
+        "sql_aggregat": _timed(lambda: _sql_path(AGGREGATE_SQL)(conn, gala_id), args.repeat),
+        "sql_group_by": _timed(lambda: _sql_path(GROUP_BY_SQL)(conn, gala_id), args.repeat),
+        "matrice": _timed(lambda: scoring.load_matrix(conn, gala_id), args.repeat),
+        "matrice_cache": _timed(lambda: scoring.cached_matrix(conn, gala_id), args.repeat),
+    }
+    for name in scoring.STRATEGIES:
+        timings[name] = _timed(
+            lambda name=name: _rank_by_category(participant_rows, scoring.compute_scores(matrix, name)),
+            args.repeat,
+        )
+    conn.close()
+
+    print(f"Gala {gala_id} : {len(participant_rows)} participants, {len(matrix)} notes, {len(matrix.judge_ids)} juges")
+    print(f"{'chemin':<18} {'médiane ms':>11} {'min ms':>9}")
+    for name, samples in timings.items():
+        print(f"{name:<18} {statistics.median(samples):>11.2f} {min(samples):>9.2f}")
+
+    if mismatches:
+        print(f"❌ moyenne_ponderee diffère de score_aggregate pour {len(mismatches)} participant(s)")
+        return 1
+    print("✅ moyenne_ponderee identique à score_aggregate")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
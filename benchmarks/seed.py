@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Génère une base SQLite réaliste de « soirée de gala » pour les mesures de performance.
+
+Usage:
+    python -m benchmarks.seed --db /tmp/gala_bench.db [--galas 1] [--participants 40] [--judges 40]
+
+Le jeu de données reprend les catégories et questions de ``import_csv`` :
+- 9 catégories ciblées + la catégorie « Narratif (général) » par gala;
+- des compagnies inscrites dans 1 ou 2 catégories (+ leur participant narratif);
+- des juges assignés à quelques catégories, avec une partie des notes déjà saisies.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from werkzeug.security import generate_password_hash
+
+from import_csv import CATEGORY_QUESTIONS, GENERAL_CATEGORY_NAME, GENERAL_QUESTIONS, TARGET_CATEGORIES
+from models.init_db import SCHEMA_SQL, apply_migrations
+
+BENCH_PASSWORD = "motdepasse123"
+
+
+@dataclass
+class SeedSummary:
+    db_path: Path
+    admin_username: str
+    admin_user_id: int
+    judge_usernames: List[str] = field(default_factory=list)
+    judge_user_ids: List[int] = field(default_factory=list)
+    gala_ids: List[int] = field(default_factory=list)
+    # gala_id -> liste des gala_categorie_id (hors narratif)
+    categories_by_gala: Dict[int, List[int]] = field(default_factory=dict)
+    # juge user_id -> liste des gala_categorie_id assignés
+    assignments: Dict[int, List[int]] = field(default_factory=dict)
+    # gala_categorie_id -> liste des participant_id
+    participants_by_category: Dict[int, List[int]] = field(default_factory=dict)
+    # gala_categorie_id -> liste des question_id
+    questions_by_category: Dict[int, List[int]] = field(default_factory=dict)
+    notes: int = 0
+
+
+def _create_user(conn: sqlite3.Connection, prenom: str, nom: str, username: str, role_id: int, password_hash: str) -> int:
+    personne_id = conn.execute(
+        "INSERT INTO personne (prenom, nom, courriel) VALUES (?, ?, ?)",
+        (prenom, nom, f"{username}@example.com"),
+    ).lastrowid
+    return conn.execute(
+        "INSERT INTO user (personne_id, username, password_hash, role_id) VALUES (?, ?, ?, ?)",
+        (personne_id, username, password_hash, role_id),
+    ).lastrowid
+
+
+def seed_database(
+    db_path: Path,
+    galas: int = 1,
+    participants_per_category: int = 40,
+    judges: int = 40,
+    categories_per_judge: int = 3,
+    fill_ratio: float = 0.6,
+    seed: Optional[int] = 42,
+) -> SeedSummary:
+    """Crée (ou écrase) ``db_path`` et le remplit. Retourne les identifiants utiles."""
+    db_path = Path(db_path)
+    for suffix in ("", "-wal", "-shm"):
+        candidate = Path(f"{db_path}{suffix}")
+        if candidate.exists():
+            candidate.unlink()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    # Un seul hachage pour tous les comptes : le coût de werkzeug dominerait sinon.
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.executescript(SCHEMA_SQL)
+    conn.execute("PRAGMA synchronous = OFF;")
+
+    roles = {}
+    for name in ("admin", "juge", "membre"):
+        roles[name] = conn.execute(
+            "INSERT INTO role (nom, description) VALUES (?, ?)",
+            (name, name.capitalize()),
+        ).lastrowid
+
+    admin_username = "bench_admin"
+    admin_user_id = _create_user(conn, "Admin", "Bench", admin_username, roles["admin"], password_hash)
+    summary = SeedSummary(db_path=db_path, admin_username=admin_username, admin_user_id=admin_user_id)
+
+    judge_ids: List[int] = []
+    for index in range(judges):
+        username = f"bench_juge_{index:03d}"
+        user_id = _create_user(conn, f"Juge{index}", "Bench", username, roles["juge"], password_hash)
+        judge_ids.append(conn.execute("INSERT INTO juge (user_id) VALUES (?)", (user_id,)).lastrowid)
+        summary.judge_usernames.append(username)
+        summary.judge_user_ids.append(user_id)
+
+    categorie_ids = {
+        name: conn.execute("INSERT INTO categorie (nom, description) VALUES (?, '')", (name,)).lastrowid
+        for name in [*TARGET_CATEGORIES, GENERAL_CATEGORY_NAME]
+    }
+
+    for gala_index in range(galas):
+        gala_id = conn.execute(
+            "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+            (f"Gala Bench {gala_index + 1}", 2025 - gala_index, "Portneuf", "2025-11-15"),
+        ).lastrowid
+        summary.gala_ids.append(gala_id)
+
+        gc_ids: Dict[str, int] = {}
+        for ordre, name in enumerate([GENERAL_CATEGORY_NAME, *TARGET_CATEGORIES]):
+            gc_ids[name] = conn.execute(
+                "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+                (gala_id, categorie_ids[name], ordre),
+            ).lastrowid
+            texts = GENERAL_QUESTIONS if name == GENERAL_CATEGORY_NAME else CATEGORY_QUESTIONS.get(name, [])
+            summary.questions_by_category[gc_ids[name]] = [
+                conn.execute(
+                    "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+                    (gc_ids[name], texte, rng.choice([1.0, 1.0, 1.5, 2.0])),
+                ).lastrowid
+                for texte in texts
+            ]
+
+        target_gc_ids = [gc_ids[name] for name in TARGET_CATEGORIES]
+        narratif_gc_id = gc_ids[GENERAL_CATEGORY_NAME]
+        summary.categories_by_gala[gala_id] = target_gc_ids
+
+        # Compagnies : chaque catégorie reçoit ``participants_per_category`` candidatures,
+        # une compagnie sur trois postule dans une deuxième catégorie.
+        responses: List[tuple] = []
+        slots = [gc_id for gc_id in target_gc_ids for _ in range(participants_per_category)]
+        rng.shuffle(slots)
+        company_index = 0
+        while slots:
+            company_index += 1
+            compagnie_id = conn.execute(
+                "INSERT INTO compagnie (nom, secteur, ville, courriel, responsable_nom) VALUES (?, ?, ?, ?, ?)",
+                (
+                    f"Entreprise {gala_index + 1}-{company_index:04d}",
+                    rng.choice(["Services", "Manufacture", "Commerce", "Tourisme", "Agroalimentaire"]),
+                    rng.choice(["Donnacona", "Pont-Rouge", "Saint-Raymond", "Portneuf", "Cap-Santé"]),
+                    f"contact{company_index}@example.com",
+                    f"Responsable {company_index}",
+                ),
+            ).lastrowid
+            chosen = [slots.pop()]
+            if slots and company_index % 3 == 0 and slots[-1] != chosen[0]:
+                chosen.append(slots.pop())
+            for gc_id in [narratif_gc_id, *chosen]:
+                participant_id = conn.execute(
+                    "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+                    (compagnie_id, gc_id),
+                ).lastrowid
+                summary.participants_by_category.setdefault(gc_id, []).append(participant_id)
+                for question_id in summary.questions_by_category[gc_id]:
+                    responses.append(
+                        (participant_id, question_id, f"Réponse {participant_id}-{question_id} " + "lorem ipsum " * 40)
+                    )
+        conn.executemany(
+            "INSERT INTO reponse_participant (participant_id, question_id, contenu) VALUES (?, ?, ?)",
+            responses,
+        )
+
+        notes: List[tuple] = []
+        assignments: List[tuple] = []
+        # Le gala courant mobilise tous les juges; les éditions archivées, une moitié.
+        panel = list(zip(judge_ids, summary.judge_user_ids))
+        if gala_index > 0:
+            panel = rng.sample(panel, max(1, len(panel) // 2))
+        for juge_id, user_id in panel:
+            assigned = rng.sample(target_gc_ids, min(categories_per_judge, len(target_gc_ids)))
+            summary.assignments.setdefault(user_id, []).extend(assigned)
+            for gc_id in assigned:
+                assignments.append((juge_id, gc_id))
+                for participant_id in summary.participants_by_category.get(gc_id, []):
+                    for question_id in summary.questions_by_category[gc_id]:
+                        if rng.random() < fill_ratio:
+                            notes.append((juge_id, participant_id, question_id, rng.randint(1, 6)))
+        conn.executemany(
+            "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+            assignments,
+        )
+        conn.executemany(
+            "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+            notes,
+        )
+        summary.notes += len(notes)
+
+    conn.commit()
+    apply_migrations(conn)
+    conn.close()
+    return summary
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Génère une base de test « soirée de gala ».")
+    ap.add_argument("--db", required=True, type=Path)
+    ap.add_argument("--galas", type=int, default=1)
+    ap.add_argument("--participants", type=int, default=40, help="Participants par catégorie")
+    ap.add_argument("--judges", type=int, default=40)
+    ap.add_argument("--categories-per-judge", type=int, default=3)
+    ap.add_argument("--fill", type=float, default=0.6, help="Proportion de notes déjà saisies")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    summary = seed_database(
+        args.db,
+        galas=args.galas,
+        participants_per_category=args.participants,
+        judges=args.judges,
+        categories_per_judge=args.categories_per_judge,
+        fill_ratio=args.fill,
+        seed=args.seed,
+    )
+    participants = sum(len(ids) for ids in summary.participants_by_category.values())
+    print(
+        f"✅ Base générée : {summary.db_path} — galas:{len(summary.gala_ids)} "
+        f"juges:{len(summary.judge_user_ids)} participants:{participants} notes:{summary.notes}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Empreinte mémoire d'un gala chargé : dictionnaires imbriqués contre ``GalaSnapshot``.
+
+Chemins mesurés sur un gala généré (``benchmarks.seed``) :
+    dict_of_dict      lignes converties en dictionnaires (participant -> compagnie,
+                      juge -> affectations, coups de cœur), comme le faisait
+                      ``/admin/api/results`` avant ``models.gala_snapshot`` ;
+    snapshot          ``build_snapshot`` : enregistrements ``__slots__``, compagnies
+                      partagées, colonnes de scores ``array``.
+
+Pour chacun : mémoire retenue par le résultat (``tracemalloc``), pic pendant la
+construction et durée médiane de construction. ``--galas`` charge plusieurs galas
+pour voir ce que coûte le cache de ``MAX_CACHED_SNAPSHOTS`` instantanés.
+
+Usage:
+    python -m benchmarks.snapshot_memory [--participants 80] [--judges 60] [--galas 1]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.seed import seed_database
+from models import db as db_module
+from models import gala_snapshot, gala_structure
+from models.data_version import gala_version
+
+
+def _dict_of_dict(conn: sqlite3.Connection, gala_id: int) -> Dict[str, Any]:
+    participants: Dict[int, Dict[str, Any]] = {}
+    for row in conn.execute(gala_snapshot.PARTICIPANTS_SQL, (gala_id,)):
+        participants[row["id"]] = {
+            "id": row["id"],
+            "gala_categorie_id": row["gala_categorie_id"],
+            "compagnie": {
+                "id": row["compagnie_id"],
+                "nom": row["nom"],
+                "ville": row["ville"],
+                "secteur": row["secteur"],
+                "responsable_nom": row["responsable_nom"],
+            },
+            "weighted_sum": row["weighted_sum"],
+            "answered_weight": row["answered_weight"],
+            "notes_recorded": row["notes_recorded"],
+            "judges_answered": row["judges_answered"],
+        }
+    judges: Dict[int, Dict[str, Any]] = {}
+    for row in conn.execute(gala_snapshot.JUDGES_SQL, (gala_id,)):
+        judge = judges.setdefault(
+            row["juge_id"],
+            {"id": row["juge_id"], "prenom": row["prenom"], "nom": row["nom"], "categories": {}, "answered_notes": 0},
+        )
+        judge["categories"][row["gala_categorie_id"]] = {"expected_notes": row["expected_notes"]}
+        judge["answered_notes"] += row["recorded_notes"]
+    favorites: Dict[int, List[Dict[str, Any]]] = {}
+    for row in conn.execute(gala_snapshot.FAVORITES_SQL, (gala_id,)):
+        favorites.setdefault(row["participant_id"], []).append(
+            {"juge_id": row["juge_id"], "nom": f"{row['prenom']} {row['nom']}"}
+        )
+    structure = gala_structure.gala_structure(conn, gala_id)
+    return {"structure": structure, "participants": participants, "judges": judges, "favorites": favorites}
+
+
+def _build_snapshot(conn: sqlite3.Connection, gala_id: int) -> Optional[gala_snapshot.GalaSnapshot]:
+    return gala_snapshot.build_snapshot(conn, gala_id, gala_version(conn, gala_id))
+
+
+def _measure(build: Callable[[], object]) -> Tuple[object, int, int]:
+    """(résultat, octets retenus, pic en octets) ; caches vidés pour compter la structure."""
+    gala_structure.invalidate()
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = build()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained - baseline, peak - baseline
+
+
+def _timed(func: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        gala_structure.invalidate()
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Mémoire d'un gala chargé : dictionnaires contre instantané.")
+    ap.add_argument("--db", type=Path, help="Base générée (par défaut : fichier temporaire)")
+    ap.add_argument("--galas", type=int, default=1)
+    ap.add_argument("--participants", type=int, default=80, help="Participants par catégorie")
+    ap.add_argument("--judges", type=int, default=60)
+    ap.add_argument("--fill", type=float, default=0.9, help="Part des notes saisies")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="gala_snapshot_")) / "gala.db"
+    summary = seed_database(
+        db_path,
+        galas=args.galas,
+        participants_per_category=args.participants,
+        judges=args.judges,
+        fill_ratio=args.fill,
+    )
+    db_module.DB_PATH = db_path
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    gala_ids = summary.gala_ids
+
+    paths = {
+        "dict_of_dict": lambda: [_dict_of_dict(conn, gala_id) for gala_id in gala_ids],
+        "snapshot": lambda: [_build_snapshot(conn, gala_id) for gala_id in gala_ids],
+    }
+    results = {}
+    for name, build in paths.items():
+        built, retained, peak = _measure(build)
+        results[name] = (built, retained, peak, _timed(build, args.repeat))
+
+    snapshots = results["snapshot"][0]
+    participants = sum(len(snap.participants) for snap in snapshots)
+    companies = sum(len({p.company.id for p in snap.participants}) for snap in snapshots)
+    judges = sum(len(snap.judges) for snap in snapshots)
+    conn.close()
+
+    print(f"{len(gala_ids)} gala(s) : {participants} participants, {companies} compagnies, {judges} juges")
+    print(f"{'chemin':<14} {'retenu Ko':>10} {'pic Ko':>9} {'médiane ms':>11} {'min ms':>9}")
+    for name, (_, retained, peak, samples) in results.items():
+        print(
+            f"{name:<14} {retained / 1024:>10.1f} {peak / 1024:>9.1f}"
+            f" {statistics.median(samples):>11.2f} {min(samples):>9.2f}"
+        )
+    ratio = results["snapshot"][1] / results["dict_of_dict"][1] if results["dict_of_dict"][1] else 0.0
+    print(f"Instantané : {ratio:.0%} de la mémoire des dictionnaires")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
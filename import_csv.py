@@ -4,7 +4,7 @@ Importe un CSV de candidatures dans la base SQLite (schéma Gala CCEP).
 
 Usage:
     python import_csv.py --csv donnees.csv --gala "Soirée Distinction" --annee 2025 \
-        --lieu "Portneuf" --date "2025-11-15" [--db data/gala.db]
+        --lieu "Portneuf" --date "2025-11-15" [--db data/gala.db] [--chunk-size 500] [--restart]
 
 Fonctions clés :
 - Crée la base si absente via init_db.py (si exposé).
@@ -12,6 +12,13 @@ Fonctions clés :
 - Crée/MAJ les compagnies et crée 1 participant par catégorie choisie.
 - Insère les réponses aux questions par catégorie **et** aux 2 questions « générales ».
 - Tolère des variantes d'orthographe (accents/typos) pour les catégories.
+- Import massif : colonnes résolues une fois par fichier, caches en mémoire,
+  écritures groupées (executemany + ON CONFLICT) en WAL sans fsync pendant le chargement.
+- Lecture en flux : les lignes sont résolues au fil de la lecture et écrites par lots
+  de ``--chunk-size`` lignes, un commit par lot (débit affiché en lignes/s).
+- Reprise : la table ``import_checkpoint`` garde, pour l'empreinte SHA-256 du fichier
+  et le gala, le nombre de lignes validées ; relancer la même commande après un échec
+  reprend après le dernier lot (``--restart`` pour tout relire).
 
 Notes :
 - Les catégories de participation peuvent venir d'un champ JSON unique (liste) OU
@@ -25,13 +32,19 @@ Notes :
 from __future__ import annotations
 import argparse
 import csv
+import hashlib
+import itertools
 import json
 import re
 import sqlite3
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import unicodedata
 
+from models.init_db import IMPORT_CHECKPOINT_SQL
+
 # =========================================
 #  DB bootstrap
 # =========================================
@@ -236,77 +249,85 @@ def ensure_question(conn: sqlite3.Connection, gala_categorie_id: int, texte: str
     )
     return cur.lastrowid
 
-def ensure_compagnie(conn: sqlite3.Connection, data: Dict[str, str]) -> int:
+def ensure_structure(conn: sqlite3.Connection, gala_id: int) -> Tuple[Dict[str, int], int]:
+    """Catégories ciblées et « Narratif (général) » avec leurs questions ; retourne (catégorie → gc_id, gc général)."""
+    cat_name_to_gc_id: Dict[str, int] = {}
+    for cat_name in TARGET_CATEGORIES:
+        cat_id = ensure_categorie(conn, cat_name)
+        gc_id = ensure_gala_categorie(conn, gala_id, cat_id)
+        cat_name_to_gc_id[cat_name] = gc_id
+        for qtxt in CATEGORY_QUESTIONS.get(cat_name, []):
+            ensure_question(conn, gc_id, qtxt)
+
+    cat_gen_id = ensure_categorie(conn, GENERAL_CATEGORY_NAME)
+    gc_gen_id = ensure_gala_categorie(conn, gala_id, cat_gen_id)
+    for qtxt in GENERAL_QUESTIONS:
+        ensure_question(conn, gc_gen_id, qtxt)
+    return cat_name_to_gc_id, gc_gen_id
+
+class GalaLockedError(RuntimeError):
+    pass
+
+def begin_unlocked(conn: sqlite3.Connection, gala_id: int) -> None:
+    """Ouvre une transaction d'écriture (BEGIN IMMEDIATE) et refuse un gala verrouillé.
+
+    Le verrou est lu après la prise du verrou d'écriture SQLite : il ne peut pas
+    être posé entre la vérification et les écritures du lot.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    if conn.execute("SELECT 1 FROM gala_lock WHERE gala_id=?", (gala_id,)).fetchone():
+        raise GalaLockedError(f"Gala {gala_id} verrouillé : import refusé.")
+
+COMPAGNIE_FIELDS = ["nom", "secteur", "nombre_employes", "adresse", "telephone", "courriel", "responsable_nom", "neq"]
+
+# UNIQUE(participant_id, question_id) : la dernière réponse lue l'emporte
+UPSERT_REPONSE_SQL = """
+INSERT INTO reponse_participant(participant_id, question_id, contenu) VALUES(?,?,?)
+ON CONFLICT(participant_id, question_id) DO UPDATE SET contenu = excluded.contenu
+"""
+
+def compagnie_key(data: Dict[str, str]) -> Tuple[str, str]:
     # clé d'unicité pragmatique: nom + courriel (ajuste si besoin)
-    cur = conn.execute(
-        "SELECT id FROM compagnie WHERE nom=? AND COALESCE(courriel,'')=COALESCE(?, '')",
-        (data.get("nom"), data.get("courriel")),
-    )
-    row = cur.fetchone()
-    if row:
-        # Mise à jour légère
-        conn.execute(
-            "UPDATE compagnie SET secteur=?, nombre_employes=?, adresse=?, telephone=?, responsable_nom=?, neq=? WHERE id=?",
-            (
-                data.get("secteur"),
-                data.get("nombre_employes"),
-                data.get("adresse"),
-                data.get("telephone"),
-                data.get("responsable_nom"),
-                data.get("neq"),
-                row[0],
-            ),
-        )
-        return row[0]
-    cur = conn.execute(
-        """
-        INSERT INTO compagnie(nom, secteur, nombre_employes, adresse, telephone, courriel, responsable_nom, neq)
-        VALUES(?,?,?,?,?,?,?,?)
-        """,
-        (
-            data.get("nom"),
-            data.get("secteur"),
-            data.get("nombre_employes"),
-            data.get("adresse"),
-            data.get("telephone"),
-            data.get("courriel"),
-            data.get("responsable_nom"),
-            data.get("neq"),
-        ),
-    )
-    return cur.lastrowid
+    return (data.get("nom") or "", data.get("courriel") or "")
 
-def ensure_participant(conn: sqlite3.Connection, compagnie_id: int, gala_categorie_id: int) -> int:
-    cur = conn.execute(
-        "SELECT id FROM participant WHERE compagnie_id=? AND gala_categorie_id=?",
-        (compagnie_id, gala_categorie_id),
-    )
-    row = cur.fetchone()
-    if row:
-        return row[0]
-    cur = conn.execute(
-        "INSERT INTO participant(compagnie_id, gala_categorie_id) VALUES(?,?)",
-        (compagnie_id, gala_categorie_id),
-    )
-    return cur.lastrowid
+# =========================================
+#  Caches en mémoire (chargés une fois par import)
+# =========================================
 
-def upsert_reponse(conn: sqlite3.Connection, participant_id: int, question_id: int, contenu: str) -> None:
-    # UNIQUE(participant_id, question_id)
-    cur = conn.execute(
-        "SELECT id FROM reponse_participant WHERE participant_id=? AND question_id=?",
-        (participant_id, question_id),
-    )
-    row = cur.fetchone()
-    if row:
-        conn.execute(
-            "UPDATE reponse_participant SET contenu=? WHERE id=?",
-            (contenu, row[0]),
-        )
-    else:
-        conn.execute(
-            "INSERT INTO reponse_participant(participant_id, question_id, contenu) VALUES(?,?,?)",
-            (participant_id, question_id, contenu),
-        )
+def load_compagnies(conn: sqlite3.Connection) -> Dict[Tuple[str, str], int]:
+    cache: Dict[Tuple[str, str], int] = {}
+    for cid, nom, courriel in conn.execute("SELECT id, nom, COALESCE(courriel, '') FROM compagnie ORDER BY id"):
+        cache.setdefault((nom or "", courriel), cid)
+    return cache
+
+def load_participants(conn: sqlite3.Connection, gala_categorie_ids: List[int]) -> Dict[Tuple[int, int], int]:
+    placeholders = ",".join("?" for _ in gala_categorie_ids)
+    cache: Dict[Tuple[int, int], int] = {}
+    for pid, compagnie_id, gc_id in conn.execute(
+        f"SELECT id, compagnie_id, gala_categorie_id FROM participant WHERE gala_categorie_id IN ({placeholders}) ORDER BY id",
+        tuple(gala_categorie_ids),
+    ):
+        cache.setdefault((compagnie_id, gc_id), pid)
+    return cache
+
+def load_questions(conn: sqlite3.Connection, gala_categorie_ids: List[int]) -> Dict[Tuple[int, str], int]:
+    placeholders = ",".join("?" for _ in gala_categorie_ids)
+    cache: Dict[Tuple[int, str], int] = {}
+    for qid, gc_id, texte in conn.execute(
+        f"SELECT id, gala_categorie_id, texte FROM question WHERE gala_categorie_id IN ({placeholders}) ORDER BY id",
+        tuple(gala_categorie_ids),
+    ):
+        cache.setdefault((gc_id, texte), qid)
+    return cache
+
+def apply_bulk_pragmas(conn: sqlite3.Connection) -> None:
+    """Réglages de chargement massif : WAL, sans fsync pendant l'import."""
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -64000;")
+
+CANON_CATEGORY_KEYS = {keyify(t): t for t in TARGET_CATEGORIES}
 
 # =========================================
 #  Lecture CSV & détection des colonnes catégorie
@@ -332,6 +353,20 @@ def detect_category_columns(headers: List[str]) -> Tuple[Optional[str], Optional
             q26 = h
     return (None, q18) if (q18 or q26) else (None, None)
 
+def resolve_question_columns(headers: List[str], questions: List[str]) -> Dict[str, str]:
+    """Associe chaque question à sa colonne CSV, une seule fois par fichier.
+
+    Correspondance stricte ou par préfixe de 60 caractères (entêtes tronquées).
+    """
+    keyed_headers = [(h, keyify(h)) for h in headers]
+    columns: Dict[str, str] = {}
+    for qtxt in questions:
+        prefix = keyify(qtxt)[:60]
+        match_col = next((h for h, hk in keyed_headers if h == qtxt or hk.startswith(prefix)), None)
+        if match_col:
+            columns[qtxt] = match_col
+    return columns
+
 def parse_categories(row: Dict[str, str], col_combined: Optional[str], col_first: Optional[str], headers: List[str]) -> List[str]:
     cats: List[str] = []
     if col_combined and row.get(col_combined):
@@ -354,7 +389,7 @@ def parse_categories(row: Dict[str, str], col_combined: Optional[str], col_first
         cats = [norm(v) for v in vals if norm(v)]
 
     # Normalisation + alias → nom canonique
-    canon_keys = {keyify(t): t for t in TARGET_CATEGORIES}
+    canon_keys = CANON_CATEGORY_KEYS
     resolved: List[str] = []
     for c in cats:
         k = keyify(c)
@@ -378,11 +413,245 @@ def parse_categories(row: Dict[str, str], col_combined: Optional[str], col_first
             result.append(c)
     return result
 
+# =========================================
+#  Points de reprise (table import_checkpoint)
+# =========================================
+
+DEFAULT_CHUNK_SIZE = 500
+
+CHECKPOINT_FIELDS = (
+    "id", "file_hash", "gala_nom", "annee", "gala_id", "file_name", "status", "rows_done",
+    "rows_per_second", "error", "created_at", "updated_at", "finished_at",
+)
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_checkpoint(conn: sqlite3.Connection, checkpoint_id: int) -> Optional[Dict[str, Any]]:
+    row = conn.execute(
+        f"SELECT {', '.join(CHECKPOINT_FIELDS)} FROM import_checkpoint WHERE id=?", (checkpoint_id,)
+    ).fetchone()
+    return dict(zip(CHECKPOINT_FIELDS, row)) if row else None
+
+def open_checkpoint(
+    conn: sqlite3.Connection,
+    file_hash: str,
+    gala_nom: str,
+    annee: int,
+    file_name: Optional[str] = None,
+    status: str = "running",
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """Crée ou reprend le point de reprise d'un fichier pour un gala.
+
+    Un import terminé (« done ») le reste ; ``restart`` repart de la première ligne.
+    """
+    conn.execute(
+        """
+        INSERT INTO import_checkpoint(file_hash, gala_nom, annee, file_name, status)
+        VALUES(:file_hash, :gala_nom, :annee, :file_name, :status)
+        ON CONFLICT(file_hash, gala_nom, annee) DO UPDATE SET
+            file_name = COALESCE(excluded.file_name, import_checkpoint.file_name),
+            rows_done = CASE WHEN :restart THEN 0 ELSE import_checkpoint.rows_done END,
+            status = CASE WHEN import_checkpoint.status = 'done' AND NOT :restart THEN 'done' ELSE excluded.status END,
+            error = NULL,
+            finished_at = CASE WHEN :restart THEN NULL ELSE import_checkpoint.finished_at END,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        {
+            "file_hash": file_hash,
+            "gala_nom": gala_nom,
+            "annee": annee,
+            "file_name": file_name,
+            "status": status,
+            "restart": bool(restart),
+        },
+    )
+    (checkpoint_id,) = conn.execute(
+        "SELECT id FROM import_checkpoint WHERE file_hash=? AND gala_nom=? AND annee=?",
+        (file_hash, gala_nom, annee),
+    ).fetchone()
+    return load_checkpoint(conn, checkpoint_id)
+
+@dataclass
+class ImportReport:
+    checkpoint_id: int
+    gala_id: Optional[int] = None
+    # Lignes validées lors d'imports précédents du même fichier (sautées à la reprise).
+    rows_resumed: int = 0
+    # Lignes CSV traitées par cet appel (y compris celles ignorées faute de nom).
+    rows_read: int = 0
+    chunks: int = 0
+    companies: int = 0
+    new_companies: int = 0
+    participants: int = 0
+    responses: int = 0
+    elapsed: float = 0.0
+    already_done: bool = False
+
+    @property
+    def rows_done(self) -> int:
+        return self.rows_resumed + self.rows_read
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+def print_progress(report: ImportReport) -> None:
+    print(f"   … {report.rows_done} lignes ({report.rows_per_second:.0f} lignes/s)")
+
+# =========================================
+#  Lecture en flux et écriture par lots
+# =========================================
+
+# (clé compagnie, champs compagnie, [(gala_categorie_id, [(question_id, contenu)])], participations)
+PlannedRow = Tuple[Tuple[str, str], Dict[str, str], List[Tuple[int, List[Tuple[int, str]]]], int]
+
+def iter_planned_rows(
+    reader: Iterable[Dict[str, str]],
+    headers: List[str],
+    cat_name_to_gc_id: Dict[str, int],
+    gc_gen_id: int,
+    questions: Dict[Tuple[int, str], int],
+) -> Iterator[Optional[PlannedRow]]:
+    """Une entrée par ligne CSV lue (``None`` si la ligne est ignorée), résolue sans écrire."""
+    col_combined, col_first = detect_category_columns(headers)
+    print(f"➡️  Détection colonnes catégories: combined={col_combined!r}, first={col_first!r}")
+
+    all_questions = list(GENERAL_QUESTIONS)
+    for qtxts in CATEGORY_QUESTIONS.values():
+        all_questions.extend(qtxts)
+    question_columns = resolve_question_columns(headers, all_questions)
+
+    for row in reader:
+        # Compagnie (la dernière ligne lue l'emporte pour les champs)
+        comp_payload: Dict[str, str] = {}
+        for csv_col, db_field in COMPANY_FIELD_MAP.items():
+            if csv_col in row and row[csv_col]:
+                comp_payload[db_field] = norm(row[csv_col])
+        if not comp_payload.get("nom"):
+            yield None  # ignore les lignes sans nom
+            continue
+
+        # Participant « narratif général » (un par compagnie/gala) + 2 réponses générales
+        planned: List[Tuple[int, List[Tuple[int, str]]]] = []
+        answers: List[Tuple[int, str]] = []
+        for qtxt in GENERAL_QUESTIONS:
+            match_col = question_columns.get(qtxt)
+            if match_col and row.get(match_col):
+                answers.append((questions[(gc_gen_id, qtxt)], row[match_col]))
+        planned.append((gc_gen_id, answers))
+
+        # Catégories de participation + réponses par question
+        participations = 0
+        for cat in parse_categories(row, col_combined, col_first, headers):
+            gc_id = cat_name_to_gc_id.get(cat)
+            if not gc_id:
+                continue  # hors scope
+            participations += 1
+            answers = []
+            for qtxt in CATEGORY_QUESTIONS.get(cat, []):
+                match_col = question_columns.get(qtxt)
+                if match_col and row.get(match_col) not in (None, ""):
+                    answers.append((questions[(gc_id, qtxt)], row[match_col]))
+            planned.append((gc_id, answers))
+
+        yield compagnie_key(comp_payload), comp_payload, planned, participations
+
+def write_chunk(
+    conn: sqlite3.Connection,
+    chunk: List[Optional[PlannedRow]],
+    compagnies: Dict[Tuple[str, str], int],
+    participants: Dict[Tuple[int, int], int],
+) -> Tuple[List[Tuple[str, str]], int, int]:
+    """Écrit un lot (sans commit) et complète les caches avec les lignes créées.
+
+    Retourne (clés des compagnies du lot, nouvelles compagnies, réponses écrites).
+    """
+    company_payloads: Dict[Tuple[str, str], Dict[str, str]] = {}
+    planned: List[Tuple[Tuple[str, str], int, List[Tuple[int, str]]]] = []
+    for entry in chunk:
+        if entry is None:
+            continue
+        key, comp_payload, row_planned, _ = entry
+        company_payloads[key] = comp_payload
+        planned.extend((key, gc_id, answers) for gc_id, answers in row_planned)
+
+    existing = [(key, data) for key, data in company_payloads.items() if key in compagnies]
+    new = [data for key, data in company_payloads.items() if key not in compagnies]
+    conn.executemany(
+        "UPDATE compagnie SET secteur=?, nombre_employes=?, adresse=?, telephone=?, responsable_nom=?, neq=? WHERE id=?",
+        [
+            (
+                data.get("secteur"),
+                data.get("nombre_employes"),
+                data.get("adresse"),
+                data.get("telephone"),
+                data.get("responsable_nom"),
+                data.get("neq"),
+                compagnies[key],
+            )
+            for key, data in existing
+        ],
+    )
+    if new:
+        # Seules les lignes créées par ce lot sont relues (pas toute la table).
+        (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM compagnie").fetchone()
+        conn.executemany(
+            f"INSERT INTO compagnie({', '.join(COMPAGNIE_FIELDS)}) VALUES({','.join('?' for _ in COMPAGNIE_FIELDS)})",
+            [tuple(data.get(field) for field in COMPAGNIE_FIELDS) for data in new],
+        )
+        for cid, nom, courriel in conn.execute(
+            "SELECT id, nom, COALESCE(courriel, '') FROM compagnie WHERE id > ? ORDER BY id", (last_id,)
+        ):
+            compagnies.setdefault((nom or "", courriel), cid)
+
+    missing: Dict[Tuple[int, int], None] = {}
+    for key, gc_id, _ in planned:
+        participant_key = (compagnies[key], gc_id)
+        if participant_key not in participants:
+            missing[participant_key] = None
+    if missing:
+        (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM participant").fetchone()
+        conn.executemany("INSERT INTO participant(compagnie_id, gala_categorie_id) VALUES(?,?)", list(missing))
+        for pid, compagnie_id, gc_id in conn.execute(
+            "SELECT id, compagnie_id, gala_categorie_id FROM participant WHERE id > ? ORDER BY id", (last_id,)
+        ):
+            participants.setdefault((compagnie_id, gc_id), pid)
+
+    reponses = [
+        (participants[(compagnies[key], gc_id)], qid, contenu)
+        for key, gc_id, answers in planned
+        for qid, contenu in answers
+    ]
+    conn.executemany(UPSERT_REPONSE_SQL, reponses)
+    return list(company_payloads), len(new), len(reponses)
+
 # =========================================
 #  Import principal
 # =========================================
 
-def import_csv(db_path: Path, csv_path: Path, gala_nom: str, annee: int, lieu: Optional[str], date_gala: Optional[str]) -> None:
+def import_csv(
+    db_path: Path,
+    csv_path: Path,
+    gala_nom: str,
+    annee: int,
+    lieu: Optional[str],
+    date_gala: Optional[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    restart: bool = False,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+    file_name: Optional[str] = None,
+) -> ImportReport:
+    """Importe ``csv_path`` par lots de ``chunk_size`` lignes, un commit par lot.
+
+    Un fichier déjà partiellement importé pour ce gala (même empreinte) reprend après
+    le dernier lot validé ; ``progress`` est appelé après chaque lot.
+    """
     if not db_path.exists():
         if init_database:
             print("🛠️  DB absente → création via init_db.init_database() …")
@@ -391,105 +660,125 @@ def import_csv(db_path: Path, csv_path: Path, gala_nom: str, annee: int, lieu: O
             db_path.parent.mkdir(parents=True, exist_ok=True)
             raise FileNotFoundError(f"Base inexistante et init_db.py introuvable. Crée d'abord {db_path}.")
 
+    chunk_size = max(1, int(chunk_size))
+    file_hash = file_sha256(csv_path)
     conn = sqlite3.connect(str(db_path))
     conn.execute("PRAGMA foreign_keys = ON;")
+    apply_bulk_pragmas(conn)
 
     try:
+        conn.executescript(IMPORT_CHECKPOINT_SQL)
         gala_id = ensure_gala(conn, gala_nom, annee, lieu, date_gala)
 
-        # 1) Préparer catégories & questions spécifiques (idempotent)
-        cat_name_to_gc_id: Dict[str, int] = {}
-        for cat_name in TARGET_CATEGORIES:
-            cat_id = ensure_categorie(conn, cat_name)
-            gc_id = ensure_gala_categorie(conn, gala_id, cat_id)
-            cat_name_to_gc_id[cat_name] = gc_id
-            for qtxt in CATEGORY_QUESTIONS.get(cat_name, []):
-                ensure_question(conn, gc_id, qtxt)
-
-        # 2) Catégorie « Narratif (général) » (toujours créée)
-        cat_gen_id = ensure_categorie(conn, GENERAL_CATEGORY_NAME)
-        gc_gen_id = ensure_gala_categorie(conn, gala_id, cat_gen_id)
-        for qtxt in GENERAL_QUESTIONS:
-            ensure_question(conn, gc_gen_id, qtxt)
-
+        # 1) Point de reprise, validé avant toute écriture dans le gala
+        checkpoint = open_checkpoint(
+            conn, file_hash, gala_nom, annee, file_name=file_name or csv_path.name, restart=restart
+        )
+        conn.execute("UPDATE import_checkpoint SET gala_id=? WHERE id=?", (gala_id, checkpoint["id"]))
         conn.commit()
 
-        # 3) Charger CSV & importer lignes
-        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            headers = reader.fieldnames or []
-            if not headers:
-                raise RuntimeError("CSV sans en-têtes détectés.")
-
-            col_combined, col_first = detect_category_columns(headers)
-            print(f"➡️  Détection colonnes catégories: combined={col_combined!r}, first={col_first!r}")
-
-            inserted_participants = 0
-            inserted_compagnies = 0
-            inserted_reponses = 0
-
-            for row in reader:
-                # 3.1 Compagnie
-                comp_payload: Dict[str, str] = {}
-                for csv_col, db_field in COMPANY_FIELD_MAP.items():
-                    if csv_col in row and row[csv_col]:
-                        comp_payload[db_field] = norm(row[csv_col])
-                if not comp_payload.get("nom"):
-                    continue  # ignore les lignes sans nom
-                compagnie_id = ensure_compagnie(conn, comp_payload)
-                if compagnie_id:
-                    inserted_compagnies += 1
-
-                # 3.2 Participant « narratif général » (un par compagnie/gala)
-                p_general_id = ensure_participant(conn, compagnie_id, gc_gen_id)
-                # Insérer les 2 réponses générales si colonnes présentes (tolérance entêtes tronquées → préfixes)
-                for qtxt in GENERAL_QUESTIONS:
-                    # correspondance stricte ou par préfixe 60 car.
-                    match_col = next((h for h in headers if h == qtxt or keyify(h).startswith(keyify(qtxt)[:60])), None)
-                    if match_col and row.get(match_col):
-                        cur = conn.execute(
-                            "SELECT id FROM question WHERE gala_categorie_id=? AND texte=?",
-                            (gc_gen_id, qtxt),
-                        )
-                        qr = cur.fetchone()
-                        qid = qr[0] if qr else ensure_question(conn, gc_gen_id, qtxt)
-                        upsert_reponse(conn, p_general_id, qid, row[match_col])
-                        inserted_reponses += 1
-
-                # 3.3 Catégories de participation
-                cats = parse_categories(row, col_combined, col_first, headers)
-                if not cats:
-                    continue
-
-                for cat in cats:
-                    gc_id = cat_name_to_gc_id.get(cat)
-                    if not gc_id:
-                        continue  # hors scope
-                    participant_id = ensure_participant(conn, compagnie_id, gc_id)
-                    inserted_participants += 1
-
-                    # 3.4 Réponses par question de la catégorie
-                    for qtxt in CATEGORY_QUESTIONS.get(cat, []):
-                        # match strict ou préfixe (entêtes tronquées)
-                        match_col = next((h for h in headers if h == qtxt or keyify(h).startswith(keyify(qtxt)[:60])), None)
-                        if match_col and row.get(match_col) not in (None, ""):
-                            cur = conn.execute(
-                                "SELECT id FROM question WHERE gala_categorie_id=? AND texte=?",
-                                (gc_id, qtxt),
-                            )
-                            qr = cur.fetchone()
-                            qid = qr[0] if qr else ensure_question(conn, gc_id, qtxt)
-                            upsert_reponse(conn, participant_id, qid, row[match_col])
-                            inserted_reponses += 1
+        report = ImportReport(checkpoint["id"], gala_id=gala_id, rows_resumed=checkpoint["rows_done"])
+        if checkpoint["status"] == "done":
+            report.already_done = True
+            print(f"⏭️  Fichier déjà importé pour ce gala ({report.rows_resumed} lignes) — --restart pour recommencer.")
+            return report
+        if report.rows_resumed:
+            print(f"↪️  Reprise après la ligne {report.rows_resumed}")
 
+        try:
+            # 2) Catégories & questions (idempotent), refusées si le gala est verrouillé
+            begin_unlocked(conn, gala_id)
+            cat_name_to_gc_id, gc_gen_id = ensure_structure(conn, gala_id)
             conn.commit()
-            print(
-                f"✅ Import terminé — compagnies:{inserted_compagnies} participants:{inserted_participants} réponses:{inserted_reponses}"
+            _import_rows(conn, csv_path, report, chunk_size, progress, cat_name_to_gc_id, gc_gen_id)
+        except Exception as exc:
+            conn.rollback()
+            conn.execute(
+                "UPDATE import_checkpoint SET status='failed', error=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (str(exc) or type(exc).__name__, report.checkpoint_id),
             )
+            conn.commit()
+            raise
+
+        print(
+            f"✅ Import terminé — compagnies:{report.companies} (nouvelles:{report.new_companies}) "
+            f"participants:{report.participants} réponses:{report.responses} "
+            f"en {report.elapsed:.2f}s ({report.rows_per_second:.0f} lignes/s)"
+        )
+        return report
 
     finally:
+        conn.execute("PRAGMA synchronous = NORMAL;")
         conn.close()
 
+def _import_rows(
+    conn: sqlite3.Connection,
+    csv_path: Path,
+    report: ImportReport,
+    chunk_size: int,
+    progress: Optional[Callable[[ImportReport], None]],
+    cat_name_to_gc_id: Dict[str, int],
+    gc_gen_id: int,
+) -> None:
+    started = time.perf_counter()
+
+    # Caches : questions, compagnies et participants existants (complétés lot après lot)
+    gc_ids = [gc_gen_id, *cat_name_to_gc_id.values()]
+    questions = load_questions(conn, gc_ids)
+    compagnies = load_compagnies(conn)
+    participants = load_participants(conn, gc_ids)
+    seen_companies: Set[Tuple[str, str]] = set()
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        headers = reader.fieldnames or []
+        if not headers:
+            raise RuntimeError("CSV sans en-têtes détectés.")
+
+        # Lignes déjà validées : lues par le parseur CSV (champs multilignes) mais pas traitées.
+        for _ in itertools.islice(reader, report.rows_resumed):
+            pass
+
+        rows = iter_planned_rows(reader, headers, cat_name_to_gc_id, gc_gen_id, questions)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            # Le verrou peut être posé pendant l'import : revérifié à chaque lot.
+            begin_unlocked(conn, report.gala_id)
+            keys, new_companies, responses = write_chunk(conn, chunk, compagnies, participants)
+            seen_companies.update(keys)
+            report.rows_read += len(chunk)
+            report.chunks += 1
+            report.companies = len(seen_companies)
+            report.new_companies += new_companies
+            report.participants += sum(entry[3] for entry in chunk if entry is not None)
+            report.responses += responses
+            report.elapsed = time.perf_counter() - started
+            # Le point de reprise avance dans la même transaction que le lot.
+            conn.execute(
+                """
+                UPDATE import_checkpoint
+                SET status='running', rows_done=?, rows_per_second=?, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+                """,
+                (report.rows_done, round(report.rows_per_second, 1), report.checkpoint_id),
+            )
+            conn.commit()
+            if progress:
+                progress(report)
+
+    report.elapsed = time.perf_counter() - started
+    conn.execute(
+        """
+        UPDATE import_checkpoint
+        SET status='done', rows_done=?, rows_per_second=?, updated_at=CURRENT_TIMESTAMP, finished_at=CURRENT_TIMESTAMP
+        WHERE id=?
+        """,
+        (report.rows_done, round(report.rows_per_second, 1), report.checkpoint_id),
+    )
+    conn.commit()
+
 # =========================================
 #  CLI
 # =========================================
@@ -502,13 +791,18 @@ def main() -> None:
     ap.add_argument("--annee", type=int, required=True)
     ap.add_argument("--lieu")
     ap.add_argument("--date")
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par transaction")
+    ap.add_argument("--restart", action="store_true", help="Ignore le point de reprise et relit tout le fichier")
     args = ap.parse_args()
 
     # Crée le dossier du DB si besoin
     if args.db and args.db.parent:
         args.db.parent.mkdir(parents=True, exist_ok=True)
 
-    import_csv(args.db, args.csv, args.gala, args.annee, args.lieu, args.date)
+    import_csv(
+        args.db, args.csv, args.gala, args.annee, args.lieu, args.date,
+        chunk_size=args.chunk_size, restart=args.restart, progress=print_progress,
+    )
 
 if __name__ == "__main__":
     main()
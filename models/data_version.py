@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Requêtes conditionnelles (ETag / If-None-Match) basées sur la table ``data_version``.
+
+Les triggers de ``models.init_db.DATA_VERSION_SQL`` incrémentent un compteur par
+gala à chaque écriture (notes, coups de cœur, soumissions, verrous, questions,
+participants...). Une route de lecture lit ce compteur (une requête sur clé
+primaire), en dérive un ETag et répond ``304 Not Modified`` sans recalculer sa
+charge utile quand le client possède déjà la version courante.
+
+Le compteur est lu *avant* les données : une écriture concurrente produit au pire
+un ETag plus ancien que le contenu, donc un rechargement de trop, jamais un 304 périmé.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from typing import Any, Iterable, Optional
+
+from flask import Response, request
+
+from models.init_db import DATA_VERSION_ALL, DATA_VERSION_SHARED, data_version_bump_sql
+
+
+def _versions(conn: sqlite3.Connection, *scopes: int) -> tuple:
+    placeholders = ",".join("?" for _ in scopes)
+    rows = conn.execute(
+        f"SELECT scope, version FROM data_version WHERE scope IN ({placeholders})",
+        scopes,
+    ).fetchall()
+    found = {row[0]: row[1] for row in rows}
+    return tuple(found.get(scope, 0) for scope in scopes)
+
+
+def gala_version(conn: sqlite3.Connection, gala_id: int) -> str:
+    """Version des données d'un gala (y compris les données partagées qu'il affiche)."""
+    gala, shared = _versions(conn, gala_id, DATA_VERSION_SHARED)
+    return f"g{gala_id}:{gala}.{shared}"
+
+
+def structure_version(conn: sqlite3.Connection, gala_id: int) -> str:
+    """Version de la structure d'un gala (catégories, questions, participants, verrou)."""
+    rows = conn.execute(
+        "SELECT scope, version FROM structure_version WHERE scope IN (?, ?)",
+        (gala_id, DATA_VERSION_SHARED),
+    ).fetchall()
+    found = {row[0]: row[1] for row in rows}
+    return f"s{gala_id}:{found.get(gala_id, 0)}.{found.get(DATA_VERSION_SHARED, 0)}"
+
+
+# Même valeur que structure_version(), à intégrer dans une requête existante
+# (paramètre : gala_id, deux fois).
+STRUCTURE_VERSION_SQL = f"""(
+    SELECT 's' || ? || ':'
+        || COALESCE(MAX(CASE WHEN scope != {DATA_VERSION_SHARED} THEN version END), 0) || '.'
+        || COALESCE(MAX(CASE WHEN scope = {DATA_VERSION_SHARED} THEN version END), 0)
+    FROM structure_version
+    WHERE scope IN (?, {DATA_VERSION_SHARED})
+)"""
+
+
+def galas_version(conn: sqlite3.Connection, gala_ids: Iterable[int]) -> str:
+    """Versions (données et structure) d'un ensemble de galas, en une requête.
+
+    Pour les routes qui couvrent les galas d'un utilisateur : contrairement à
+    ``global_version()``, une écriture dans un autre gala ne change pas l'ETag.
+    """
+    scopes = sorted(set(gala_ids)) + [DATA_VERSION_SHARED]
+    placeholders = ",".join("?" for _ in scopes)
+    rows = conn.execute(
+        f"""
+        SELECT 'g' AS kind, scope, version FROM data_version WHERE scope IN ({placeholders})
+        UNION ALL
+        SELECT 's' AS kind, scope, version FROM structure_version WHERE scope IN ({placeholders})
+        """,
+        (*scopes, *scopes),
+    ).fetchall()
+    found = {(row[0], row[1]): row[2] for row in rows}
+    return ",".join(
+        f"{scope}:{found.get(('g', scope), 0)}.{found.get(('s', scope), 0)}" for scope in scopes
+    )
+
+
+def global_version(conn: sqlite3.Connection) -> str:
+    """Version de l'ensemble des données (routes qui couvrent plusieurs galas)."""
+    (version,) = _versions(conn, DATA_VERSION_ALL)
+    return f"all:{version}"
+
+
+def global_structure_version(conn: sqlite3.Connection) -> str:
+    """Version de la structure de tous les galas (listes de galas et catégories)."""
+    row = conn.execute(
+        "SELECT version FROM structure_version WHERE scope = ?", (DATA_VERSION_ALL,)
+    ).fetchone()
+    return f"sall:{row[0] if row else 0}"
+
+
+def bump_data_version(conn: sqlite3.Connection, gala_id: Optional[int] = None) -> None:
+    """Incrémente la version d'un gala (tous les galas si ``None``) et la version globale.
+
+    Pour les tables dérivées réécrites hors triggers (reconstruction des scores) :
+    à appeler dans la même transaction, les ETag et les caches indexés sur la
+    version sont alors périmés dans tous les workers.
+    """
+    if gala_id is None:
+        conn.execute(data_version_bump_sql("SELECT id AS gala_id FROM gala"))
+    else:
+        conn.execute(data_version_bump_sql("SELECT ? AS gala_id"), (gala_id,))
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag opaque dérivé de la version et de tout ce qui fait varier la réponse."""
+    key = repr((request.path, sorted(request.args.items(multi=True)), parts))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """Réponse 304 si le client possède déjà ``etag``, sinon ``None``."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    # Le navigateur doit revalider à chaque fois : la réponse dépend de la session.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,11 +1,327 @@
 import sqlite3
+import threading
+import time
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask, current_app, g, has_app_context
 
 DB_PATH = Path("data") / "gala.db"
 
+POOL_EXTENSION_KEY = "gala_db_pool"
 
-def get_db_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+DEFAULT_POOL_CONFIG = {
+    "DB_POOL_SIZE": 8,
+    "DB_POOL_TIMEOUT": 10.0,
+    "DB_BUSY_TIMEOUT_MS": 5000,
+    "DB_MMAP_SIZE": 64 * 1024 * 1024,
+    "DB_CACHE_SIZE_KIB": 16000,
+}
+
+# Creation du pool : les premieres requetes concurrentes (workers gthread) ne doivent
+# pas en construire chacune un, dont les connexions depasseraient DB_POOL_SIZE.
+_create_lock = threading.Lock()
+
+
+class PoolTimeoutError(RuntimeError):
+    """Levee lorsqu'aucune connexion ne se libere dans le delai imparti."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connexion SQLite dont ``close()`` rend la main au pool au lieu de fermer le fichier.
+
+    Les routes appellent ``conn.close()`` en fin de traitement : dans un contexte
+    d'application, on se contente d'annuler une transaction laissee ouverte. La
+    remise au pool se fait dans ``teardown_appcontext``.
+    """
+
+    _pool: Optional["ConnectionPool"] = None
+    # Curseurs instrumentes (models.metrics) ; None = curseur sqlite3 standard.
+    cursor_factory: Optional[type] = None
+
+    def cursor(self, factory: Optional[type] = None) -> sqlite3.Cursor:
+        factory = factory or self.cursor_factory
+        return super().cursor(factory) if factory is not None else super().cursor()
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        # Connection.execute() en C n'appelle pas self.cursor() : on passe par le curseur.
+        if self.cursor_factory is None:
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        if self.cursor_factory is None:
+            return super().executemany(sql, parameters)
+        return self.cursor().executemany(sql, parameters)
+
+    def close(self) -> None:
+        if self._pool is None:
+            super().close()
+            return
+        if self.in_transaction:
+            self.rollback()
+
+    def discard(self) -> None:
+        """Ferme reellement la connexion, meme si elle appartient a un pool."""
+        super().close()
+
+
+def configure_connection(
+    conn: sqlite3.Connection,
+    busy_timeout_ms: int = DEFAULT_POOL_CONFIG["DB_BUSY_TIMEOUT_MS"],
+    mmap_size: int = DEFAULT_POOL_CONFIG["DB_MMAP_SIZE"],
+    cache_size_kib: int = DEFAULT_POOL_CONFIG["DB_CACHE_SIZE_KIB"],
+) -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)};")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)};")
+    # Valeur negative = taille exprimee en KiB plutot qu'en pages.
+    conn.execute(f"PRAGMA cache_size = -{int(cache_size_kib)};")
+    return conn
+
+
+class ConnectionPool:
+    """Pool borne de connexions SQLite longue duree, configurees une seule fois."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_size: int = DEFAULT_POOL_CONFIG["DB_POOL_SIZE"],
+        timeout: float = DEFAULT_POOL_CONFIG["DB_POOL_TIMEOUT"],
+        busy_timeout_ms: int = DEFAULT_POOL_CONFIG["DB_BUSY_TIMEOUT_MS"],
+        mmap_size: int = DEFAULT_POOL_CONFIG["DB_MMAP_SIZE"],
+        cache_size_kib: int = DEFAULT_POOL_CONFIG["DB_CACHE_SIZE_KIB"],
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("La taille du pool doit etre d'au moins 1.")
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+        self._idle: List[PooledConnection] = []
+        self._connect_hooks: List[Callable[[sqlite3.Connection], None]] = []
+        self._opened = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=PooledConnection,
+            check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000,
+        )
+        configure_connection(conn, self.busy_timeout_ms, self.mmap_size, self.cache_size_kib)
+        conn._pool = self
+        for hook in self._connect_hooks:
+            hook(conn)
+        return conn
+
+    def add_connect_hook(self, hook: Callable[[sqlite3.Connection], None]) -> None:
+        """Enregistre un rappel execute sur chaque connexion du pool (instrumentation)."""
+        with self._cond:
+            self._connect_hooks.append(hook)
+            idle = list(self._idle)
+        for conn in idle:
+            hook(conn)
+
+    def acquire(self) -> PooledConnection:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Le pool de connexions est ferme.")
+            if self._idle:
+                self._hits += 1
+                return self._idle.pop()
+            if self._opened < self.max_size:
+                self._opened += 1
+                self._misses += 1
+                open_new = True
+            else:
+                open_new = False
+                self._waits += 1
+                started = time.perf_counter()
+                deadline = started + self.timeout
+                while not self._idle:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or self._closed:
+                        self._timeouts += 1
+                        raise PoolTimeoutError("Aucune connexion disponible dans le pool.")
+                    self._cond.wait(remaining)
+                waited = time.perf_counter() - started
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+                return self._idle.pop()
+
+        if open_new:
+            try:
+                return self._open()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, conn: PooledConnection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._drop(conn)
+            return
+        with self._cond:
+            if self._closed:
+                self._opened -= 1
+                conn.discard()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _drop(self, conn: PooledConnection) -> None:
+        try:
+            conn.discard()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Ouvre d'avance jusqu'a ``count`` connexions (toutes par defaut)."""
+        target = self.max_size if count is None else min(count, self.max_size)
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._opened >= target:
+                    break
+                self._opened += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                raise
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+            opened += 1
+        return opened
+
+    def close_all(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.discard()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "db_path": str(self.db_path),
+                "max_size": self.max_size,
+                "opened": self._opened,
+                "idle": len(self._idle),
+                "in_use": self._opened - len(self._idle),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+
+def init_app(app: Flask) -> None:
+    """Branche le pool sur l'application (idempotent)."""
+    if POOL_EXTENSION_KEY in app.extensions:
+        return
+    for key, value in DEFAULT_POOL_CONFIG.items():
+        app.config.setdefault(key, value)
+    # Le pool est cree paresseusement : DB_PATH peut encore changer (tests, CLI).
+    app.extensions[POOL_EXTENSION_KEY] = None
+    app.teardown_appcontext(_release_request_connection)
+
+
+def get_pool(app: Optional[Flask] = None) -> ConnectionPool:
+    app = app or current_app._get_current_object()
+    if POOL_EXTENSION_KEY not in app.extensions:
+        raise RuntimeError("models.db.init_app() n'a pas ete appele pour cette application.")
+    pool = app.extensions[POOL_EXTENSION_KEY]
+    if pool is not None:
+        return pool
+    with _create_lock:
+        pool = app.extensions[POOL_EXTENSION_KEY]
+        if pool is None:
+            pool = ConnectionPool(
+                DB_PATH,
+                max_size=app.config["DB_POOL_SIZE"],
+                timeout=app.config["DB_POOL_TIMEOUT"],
+                busy_timeout_ms=app.config["DB_BUSY_TIMEOUT_MS"],
+                mmap_size=app.config["DB_MMAP_SIZE"],
+                cache_size_kib=app.config["DB_CACHE_SIZE_KIB"],
+            )
+            app.extensions[POOL_EXTENSION_KEY] = pool
+    return pool
+
+
+def get_pool_stats(app: Optional[Flask] = None) -> Dict[str, Any]:
+    return get_pool(app).stats()
+
+
+def _release_request_connection(exc: Optional[BaseException] = None) -> None:
+    conn = g.pop("_db_conn", None)
+    if conn is None:
+        return
+    pool = conn._pool
+    if pool is None:
+        conn.close()
+    else:
+        pool.release(conn)
+
+
+def open_standalone_connection() -> sqlite3.Connection:
+    """Connexion hors pool, fermee reellement par ``close()``.
+
+    Sert aussi aux reponses en flux (exports) : un telechargement lent ne doit
+    pas immobiliser une connexion du pool pendant toute sa duree.
+    """
+    conn = sqlite3.connect(DB_PATH, factory=PooledConnection)
+    return configure_connection(conn)
+
+
+def release_db_connection() -> None:
+    """Rend des maintenant au pool la connexion de la requete (avant un long calcul sans SQL).
+
+    Un appel suivant a ``get_db_connection()`` en reprend une autre.
+    """
+    if has_app_context():
+        _release_request_connection()
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """Retourne la connexion de la requete courante (pool) ou une connexion autonome.
+
+    Hors contexte Flask (scripts, tests), une connexion classique est ouverte et
+    ``close()`` la ferme reellement.
+    """
+    if not has_app_context() or POOL_EXTENSION_KEY not in current_app.extensions:
+        return open_standalone_connection()
+    conn = g.get("_db_conn")
+    if conn is None:
+        conn = get_pool().acquire()
+        g._db_conn = conn
     return conn
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+Exports en flux des résultats et des notes brutes d'un gala (CSV et XLSX).
+
+Les lignes sont lues par paquets (``fetchmany``) et sérialisées au fil de l'eau :
+la mémoire consommée ne dépend pas du nombre de notes. Le classement est calculé
+pendant la lecture, les participants arrivant déjà triés par catégorie et score.
+
+Le XLSX est écrit à la main (SpreadsheetML minimal, chaînes « inline ») dans une
+archive zip produite en flux : aucune dépendance supplémentaire n'est requise.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import re
+import sqlite3
+import zipfile
+from itertools import groupby
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from models import scoring
+
+FETCH_SIZE = 500
+
+CSV_MIMETYPE = "text/csv"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_FORMATS = ("csv", "xlsx")
+
+RESULTS_HEADER = [
+    "categorie",
+    "rang",
+    "participant_id",
+    "compagnie",
+    "ville",
+    "secteur",
+    "score_base",
+    "bonus",
+    "score_final",
+    "coups_de_coeur",
+    "notes_enregistrees",
+    "juges",
+]
+
+NOTES_HEADER = [
+    "categorie",
+    "juge_id",
+    "juge",
+    "participant_id",
+    "compagnie",
+    "question_id",
+    "question",
+    "ponderation",
+    "valeur",
+    "commentaire",
+]
+
+RESULTS_SQL = """
+    SELECT
+        c.nom AS categorie_nom,
+        gc.id AS gala_categorie_id,
+        p.id AS participant_id,
+        comp.nom AS compagnie_nom,
+        comp.ville AS compagnie_ville,
+        comp.secteur AS compagnie_secteur,
+        sa.weighted_sum / NULLIF(sa.answered_weight, 0) AS score_base,
+        COALESCE(fav.total, 0) AS favorites_count,
+        sa.weighted_sum / NULLIF(sa.answered_weight, 0) + COALESCE(fav.total, 0) * :bonus AS score_final,
+        COALESCE(sa.notes_recorded, 0) AS notes_recorded,
+        COALESCE(sa.judges_answered, 0) AS judges_answered
+    FROM gala_categorie AS gc
+    JOIN categorie AS c ON c.id = gc.categorie_id
+    JOIN participant AS p ON p.gala_categorie_id = gc.id
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    LEFT JOIN score_aggregate AS sa ON sa.participant_id = p.id
+    LEFT JOIN (
+        SELECT participant_id, COUNT(*) AS total
+        FROM coup_de_coeur
+        WHERE gala_id = :gala_id
+        GROUP BY participant_id
+    ) AS fav ON fav.participant_id = p.id
+    WHERE gc.gala_id = :gala_id
+      AND EXISTS (SELECT 1 FROM question AS q WHERE q.gala_categorie_id = gc.id)
+    ORDER BY
+        gc.ordre_affichage,
+        c.nom COLLATE NOCASE,
+        gc.id,
+        score_final IS NULL,
+        score_final DESC,
+        LOWER(comp.nom)
+"""
+
+NOTES_SQL = """
+    SELECT
+        c.nom AS categorie_nom,
+        n.juge_id,
+        per.prenom AS juge_prenom,
+        per.nom AS juge_nom,
+        p.id AS participant_id,
+        comp.nom AS compagnie_nom,
+        q.id AS question_id,
+        q.texte AS question_texte,
+        q.ponderation,
+        n.valeur,
+        n.commentaire
+    FROM gala_categorie AS gc
+    JOIN categorie AS c ON c.id = gc.categorie_id
+    JOIN participant AS p ON p.gala_categorie_id = gc.id
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    JOIN note AS n ON n.participant_id = p.id
+    JOIN question AS q ON q.id = n.question_id
+    JOIN juge AS j ON j.id = n.juge_id
+    JOIN user AS u ON u.id = j.user_id
+    JOIN personne AS per ON per.id = u.personne_id
+    WHERE gc.gala_id = ?
+    ORDER BY gc.ordre_affichage, c.nom COLLATE NOCASE, gc.id, p.id, n.juge_id, q.id
+"""
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def _fetch_in_batches(cursor: sqlite3.Cursor, size: int = FETCH_SIZE) -> Iterator[sqlite3.Row]:
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+# ==============================
+# 🧮 Lignes à exporter
+# ==============================
+def iter_results_rows(
+    conn: sqlite3.Connection,
+    gala_id: int,
+    favorite_bonus: float,
+    strategy: str = scoring.DEFAULT_STRATEGY,
+) -> Iterator[List[Any]]:
+    """Une ligne par participant, classée par catégorie (mêmes règles que /admin/api/results).
+
+    Avec la stratégie par défaut, le tri vient de SQL et les lignes sont écrites au fil
+    de la lecture ; une autre stratégie recalcule les scores et retrie chaque catégorie
+    en mémoire (une catégorie à la fois).
+    """
+    cursor = conn.execute(RESULTS_SQL, {"gala_id": gala_id, "bonus": favorite_bonus})
+    if strategy == scoring.DEFAULT_STRATEGY:
+        category_id = None
+        ranker = scoring.Ranker()
+        for row in _fetch_in_batches(cursor):
+            if row["gala_categorie_id"] != category_id:
+                category_id = row["gala_categorie_id"]
+                ranker = scoring.Ranker()
+            final_score = row["score_final"]
+            yield _results_row(row, ranker(final_score), row["score_base"], final_score, favorite_bonus)
+        return
+
+    # Une ligne par participant (pas par note) : la liste tient en mémoire.
+    rows = cursor.fetchall()
+    scores = scoring.gala_scores(conn, gala_id, strategy)
+    for _, category_rows in groupby(rows, key=lambda row: row["gala_categorie_id"]):
+        entries = []
+        for row in category_rows:
+            base_score = scores.get(row["participant_id"])
+            final_score = base_score + row["favorites_count"] * favorite_bonus if base_score is not None else None
+            entries.append((row, base_score, final_score))
+        for rank, (row, base_score, final_score) in scoring.ranked(
+            entries, score=lambda entry: entry[2], name=lambda entry: entry[0]["compagnie_nom"]
+        ):
+            yield _results_row(row, rank, base_score, final_score, favorite_bonus)
+
+
+def _results_row(
+    row: sqlite3.Row,
+    rank: Optional[int],
+    base_score: Optional[float],
+    final_score: Optional[float],
+    favorite_bonus: float,
+) -> List[Any]:
+    return [
+        row["categorie_nom"],
+        rank,
+        row["participant_id"],
+        row["compagnie_nom"],
+        row["compagnie_ville"],
+        row["compagnie_secteur"],
+        _round(base_score),
+        round(row["favorites_count"] * favorite_bonus, 2),
+        _round(final_score),
+        row["favorites_count"],
+        row["notes_recorded"],
+        row["judges_answered"],
+    ]
+
+
+def iter_notes_rows(conn: sqlite3.Connection, gala_id: int) -> Iterator[List[Any]]:
+    """Une ligne par note saisie (juge × participant × question)."""
+    cursor = conn.execute(NOTES_SQL, (gala_id,))
+    for row in _fetch_in_batches(cursor):
+        yield [
+            row["categorie_nom"],
+            row["juge_id"],
+            f"{row['juge_prenom']} {row['juge_nom']}",
+            row["participant_id"],
+            row["compagnie_nom"],
+            row["question_id"],
+            row["question_texte"],
+            row["ponderation"],
+            row["valeur"],
+            row["commentaire"],
+        ]
+
+
+# ==============================
+# 📄 CSV
+# ==============================
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], chunk_rows: int = FETCH_SIZE) -> Iterator[bytes]:
+    """Sérialise ``rows`` en CSV UTF-8 (avec BOM pour Excel), par blocs de ``chunk_rows`` lignes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ==============================
+# 📊 XLSX
+# ==============================
+# Caractères interdits en XML 1.0 (un commentaire collé depuis Word peut en contenir).
+_XML_INVALID_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    "</styleSheet>"
+)
+
+_SHEET_HEAD_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+    "<sheetData>"
+)
+
+_SHEET_TAIL_XML = "</sheetData></worksheet>"
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _xlsx_cell(value: Any, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if value is None:
+        return f"<c{style_attr}/>"
+    if isinstance(value, bool):
+        return f'<c t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c{style_attr}><v>{value!r}</v></c>"
+    text = escape(_XML_INVALID_RE.sub("", str(value)))
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Sequence[Any], style: int = 0) -> str:
+    return "<row>" + "".join(_xlsx_cell(value, style) for value in values) + "</row>"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Flux d'écriture non positionnable : ``zipfile`` y écrit, le générateur vide."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_xlsx(
+    sheet_name: str,
+    header: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_rows: int = FETCH_SIZE,
+) -> Iterator[bytes]:
+    """Produit un classeur XLSX d'une feuille, octet par octet au fil des lignes."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES_XML)
+        archive.writestr("_rels/.rels", _ROOT_RELS_XML)
+        archive.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS_XML)
+        archive.writestr("xl/styles.xml", _STYLES_XML)
+        with archive.open("xl/worksheets/sheet1.xml", mode="w") as sheet:
+            sheet.write((_SHEET_HEAD_XML + _xlsx_row(header, style=1)).encode("utf-8"))
+            pending = 0
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                pending += 1
+                if pending >= chunk_rows:
+                    pending = 0
+                    data = sink.drain()
+                    if data:
+                        yield data
+            sheet.write(_SHEET_TAIL_XML.encode("utf-8"))
+    yield sink.drain()
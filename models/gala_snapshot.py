@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Instantané immuable d'un gala pour les routes de lecture (résultats admin, listes juge).
+
+``/admin/api/results`` relisait à chaque appel participants, compagnies, juges,
+coups de cœur et soumissions, puis transformait chaque ``sqlite3.Row`` en
+dictionnaires imbriqués (``categories_lookup``, ``judges_payload``...). Pour un
+gala verrouillé, rien de tout cela ne change plus.
+
+Un ``GalaSnapshot`` rassemble ces données pour une ``gala_version`` donnée :
+- enregistrements ``__slots__`` gelés (compagnies partagées entre leurs
+  candidatures, participants, juges, coups de cœur) ; catégories et questions
+  viennent de ``models.gala_structure`` ;
+- colonnes de scores ``array`` indexées comme ``participants`` (somme pondérée,
+  poids répondu, notes saisies, juges ayant répondu) et progression par juge,
+  lue dans ``judge_workload``.
+
+Il est construit une seule fois par version (les requêtes concurrentes attendent
+la construction en cours plutôt que de la refaire) et remplacé d'un bloc quand la
+version change : un lecteur garde l'instantané qu'il a obtenu, cohérent jusqu'au bout.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, Iterator, List, Optional, Tuple
+
+from models import db as db_module
+from models import gala_structure
+from models.data_version import gala_version, structure_version
+
+# Instantanés gardés en mémoire (galas les plus récemment consultés).
+MAX_CACHED_SNAPSHOTS = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Company:
+    id: int
+    nom: str
+    ville: Optional[str]
+    secteur: Optional[str]
+    responsable_nom: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class Participant:
+    id: int
+    gala_categorie_id: int
+    company: Company
+
+
+@dataclass(frozen=True, slots=True)
+class Judge:
+    id: int
+    prenom: str
+    nom: str
+    # Catégories affectées et notes attendues dans chacune (judge_workload).
+    gala_categorie_ids: Tuple[int, ...]
+    expected_notes: Tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Favorite:
+    juge_id: int
+    nom: str
+
+
+@dataclass(frozen=True, slots=True)
+class GalaSnapshot:
+    version: str
+    structure: gala_structure.GalaStructure
+    # Triés par nom de compagnie ; les colonnes ci-dessous suivent cet ordre.
+    participants: Tuple[Participant, ...]
+    participant_index: Dict[int, int]
+    by_category: Dict[int, Tuple[int, ...]]
+    weighted_sum: array
+    answered_weight: array
+    notes_recorded: array
+    judges_answered: array
+    favorites: Dict[int, Tuple[Favorite, ...]]
+    # Triés par nom puis prénom ; colonnes par juge dans le même ordre.
+    judges: Tuple[Judge, ...]
+    judge_answered: array
+    judge_submitted_at: Tuple[Optional[str], ...]
+    judge_counts: Dict[int, int]
+
+    @property
+    def locked(self) -> bool:
+        return self.structure.locked
+
+    def participant_count(self, gala_categorie_id: int) -> int:
+        return len(self.by_category.get(gala_categorie_id, ()))
+
+    def category_participants(self, gala_categorie_id: int) -> Iterator[Tuple[int, Participant]]:
+        """(index dans les colonnes, participant) d'une catégorie, par nom de compagnie."""
+        for index in self.by_category.get(gala_categorie_id, ()):
+            yield index, self.participants[index]
+
+    def judge_expected(self, judge: Judge, gala_categorie_ids: Collection[int]) -> int:
+        """Notes attendues d'un juge sur les catégories retenues."""
+        return sum(
+            expected
+            for category_id, expected in zip(judge.gala_categorie_ids, judge.expected_notes)
+            if category_id in gala_categorie_ids
+        )
+
+
+PARTICIPANTS_SQL = """
+    SELECT p.id, p.gala_categorie_id,
+           comp.id AS compagnie_id, comp.nom, comp.ville, comp.secteur, comp.responsable_nom,
+           COALESCE(sa.weighted_sum, 0) AS weighted_sum,
+           COALESCE(sa.answered_weight, 0) AS answered_weight,
+           COALESCE(sa.notes_recorded, 0) AS notes_recorded,
+           COALESCE(sa.judges_answered, 0) AS judges_answered
+    FROM gala_categorie AS gc
+    JOIN participant AS p ON p.gala_categorie_id = gc.id
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    LEFT JOIN score_aggregate AS sa ON sa.participant_id = p.id
+    WHERE gc.gala_id = ?
+    ORDER BY comp.nom COLLATE NOCASE, p.id
+"""
+
+JUDGES_SQL = """
+    SELECT jw.juge_id, per.prenom, per.nom, jw.gala_categorie_id, jw.expected_notes, jw.recorded_notes
+    FROM gala_categorie AS gc
+    JOIN judge_workload AS jw ON jw.gala_categorie_id = gc.id
+    JOIN juge AS j ON j.id = jw.juge_id
+    JOIN user AS u ON u.id = j.user_id
+    JOIN personne AS per ON per.id = u.personne_id
+    WHERE gc.gala_id = ?
+    ORDER BY per.nom COLLATE NOCASE, per.prenom COLLATE NOCASE, j.id, jw.gala_categorie_id
+"""
+
+FAVORITES_SQL = """
+    SELECT cdc.participant_id, cdc.juge_id, per.prenom, per.nom
+    FROM coup_de_coeur AS cdc
+    JOIN juge AS j ON j.id = cdc.juge_id
+    JOIN user AS u ON u.id = j.user_id
+    JOIN personne AS per ON per.id = u.personne_id
+    WHERE cdc.gala_id = ?
+"""
+
+
+def build_snapshot(conn: sqlite3.Connection, gala_id: int, version: str) -> Optional[GalaSnapshot]:
+    """Lit un gala complet (``None`` s'il n'existe pas) ; ``version`` doit avoir été lue avant."""
+    # La structure en cache d'un gala modifiable peut avoir jusqu'à UNLOCKED_TTL_SECONDS de
+    # retard sur un autre worker ; l'instantané vivant plus longtemps, elle est revalidée ici.
+    lock_row = conn.execute("SELECT locked_at FROM gala_lock WHERE gala_id = ?", (gala_id,)).fetchone()
+    locked_at = lock_row["locked_at"] if lock_row else None
+    structure = gala_structure.gala_structure(conn, gala_id, locked_at=locked_at)
+    if structure is not None and structure.version != structure_version(conn, gala_id):
+        gala_structure.invalidate(gala_id)
+        structure = gala_structure.gala_structure(conn, gala_id, locked_at=locked_at)
+    if structure is None:
+        return None
+
+    companies: Dict[int, Company] = {}
+    participants: List[Participant] = []
+    by_category: Dict[int, List[int]] = {}
+    weighted_sum, answered_weight = array("d"), array("d")
+    notes_recorded, judges_answered = array("q"), array("q")
+    for row in conn.execute(PARTICIPANTS_SQL, (gala_id,)):
+        company = companies.get(row["compagnie_id"])
+        if company is None:
+            company = companies[row["compagnie_id"]] = Company(
+                row["compagnie_id"], row["nom"], row["ville"], row["secteur"], row["responsable_nom"]
+            )
+        by_category.setdefault(row["gala_categorie_id"], []).append(len(participants))
+        participants.append(Participant(row["id"], row["gala_categorie_id"], company))
+        weighted_sum.append(row["weighted_sum"])
+        answered_weight.append(row["answered_weight"])
+        notes_recorded.append(row["notes_recorded"])
+        judges_answered.append(row["judges_answered"])
+
+    judge_rows: "OrderedDict[int, List[sqlite3.Row]]" = OrderedDict()
+    judge_counts: Dict[int, int] = {}
+    for row in conn.execute(JUDGES_SQL, (gala_id,)):
+        judge_rows.setdefault(row["juge_id"], []).append(row)
+        judge_counts[row["gala_categorie_id"]] = judge_counts.get(row["gala_categorie_id"], 0) + 1
+    judges = tuple(
+        Judge(
+            juge_id,
+            rows[0]["prenom"],
+            rows[0]["nom"],
+            tuple(row["gala_categorie_id"] for row in rows),
+            tuple(row["expected_notes"] for row in rows),
+        )
+        for juge_id, rows in judge_rows.items()
+    )
+    submitted = dict(
+        conn.execute("SELECT juge_id, submitted_at FROM juge_gala_submission WHERE gala_id = ?", (gala_id,)).fetchall()
+    )
+    favorites: Dict[int, List[Favorite]] = {}
+    for row in conn.execute(FAVORITES_SQL, (gala_id,)):
+        favorites.setdefault(row["participant_id"], []).append(Favorite(row["juge_id"], f"{row['prenom']} {row['nom']}"))
+
+    return GalaSnapshot(
+        version=version,
+        structure=structure,
+        participants=tuple(participants),
+        participant_index={participant.id: index for index, participant in enumerate(participants)},
+        by_category={category_id: tuple(indexes) for category_id, indexes in by_category.items()},
+        weighted_sum=weighted_sum,
+        answered_weight=answered_weight,
+        notes_recorded=notes_recorded,
+        judges_answered=judges_answered,
+        favorites={participant_id: tuple(entries) for participant_id, entries in favorites.items()},
+        judges=judges,
+        judge_answered=array("q", (sum(row["recorded_notes"] for row in rows) for rows in judge_rows.values())),
+        judge_submitted_at=tuple(submitted.get(judge.id) for judge in judges),
+        judge_counts=judge_counts,
+    )
+
+
+# Clé : (fichier de base, gala_id) -> instantané courant.
+_cache: "OrderedDict[Tuple[str, int], GalaSnapshot]" = OrderedDict()
+_lock = threading.Lock()
+# Une construction à la fois par gala : les requêtes suivantes réutilisent son résultat.
+_build_locks: Dict[Tuple[str, int], threading.Lock] = {}
+_stats = {"hits": 0, "builds": 0, "evictions": 0, "last_build_ms": 0.0}
+
+
+def snapshot(conn: sqlite3.Connection, gala_id: int, version: Optional[str] = None) -> Optional[GalaSnapshot]:
+    """Instantané courant d'un gala ; ``version`` : ``gala_version`` déjà lue par l'appelant."""
+    if version is None:
+        version = gala_version(conn, gala_id)
+    key = (str(db_module.DB_PATH), gala_id)
+    current = _lookup(key, version)
+    if current is not None:
+        return current
+
+    with _lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        current = _lookup(key, version)
+        if current is not None:
+            return current
+        started = time.perf_counter()
+        built = build_snapshot(conn, gala_id, version)
+        with _lock:
+            _stats["builds"] += 1
+            _stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            if built is None:
+                _cache.pop(key, None)
+                return None
+            _cache[key] = built
+            _cache.move_to_end(key)
+            while len(_cache) > MAX_CACHED_SNAPSHOTS:
+                evicted, _ = _cache.popitem(last=False)
+                _build_locks.pop(evicted, None)
+                _stats["evictions"] += 1
+    return built
+
+
+def _lookup(key: Tuple[str, int], version: str) -> Optional[GalaSnapshot]:
+    with _lock:
+        current = _cache.get(key)
+        if current is None or current.version != version:
+            return None
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return current
+
+
+def invalidate(gala_id: Optional[int] = None) -> None:
+    with _lock:
+        if gala_id is None:
+            _cache.clear()
+        else:
+            _cache.pop((str(db_module.DB_PATH), gala_id), None)
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        stats["size"] = len(_cache)
+    stats["max_size"] = MAX_CACHED_SNAPSHOTS
+    return stats
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Structure d'un gala en cache : gala, catégories, questions et pondérations.
+
+La structure ne bouge presque plus une fois le jugement commencé, mais chaque
+page juge et admin relisait ``gala``, ``gala_categorie``, ``categorie`` et
+``question`` (nombre de questions, ``SUM(ponderation)``...). Elle est gardée ici
+par gala, avec éviction LRU.
+
+Validité d'une entrée :
+    gala verrouillé    immuable (les routes d'écriture refusent toute
+                       modification) : gardé tant que le verrou lu par
+                       l'appelant (``locked_at``) ne change pas ; sans ce
+                       verrou, traité comme un gala modifiable (un autre
+                       worker a pu le déverrouiller) ;
+    gala modifiable    réutilisé sans requête pendant ``UNLOCKED_TTL_SECONDS``,
+                       puis revalidé par ``structure_version`` (une requête sur
+                       clé primaire) et rechargé seulement s'il a changé.
+
+Les routes admin qui modifient la structure appellent ``invalidate(gala_id)`` :
+le processus qui écrit voit son changement immédiatement, les autres workers
+au plus tard après le TTL.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from models import db as db_module
+from models.data_version import STRUCTURE_VERSION_SQL, structure_version
+
+# Nombre de galas gardés en mémoire (les plus récemment consultés).
+MAX_CACHED_GALAS = 32
+# Durée pendant laquelle la structure d'un gala non verrouillé est reprise sans vérification.
+UNLOCKED_TTL_SECONDS = 5.0
+
+# Valeur par défaut de ``locked_at`` : l'appelant ne connaît pas l'état du verrou.
+_UNKNOWN = object()
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionStructure:
+    id: int
+    texte: str
+    ponderation: float
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryStructure:
+    id: int  # gala_categorie.id
+    categorie_id: int
+    nom: str
+    ordre_affichage: int
+    actif: int
+    is_narratif: bool
+    questions: Tuple[QuestionStructure, ...]
+
+    @property
+    def question_count(self) -> int:
+        return len(self.questions)
+
+    @property
+    def total_weight(self) -> float:
+        return float(sum(question.ponderation for question in self.questions))
+
+
+@dataclass(frozen=True, slots=True)
+class GalaStructure:
+    version: str
+    gala: Dict[str, Any]  # id, nom, annee, lieu, date_gala
+    locked_at: Optional[str]
+    # Ordre d'affichage (ordre_affichage, puis nom).
+    categories: Tuple[CategoryStructure, ...]
+
+    @property
+    def locked(self) -> bool:
+        return self.locked_at is not None
+
+    @property
+    def question_count(self) -> int:
+        return sum(category.question_count for category in self.categories)
+
+    def category(self, gala_categorie_id: int) -> Optional[CategoryStructure]:
+        for category in self.categories:
+            if category.id == gala_categorie_id:
+                return category
+        return None
+
+
+@dataclass(slots=True)
+class _Entry:
+    structure: GalaStructure
+    checked_at: float
+
+
+# Clé : (fichier de base, gala_id) ; le fichier distingue les bases de test.
+_cache: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidations": 0, "evictions": 0, "invalidations": 0}
+
+
+def _key(gala_id: int) -> Tuple[str, int]:
+    return str(db_module.DB_PATH), gala_id
+
+
+def _load(conn: sqlite3.Connection, gala_id: int, locked_at: Any) -> Optional[GalaStructure]:
+    # Version lue dans la même requête que le gala : au pire plus ancienne que les
+    # catégories lues ensuite, ce qui provoque un rechargement de trop, jamais un cache périmé.
+    if locked_at is _UNKNOWN:
+        lock_column, lock_join = "gl.locked_at", "LEFT JOIN gala_lock AS gl ON gl.gala_id = g.id"
+    else:
+        lock_column, lock_join = "NULL", ""
+    gala_row = conn.execute(
+        f"""
+        SELECT g.id, g.nom, g.annee, g.lieu, g.date_gala, {lock_column} AS locked_at,
+               {STRUCTURE_VERSION_SQL} AS version
+        FROM gala AS g
+        {lock_join}
+        WHERE g.id = ?
+        """,
+        (gala_id, gala_id, gala_id),
+    ).fetchone()
+    if gala_row is None:
+        return None
+    if locked_at is _UNKNOWN:
+        locked_at = gala_row["locked_at"]
+
+    rows = conn.execute(
+        """
+        SELECT gc.id, gc.categorie_id, gc.ordre_affichage, gc.actif,
+               c.nom, c.is_narratif,
+               q.id AS question_id, q.texte, q.ponderation
+        FROM gala_categorie AS gc
+        JOIN categorie AS c ON c.id = gc.categorie_id
+        LEFT JOIN question AS q ON q.gala_categorie_id = gc.id
+        WHERE gc.gala_id = ?
+        ORDER BY gc.ordre_affichage, c.nom COLLATE NOCASE, gc.id, q.id
+        """,
+        (gala_id,),
+    ).fetchall()
+
+    categories: "OrderedDict[int, Tuple[sqlite3.Row, list]]" = OrderedDict()
+    for row in rows:
+        _, questions = categories.setdefault(row["id"], (row, []))
+        if row["question_id"] is not None:
+            questions.append(QuestionStructure(row["question_id"], row["texte"], row["ponderation"]))
+
+    return GalaStructure(
+        version=gala_row["version"],
+        gala={
+            "id": gala_row["id"],
+            "nom": gala_row["nom"],
+            "annee": gala_row["annee"],
+            "lieu": gala_row["lieu"],
+            "date_gala": gala_row["date_gala"],
+        },
+        locked_at=locked_at,
+        categories=tuple(
+            CategoryStructure(
+                id=row["id"],
+                categorie_id=row["categorie_id"],
+                nom=row["nom"],
+                ordre_affichage=row["ordre_affichage"],
+                actif=row["actif"],
+                is_narratif=bool(row["is_narratif"]),
+                questions=tuple(questions),
+            )
+            for row, questions in categories.values()
+        ),
+    )
+
+
+def _still_valid(
+    conn: sqlite3.Connection, entry: _Entry, gala_id: int, locked_at: Any, now: float, revalidate: bool = False
+) -> bool:
+    structure = entry.structure
+    if locked_at is not _UNKNOWN and locked_at != structure.locked_at:
+        return False
+    if structure.locked and locked_at is not _UNKNOWN:
+        return True
+    if not revalidate and now - entry.checked_at < UNLOCKED_TTL_SECONDS:
+        return True
+    if structure_version(conn, gala_id) != structure.version:
+        return False
+    with _lock:
+        _stats["revalidations"] += 1
+    entry.checked_at = now
+    return True
+
+
+def gala_structure(
+    conn: sqlite3.Connection, gala_id: int, locked_at: Any = _UNKNOWN, revalidate: bool = False
+) -> Optional[GalaStructure]:
+    """Structure d'un gala (``None`` s'il n'existe pas).
+
+    ``locked_at`` : horodatage du verrou déjà lu par l'appelant (``None`` si le gala
+    n'est pas verrouillé). Un verrou posé ou levé par un autre worker est ainsi
+    détecté sans requête supplémentaire.
+
+    ``revalidate`` : ignore le TTL d'un gala modifiable et compare tout de suite
+    ``structure_version``. À utiliser quand la réponse est servie sous un ETag tiré
+    d'une version fraîche : une structure en retard y resterait figée par les 304.
+    """
+    key = _key(gala_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+
+    if entry is not None and _still_valid(conn, entry, gala_id, locked_at, now, revalidate):
+        with _lock:
+            _stats["hits"] += 1
+        return entry.structure
+
+    loaded = _load(conn, gala_id, locked_at)
+    with _lock:
+        _stats["misses"] += 1
+        if loaded is None:
+            _cache.pop(key, None)
+            return None
+        _cache[key] = _Entry(loaded, now)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_GALAS:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+    return loaded
+
+
+def invalidate(gala_id: Optional[int] = None) -> None:
+    """Oublie un gala (ou tout le cache) ; appelé par les routes qui modifient la structure."""
+    with _lock:
+        if gala_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(_key(gala_id), None)
+        _stats["invalidations"] += 1
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        stats["size"] = len(_cache)
+    stats["max_size"] = MAX_CACHED_GALAS
+    stats["unlocked_ttl_seconds"] = UNLOCKED_TTL_SECONDS
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+    return stats
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Imports CSV lancés depuis l'administration, exécutés hors du fil de la requête.
+
+``import_csv.py`` se lançait seulement en ligne de commande ; un import de
+plusieurs milliers de candidatures dépasse largement le délai d'une requête.
+Le téléversement (``POST /admin/api/imports``) :
+
+- enregistre le fichier sous ``IMPORT_UPLOAD_DIR/<sha256>.csv`` en calculant son
+  empreinte au fil de l'écriture ;
+- réserve sa ligne ``import_checkpoint`` en base (passage conditionnel de
+  « queued »/« failed » à « running ») : avec plusieurs workers, un seul lance
+  l'import d'un même fichier, les autres répondent 409 ;
+- confie l'import à un fil unique par processus (SQLite n'a qu'un écrivain :
+  deux imports en parallèle ne feraient que s'attendre) et répond aussitôt avec
+  l'identifiant du point de reprise.
+
+Une ligne « running » qui n'avance plus depuis ``IMPORT_STALE_SECONDS`` (worker
+arrêté en plein import) peut être réservée de nouveau.
+
+L'import écrit par lots de ``IMPORT_CHUNK_SIZE`` lignes, un commit par lot : les
+requêtes des juges s'intercalent entre deux lots au lieu d'attendre la fin.
+Le statut (``GET /admin/api/imports/<id>``) est lu dans ``import_checkpoint`` et
+non en mémoire : n'importe quel worker peut y répondre. Téléverser de nouveau un
+fichier interrompu reprend après le dernier lot validé.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Set, Tuple
+
+from flask import Flask, current_app
+
+from import_csv import import_csv, load_checkpoint, open_checkpoint
+from models import db as db_module
+from models import gala_snapshot, gala_structure, init_db
+
+EXTENSION_KEY = "gala_import_jobs"
+
+DEFAULT_IMPORT_CONFIG = {
+    # Dossier des fichiers téléversés ; None = « imports » dans le dossier des données.
+    "IMPORT_UPLOAD_DIR": None,
+    "IMPORT_CHUNK_SIZE": 500,
+    # Délai sans lot validé au-delà duquel un import « running » est tenu pour abandonné.
+    "IMPORT_STALE_SECONDS": 900,
+}
+
+_create_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class ImportRunner:
+    def __init__(self, upload_dir: Path, chunk_size: int = 500, stale_seconds: int = 900) -> None:
+        self.upload_dir = Path(upload_dir)
+        self.chunk_size = chunk_size
+        self.stale_seconds = stale_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gala-import")
+        self._lock = threading.Lock()
+        # Points de reprise en file ou en cours dans ce processus.
+        self._active: Set[int] = set()
+        self._stats = {"submitted": 0, "done": 0, "failed": 0}
+
+    def save_upload(self, stream: IO[bytes], block_size: int = 1 << 20) -> Tuple[Path, str]:
+        """Écrit le fichier téléversé et retourne (chemin, empreinte SHA-256)."""
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.upload_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for block in iter(lambda: stream.read(block_size), b""):
+                    digest.update(block)
+                    out.write(block)
+            file_hash = digest.hexdigest()
+            path = self.upload_dir / f"{file_hash}.csv"
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return path, file_hash
+
+    def claim(
+        self,
+        conn: sqlite3.Connection,
+        file_hash: str,
+        gala_nom: str,
+        annee: int,
+        file_name: Optional[str] = None,
+        restart: bool = False,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Réserve l'import en base ; retourne (point de reprise, réservé par cet appel).
+
+        À appeler dans une transaction d'écriture (``BEGIN IMMEDIATE``) : deux
+        workers qui reçoivent le même fichier ne peuvent pas réserver tous deux la ligne.
+        """
+        running = conn.execute(
+            """
+            SELECT id FROM import_checkpoint
+            WHERE file_hash = ? AND gala_nom = ? AND annee = ? AND status = 'running'
+              AND updated_at > datetime('now', ?)
+            """,
+            (file_hash, gala_nom, annee, f"-{int(self.stale_seconds)} seconds"),
+        ).fetchone()
+        if running is not None:
+            return load_checkpoint(conn, running[0]), False
+
+        job = open_checkpoint(conn, file_hash, gala_nom, annee, file_name=file_name, status="queued", restart=restart)
+        if job["status"] == "done":
+            return job, False
+        claimed = conn.execute(
+            """
+            UPDATE import_checkpoint SET status = 'running', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN ('queued', 'failed')
+            """,
+            (job["id"],),
+        ).rowcount == 1
+        return load_checkpoint(conn, job["id"]), claimed
+
+    def submit(
+        self,
+        checkpoint_id: int,
+        csv_path: Path,
+        gala_nom: str,
+        annee: int,
+        lieu: Optional[str],
+        date_gala: Optional[str],
+        file_name: Optional[str] = None,
+        restart: bool = False,
+    ) -> Optional[Future]:
+        """Met l'import en file ; ``None`` s'il y est déjà dans ce processus."""
+        with self._lock:
+            if checkpoint_id in self._active:
+                return None
+            self._active.add(checkpoint_id)
+            self._stats["submitted"] += 1
+        return self._executor.submit(
+            self._run, checkpoint_id, Path(db_module.DB_PATH), csv_path, gala_nom, annee, lieu, date_gala,
+            file_name, restart,
+        )
+
+    def _run(
+        self,
+        checkpoint_id: int,
+        db_path: Path,
+        csv_path: Path,
+        gala_nom: str,
+        annee: int,
+        lieu: Optional[str],
+        date_gala: Optional[str],
+        file_name: Optional[str],
+        restart: bool,
+    ) -> None:
+        outcome = "failed"
+        try:
+            import_csv(
+                db_path, csv_path, gala_nom, annee, lieu, date_gala,
+                chunk_size=self.chunk_size, restart=restart, file_name=file_name,
+            )
+            outcome = "done"
+        except Exception:
+            # Le message est aussi consigné dans import_checkpoint (statut « failed ») ;
+            # la trace complète part dans les journaux du serveur.
+            logger.exception("Import CSV %s interrompu", checkpoint_id)
+        finally:
+            # Lots validés même en cas d'échec : la structure et les instantanés de ce
+            # processus ne doivent pas survivre à l'import.
+            gala_id = self._checkpoint_gala(db_path, checkpoint_id)
+            if gala_id is not None:
+                gala_structure.invalidate(gala_id)
+                gala_snapshot.invalidate(gala_id)
+            with self._lock:
+                self._active.discard(checkpoint_id)
+                self._stats[outcome] += 1
+
+    @staticmethod
+    def _checkpoint_gala(db_path: Path, checkpoint_id: int) -> Optional[int]:
+        conn = sqlite3.connect(str(db_path))
+        try:
+            row = conn.execute("SELECT gala_id FROM import_checkpoint WHERE id = ?", (checkpoint_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = len(self._active)
+        stats["chunk_size"] = self.chunk_size
+        stats["stale_seconds"] = self.stale_seconds
+        return stats
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+# ==============================
+# 🔌 Branchement Flask
+# ==============================
+def init_app(app: Flask) -> None:
+    """Déclare la configuration (idempotent) ; le fil d'import est créé au premier usage."""
+    if EXTENSION_KEY in app.extensions:
+        return
+    for key, value in DEFAULT_IMPORT_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.extensions[EXTENSION_KEY] = None
+
+
+def get_runner(app: Optional[Flask] = None) -> ImportRunner:
+    app = app or current_app._get_current_object()
+    if EXTENSION_KEY not in app.extensions:
+        raise RuntimeError("models.import_jobs.init_app() n'a pas ete appele pour cette application.")
+    runner = app.extensions[EXTENSION_KEY]
+    if runner is not None:
+        return runner
+    with _create_lock:
+        runner = app.extensions[EXTENSION_KEY]
+        if runner is None:
+            upload_dir = app.config["IMPORT_UPLOAD_DIR"] or Path(init_db.DATA_DIR) / "imports"
+            runner = ImportRunner(
+                upload_dir,
+                chunk_size=app.config["IMPORT_CHUNK_SIZE"],
+                stale_seconds=app.config["IMPORT_STALE_SECONDS"],
+            )
+            app.extensions[EXTENSION_KEY] = runner
+    return runner
@@ -1,5 +1,6 @@
 import sqlite3
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
 
 # ==============================
 # 📂 Emplacement de la base
@@ -27,7 +28,8 @@ CREATE TABLE IF NOT EXISTS gala (
 CREATE TABLE IF NOT EXISTS categorie (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     nom TEXT NOT NULL,
-    description TEXT
+    description TEXT,
+    is_narratif INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS gala_categorie (
@@ -191,6 +193,629 @@ CREATE TABLE IF NOT EXISTS coup_de_coeur (
 
 """
 
+
+# ==============================
+# 📊 Tableau des scores matérialisé
+# ==============================
+def score_refresh_sql(where_clause: str) -> str:
+    """Recalcule les lignes de score_aggregate des participants filtrés par ``where_clause``.
+
+    Pas de ``INSERT OR REPLACE`` : dans un trigger, la politique de conflit de
+    l'instruction appelante (ex. l'UPSERT des notes) remplacerait le REPLACE.
+    """
+    return f"""
+    INSERT INTO score_aggregate
+        (participant_id, weighted_sum, answered_weight, notes_recorded, judges_answered)
+    SELECT
+        p.id,
+        COALESCE(SUM(n.valeur * q.ponderation), 0),
+        COALESCE(SUM(CASE WHEN n.valeur IS NOT NULL THEN q.ponderation END), 0),
+        COUNT(CASE WHEN q.id IS NOT NULL THEN n.valeur END),
+        COUNT(DISTINCT CASE WHEN n.valeur IS NOT NULL AND q.id IS NOT NULL THEN n.juge_id END)
+    FROM participant AS p
+    LEFT JOIN note AS n ON n.participant_id = p.id
+    LEFT JOIN question AS q
+        ON q.id = n.question_id AND q.gala_categorie_id = p.gala_categorie_id
+    WHERE {where_clause}
+    GROUP BY p.id
+    ON CONFLICT(participant_id) DO UPDATE SET
+        weighted_sum = excluded.weighted_sum,
+        answered_weight = excluded.answered_weight,
+        notes_recorded = excluded.notes_recorded,
+        judges_answered = excluded.judges_answered;
+    """
+
+
+SCORE_AGGREGATE_SQL = f"""
+CREATE TABLE IF NOT EXISTS score_aggregate (
+    participant_id INTEGER PRIMARY KEY,
+    weighted_sum REAL NOT NULL DEFAULT 0,
+    answered_weight REAL NOT NULL DEFAULT 0,
+    notes_recorded INTEGER NOT NULL DEFAULT 0,
+    judges_answered INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (participant_id) REFERENCES participant(id) ON DELETE CASCADE
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_score_note_insert AFTER INSERT ON note
+BEGIN
+    {score_refresh_sql("p.id = NEW.participant_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_score_note_update
+AFTER UPDATE OF valeur, participant_id, question_id ON note
+BEGIN
+    {score_refresh_sql("p.id IN (OLD.participant_id, NEW.participant_id)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_score_note_delete AFTER DELETE ON note
+BEGIN
+    {score_refresh_sql("p.id = OLD.participant_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_score_question_weight
+AFTER UPDATE OF ponderation, gala_categorie_id ON question
+BEGIN
+    {score_refresh_sql("p.gala_categorie_id IN (OLD.gala_categorie_id, NEW.gala_categorie_id)")}
+END;
+"""
+
+# ==============================
+# 🔎 Index secondaires (lookups chauds des routes juge/admin)
+# ==============================
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_participant_gala_categorie ON participant (gala_categorie_id);
+CREATE INDEX IF NOT EXISTS idx_participant_compagnie ON participant (compagnie_id);
+CREATE INDEX IF NOT EXISTS idx_question_gala_categorie ON question (gala_categorie_id);
+CREATE INDEX IF NOT EXISTS idx_juge_user ON juge (user_id);
+CREATE INDEX IF NOT EXISTS idx_jgc_juge_categorie ON juge_gala_categorie (juge_id, gala_categorie_id);
+CREATE INDEX IF NOT EXISTS idx_jgc_categorie_juge ON juge_gala_categorie (gala_categorie_id, juge_id);
+CREATE INDEX IF NOT EXISTS idx_gala_categorie_gala ON gala_categorie (gala_id);
+CREATE INDEX IF NOT EXISTS idx_note_participant ON note (participant_id, question_id);
+CREATE INDEX IF NOT EXISTS idx_coup_de_coeur_gala ON coup_de_coeur (gala_id);
+CREATE INDEX IF NOT EXISTS idx_submission_gala ON juge_gala_submission (gala_id);
+"""
+
+# ==============================
+# 🔖 Versions de données (ETag des routes de lecture)
+# ==============================
+# Portées : un gala_id, toutes les données (0) ou les données partagées entre
+# galas (-1 : catégories, compagnies, personnes, juges).
+DATA_VERSION_ALL = 0
+DATA_VERSION_SHARED = -1
+
+
+def data_version_bump_sql(gala_select: str, table: str = "data_version") -> str:
+    """Incrémente la version des galas retournés par ``gala_select`` (colonne ``gala_id``)
+    ainsi que la version globale."""
+    # « WHERE 1 » lève l'ambiguïté entre un ON de jointure et ON CONFLICT.
+    return f"""
+    INSERT INTO {table} (scope, version)
+    SELECT gala_id, 1 FROM ({gala_select}) WHERE gala_id IS NOT NULL
+    UNION
+    SELECT {DATA_VERSION_ALL}, 1 WHERE 1
+    ON CONFLICT(scope) DO UPDATE SET version = version + 1;
+    """
+
+
+# table -> requête retournant le(s) gala_id touché(s) par la ligne {row}
+DATA_VERSION_SOURCES: List[Tuple[str, str]] = [
+    (
+        "note",
+        "SELECT gc.gala_id FROM participant AS p "
+        "JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id WHERE p.id = {row}.participant_id",
+    ),
+    (
+        "reponse_participant",
+        "SELECT gc.gala_id FROM participant AS p "
+        "JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id WHERE p.id = {row}.participant_id",
+    ),
+    ("participant", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("question", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("segment", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("juge_gala_categorie", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("coup_de_coeur", "SELECT {row}.gala_id AS gala_id"),
+    ("juge_gala_submission", "SELECT {row}.gala_id AS gala_id"),
+    ("gala_lock", "SELECT {row}.gala_id AS gala_id"),
+    ("gala_categorie", "SELECT {row}.gala_id AS gala_id"),
+    ("gala", "SELECT {row}.id AS gala_id"),
+    ("categorie", f"SELECT {DATA_VERSION_SHARED} AS gala_id"),
+    ("compagnie", f"SELECT {DATA_VERSION_SHARED} AS gala_id"),
+    ("personne", f"SELECT {DATA_VERSION_SHARED} AS gala_id"),
+    ("juge", f"SELECT {DATA_VERSION_SHARED} AS gala_id"),
+]
+
+
+def _data_version_triggers_sql(
+    sources: List[Tuple[str, str]] = DATA_VERSION_SOURCES,
+    version_table: str = "data_version",
+    prefix: str = "version",
+) -> str:
+    statements = []
+    for table, source in sources:
+        for event, rows in (
+            ("INSERT", ["NEW"]),
+            ("UPDATE", ["OLD", "NEW"]),
+            ("DELETE", ["OLD"]),
+        ):
+            gala_select = " UNION ".join(source.replace("{row}", row) for row in rows)
+            statements.append(
+                f"""
+CREATE TRIGGER IF NOT EXISTS trg_{prefix}_{table}_{event.lower()} AFTER {event} ON {table}
+BEGIN
+    {data_version_bump_sql(gala_select, version_table)}
+END;
+"""
+            )
+    return "".join(statements)
+
+
+DATA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS data_version (
+    scope INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+""" + _data_version_triggers_sql()
+
+# ==============================
+# 📡 Journal des deltas temps réel (flux SSE des résultats)
+# ==============================
+LIVE_EVENT_SQL = """
+CREATE TABLE IF NOT EXISTS live_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gala_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (gala_id) REFERENCES gala(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_live_event_gala ON live_event (gala_id, id);
+"""
+
+# ==============================
+# 🔍 Recherche plein texte des participants (FTS5)
+# ==============================
+SEARCH_COLUMNS = ("nom", "courriel", "ville", "responsable_nom", "responsable_titre", "secteur", "reponses")
+
+
+def search_refresh_sql(participant_select: str) -> str:
+    """Réindexe les participants retournés par ``participant_select`` (colonne unique : id)."""
+    columns = ", ".join(SEARCH_COLUMNS)
+    return f"""
+    DELETE FROM participant_search WHERE rowid IN ({participant_select});
+    INSERT INTO participant_search (rowid, {columns})
+    SELECT
+        p.id,
+        comp.nom,
+        comp.courriel,
+        comp.ville,
+        comp.responsable_nom,
+        comp.responsable_titre,
+        comp.secteur,
+        (
+            SELECT group_concat(r.contenu, char(10))
+            FROM reponse_participant AS r
+            WHERE r.participant_id = p.id AND r.contenu IS NOT NULL
+        )
+    FROM participant AS p
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    WHERE p.id IN ({participant_select});
+    """
+
+
+SEARCH_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS participant_search USING fts5(
+    {", ".join(SEARCH_COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_search_participant_insert AFTER INSERT ON participant
+BEGIN
+    {search_refresh_sql("SELECT NEW.id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_participant_update AFTER UPDATE OF compagnie_id ON participant
+BEGIN
+    {search_refresh_sql("SELECT NEW.id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_participant_delete AFTER DELETE ON participant
+BEGIN
+    DELETE FROM participant_search WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_compagnie_update
+AFTER UPDATE OF nom, courriel, ville, responsable_nom, responsable_titre, secteur ON compagnie
+BEGIN
+    {search_refresh_sql("SELECT id FROM participant WHERE compagnie_id = NEW.id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_reponse_insert AFTER INSERT ON reponse_participant
+BEGIN
+    {search_refresh_sql("SELECT NEW.participant_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_reponse_update AFTER UPDATE ON reponse_participant
+BEGIN
+    {search_refresh_sql("SELECT OLD.participant_id UNION SELECT NEW.participant_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_reponse_delete AFTER DELETE ON reponse_participant
+BEGIN
+    {search_refresh_sql("SELECT OLD.participant_id")}
+END;
+"""
+
+# ==============================
+# 🧭 Structure des galas (caches en mémoire) et catégorie « Narratif »
+# ==============================
+# Même principe que data_version, restreint à la structure : les notes ne
+# l'incrémentent pas, un cache reste donc valide pendant toute la soirée.
+STRUCTURE_VERSION_SOURCES: List[Tuple[str, str]] = [
+    ("participant", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("question", "SELECT gala_id FROM gala_categorie WHERE id = {row}.gala_categorie_id"),
+    ("gala_categorie", "SELECT {row}.gala_id AS gala_id"),
+    ("gala_lock", "SELECT {row}.gala_id AS gala_id"),
+    ("gala", "SELECT {row}.id AS gala_id"),
+    ("categorie", f"SELECT {DATA_VERSION_SHARED} AS gala_id"),
+]
+
+STRUCTURE_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS structure_version (
+    scope INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+""" + _data_version_triggers_sql(STRUCTURE_VERSION_SOURCES, "structure_version", "structure")
+
+# La catégorie partagée « Narratif (général) » est repérée par un drapeau explicite.
+# Les écritures qui ne le renseignent pas (import CSV, anciens scripts) gardent la
+# convention de nommage grâce au trigger.
+NARRATIF_SQL = """
+CREATE TRIGGER IF NOT EXISTS trg_categorie_narratif_default
+AFTER INSERT ON categorie
+WHEN NEW.is_narratif = 0 AND LOWER(NEW.nom) LIKE 'narratif%'
+BEGIN
+    UPDATE categorie SET is_narratif = 1 WHERE id = NEW.id;
+END;
+"""
+
+# ==============================
+# 📨 File d'écriture différée des notes (models.note_queue)
+# ==============================
+# Dernière séquence du journal appliquée à cette base, mise à jour dans la même
+# transaction que les notes : le rejeu après un arrêt brutal reprend exactement là.
+NOTE_QUEUE_SQL = """
+CREATE TABLE IF NOT EXISTS note_queue_cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    applied_seq INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO note_queue_cursor (id, applied_seq) VALUES (1, 0);
+"""
+
+# ==============================
+# 🧮 Charge de travail des juges (progression et soumission)
+# ==============================
+def workload_refresh_sql(where_clause: str) -> str:
+    """Recalcule les lignes de judge_workload des affectations filtrées par ``where_clause``
+    (alias ``jgc`` : juge_gala_categorie, ``gc`` : gala_categorie).
+
+    Une note ne compte que si sa question appartient à la catégorie du participant.
+    """
+    return f"""
+    INSERT INTO judge_workload
+        (juge_id, gala_categorie_id, gala_id, question_count, participant_count,
+         recorded_notes, completed_participants)
+    SELECT
+        t.juge_id,
+        t.gala_categorie_id,
+        t.gala_id,
+        t.question_count,
+        t.participant_count,
+        (
+            SELECT COUNT(*)
+            FROM note AS n
+            JOIN participant AS p ON p.id = n.participant_id
+            JOIN question AS q ON q.id = n.question_id
+            WHERE n.juge_id = t.juge_id
+              AND p.gala_categorie_id = t.gala_categorie_id
+              AND q.gala_categorie_id = t.gala_categorie_id
+        ),
+        (
+            SELECT COUNT(*)
+            FROM participant AS p
+            WHERE p.gala_categorie_id = t.gala_categorie_id
+              AND t.question_count > 0
+              AND (
+                  SELECT COUNT(*)
+                  FROM note AS n
+                  JOIN question AS q ON q.id = n.question_id
+                  WHERE n.juge_id = t.juge_id
+                    AND n.participant_id = p.id
+                    AND q.gala_categorie_id = t.gala_categorie_id
+              ) >= t.question_count
+        )
+    FROM (
+        SELECT DISTINCT
+            jgc.juge_id,
+            jgc.gala_categorie_id,
+            gc.gala_id,
+            (SELECT COUNT(*) FROM question WHERE gala_categorie_id = jgc.gala_categorie_id) AS question_count,
+            (SELECT COUNT(*) FROM participant WHERE gala_categorie_id = jgc.gala_categorie_id) AS participant_count
+        FROM juge_gala_categorie AS jgc
+        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
+        WHERE {where_clause}
+    ) AS t
+    WHERE 1
+    ON CONFLICT(juge_id, gala_categorie_id) DO UPDATE SET
+        gala_id = excluded.gala_id,
+        question_count = excluded.question_count,
+        participant_count = excluded.participant_count,
+        recorded_notes = excluded.recorded_notes,
+        completed_participants = excluded.completed_participants;
+    """
+
+
+def _workload_note_sql(row: str, sign: str) -> str:
+    """Ajuste la ligne touchée par une note ({row} : NEW ou OLD) sans tout recompter."""
+    # Nombre de notes du juge pour ce participant une fois l'écriture faite.
+    participant_notes = f"""(
+            SELECT COUNT(*)
+            FROM note AS n
+            JOIN question AS q ON q.id = n.question_id
+            WHERE n.juge_id = {row}.juge_id
+              AND n.participant_id = {row}.participant_id
+              AND q.gala_categorie_id = judge_workload.gala_categorie_id
+        )"""
+    # Participant complet avant une suppression / après un ajout.
+    completed = f"{participant_notes} + 1 = question_count" if sign == "-" else f"{participant_notes} = question_count"
+    return f"""
+    UPDATE judge_workload SET
+        recorded_notes = recorded_notes {sign} 1,
+        completed_participants = completed_participants {sign} ({completed})
+    WHERE juge_id = {row}.juge_id
+      AND gala_categorie_id = (
+          SELECT p.gala_categorie_id
+          FROM participant AS p
+          JOIN question AS q ON q.gala_categorie_id = p.gala_categorie_id
+          WHERE p.id = {row}.participant_id AND q.id = {row}.question_id
+      );
+    """
+
+
+# Une ligne par (juge, catégorie affectée). Les ajouts de notes, de participants et de
+# questions ajustent la ligne ; les suppressions et déplacements la recalculent.
+JUDGE_WORKLOAD_SQL = f"""
+CREATE TABLE IF NOT EXISTS judge_workload (
+    juge_id INTEGER NOT NULL,
+    gala_categorie_id INTEGER NOT NULL,
+    gala_id INTEGER NOT NULL,
+    question_count INTEGER NOT NULL DEFAULT 0,
+    participant_count INTEGER NOT NULL DEFAULT 0,
+    expected_notes INTEGER GENERATED ALWAYS AS (question_count * participant_count) VIRTUAL,
+    recorded_notes INTEGER NOT NULL DEFAULT 0,
+    completed_participants INTEGER NOT NULL DEFAULT 0,
+    ready_to_submit INTEGER GENERATED ALWAYS AS (recorded_notes >= question_count * participant_count) VIRTUAL,
+    PRIMARY KEY (juge_id, gala_categorie_id),
+    FOREIGN KEY (juge_id) REFERENCES juge(id) ON DELETE CASCADE,
+    FOREIGN KEY (gala_categorie_id) REFERENCES gala_categorie(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_judge_workload_ready ON judge_workload (juge_id, gala_id, ready_to_submit);
+CREATE INDEX IF NOT EXISTS idx_judge_workload_categorie ON judge_workload (gala_categorie_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_note_insert AFTER INSERT ON note
+BEGIN
+    {_workload_note_sql("NEW", "+")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_note_delete AFTER DELETE ON note
+BEGIN
+    {_workload_note_sql("OLD", "-")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_note_update
+AFTER UPDATE OF juge_id, participant_id, question_id ON note
+BEGIN
+    {workload_refresh_sql(
+        "(jgc.juge_id = OLD.juge_id AND jgc.gala_categorie_id = "
+        "(SELECT gala_categorie_id FROM participant WHERE id = OLD.participant_id)) "
+        "OR (jgc.juge_id = NEW.juge_id AND jgc.gala_categorie_id = "
+        "(SELECT gala_categorie_id FROM participant WHERE id = NEW.participant_id))"
+    )}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_participant_insert AFTER INSERT ON participant
+BEGIN
+    UPDATE judge_workload SET participant_count = participant_count + 1
+    WHERE gala_categorie_id = NEW.gala_categorie_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_participant_delete AFTER DELETE ON participant
+BEGIN
+    {workload_refresh_sql("jgc.gala_categorie_id = OLD.gala_categorie_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_participant_update AFTER UPDATE OF gala_categorie_id ON participant
+BEGIN
+    {workload_refresh_sql("jgc.gala_categorie_id IN (OLD.gala_categorie_id, NEW.gala_categorie_id)")}
+END;
+
+-- Une question neuve n'a encore aucune note : plus aucun participant n'est complet.
+CREATE TRIGGER IF NOT EXISTS trg_workload_question_insert AFTER INSERT ON question
+BEGIN
+    UPDATE judge_workload SET question_count = question_count + 1, completed_participants = 0
+    WHERE gala_categorie_id = NEW.gala_categorie_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_question_delete AFTER DELETE ON question
+BEGIN
+    {workload_refresh_sql("jgc.gala_categorie_id = OLD.gala_categorie_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_question_update AFTER UPDATE OF gala_categorie_id ON question
+BEGIN
+    {workload_refresh_sql("jgc.gala_categorie_id IN (OLD.gala_categorie_id, NEW.gala_categorie_id)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_assignment_insert AFTER INSERT ON juge_gala_categorie
+BEGIN
+    {workload_refresh_sql("jgc.juge_id = NEW.juge_id AND jgc.gala_categorie_id = NEW.gala_categorie_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_assignment_update
+AFTER UPDATE OF juge_id, gala_categorie_id ON juge_gala_categorie
+BEGIN
+    DELETE FROM judge_workload
+    WHERE juge_id = OLD.juge_id AND gala_categorie_id = OLD.gala_categorie_id
+      AND NOT EXISTS (
+          SELECT 1 FROM juge_gala_categorie
+          WHERE juge_id = OLD.juge_id AND gala_categorie_id = OLD.gala_categorie_id
+      );
+    {workload_refresh_sql("jgc.juge_id = NEW.juge_id AND jgc.gala_categorie_id = NEW.gala_categorie_id")}
+END;
+
+-- Une affectation en double peut disparaître sans retirer la ligne.
+CREATE TRIGGER IF NOT EXISTS trg_workload_assignment_delete AFTER DELETE ON juge_gala_categorie
+BEGIN
+    DELETE FROM judge_workload
+    WHERE juge_id = OLD.juge_id AND gala_categorie_id = OLD.gala_categorie_id
+      AND NOT EXISTS (
+          SELECT 1 FROM juge_gala_categorie
+          WHERE juge_id = OLD.juge_id AND gala_categorie_id = OLD.gala_categorie_id
+      );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workload_gala_categorie_update AFTER UPDATE OF gala_id ON gala_categorie
+BEGIN
+    UPDATE judge_workload SET gala_id = NEW.gala_id WHERE gala_categorie_id = NEW.id;
+END;
+"""
+
+# ==============================
+# 📥 Points de reprise des imports CSV (import_csv.py)
+# ==============================
+# Une ligne par fichier (empreinte SHA-256) et par gala ; rows_done est mis à jour
+# dans la même transaction que chaque lot de lignes : un import interrompu reprend
+# juste après le dernier lot validé. Sert aussi de statut aux imports lancés depuis
+# l'administration (lisible par n'importe quel worker).
+IMPORT_CHECKPOINT_SQL = """
+CREATE TABLE IF NOT EXISTS import_checkpoint (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    gala_nom TEXT NOT NULL,
+    annee INTEGER NOT NULL,
+    gala_id INTEGER REFERENCES gala(id) ON DELETE SET NULL,
+    file_name TEXT,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    rows_per_second REAL,
+    error TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT,
+    UNIQUE (file_hash, gala_nom, annee)
+);
+"""
+
+SCHEMA_SQL += (
+    SCORE_AGGREGATE_SQL
+    + INDEX_SQL
+    + DATA_VERSION_SQL
+    + LIVE_EVENT_SQL
+    + SEARCH_SQL
+    + STRUCTURE_VERSION_SQL
+    + NARRATIF_SQL
+    + NOTE_QUEUE_SQL
+    + JUDGE_WORKLOAD_SQL
+    + IMPORT_CHECKPOINT_SQL
+)
+
+
+def add_column_sql(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], str]:
+    """``ALTER TABLE ... ADD COLUMN`` rejouable : rien si la colonne existe déjà."""
+    def build(conn: sqlite3.Connection) -> str:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column in columns:
+            return ""
+        return f"ALTER TABLE {table} ADD COLUMN {column} {definition};"
+    return build
+
+# ==============================
+# 🧱 Migrations versionnées (PRAGMA user_version)
+# ==============================
+# Chaque migration est idempotente : une base neuve créée avec SCHEMA_SQL
+# peut les rejouer sans effet de bord. Une étape peut être une fonction qui
+# reçoit la connexion et retourne le SQL à exécuter (ex. add_column_sql).
+MigrationStep = Union[str, Callable[[sqlite3.Connection], str]]
+
+MIGRATIONS: List[Tuple[int, str, MigrationStep]] = [
+    (1, "Tableau des scores matérialisé", SCORE_AGGREGATE_SQL + score_refresh_sql("1 = 1")),
+    (2, "Index secondaires", INDEX_SQL + "\nANALYZE;"),
+    (
+        3,
+        "Triggers score_aggregate compatibles UPSERT",
+        """
+        DROP TRIGGER IF EXISTS trg_score_note_insert;
+        DROP TRIGGER IF EXISTS trg_score_note_update;
+        DROP TRIGGER IF EXISTS trg_score_note_delete;
+        DROP TRIGGER IF EXISTS trg_score_question_weight;
+        """ + SCORE_AGGREGATE_SQL,
+    ),
+    (4, "Versions de données par gala (ETag)", DATA_VERSION_SQL),
+    (5, "Journal des deltas temps réel", LIVE_EVENT_SQL),
+    (
+        6,
+        "Recherche plein texte des participants",
+        SEARCH_SQL + "\nDELETE FROM participant_search;" + search_refresh_sql("SELECT id FROM participant"),
+    ),
+    (
+        7,
+        "Drapeau is_narratif et versions de structure",
+        lambda conn: add_column_sql("categorie", "is_narratif", "INTEGER NOT NULL DEFAULT 0")(conn)
+        + "\nUPDATE categorie SET is_narratif = 1 WHERE LOWER(nom) LIKE 'narratif%';\n"
+        + NARRATIF_SQL
+        + STRUCTURE_VERSION_SQL,
+    ),
+    (8, "Curseur de la file d'écriture différée des notes", NOTE_QUEUE_SQL),
+    (9, "Charge de travail des juges", JUDGE_WORKLOAD_SQL + workload_refresh_sql("1 = 1")),
+    (10, "Points de reprise des imports CSV", IMPORT_CHECKPOINT_SQL),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Applique les migrations en attente, chacune dans sa propre transaction."""
+    current = get_schema_version(conn)
+    applied: List[int] = []
+    for version, _description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        sql = step(conn) if callable(step) else step
+        # PRAGMA user_version est transactionnel : version et DDL sont validés ensemble.
+        conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;")
+        applied.append(version)
+    return applied
+
+
+def migrate_database(db_file: Optional[Path] = None) -> List[int]:
+    """Met à niveau une base existante (index, tables dérivées...)."""
+    db_file = db_file or DB_FILE
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    try:
+        applied = apply_migrations(conn)
+    finally:
+        conn.close()
+    descriptions = {version: description for version, description, _ in MIGRATIONS}
+    for version in applied:
+        print(f"🧱 Migration {version} appliquée : {descriptions[version]}")
+    return applied
+
 # ==============================
 # 🚀 Création automatique
 # ==============================
@@ -211,6 +836,7 @@ def init_database() -> None:
     conn.execute("PRAGMA foreign_keys = ON;")  # ⚠️ Activation obligatoire
     conn.executescript(SCHEMA_SQL)
     conn.commit()
+    apply_migrations(conn)
     conn.close()
     print(f"✅ Base de données créée avec succès : {DB_FILE.resolve()}")
 
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Flux temps réel (Server-Sent Events) du tableau des résultats.
+
+Les routes d'écriture publient des deltas dans la table ``live_event``, dans la
+même transaction que l'écriture elle-même. Le flux SSE relit cette table par
+identifiant croissant : les événements traversent ainsi les processus gunicorn
+sans courtier externe, et un client qui se reconnecte reprend au ``Last-Event-ID``.
+
+Types d'événements (``kind``) :
+    participant_score  score, bonus et notes d'un participant
+    judge_progress     nombre de notes saisies par un juge pour le gala
+    submission         soumission reçue ou retirée
+    lock               verrouillage du gala activé ou levé
+    resync             le client a manqué des événements : recharger la vue complète
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from models.db import open_standalone_connection
+from models.scoreboard import FAVORITE_BONUS
+
+DEFAULT_LIVE_CONFIG = {
+    # Intervalle de relecture de live_event par flux ouvert.
+    "LIVE_POLL_INTERVAL": 1.0,
+    # Un flux se ferme après ce délai ; EventSource se reconnecte seul (Last-Event-ID).
+    "LIVE_STREAM_MAX_SECONDS": 120.0,
+    "LIVE_KEEPALIVE_SECONDS": 15.0,
+    # Chaque flux occupe un fil du worker gthread : on en borne le nombre.
+    "LIVE_MAX_STREAMS": 2,
+}
+
+# Nombre d'événements conservés (tous galas confondus).
+LIVE_EVENT_RETENTION = 5000
+LIVE_RETRY_MS = 2000
+
+
+# ==============================
+# 📣 Publication (routes d'écriture)
+# ==============================
+def publish(conn: sqlite3.Connection, gala_id: int, kind: str, payload: Dict[str, Any]) -> int:
+    """Ajoute un événement ; visible des flux au ``commit()`` de l'appelant."""
+    event_id = conn.execute(
+        "INSERT INTO live_event (gala_id, kind, payload) VALUES (?, ?, ?)",
+        (gala_id, kind, json.dumps(payload, separators=(",", ":"))),
+    ).lastrowid
+    if event_id > LIVE_EVENT_RETENTION:
+        conn.execute("DELETE FROM live_event WHERE id <= ?", (event_id - LIVE_EVENT_RETENTION,))
+    return event_id
+
+
+def participant_score_payloads(conn: sqlite3.Connection, participant_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Scores de participants, calculés comme dans /admin/api/results."""
+    ids = sorted(set(participant_ids))
+    if not ids:
+        return []
+    placeholders = ",".join("?" for _ in ids)
+    rows = conn.execute(
+        f"""
+        SELECT
+            p.id AS participant_id,
+            p.gala_categorie_id,
+            COALESCE(sa.weighted_sum, 0) AS weighted_sum,
+            COALESCE(sa.answered_weight, 0) AS answered_weight,
+            COALESCE(sa.notes_recorded, 0) AS notes_recorded,
+            COALESCE(sa.judges_answered, 0) AS judges_answered
+        FROM participant AS p
+        LEFT JOIN score_aggregate AS sa ON sa.participant_id = p.id
+        WHERE p.id IN ({placeholders})
+        """,
+        tuple(ids),
+    ).fetchall()
+    favorite_rows = conn.execute(
+        f"""
+        SELECT cdc.participant_id, per.prenom, per.nom
+        FROM coup_de_coeur AS cdc
+        JOIN juge AS j ON j.id = cdc.juge_id
+        JOIN user AS u ON u.id = j.user_id
+        JOIN personne AS per ON per.id = u.personne_id
+        WHERE cdc.participant_id IN ({placeholders})
+        """,
+        tuple(ids),
+    ).fetchall()
+    favorites: Dict[int, List[str]] = {}
+    for row in favorite_rows:
+        favorites.setdefault(row["participant_id"], []).append(f"{row['prenom']} {row['nom']}")
+
+    payloads = []
+    for row in rows:
+        base_score = row["weighted_sum"] / row["answered_weight"] if row["answered_weight"] > 0 else None
+        names = favorites.get(row["participant_id"], [])
+        bonus_value = len(names) * FAVORITE_BONUS
+        final_score = base_score + bonus_value if base_score is not None else None
+        payloads.append(
+            {
+                "participant_id": row["participant_id"],
+                "gala_categorie_id": row["gala_categorie_id"],
+                "score_base": round(base_score, 2) if base_score is not None else None,
+                "score_bonus": round(bonus_value, 2) if bonus_value else 0.0,
+                "score_final": round(final_score, 2) if final_score is not None else None,
+                "notes_recorded": row["notes_recorded"],
+                "judges_answered": row["judges_answered"],
+                "favorites": names,
+            }
+        )
+    return payloads
+
+
+def judge_progress_payload(conn: sqlite3.Connection, juge_id: int, gala_id: int) -> Dict[str, Any]:
+    # Mêmes compteurs que l'instantané des résultats et la soumission (judge_workload) :
+    # seules les notes des catégories affectées comptent.
+    answered, expected = conn.execute(
+        """
+        SELECT COALESCE(SUM(recorded_notes), 0), COALESCE(SUM(expected_notes), 0)
+        FROM judge_workload
+        WHERE juge_id = ? AND gala_id = ?
+        """,
+        (juge_id, gala_id),
+    ).fetchone()
+    return {"juge_id": juge_id, "answered_notes": answered, "expected_notes": expected}
+
+
+def publish_note_changes(conn: sqlite3.Connection, gala_id: int, juge_id: int, participant_ids: Iterable[int]) -> None:
+    for payload in participant_score_payloads(conn, participant_ids):
+        publish(conn, gala_id, "participant_score", payload)
+    publish(conn, gala_id, "judge_progress", judge_progress_payload(conn, juge_id, gala_id))
+
+
+def publish_favorite_change(conn: sqlite3.Connection, gala_id: int, participant_ids: Iterable[Optional[int]]) -> None:
+    for payload in participant_score_payloads(conn, [pid for pid in participant_ids if pid is not None]):
+        publish(conn, gala_id, "participant_score", payload)
+
+
+# ==============================
+# 📡 Lecture (flux SSE)
+# ==============================
+_streams_lock = threading.Lock()
+_active_streams = 0
+
+
+def try_open_stream(max_streams: int) -> bool:
+    """Réserve une place de flux dans ce processus ; ``False`` si la limite est atteinte."""
+    global _active_streams
+    with _streams_lock:
+        if _active_streams >= max_streams:
+            return False
+        _active_streams += 1
+        return True
+
+
+def release_stream() -> None:
+    global _active_streams
+    with _streams_lock:
+        _active_streams -= 1
+
+
+def latest_event_id(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM live_event").fetchone()[0]
+
+
+def events_since(conn: sqlite3.Connection, gala_id: int, last_id: int, limit: int = 200) -> List[sqlite3.Row]:
+    return conn.execute(
+        "SELECT id, kind, payload FROM live_event WHERE gala_id = ? AND id > ? ORDER BY id LIMIT ?",
+        (gala_id, last_id, limit),
+    ).fetchall()
+
+
+def format_event(kind: str, data: str, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {kind}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(
+    gala_id: int,
+    last_id: Optional[int],
+    poll_interval: float,
+    max_seconds: float,
+    keepalive_seconds: float,
+) -> Iterator[str]:
+    """Générateur SSE d'un gala (une connexion hors pool pour toute sa durée)."""
+    conn = open_standalone_connection()
+    try:
+        current = latest_event_id(conn)
+        yield f"retry: {LIVE_RETRY_MS}\n\n"
+        if last_id is None:
+            last_id = current
+        elif last_id < current - LIVE_EVENT_RETENTION:
+            # Les événements manqués ont été purgés : le client recharge la vue.
+            yield format_event("resync", "{}", current)
+            last_id = current
+
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < max_seconds:
+            rows = events_since(conn, gala_id, last_id)
+            for row in rows:
+                last_id = row["id"]
+                yield format_event(row["kind"], row["payload"], row["id"])
+            now = time.monotonic()
+            if rows:
+                last_sent = now
+            elif now - last_sent >= keepalive_seconds:
+                yield ": ping\n\n"
+                last_sent = now
+            time.sleep(poll_interval)
+    finally:
+        conn.close()
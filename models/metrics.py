@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation des requêtes HTTP et SQL (optionnelle).
+
+Activée par ``METRICS_ENABLED`` (ou la variable d'environnement ``GALA_METRICS=1``),
+elle mesure pour chaque requête :
+- la durée totale ;
+- le nombre d'instructions SQL et leur durée cumulée (exécution + lecture des lignes) ;
+- l'instruction la plus lente, sous forme normalisée (valeurs remplacées par ``?``).
+
+Les connexions du pool reçoivent un curseur instrumenté (``PooledConnection.cursor_factory``) ;
+les connexions autonomes (exports, flux SSE) ne sont pas mesurées.
+
+Les agrégats par route sont exposés au format texte Prometheus par
+``/admin/api/metrics`` ; chaque processus gunicorn tient ses propres compteurs.
+L'en-tête ``X-Query-Count`` (et ``X-SQL-Time-Ms``) accompagne chaque réponse :
+un test peut ainsi détecter une régression N+1 sans lire les journaux.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, g, has_app_context, request
+
+from models import db as db_module
+
+EXTENSION_KEY = "gala_metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes des histogrammes (secondes, puis nombre d'instructions SQL).
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+SQL_TEXT_MAX = 300
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Texte d'une instruction sans ses valeurs : ``IN (1, 2, 3)`` devient ``IN (?...)``."""
+    text = " ".join(sql.split())
+    text = _STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?...)", text)
+    if len(text) > SQL_TEXT_MAX:
+        text = text[:SQL_TEXT_MAX] + "…"
+    return text
+
+
+# ==============================
+# 🧮 Mesures d'une requête
+# ==============================
+class RequestStats:
+    """Instructions SQL d'une requête HTTP : ``[texte, durée]`` par exécution."""
+
+    __slots__ = ("started", "statements", "sql_time")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.statements: List[List[Any]] = []
+        self.sql_time = 0.0
+
+    def begin(self, sql: str) -> List[Any]:
+        entry = [sql, 0.0]
+        self.statements.append(entry)
+        return entry
+
+    def add(self, entry: List[Any], seconds: float) -> None:
+        entry[1] += seconds
+        self.sql_time += seconds
+
+    @property
+    def query_count(self) -> int:
+        return len(self.statements)
+
+    def slowest(self) -> Optional[Tuple[str, float]]:
+        if not self.statements:
+            return None
+        sql, seconds = max(self.statements, key=lambda entry: entry[1])
+        return sql, seconds
+
+
+def _current_stats() -> Optional[RequestStats]:
+    return g.get("_request_metrics") if has_app_context() else None
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Curseur qui impute le temps d'exécution et de lecture à la requête HTTP en cours."""
+
+    _stats: Optional[RequestStats] = None
+    _entry: Optional[List[Any]] = None
+
+    def _timed(self, method, *args):
+        stats, entry = self._stats, self._entry
+        if stats is None or entry is None:
+            return method(*args)
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            stats.add(entry, time.perf_counter() - started)
+
+    def _start(self, sql: str) -> None:
+        self._stats = _current_stats()
+        self._entry = self._stats.begin(sql) if self._stats is not None else None
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        self._start(sql)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        self._start(sql)
+        return self._timed(super().executemany, sql, parameters)
+
+    def fetchone(self) -> Any:
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self._timed(super().fetchmany, size)
+
+    def fetchall(self) -> list:
+        return self._timed(super().fetchall)
+
+    def __next__(self) -> Any:
+        return self._timed(super().__next__)
+
+
+def instrument_connection(conn: sqlite3.Connection) -> None:
+    conn.cursor_factory = InstrumentedCursor
+
+
+# ==============================
+# 📈 Agrégats par route
+# ==============================
+class Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """(borne « le », nombre cumulé), +Inf compris."""
+        cumulative = 0
+        samples = []
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            samples.append((_format_number(bound), cumulative))
+        samples.append(("+Inf", self.count))
+        return samples
+
+
+class RouteMetrics:
+    __slots__ = ("duration", "queries", "sql_time", "slowest_seconds", "slowest_sql")
+
+    def __init__(self) -> None:
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_time = Histogram(DURATION_BUCKETS)
+        self.slowest_seconds = 0.0
+        self.slowest_sql = ""
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, endpoint: str, method: str, status: int, wall: float, stats: RequestStats) -> None:
+        slowest = stats.slowest()
+        with self._lock:
+            route = self.routes.get((endpoint, method))
+            if route is None:
+                route = self.routes[(endpoint, method)] = RouteMetrics()
+            route.duration.observe(wall)
+            route.queries.observe(stats.query_count)
+            route.sql_time.observe(stats.sql_time)
+            if slowest is not None and slowest[1] >= route.slowest_seconds:
+                route.slowest_seconds = slowest[1]
+                route.slowest_sql = normalize_sql(slowest[0])
+            key = (endpoint, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self, extra: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        lines: List[str] = []
+        with self._lock:
+            routes = sorted(self.routes.items())
+            responses = sorted(self.responses.items())
+
+            lines += [
+                "# HELP gala_http_responses_total Reponses HTTP par route et statut.",
+                "# TYPE gala_http_responses_total counter",
+            ]
+            for (endpoint, method, status), count in responses:
+                lines.append(_sample("gala_http_responses_total", {"endpoint": endpoint, "method": method, "status": status}, count))
+
+            for name, attribute, help_text in (
+                ("gala_http_request_duration_seconds", "duration", "Duree totale des requetes HTTP."),
+                ("gala_sql_queries_per_request", "queries", "Instructions SQL executees par requete."),
+                ("gala_sql_time_per_request_seconds", "sql_time", "Temps SQL cumule par requete."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (endpoint, method), route in routes:
+                    histogram: Histogram = getattr(route, attribute)
+                    labels = {"endpoint": endpoint, "method": method}
+                    for bound, cumulative in histogram.samples():
+                        lines.append(_sample(f"{name}_bucket", {**labels, "le": bound}, cumulative))
+                    lines.append(_sample(f"{name}_sum", labels, histogram.total))
+                    lines.append(_sample(f"{name}_count", labels, histogram.count))
+
+            lines += [
+                "# HELP gala_sql_slowest_statement_seconds Instruction SQL la plus lente observee par route.",
+                "# TYPE gala_sql_slowest_statement_seconds gauge",
+            ]
+            for (endpoint, method), route in routes:
+                if route.slowest_sql:
+                    labels = {"endpoint": endpoint, "method": method, "statement": route.slowest_sql}
+                    lines.append(_sample("gala_sql_slowest_statement_seconds", labels, route.slowest_seconds))
+
+        for prefix, values in (extra or {}).items():
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(_sample(f"{prefix}_{key}", {}, value))
+
+        lines.append("# TYPE gala_metrics_start_time_seconds gauge")
+        lines.append(_sample("gala_metrics_start_time_seconds", {"pid": os.getpid()}, self.started_at))
+        return "\n".join(lines) + "\n"
+
+
+def _format_number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: Dict[str, Any], value: float) -> str:
+    rendered = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {_format_number(value)}" if rendered else f"{name} {_format_number(value)}"
+
+
+# ==============================
+# 🔌 Branchement Flask
+# ==============================
+def init_app(app: Flask) -> None:
+    """Branche l'instrumentation si ``METRICS_ENABLED`` (idempotent)."""
+    if EXTENSION_KEY in app.extensions:
+        return
+    app.config.setdefault("METRICS_ENABLED", os.environ.get("GALA_METRICS") == "1")
+    app.config.setdefault("METRICS_QUERY_HEADER", True)
+    app.extensions[EXTENSION_KEY] = None
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    app.extensions[EXTENSION_KEY] = MetricsRegistry()
+    db_module.init_app(app)
+    db_module.get_pool(app).add_connect_hook(instrument_connection)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def get_registry(app: Optional[Flask] = None) -> Optional[MetricsRegistry]:
+    app = app or current_app._get_current_object()
+    return app.extensions.get(EXTENSION_KEY)
+
+
+def _start_request() -> None:
+    g._request_metrics = RequestStats()
+
+
+def _finish_request(response):
+    stats: Optional[RequestStats] = g.pop("_request_metrics", None)
+    if stats is None:
+        return response
+    wall = time.perf_counter() - stats.started
+    get_registry().observe(request.endpoint or "<inconnue>", request.method, response.status_code, wall, stats)
+    if current_app.config["METRICS_QUERY_HEADER"]:
+        response.headers["X-Query-Count"] = str(stats.query_count)
+        response.headers["X-SQL-Time-Ms"] = f"{stats.sql_time * 1000:.2f}"
+    return response
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Catégorie partagée « Narratif (général) » : correspondances en cache.
+
+Chaque compagnie inscrite à un gala possède un participant dans la catégorie
+narrative (``categorie.is_narratif = 1``) qui porte les réponses communes à
+toutes ses candidatures. Les routes juge et admin ont besoin, pour un gala, des
+``gala_categorie`` narratives et du participant narratif de chaque compagnie.
+
+Ces correspondances sont gardées en mémoire par gala et validées par la
+version de structure du gala (``structure_version``, incrémentée par trigger
+à chaque ajout de participant, de catégorie...). Un worker voit donc les
+écritures faites par les autres processus ; les notes n'invalident rien.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models import db as db_module
+from models.data_version import structure_version
+
+# Nombre de galas gardés en mémoire (les plus récemment consultés).
+MAX_CACHED_GALAS = 32
+
+
+@dataclass(frozen=True)
+class GalaNarratif:
+    version: str
+    category_ids: Tuple[int, ...]
+    # compagnie_id -> (participant_id, gala_categorie_id)
+    participants: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+
+    def participant_for(self, compagnie_id: Optional[int]) -> Optional[Dict[str, int]]:
+        entry = self.participants.get(compagnie_id) if compagnie_id is not None else None
+        if entry is None:
+            return None
+        return {"id": entry[0], "gala_categorie_id": entry[1]}
+
+
+# Clé : (fichier de base, gala_id) ; le fichier distingue les bases de test.
+_cache: "OrderedDict[Tuple[str, int], GalaNarratif]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(gala_id: int) -> Tuple[str, int]:
+    return str(db_module.DB_PATH), gala_id
+
+
+def _load(conn: sqlite3.Connection, gala_id: int, version: str) -> GalaNarratif:
+    category_ids = tuple(
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT gc.id
+            FROM gala_categorie AS gc
+            JOIN categorie AS c ON c.id = gc.categorie_id
+            WHERE gc.gala_id = ? AND c.is_narratif = 1
+            ORDER BY gc.id
+            """,
+            (gala_id,),
+        )
+    )
+    participants: Dict[int, Tuple[int, int]] = {}
+    if category_ids:
+        placeholders = ",".join("?" for _ in category_ids)
+        rows = conn.execute(
+            f"""
+            SELECT id, compagnie_id, gala_categorie_id
+            FROM participant
+            WHERE gala_categorie_id IN ({placeholders})
+            ORDER BY id
+            """,
+            category_ids,
+        ).fetchall()
+        for row in rows:
+            # Le plus ancien participant narratif d'une compagnie fait foi.
+            participants.setdefault(row[1], (row[0], row[2]))
+    return GalaNarratif(version=version, category_ids=category_ids, participants=participants)
+
+
+def gala_narratif(conn: sqlite3.Connection, gala_id: int, version: Optional[str] = None) -> GalaNarratif:
+    """Correspondances narratives d'un gala.
+
+    ``version`` : version de structure déjà lue par l'appelant (évite une requête).
+    """
+    if version is None:
+        version = structure_version(conn, gala_id)
+    key = _key(gala_id)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached.version == version:
+            _cache.move_to_end(key)
+            return cached
+
+    loaded = _load(conn, gala_id, version)
+    with _lock:
+        _cache[key] = loaded
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_GALAS:
+            _cache.popitem(last=False)
+    return loaded
+
+
+def narratif_category_ids(conn: sqlite3.Connection, gala_ids: List[int]) -> Dict[int, List[int]]:
+    """gala_id -> gala_categorie narratives, pour plusieurs galas."""
+    return {gala_id: list(gala_narratif(conn, gala_id).category_ids) for gala_id in gala_ids}
+
+
+def invalidate(gala_id: Optional[int] = None) -> None:
+    """Oublie un gala (ou tout le cache) ; utile après une écriture hors triggers."""
+    with _lock:
+        if gala_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(_key(gala_id), None)
@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+"""
+File d'écriture différée (write-behind) des notes et coups de cœur des juges.
+
+SQLite n'admet qu'un écrivain à la fois : quand quarante juges enregistrent en
+même temps, chaque ``commit`` de la sauvegarde automatique attendait son tour sur
+le verrou du fichier (upsert, triggers ``score_aggregate`` / ``data_version``,
+deltas ``live_event``). Avec ``NOTE_WRITE_BEHIND`` :
+
+- la requête valide la mutation puis l'ajoute à un journal SQLite séparé
+  (``<base>-notes``, ``synchronous = FULL``) : une insertion sans trigger, sur un
+  autre fichier que la base principale. La réponse part aussitôt avec le numéro
+  de séquence attribué (``seq``) ;
+- un fil écrivain par processus vide le journal par lots, un lot par transaction
+  (``BEGIN IMMEDIATE``), deltas temps réel compris ;
+- la dernière séquence appliquée (``note_queue_cursor``) est écrite dans la même
+  transaction que les notes : après un arrêt brutal, le journal est rejoué
+  exactement à partir de là, par n'importe quel worker ;
+- ``flush_pending(conn)`` est la barrière des routes qui doivent voir toutes les
+  notes acceptées (soumission d'un juge, verrouillage d'un gala) : elle applique
+  le journal dans leur propre transaction d'écriture, quel que soit le worker qui
+  a reçu les notes ;
+- les lectures d'un juge (``sync_judge``) appliquent d'abord ses mutations en
+  attente : il relit toujours ce qu'il vient d'enregistrer.
+
+Une mutation qui arrive à l'application après le verrouillage du gala ou la
+soumission du juge est écartée (« rejected »), comme l'aurait été la requête.
+Au-delà de ``NOTE_QUEUE_MAX_PENDING`` mutations en attente, la requête qui ajoute
+applique elle-même le journal (contre-pression) au lieu de laisser la file grossir.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import Flask, current_app
+
+from models import db as db_module
+from models import live
+
+EXTENSION_KEY = "gala_note_queue"
+
+DEFAULT_NOTE_QUEUE_CONFIG = {
+    # Journal des mutations ; None = fichier « <DB_PATH>-notes » à côté de la base.
+    "NOTE_QUEUE_PATH": None,
+    "NOTE_QUEUE_BATCH_SIZE": 500,
+    # Délai maximal entre deux passages du fil écrivain (il est aussi réveillé à chaque ajout).
+    "NOTE_QUEUE_INTERVAL": 0.05,
+    "NOTE_QUEUE_MAX_PENDING": 2000,
+    "NOTE_QUEUE_SYNCHRONOUS": "FULL",
+}
+
+_create_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+NOTE = "note"
+FAVORITE_SET = "favorite_set"
+FAVORITE_CLEAR = "favorite_clear"
+
+# Les drapeaux has_* conservent la valeur existante d'un champ absent de la requête.
+NOTE_UPSERT_SQL = """
+    INSERT INTO note (juge_id, participant_id, question_id, valeur, commentaire)
+    VALUES (:juge_id, :participant_id, :question_id, :valeur, :commentaire)
+    ON CONFLICT(juge_id, participant_id, question_id)
+    DO UPDATE SET
+        valeur = CASE WHEN :has_valeur THEN excluded.valeur ELSE note.valeur END,
+        commentaire = CASE WHEN :has_commentaire THEN excluded.commentaire ELSE note.commentaire END
+"""
+
+FAVORITE_UPSERT_SQL = """
+    INSERT INTO coup_de_coeur (juge_id, gala_id, participant_id)
+    VALUES (?, ?, ?)
+    ON CONFLICT(juge_id, gala_id)
+    DO UPDATE SET participant_id = excluded.participant_id, created_at = CURRENT_TIMESTAMP
+"""
+
+JOURNAL_SQL = """
+CREATE TABLE IF NOT EXISTS mutation (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    gala_id INTEGER NOT NULL,
+    juge_id INTEGER NOT NULL,
+    participant_id INTEGER,
+    question_id INTEGER,
+    valeur INTEGER,
+    commentaire TEXT,
+    has_valeur INTEGER NOT NULL DEFAULT 0,
+    has_commentaire INTEGER NOT NULL DEFAULT 0,
+    accepted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mutation_juge ON mutation (juge_id, seq);
+"""
+
+MUTATION_COLUMNS = (
+    "kind, gala_id, juge_id, participant_id, question_id, valeur, commentaire, has_valeur, has_commentaire, accepted_at"
+)
+
+Mutation = Tuple[Any, ...]
+
+
+def note_upsert_params(juge_id: int, participant_id: int, question_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "juge_id": juge_id,
+        "participant_id": participant_id,
+        "question_id": question_id,
+        "valeur": fields.get("valeur"),
+        "commentaire": fields.get("commentaire"),
+        "has_valeur": "valeur" in fields,
+        "has_commentaire": "commentaire" in fields,
+    }
+
+
+def note_mutation(gala_id: int, juge_id: int, participant_id: int, question_id: int, fields: Dict[str, Any]) -> Mutation:
+    return (
+        NOTE, gala_id, juge_id, participant_id, question_id,
+        fields.get("valeur"), fields.get("commentaire"), int("valeur" in fields), int("commentaire" in fields),
+    )
+
+
+def favorite_mutation(gala_id: int, juge_id: int, participant_id: Optional[int]) -> Mutation:
+    """Coup de cœur choisi (``participant_id``) ou retiré (``None``)."""
+    kind = FAVORITE_CLEAR if participant_id is None else FAVORITE_SET
+    return (kind, gala_id, juge_id, participant_id, None, None, None, 0, 0)
+
+
+class NoteQueue:
+    def __init__(
+        self,
+        db_path: Path,
+        journal_path: Path,
+        batch_size: int = 500,
+        interval: float = 0.05,
+        max_pending: int = 2000,
+        synchronous: str = "FULL",
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.journal_path = Path(journal_path)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.synchronous = synchronous
+
+        # Une connexion au journal par fil (ajouts concurrents depuis les requêtes).
+        self._local = threading.local()
+        # Une seule application à la fois dans le processus ; entre processus,
+        # BEGIN IMMEDIATE sur la base principale sérialise.
+        self._apply_lock = threading.Lock()
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        # Plus haute séquence connue comme appliquée (indication : un autre worker peut être plus loin).
+        self._applied_seq = 0
+        self._purged_seq = -1
+        self._last_seq = 0
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "accepted": 0,
+            "applied": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batch_max": 0,
+            # Barrières (soumission, verrou) qui ont trouvé des mutations en attente ; leur
+            # transaction peut encore être annulée, elles ne comptent donc pas dans « applied ».
+            "barrier_flushes": 0,
+            "backpressure_drains": 0,
+            "judge_syncs": 0,
+            "errors": 0,
+            "last_batch_ms": 0.0,
+        }
+
+        with self._journal() as journal:
+            journal.executescript(JOURNAL_SQL)
+        self._align_sequence()
+
+    # ------------------------------
+    # Connexions
+    # ------------------------------
+    def _journal(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.journal_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute(f"PRAGMA synchronous = {self.synchronous};")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _writer(self) -> sqlite3.Connection:
+        # Appelée sous _apply_lock.
+        if self._writer_conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._writer_conn = db_module.configure_connection(conn)
+        return self._writer_conn
+
+    def _align_sequence(self) -> None:
+        """Un journal recréé (supprimé à la main) ne doit pas réutiliser des séquences déjà appliquées."""
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            applied = _applied_seq(conn)
+        finally:
+            conn.close()
+        journal = self._journal()
+        with journal:
+            current = journal.execute("SELECT seq FROM sqlite_sequence WHERE name = 'mutation'").fetchone()
+            if current is None:
+                journal.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('mutation', ?)", (applied,))
+            elif current[0] < applied:
+                journal.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'mutation'", (applied,))
+        self._applied_seq = applied
+
+    # ------------------------------
+    # Ajout (fil de la requête)
+    # ------------------------------
+    def submit(self, mutations: Iterable[Mutation]) -> int:
+        """Ajoute des mutations au journal (une transaction) ; retourne la séquence de la dernière."""
+        accepted_at = time.time()
+        journal = self._journal()
+        seq = 0
+        count = 0
+        with journal:
+            for mutation in mutations:
+                seq = journal.execute(
+                    f"INSERT INTO mutation ({MUTATION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*mutation, accepted_at),
+                ).lastrowid
+                count += 1
+        with self._lock:
+            self._stats["accepted"] += count
+            self._last_seq = max(self._last_seq, seq)
+        self._ensure_writer()
+        if seq - self._applied_seq > self.max_pending:
+            self._count("backpressure_drains")
+            self.drain()
+        else:
+            self._wakeup.set()
+        return seq
+
+    # ------------------------------
+    # Application (fil écrivain, barrières)
+    # ------------------------------
+    def apply_pending(self, conn: sqlite3.Connection, limit: Optional[int] = None) -> Tuple[int, int, int]:
+        """Applique les mutations non appliquées dans la transaction d'écriture ouverte de ``conn``.
+
+        Retourne (mutations traitées, mutations écartées, séquence atteinte) ; le
+        ``commit`` revient à l'appelant.
+        """
+        applied_seq = _applied_seq(conn)
+        rows = self._journal().execute(
+            f"SELECT seq, {MUTATION_COLUMNS} FROM mutation WHERE seq > ? ORDER BY seq LIMIT ?",
+            (applied_seq, -1 if limit is None else limit),
+        ).fetchall()
+        if not rows:
+            return 0, 0, applied_seq
+
+        closed: Dict[Tuple[int, int], bool] = {}
+        note_targets: Dict[Tuple[int, int], set] = {}
+        favorite_targets: Dict[int, set] = {}
+        rejected = 0
+        for seq, kind, gala_id, juge_id, participant_id, question_id, valeur, commentaire, has_valeur, has_commentaire, _ in rows:
+            key = (gala_id, juge_id)
+            if key not in closed:
+                closed[key] = _is_closed(conn, gala_id, juge_id)
+            if closed[key]:
+                rejected += 1
+                continue
+            try:
+                if kind == NOTE:
+                    conn.execute(
+                        NOTE_UPSERT_SQL,
+                        {
+                            "juge_id": juge_id,
+                            "participant_id": participant_id,
+                            "question_id": question_id,
+                            "valeur": valeur,
+                            "commentaire": commentaire,
+                            "has_valeur": has_valeur,
+                            "has_commentaire": has_commentaire,
+                        },
+                    )
+                    note_targets.setdefault(key, set()).add(participant_id)
+                    continue
+                previous = conn.execute(
+                    "SELECT participant_id FROM coup_de_coeur WHERE juge_id = ? AND gala_id = ?",
+                    (juge_id, gala_id),
+                ).fetchone()
+                if kind == FAVORITE_SET:
+                    conn.execute(FAVORITE_UPSERT_SQL, (juge_id, gala_id, participant_id))
+                else:
+                    conn.execute("DELETE FROM coup_de_coeur WHERE juge_id = ? AND gala_id = ?", (juge_id, gala_id))
+                targets = favorite_targets.setdefault(gala_id, set())
+                targets.update(pid for pid in (previous[0] if previous else None, participant_id) if pid is not None)
+            except sqlite3.IntegrityError:
+                # Participant ou question supprimé depuis l'acceptation.
+                rejected += 1
+
+        for (gala_id, juge_id), participant_ids in note_targets.items():
+            live.publish_note_changes(conn, gala_id, juge_id, participant_ids)
+        for gala_id, participant_ids in favorite_targets.items():
+            live.publish_favorite_change(conn, gala_id, participant_ids)
+        last_seq = rows[-1][0]
+        conn.execute("UPDATE note_queue_cursor SET applied_seq = ? WHERE id = 1", (last_seq,))
+        return len(rows), rejected, last_seq
+
+    def drain(self) -> int:
+        """Applique tout le journal, par lots d'une transaction chacun ; retourne le nombre de mutations."""
+        total = 0
+        with self._apply_lock:
+            # Rien en attente : pas de BEGIN IMMEDIATE (le verrou d'écriture reste aux requêtes).
+            if not self._has_pending():
+                return 0
+            conn = self._writer()
+            while True:
+                started = time.perf_counter()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    count, rejected, applied_seq = self.apply_pending(conn, self.batch_size)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._purge(applied_seq)
+                if count:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    with self._lock:
+                        self._stats["applied"] += count - rejected
+                        self._stats["rejected"] += rejected
+                        self._stats["batches"] += 1
+                        self._stats["batch_max"] = max(self._stats["batch_max"], count)
+                        self._stats["last_batch_ms"] = round(elapsed_ms, 3)
+                total += count
+                if count < self.batch_size:
+                    return total
+
+    def barrier(self, conn: sqlite3.Connection) -> int:
+        """Applique tout le journal dans la transaction (BEGIN IMMEDIATE) ouverte par l'appelant."""
+        count, _, _ = self.apply_pending(conn)
+        if count:
+            self._count("barrier_flushes")
+        return count
+
+    def sync_judge(self, juge_id: int, participant_ids: Optional[Iterable[int]] = None) -> bool:
+        """Applique le journal si ce juge y a des mutations en attente (relecture de ses saisies).
+
+        Avec ``participant_ids``, seules comptent les notes de ces participants et
+        les coups de cœur. Retourne vrai si le journal a été appliqué.
+        """
+        sql = "SELECT 1 FROM mutation WHERE juge_id = ? AND seq > ?"
+        params: list = [juge_id, self._applied_seq]
+        if participant_ids is not None:
+            ids = sorted(set(participant_ids))
+            sql += f" AND (kind != '{NOTE}' OR participant_id IN ({','.join('?' for _ in ids)}))"
+            params += ids
+        if not self._journal().execute(sql + " LIMIT 1", params).fetchone():
+            return False
+        self._count("judge_syncs")
+        self.drain()
+        return True
+
+    def _has_pending(self) -> bool:
+        return self._journal().execute("SELECT 1 FROM mutation WHERE seq > ? LIMIT 1", (self._applied_seq,)).fetchone() is not None
+
+    def _purge(self, applied_seq: int) -> None:
+        with self._lock:
+            if applied_seq <= self._purged_seq:
+                return
+            self._applied_seq = max(self._applied_seq, applied_seq)
+            self._purged_seq = applied_seq
+        journal = self._journal()
+        with journal:
+            journal.execute("DELETE FROM mutation WHERE seq <= ?", (applied_seq,))
+
+    # ------------------------------
+    # Fil écrivain
+    # ------------------------------
+    def _ensure_writer(self) -> None:
+        # Après un fork (gunicorn preload), le fil du processus parent n'existe plus.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._apply_lock = threading.Lock()
+                self._writer_conn = None
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="note-queue-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:  # le fil ne doit pas mourir : le journal reste à rejouer
+                self._count("errors")
+                logger.exception("File des notes : échec d'application")
+                self._stopping.wait(max(self.interval, 1.0))
+
+    def start(self) -> None:
+        """Démarre le fil écrivain (qui rejoue aussitôt un journal laissé par un arrêt brutal)."""
+        self._ensure_writer()
+        self._wakeup.set()
+
+    def shutdown(self, flush: bool = True) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5.0)
+        if flush:
+            self.drain()
+        with self._apply_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._journal().execute(
+            "SELECT COUNT(*), MIN(accepted_at) FROM mutation WHERE seq > ?", (self._applied_seq,)
+        ).fetchone()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["last_seq"] = self._last_seq
+            stats["applied_seq"] = self._applied_seq
+        stats["pending"] = row[0]
+        stats["oldest_pending_age_seconds"] = round(time.time() - row[1], 3) if row[1] is not None else 0.0
+        stats["max_pending"] = self.max_pending
+        return stats
+
+
+def _applied_seq(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT applied_seq FROM note_queue_cursor WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def _is_closed(conn: sqlite3.Connection, gala_id: int, juge_id: int) -> bool:
+    return bool(
+        conn.execute(
+            """
+            SELECT EXISTS (SELECT 1 FROM gala_lock WHERE gala_id = ?)
+                OR EXISTS (SELECT 1 FROM juge_gala_submission WHERE juge_id = ? AND gala_id = ?)
+            """,
+            (gala_id, juge_id, gala_id),
+        ).fetchone()[0]
+    )
+
+
+# ==============================
+# 🔌 Branchement Flask
+# ==============================
+def init_app(app: Flask) -> None:
+    """Déclare la configuration (idempotent) ; la file est créée au premier usage."""
+    if EXTENSION_KEY in app.extensions:
+        return
+    app.config.setdefault("NOTE_WRITE_BEHIND", os.environ.get("GALA_NOTE_WRITE_BEHIND") == "1")
+    for key, value in DEFAULT_NOTE_QUEUE_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.extensions[EXTENSION_KEY] = None
+
+
+def get_queue(app: Optional[Flask] = None) -> Optional[NoteQueue]:
+    """File de l'application ; ``None`` si ``NOTE_WRITE_BEHIND`` est faux (écriture directe)."""
+    app = app or current_app._get_current_object()
+    if EXTENSION_KEY not in app.extensions:
+        raise RuntimeError("models.note_queue.init_app() n'a pas ete appele pour cette application.")
+    if not app.config["NOTE_WRITE_BEHIND"]:
+        return None
+    queue = app.extensions[EXTENSION_KEY]
+    if queue is not None:
+        return queue
+    with _create_lock:
+        queue = app.extensions[EXTENSION_KEY]
+        if queue is not None:
+            return queue
+        db_path = db_module.DB_PATH
+        journal_path = app.config["NOTE_QUEUE_PATH"] or db_path.with_name(db_path.name + "-notes")
+        queue = NoteQueue(
+            db_path,
+            journal_path,
+            batch_size=app.config["NOTE_QUEUE_BATCH_SIZE"],
+            interval=app.config["NOTE_QUEUE_INTERVAL"],
+            max_pending=app.config["NOTE_QUEUE_MAX_PENDING"],
+            synchronous=app.config["NOTE_QUEUE_SYNCHRONOUS"],
+        )
+        app.extensions[EXTENSION_KEY] = queue
+        queue.start()
+    return queue
+
+
+def flush_pending(conn: sqlite3.Connection) -> int:
+    """Barrière : à appeler juste après ``BEGIN IMMEDIATE`` dans les routes qui figent des notes."""
+    queue = get_queue() if EXTENSION_KEY in current_app.extensions else None
+    return queue.barrier(conn) if queue is not None else 0
+
+
+def sync_judge(juge_id: int, participant_ids: Optional[Iterable[int]] = None) -> bool:
+    queue = get_queue() if EXTENSION_KEY in current_app.extensions else None
+    return queue.sync_judge(juge_id, participant_ids) if queue is not None else False
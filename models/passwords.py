@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Hachage des mots de passe hors du fil de la requête, dans un pool borné.
+
+``generate_password_hash`` / ``check_password_hash`` (scrypt ou pbkdf2) coûtent des
+dizaines de millisecondes de CPU chacun. Quand tous les juges se connectent dans les
+minutes qui précèdent le gala, ces calculs s'empilaient sur les fils du serveur.
+Ils passent désormais par un ``ThreadPoolExecutor`` de ``PASSWORD_HASH_WORKERS`` fils
+(hashlib relâche le GIL pendant le calcul) :
+- au plus ``PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_PENDING`` calculs en cours ou
+  en attente ; au-delà, ``HasherBusy`` (la route répond 503 avec ``Retry-After``) ;
+- une requête n'attend pas plus de ``PASSWORD_HASH_TIMEOUT`` secondes.
+
+Les paramètres (``PASSWORD_HASH_METHOD``, ``PASSWORD_SALT_LENGTH``) sont configurables ;
+un hash produit avec d'anciens paramètres est recalculé à la connexion suivante
+(``needs_rehash``), le mot de passe en clair n'étant disponible qu'à ce moment-là.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+EXTENSION_KEY = "gala_passwords"
+
+DEFAULT_PASSWORD_CONFIG = {
+    # Méthode werkzeug (« scrypt », « pbkdf2:sha256:600000 »...) ; None = défaut de werkzeug.
+    "PASSWORD_HASH_METHOD": None,
+    "PASSWORD_SALT_LENGTH": 16,
+    "PASSWORD_HASH_WORKERS": 2,
+    "PASSWORD_HASH_MAX_PENDING": 32,
+    "PASSWORD_HASH_TIMEOUT": 10.0,
+}
+
+# Préfixe « méthode$ » effectivement écrit par werkzeug pour une méthode configurée
+# (« pbkdf2 » devient « pbkdf2:sha256:1000000 ») ; calculé une fois par méthode.
+_method_prefixes: Dict[Optional[str], str] = {}
+_prefix_lock = threading.Lock()
+
+
+class HasherBusy(RuntimeError):
+    """Trop de calculs de hash en cours ou en attente (ou délai dépassé)."""
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        method: Optional[str] = None,
+        salt_length: int = 16,
+        workers: int = 2,
+        max_pending: int = 32,
+        timeout: float = 10.0,
+    ) -> None:
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        # Les fils du pool ne démarrent qu'au premier calcul.
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected_busy": 0, "in_flight": 0}
+
+    def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected_busy")
+            raise HasherBusy("File de hachage pleine.")
+        with self._lock:
+            self._stats["in_flight"] += 1
+        try:
+            future: Future = self._executor.submit(self._call, func, *args)
+        except BaseException:
+            self._release()
+            raise
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Le calcul se termine en arrière-plan ; sa place n'est rendue qu'à ce moment.
+            self._count("rejected_busy")
+            raise HasherBusy("Delai de hachage depasse.") from None
+
+    def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        # Place rendue avant que le résultat ne soit visible de l'appelant.
+        try:
+            return func(*args)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._stats["in_flight"] -= 1
+        self._slots.release()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _generate(self, password: str, salt_length: Optional[int] = None) -> str:
+        kwargs: Dict[str, Any] = {"salt_length": salt_length or self.salt_length}
+        if self.method:
+            kwargs["method"] = self.method
+        return generate_password_hash(password, **kwargs)
+
+    def hash(self, password: str) -> str:
+        password_hash = self._run(self._generate, password)
+        self._count("hashed")
+        return password_hash
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        valid = self._run(check_password_hash, password_hash, password)
+        self._count("verified")
+        return valid
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Vrai si ``password_hash`` n'a pas été produit avec la méthode et le sel configurés."""
+        method, _, rest = password_hash.partition("$")
+        salt = rest.partition("$")[0]
+        return method != self._method_prefix() or len(salt) != self.salt_length
+
+    def rehash(self, password: str) -> str:
+        password_hash = self.hash(password)
+        self._count("rehashed")
+        return password_hash
+
+    def _method_prefix(self) -> str:
+        with _prefix_lock:
+            prefix = _method_prefixes.get(self.method)
+        if prefix is None:
+            # Un hash (au sel minimal) suffit à connaître les paramètres complets retenus par werkzeug.
+            prefix = self._run(self._generate, "", 1).partition("$")[0]
+            with _prefix_lock:
+                _method_prefixes[self.method] = prefix
+        return prefix
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["max_pending"] = self.max_pending
+        return stats
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def init_app(app: Flask) -> None:
+    """Déclare la configuration du pool de hachage (idempotent, pool créé au premier usage)."""
+    if EXTENSION_KEY in app.extensions:
+        return
+    for key, value in DEFAULT_PASSWORD_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.extensions[EXTENSION_KEY] = None
+
+
+def get_hasher(app: Optional[Flask] = None) -> PasswordHasher:
+    app = app or current_app._get_current_object()
+    if EXTENSION_KEY not in app.extensions:
+        raise RuntimeError("models.passwords.init_app() n'a pas ete appele pour cette application.")
+    hasher = app.extensions[EXTENSION_KEY]
+    if hasher is None:
+        hasher = PasswordHasher(
+            method=app.config["PASSWORD_HASH_METHOD"],
+            salt_length=app.config["PASSWORD_SALT_LENGTH"],
+            workers=app.config["PASSWORD_HASH_WORKERS"],
+            max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+            timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+        )
+        app.extensions[EXTENSION_KEY] = hasher
+    return hasher
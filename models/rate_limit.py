@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Limitation des tentatives de connexion et d'inscription (seaux à jetons en mémoire).
+
+Chaque clé (nom d'utilisateur, adresse IP) possède un seau de ``capacity`` jetons,
+rempli à raison de ``per_minute`` jetons par minute ; une tentative consomme un
+jeton et est refusée (429, ``Retry-After``) quand le seau est vide. Le refus a lieu
+avant tout calcul de hash : une attaque par force brute ne consomme plus de CPU.
+
+Le seau par IP est large (les juges d'une même salle partagent souvent l'adresse
+du Wi-Fi) ; le seau par utilisateur, étroit, est remis à plein après une connexion
+réussie. Les seaux vivent dans le processus (un jeu par worker gunicorn) ; au-delà de
+``max_keys`` clés, les moins récemment utilisées sont oubliées.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, current_app
+
+EXTENSION_KEY = "gala_rate_limit"
+
+DEFAULT_RATE_LIMIT_CONFIG = {
+    "AUTH_RATE_LIMIT_USER_BURST": 5,
+    "AUTH_RATE_LIMIT_USER_PER_MINUTE": 2.0,
+    "AUTH_RATE_LIMIT_IP_BURST": 60,
+    "AUTH_RATE_LIMIT_IP_PER_MINUTE": 30.0,
+    "AUTH_RATE_LIMIT_MAX_KEYS": 10000,
+}
+
+
+class TokenBucketLimiter:
+    def __init__(self, capacity: float, per_minute: float, max_keys: int = 10000) -> None:
+        self.capacity = float(capacity)
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # clé -> [jetons, instant du dernier calcul]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._stats = {"allowed": 0, "throttled": 0, "evictions": 0}
+
+    def consume(self, key: str, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Consomme un jeton : (accepté, secondes avant le prochain jeton si refusé)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.capacity, now]
+                self._evict()
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                self._stats["allowed"] += 1
+                return True, 0.0
+            self._stats["throttled"] += 1
+            retry_after = (1.0 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+            return False, retry_after
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _evict(self) -> None:
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["keys"] = len(self._buckets)
+        return stats
+
+
+class AuthRateLimiter:
+    """Seaux par utilisateur et par IP pour ``/auth/login`` et ``/auth/register``."""
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        max_keys = config["AUTH_RATE_LIMIT_MAX_KEYS"]
+        self.users = TokenBucketLimiter(config["AUTH_RATE_LIMIT_USER_BURST"], config["AUTH_RATE_LIMIT_USER_PER_MINUTE"], max_keys)
+        self.ips = TokenBucketLimiter(config["AUTH_RATE_LIMIT_IP_BURST"], config["AUTH_RATE_LIMIT_IP_PER_MINUTE"], max_keys)
+
+    def check(self, ip: Optional[str], username: Optional[str] = None) -> Optional[float]:
+        """``None`` si la tentative est permise, sinon le délai (secondes) à respecter."""
+        allowed, retry_after = self.ips.consume(ip or "-")
+        if not allowed:
+            return retry_after
+        if username:
+            allowed, retry_after = self.users.consume(username)
+            if not allowed:
+                return retry_after
+        return None
+
+    def succeeded(self, username: str) -> None:
+        self.users.reset(username)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **{f"user_{key}": value for key, value in self.users.stats().items()},
+            **{f"ip_{key}": value for key, value in self.ips.stats().items()},
+        }
+
+
+def init_app(app: Flask) -> None:
+    """Déclare la configuration (idempotent) ; les seaux sont créés au premier usage."""
+    if EXTENSION_KEY in app.extensions:
+        return
+    # Désactivable pour les tests de charge, où tous les juges virtuels partagent une IP.
+    app.config.setdefault("AUTH_RATE_LIMIT_ENABLED", os.environ.get("GALA_AUTH_RATE_LIMIT", "1") != "0")
+    for key, value in DEFAULT_RATE_LIMIT_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.extensions[EXTENSION_KEY] = None
+
+
+def get_limiter(app: Optional[Flask] = None) -> Optional[AuthRateLimiter]:
+    """Limiteur de l'application ; ``None`` si ``AUTH_RATE_LIMIT_ENABLED`` est faux."""
+    app = app or current_app._get_current_object()
+    if EXTENSION_KEY not in app.extensions:
+        raise RuntimeError("models.rate_limit.init_app() n'a pas ete appele pour cette application.")
+    if not app.config["AUTH_RATE_LIMIT_ENABLED"]:
+        return None
+    limiter = app.extensions[EXTENSION_KEY]
+    if limiter is None:
+        limiter = app.extensions[EXTENSION_KEY] = AuthRateLimiter(app.config)
+    return limiter
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Maintenance des tables matérialisées ``score_aggregate`` et ``judge_workload``.
+
+Les triggers définis dans ``models.init_db`` (``SCORE_AGGREGATE_SQL``,
+``JUDGE_WORKLOAD_SQL``) tiennent ces tables à jour à chaque écriture. Ce module
+fournit la reconstruction complète, utile pour réparer une base dont une table
+aurait dérivé des données brutes.
+
+Usage:
+    python -m models.scoreboard [--db data/gala.db] [--gala 3]
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from models.init_db import DB_FILE, JUDGE_WORKLOAD_SQL, SCORE_AGGREGATE_SQL, score_refresh_sql, workload_refresh_sql
+
+# Points ajoutés au score d'un participant pour chaque coup de cœur reçu.
+FAVORITE_BONUS = 0.5
+
+
+def rebuild_score_aggregates(conn: sqlite3.Connection, gala_id: Optional[int] = None) -> int:
+    """Recalcule score_aggregate depuis les notes brutes. Retourne le nombre de lignes écrites."""
+    if gala_id is None:
+        conn.execute("DELETE FROM score_aggregate")
+        cursor = conn.execute(score_refresh_sql("1 = 1"))
+    else:
+        conn.execute(
+            """
+            DELETE FROM score_aggregate
+            WHERE participant_id IN (
+                SELECT p.id
+                FROM participant AS p
+                JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+                WHERE gc.gala_id = ?
+            )
+            """,
+            (gala_id,),
+        )
+        cursor = conn.execute(
+            score_refresh_sql(
+                "p.gala_categorie_id IN (SELECT id FROM gala_categorie WHERE gala_id = ?)"
+            ),
+            (gala_id,),
+        )
+    return cursor.rowcount
+
+
+def rebuild_judge_workload(conn: sqlite3.Connection, gala_id: Optional[int] = None) -> int:
+    """Recalcule judge_workload depuis les affectations, questions et notes. Retourne le nombre de lignes écrites."""
+    if gala_id is None:
+        conn.execute("DELETE FROM judge_workload")
+        cursor = conn.execute(workload_refresh_sql("1 = 1"))
+    else:
+        conn.execute("DELETE FROM judge_workload WHERE gala_id = ?", (gala_id,))
+        cursor = conn.execute(workload_refresh_sql("gc.gala_id = ?"), (gala_id,))
+    return cursor.rowcount
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Reconstruit les tables score_aggregate et judge_workload.")
+    ap.add_argument("--db", type=Path, default=DB_FILE)
+    ap.add_argument("--gala", type=int, help="Limiter la reconstruction à un gala")
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        raise SystemExit(f"DB introuvable: {args.db}")
+
+    conn = sqlite3.connect(str(args.db))
+    conn.execute("PRAGMA foreign_keys = ON;")
+    try:
+        conn.executescript(SCORE_AGGREGATE_SQL + JUDGE_WORKLOAD_SQL)
+        written = rebuild_score_aggregates(conn, args.gala)
+        workload = rebuild_judge_workload(conn, args.gala)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"✅ score_aggregate reconstruit — lignes: {written}")
+    print(f"✅ judge_workload reconstruit — lignes: {workload}")
+
+
+if __name__ == "__main__":
+    main()
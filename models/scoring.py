@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de score : notes d'un gala en colonnes compactes et stratégies d'agrégation.
+
+Les notes (participant × juge × question) sont lues en une requête, triées par
+participant puis juge, et rangées dans des colonnes ``array`` (index du juge, index
+de la question, valeur) avec des tableaux de bornes : les notes du participant ``i``
+occupent ``[participant_offsets[i], participant_offsets[i + 1])``, celles d'un couple
+(participant, juge) ``[group_offsets[k], group_offsets[k + 1])``. Chaque stratégie
+travaille colonne par colonne (produits, sommes par tranche) plutôt que ligne à ligne.
+
+Stratégies disponibles (``STRATEGIES``) :
+    moyenne_ponderee   Σ(note × pondération) / Σ(pondération) ; identique à
+                       ``score_aggregate``, c'est le classement officiel ;
+    zscore_juge        notes centrées-réduites par juge (moyenne et écart type du
+                       juge sur le gala) puis ramenées à l'échelle du gala : un juge
+                       sévère ou indulgent ne pèse plus sur le classement ;
+    moyenne_tronquee   moyenne des scores par juge sans les extrêmes
+                       (``TRIM_RATIO`` des juges de chaque côté) ;
+    mediane            médiane des scores par juge.
+
+Le bonus « coup de cœur » n'est pas inclus : il s'ajoute au score de base.
+
+numpy n'est pas une dépendance du projet : les colonnes sont des ``array`` de la
+bibliothèque standard, parcourues par ``map``/``sum`` sur des tranches contiguës.
+"""
+from __future__ import annotations
+
+import math
+import sqlite3
+import statistics
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from operator import add, mul
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from models import db as db_module
+from models.data_version import gala_version
+
+DEFAULT_STRATEGY = "moyenne_ponderee"
+# Part des juges écartés de chaque côté par la moyenne tronquée.
+TRIM_RATIO = 0.2
+# Deux scores plus proches que cet écart partagent le même rang.
+RANK_EPSILON = 1e-6
+
+# Matrices gardées en mémoire (galas les plus récemment consultés).
+MAX_CACHED_MATRICES = 4
+
+# Même périmètre que score_refresh_sql : seules les questions de la catégorie du participant comptent.
+NOTES_MATRIX_SQL = """
+    SELECT n.participant_id, n.juge_id, n.question_id, n.valeur
+    FROM gala_categorie AS gc
+    JOIN participant AS p ON p.gala_categorie_id = gc.id
+    JOIN note AS n ON n.participant_id = p.id
+    JOIN question AS q ON q.id = n.question_id AND q.gala_categorie_id = p.gala_categorie_id
+    WHERE gc.gala_id = ? AND n.valeur IS NOT NULL
+    ORDER BY n.participant_id, n.juge_id, n.question_id
+"""
+
+WEIGHTS_SQL = """
+    SELECT q.id, q.ponderation
+    FROM gala_categorie AS gc
+    JOIN question AS q ON q.gala_categorie_id = gc.id
+    WHERE gc.gala_id = ?
+"""
+
+
+# ==============================
+# 🧱 Matrice des notes
+# ==============================
+@dataclass(frozen=True)
+class NoteMatrix:
+    gala_id: int
+    # Participants ayant au moins une note, dans l'ordre des colonnes.
+    participant_ids: Tuple[int, ...]
+    judge_ids: Tuple[int, ...]
+    question_ids: Tuple[int, ...]
+    weights: array  # 'd', pondération par index de question
+    judge: array  # 'l', par note
+    question: array  # 'l', par note
+    values: array  # 'd', par note
+    participant_offsets: array  # 'l', len(participant_ids) + 1
+    group_offsets: array  # 'l', une borne par couple (participant, juge) + 1
+    participant_groups: array  # 'l', premier couple de chaque participant + 1
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def rows(self) -> Iterator[Tuple[int, int, int, float]]:
+        """(participant_id, juge_id, question_id, valeur), dans l'ordre de la matrice."""
+        offsets = self.participant_offsets
+        for index, participant_id in enumerate(self.participant_ids):
+            for position in range(offsets[index], offsets[index + 1]):
+                yield (
+                    participant_id,
+                    self.judge_ids[self.judge[position]],
+                    self.question_ids[self.question[position]],
+                    self.values[position],
+                )
+
+    def note_weights(self) -> array:
+        return array("d", map(self.weights.__getitem__, self.question))
+
+    def without_judges(self, judge_ids: Collection[int]) -> "NoteMatrix":
+        """Même matrice sans les notes de ``judge_ids`` (scénario « et si »)."""
+        excluded = set(judge_ids) & set(self.judge_ids)
+        if not excluded:
+            return self
+        weights = dict(zip(self.question_ids, self.weights))
+        return _build(self.gala_id, (row for row in self.rows() if row[1] not in excluded), weights)
+
+    def with_weights(self, weights: Mapping[int, float]) -> "NoteMatrix":
+        """Même matrice avec d'autres pondérations (``question_id -> pondération``)."""
+        if not weights:
+            return self
+        updated = array(
+            "d",
+            (float(weights.get(question_id, weight)) for question_id, weight in zip(self.question_ids, self.weights)),
+        )
+        return replace(self, weights=updated)
+
+    def note_counts(self) -> Dict[int, Tuple[int, int]]:
+        """participant_id -> (notes enregistrées, juges ayant noté)."""
+        notes, groups = self.participant_offsets, self.participant_groups
+        return {
+            participant_id: (notes[index + 1] - notes[index], groups[index + 1] - groups[index])
+            for index, participant_id in enumerate(self.participant_ids)
+        }
+
+
+def _build(gala_id: int, rows: Iterable[Sequence], weights_by_question: Mapping[int, float]) -> NoteMatrix:
+    participant_ids: List[int] = []
+    judge_index: Dict[int, int] = {}
+    question_index: Dict[int, int] = {}
+    judge, question, values = array("l"), array("l"), array("d")
+    participant_offsets, group_offsets, participant_groups = array("l"), array("l"), array("l")
+
+    last_participant = last_judge = None
+    for position, (participant_id, juge_id, question_id, valeur) in enumerate(rows):
+        if participant_id != last_participant:
+            participant_ids.append(participant_id)
+            participant_offsets.append(position)
+            participant_groups.append(len(group_offsets))
+            last_participant, last_judge = participant_id, None
+        if juge_id != last_judge:
+            group_offsets.append(position)
+            last_judge = juge_id
+        judge.append(judge_index.setdefault(juge_id, len(judge_index)))
+        question.append(question_index.setdefault(question_id, len(question_index)))
+        values.append(valeur)
+
+    participant_groups.append(len(group_offsets))
+    participant_offsets.append(len(values))
+    group_offsets.append(len(values))
+    return NoteMatrix(
+        gala_id=gala_id,
+        participant_ids=tuple(participant_ids),
+        judge_ids=tuple(judge_index),
+        question_ids=tuple(question_index),
+        weights=array("d", (float(weights_by_question[question_id]) for question_id in question_index)),
+        judge=judge,
+        question=question,
+        values=values,
+        participant_offsets=participant_offsets,
+        group_offsets=group_offsets,
+        participant_groups=participant_groups,
+    )
+
+
+def load_matrix(conn: sqlite3.Connection, gala_id: int) -> NoteMatrix:
+    """Notes saisies d'un gala et pondérations de ses questions."""
+    weights = dict(conn.execute(WEIGHTS_SQL, (gala_id,)).fetchall())
+    # Tuples bruts : plusieurs dizaines de milliers de lignes, sqlite3.Row coûterait plus que le calcul.
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return _build(gala_id, cursor.execute(NOTES_MATRIX_SQL, (gala_id,)).fetchall(), weights)
+
+
+_cache: "OrderedDict[Tuple[str, int], Tuple[str, NoteMatrix]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_matrix(conn: sqlite3.Connection, gala_id: int) -> NoteMatrix:
+    """``load_matrix`` gardée par gala tant que ``gala_version`` ne change pas.
+
+    Les simulations « et si » relancent le calcul sur les mêmes notes : seule la
+    lecture de version (clé primaire) est refaite. La version est lue avant les
+    notes : une écriture concurrente provoque au pire un rechargement de trop.
+    """
+    key = (str(db_module.DB_PATH), gala_id)
+    version = gala_version(conn, gala_id)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    matrix = load_matrix(conn, gala_id)
+    with _cache_lock:
+        _cache[key] = (version, matrix)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_MATRICES:
+            _cache.popitem(last=False)
+    return matrix
+
+
+# ==============================
+# 🧮 Stratégies
+# ==============================
+Strategy = Callable[[NoteMatrix], List[Optional[float]]]
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def register_strategy(name: str) -> Callable[[Strategy], Strategy]:
+    """Enregistre une stratégie : ``matrice -> score par index de participant`` (``None`` si aucun)."""
+
+    def decorator(func: Strategy) -> Strategy:
+        STRATEGIES[name] = func
+        return func
+
+    return decorator
+
+
+def _slice_ratios(numerators: Sequence[float], denominators: Sequence[float], offsets: array) -> List[Optional[float]]:
+    ratios: List[Optional[float]] = []
+    for start, end in zip(offsets, offsets[1:]):
+        weight = sum(denominators[start:end])
+        ratios.append(sum(numerators[start:end]) / weight if weight > 0 else None)
+    return ratios
+
+
+def _weighted_means(matrix: NoteMatrix, values: Sequence[float], offsets: array) -> List[Optional[float]]:
+    weights = matrix.note_weights()
+    return _slice_ratios(array("d", map(mul, values, weights)), weights, offsets)
+
+
+def _judge_scores(matrix: NoteMatrix) -> List[List[float]]:
+    """Moyenne pondérée de chaque juge, regroupée par participant."""
+    per_group = _weighted_means(matrix, matrix.values, matrix.group_offsets)
+    groups = matrix.participant_groups
+    return [
+        [score for score in per_group[groups[index]:groups[index + 1]] if score is not None]
+        for index in range(len(matrix.participant_ids))
+    ]
+
+
+@register_strategy("moyenne_ponderee")
+def weighted_mean(matrix: NoteMatrix) -> List[Optional[float]]:
+    return _weighted_means(matrix, matrix.values, matrix.participant_offsets)
+
+
+@register_strategy("zscore_juge")
+def judge_zscore(matrix: NoteMatrix) -> List[Optional[float]]:
+    if not len(matrix):
+        return []
+    judge_count = len(matrix.judge_ids)
+    counts, totals, squares = [0] * judge_count, [0.0] * judge_count, [0.0] * judge_count
+    for judge, value in zip(matrix.judge, matrix.values):
+        counts[judge] += 1
+        totals[judge] += value
+        squares[judge] += value * value
+
+    means = [total / count for total, count in zip(totals, counts)]
+    stdevs = [math.sqrt(max(square / count - mean * mean, 0.0)) for square, count, mean in zip(squares, counts, means)]
+    # Échelle du gala : les scores restent comparables au bonus et aux autres stratégies.
+    gala_mean = sum(totals) / len(matrix)
+    gala_stdev = math.sqrt(max(sum(squares) / len(matrix) - gala_mean * gala_mean, 0.0))
+
+    # Un juge qui donne partout la même note n'apporte pas d'écart : sa note vaut la moyenne du gala.
+    scales = [gala_stdev / stdev if stdev > 0 else 0.0 for stdev in stdevs]
+    # note normalisée = moyenne du gala + (note - moyenne du juge) × échelle = décalage + note × échelle
+    shifts = [gala_mean - mean * scale for mean, scale in zip(means, scales)]
+    normalized = array(
+        "d",
+        map(
+            add,
+            map(shifts.__getitem__, matrix.judge),
+            map(mul, matrix.values, map(scales.__getitem__, matrix.judge)),
+        ),
+    )
+    return _weighted_means(matrix, normalized, matrix.participant_offsets)
+
+
+@register_strategy("moyenne_tronquee")
+def trimmed_mean(matrix: NoteMatrix) -> List[Optional[float]]:
+    scores: List[Optional[float]] = []
+    for judge_scores in _judge_scores(matrix):
+        if not judge_scores:
+            scores.append(None)
+            continue
+        judge_scores.sort()
+        cut = int(len(judge_scores) * TRIM_RATIO)
+        kept = judge_scores[cut:len(judge_scores) - cut]
+        scores.append(sum(kept) / len(kept))
+    return scores
+
+
+@register_strategy("mediane")
+def median(matrix: NoteMatrix) -> List[Optional[float]]:
+    return [statistics.median(scores) if scores else None for scores in _judge_scores(matrix)]
+
+
+def compute_scores(matrix: NoteMatrix, strategy: str = DEFAULT_STRATEGY) -> Dict[int, Optional[float]]:
+    """participant_id -> score de base ; les participants sans note sont absents."""
+    try:
+        func = STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Stratégie de score inconnue : {strategy}") from None
+    return dict(zip(matrix.participant_ids, func(matrix)))
+
+
+def gala_scores(conn: sqlite3.Connection, gala_id: int, strategy: str = DEFAULT_STRATEGY) -> Dict[int, Optional[float]]:
+    return compute_scores(cached_matrix(conn, gala_id), strategy)
+
+
+# ==============================
+# 🏆 Classement
+# ==============================
+T = TypeVar("T")
+
+
+def ranking_key(score: Optional[float], name: Optional[str]) -> Tuple[bool, float, str]:
+    """Ordre des classements : score décroissant, sans score en dernier, puis nom."""
+    return score is None, -(score or 0.0), (name or "").lower()
+
+
+class Ranker:
+    """Rang « compétition » (1, 1, 3) de scores reçus par ordre décroissant ; ``None`` sans score."""
+
+    def __init__(self) -> None:
+        self._count = 0
+        self._rank = 0
+        self._previous: Optional[float] = None
+
+    def __call__(self, score: Optional[float]) -> Optional[int]:
+        if score is None:
+            return None
+        self._count += 1
+        if self._previous is None or abs(score - self._previous) > RANK_EPSILON:
+            self._rank = self._count
+            self._previous = score
+        return self._rank
+
+
+def ranked(
+    items: Iterable[T],
+    score: Callable[[T], Optional[float]],
+    name: Callable[[T], Optional[str]],
+) -> List[Tuple[Optional[int], T]]:
+    """Trie ``items`` selon ``ranking_key`` et associe son rang à chacun."""
+    ordered = sorted(items, key=lambda item: ranking_key(score(item), name(item)))
+    ranker = Ranker()
+    return [(ranker(score(item)), item) for item in ordered]
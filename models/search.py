@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Recherche plein texte des participants (SQLite FTS5).
+
+La table virtuelle ``participant_search`` (une ligne par participant, ``rowid`` =
+``participant.id``) indexe les champs de la compagnie et le texte des réponses.
+Elle est tenue à jour par les triggers de ``models.init_db.SEARCH_SQL``.
+
+Le tokenizer ``unicode61 remove_diacritics 2`` replie casse et accents à
+l'indexation ; les termes saisis passent par ``fold`` (même repliement que
+``import_csv.keyify``) puis deviennent des préfixes : « econ » trouve « Économie ».
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Optional
+
+from markupsafe import escape
+
+# Bornes des termes trouvés dans l'extrait ; remplacées par <mark> après échappement.
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+SNIPPET_TOKENS = 16
+
+# Poids bm25 par colonne (même ordre que la table) : le nom pèse plus qu'une réponse.
+COLUMN_WEIGHTS = (10.0, 4.0, 2.0, 4.0, 1.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Participants trouvés, avec leur pertinence (bm25 : plus petit = meilleur) et un extrait.
+# Une réponse narrative appartient au participant de la catégorie « Narratif » :
+# elle fait aussi remonter les autres candidatures de la compagnie pour ce gala.
+SEARCH_HITS_SQL = f"""
+    WITH fts_hits AS (
+        SELECT
+            rowid AS participant_id,
+            bm25(participant_search, {", ".join(str(weight) for weight in COLUMN_WEIGHTS)}) AS score,
+            snippet(participant_search, -1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', {SNIPPET_TOKENS}) AS extrait
+        FROM participant_search
+        WHERE participant_search MATCH ?
+    ),
+    expanded AS (
+        SELECT participant_id, score, extrait FROM fts_hits
+        UNION ALL
+        SELECT sibling.id, h.score, h.extrait
+        FROM fts_hits AS h
+        JOIN participant AS np ON np.id = h.participant_id
+        JOIN gala_categorie AS ngc ON ngc.id = np.gala_categorie_id
+        JOIN categorie AS ncat ON ncat.id = ngc.categorie_id
+        JOIN participant AS sibling ON sibling.compagnie_id = np.compagnie_id AND sibling.id != np.id
+        JOIN gala_categorie AS sgc ON sgc.id = sibling.gala_categorie_id AND sgc.gala_id = ngc.gala_id
+        WHERE ncat.is_narratif = 1
+    )
+    SELECT participant_id, MIN(score) AS score, extrait
+    FROM expanded
+    GROUP BY participant_id
+"""
+
+
+def fold(text: str) -> str:
+    """Repliement casse/accents/espaces (voir ``import_csv.keyify``)."""
+    cleaned = unicodedata.normalize("NFKC", str(text or "")).strip()
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    cleaned = cleaned.replace("–", "-").replace("—", "-")
+    cleaned = "".join(c for c in unicodedata.normalize("NFD", cleaned) if unicodedata.category(c) != "Mn")
+    return cleaned.lower()
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """Requête FTS5 « tous les termes, en préfixe » ; ``None`` si rien à chercher.
+
+    Chaque terme est mis entre guillemets : la syntaxe FTS5 (NEAR, -, ^, :) saisie
+    par l'utilisateur n'est jamais interprétée.
+    """
+    tokens = _TOKEN_RE.findall(fold(search))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def highlight_html(extrait: Optional[str]) -> Optional[str]:
+    """Extrait échappé pour l'HTML, termes trouvés entourés de ``<mark>``."""
+    if not extrait:
+        return None
+    html = str(escape(extrait))
+    return html.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
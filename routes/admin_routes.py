@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import base64
+import json
 from collections import defaultdict
 from datetime import datetime, UTC
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from flask import Blueprint, render_template, session, jsonify, request, abort
+from flask import Blueprint, Response, current_app, render_template, session, jsonify, request, abort
 
-from models.db import get_db_connection
+from models import (
+    exports, gala_snapshot, gala_structure, import_jobs, live, metrics, narratif, note_queue, passwords, rate_limit, scoring,
+)
+from models.data_version import (
+    bump_data_version, gala_version, global_structure_version, global_version, make_etag, not_modified, with_etag,
+)
+from models.db import get_db_connection, get_pool_stats, init_app as init_db_app, open_standalone_connection
+from models.scoreboard import FAVORITE_BONUS, rebuild_judge_workload, rebuild_score_aggregates
+from models.search import SEARCH_HITS_SQL, build_match_query, highlight_html
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+admin_bp.record_once(lambda state: init_db_app(state.app))
+admin_bp.record_once(lambda state: note_queue.init_app(state.app))
+admin_bp.record_once(lambda state: import_jobs.init_app(state.app))
 
 ROLE_DISPLAY_ORDER = ["admin", "juge", "membre"]
-FAVORITE_BONUS = 0.5
 
 
 def _require_admin() -> None:
@@ -314,28 +326,240 @@ def update_judge_assignments(user_id: int):
     else:
         valid_ids = set()
 
-    cursor.execute(
-        "DELETE FROM juge_gala_categorie WHERE juge_id = ?",
-        (judge_id,),
-    )
+    added, removed = _apply_assignment_diff(conn, {judge_id: valid_ids})
+    conn.commit()
+    conn.close()
 
-    for gala_cat_id in sorted(valid_ids):
-        cursor.execute(
+    # La fiche est relue par l'interface : seul l'etat des assignations est renvoye.
+    return jsonify({
+        "status": "ok",
+        "judge": {"judge_id": judge_id, "assigned_ids": sorted(valid_ids)},
+        "added": added,
+        "removed": removed,
+    })
+
+
+# ==============================
+# 🗂️ Assignations en lot (matrice juges × categories)
+# ==============================
+def _apply_assignment_diff(
+    conn,
+    desired: Dict[int, Set[int]],
+    scope_ids: Optional[Set[int]] = None,
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """Aligne les assignations des juges de ``desired`` sur les categories voulues.
+
+    Seules les categories de ``scope_ids`` (toutes si ``None``) sont concernees ;
+    seuls les ecarts sont ecrits. Retourne les paires [juge_id, gala_categorie_id]
+    ajoutees et retirees.
+    """
+    if not desired:
+        return [], []
+    placeholders = ",".join("?" for _ in desired)
+    current_rows = conn.execute(
+        f"SELECT DISTINCT juge_id, gala_categorie_id FROM juge_gala_categorie WHERE juge_id IN ({placeholders})",
+        tuple(desired),
+    ).fetchall()
+    current = {
+        (row["juge_id"], row["gala_categorie_id"])
+        for row in current_rows
+        if scope_ids is None or row["gala_categorie_id"] in scope_ids
+    }
+    wanted = {(juge_id, category_id) for juge_id, category_ids in desired.items() for category_id in category_ids}
+
+    removed = sorted(current - wanted)
+    added = sorted(wanted - current)
+    if removed:
+        conn.executemany(
+            "DELETE FROM juge_gala_categorie WHERE juge_id = ? AND gala_categorie_id = ?",
+            removed,
+        )
+    if added:
+        conn.executemany(
             "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
-            (judge_id, gala_cat_id),
+            added,
         )
+    return [list(pair) for pair in added], [list(pair) for pair in removed]
 
-    conn.commit()
 
-    judge_payload = _build_judge_payload(conn, user_id)
+@admin_bp.route("/api/assignments", methods=["GET"])
+def assignment_matrix():
+    gala_id = request.args.get("gala_id", type=int)
+    conn = get_db_connection()
+
+    gala_rows = conn.execute(
+        "SELECT id, nom, annee FROM gala ORDER BY annee DESC, id DESC"
+    ).fetchall()
+    gala_options = [
+        {"id": row["id"], "nom": row["nom"], "annee": row["annee"]}
+        for row in gala_rows
+    ]
+    if not gala_rows:
+        conn.close()
+        return jsonify({"galas": [], "gala": None, "categories": [], "judges": []})
+
+    available_gala_ids = {row["id"] for row in gala_rows}
+    target_gala_id = gala_id if gala_id in available_gala_ids else gala_rows[0]["id"]
+
+    etag = make_etag(gala_version(conn, target_gala_id), gala_options)
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
+
+    # L'ETag vient d'une version fraiche : verrou relu et structure revalidee, sans
+    # attendre le TTL du cache (sinon des colonnes perimees resteraient figees par les 304).
+    lock_row = _get_gala_lock(conn, target_gala_id)
+    structure = gala_structure.gala_structure(
+        conn,
+        target_gala_id,
+        locked_at=lock_row["locked_at"] if lock_row else None,
+        revalidate=True,
+    )
+    judge_rows = conn.execute(
+        """
+        SELECT j.id, j.user_id, per.prenom, per.nom
+        FROM juge AS j
+        JOIN user AS u ON u.id = j.user_id
+        JOIN personne AS per ON per.id = u.personne_id
+        ORDER BY per.nom COLLATE NOCASE, per.prenom COLLATE NOCASE, j.id
+        """
+    ).fetchall()
+    assigned: Dict[int, List[int]] = defaultdict(list)
+    for row in conn.execute(
+        """
+        SELECT DISTINCT jgc.juge_id, jgc.gala_categorie_id
+        FROM gala_categorie AS gc
+        JOIN juge_gala_categorie AS jgc ON jgc.gala_categorie_id = gc.id
+        WHERE gc.gala_id = ?
+        ORDER BY jgc.juge_id, jgc.gala_categorie_id
+        """,
+        (target_gala_id,),
+    ):
+        assigned[row["juge_id"]].append(row["gala_categorie_id"])
     conn.close()
 
+    response = {
+        "galas": gala_options,
+        "gala": {
+            **structure.gala,
+            "locked": structure.locked,
+        },
+        "categories": [
+            {"id": category.id, "nom": category.nom}
+            for category in structure.categories
+        ],
+        "judges": [
+            {
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "prenom": row["prenom"],
+                "nom": row["nom"],
+                "categories": assigned.get(row["id"], []),
+            }
+            for row in judge_rows
+        ],
+    }
+    return with_etag(jsonify(response), etag)
+
+
+@admin_bp.route("/api/assignments", methods=["PUT"])
+def update_assignment_matrix():
+    payload = request.get_json(silent=True) or {}
+    raw_matrix = payload.get("assignments")
+    try:
+        gala_id = int(payload.get("gala_id"))
+        if not isinstance(raw_matrix, dict):
+            raise TypeError
+        desired = {
+            int(juge_id): {int(value) for value in category_ids}
+            for juge_id, category_ids in raw_matrix.items()
+        }
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Matrice d'assignations invalide."}), 400
+
+    conn = get_db_connection()
+    # Lecture de l'etat et ecriture du diff dans une meme transaction d'ecriture.
+    conn.execute("BEGIN IMMEDIATE")
+    if not conn.execute("SELECT 1 FROM gala WHERE id = ?", (gala_id,)).fetchone():
+        conn.rollback()
+        conn.close()
+        return jsonify({"status": "error", "message": "Gala introuvable."}), 404
+    if _get_gala_lock(conn, gala_id):
+        conn.rollback()
+        conn.close()
+        return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
+
+    scope_ids = {
+        row["id"]
+        for row in conn.execute("SELECT id FROM gala_categorie WHERE gala_id = ?", (gala_id,))
+    }
+    unknown_categories = sorted(set().union(*desired.values()) - scope_ids) if desired else []
+    if unknown_categories:
+        conn.rollback()
+        conn.close()
+        return jsonify({
+            "status": "error",
+            "message": "Categorie hors de ce gala.",
+            "gala_categorie_ids": unknown_categories,
+        }), 400
+    if desired:
+        placeholders = ",".join("?" for _ in desired)
+        known_judges = {
+            row["id"]
+            for row in conn.execute(f"SELECT id FROM juge WHERE id IN ({placeholders})", tuple(desired))
+        }
+        unknown_judges = sorted(set(desired) - known_judges)
+        if unknown_judges:
+            conn.rollback()
+            conn.close()
+            return jsonify({"status": "error", "message": "Juge introuvable.", "juge_ids": unknown_judges}), 400
+
+    added, removed = _apply_assignment_diff(conn, desired, scope_ids)
+    conn.commit()
+    conn.close()
+    return jsonify({"status": "ok", "added": added, "removed": removed})
+
+
+@admin_bp.route("/api/db/pool", methods=["GET"])
+def db_pool_stats():
+    return jsonify({"pool": get_pool_stats()})
+
+
+@admin_bp.route("/api/cache/structure", methods=["GET"])
+def structure_cache_stats():
     return jsonify({
-        "status": "ok",
-        "judge": judge_payload,
+        "structure_cache": gala_structure.cache_stats(),
+        "snapshot_cache": gala_snapshot.cache_stats(),
     })
 
 
+@admin_bp.route("/api/metrics", methods=["GET"])
+def metrics_export():
+    registry = metrics.get_registry()
+    if registry is None:
+        return jsonify({"status": "error", "message": "Instrumentation desactivee (METRICS_ENABLED)."}), 404
+    gauges = {
+        "gala_db_pool": get_pool_stats(),
+        "gala_structure_cache": gala_structure.cache_stats(),
+        "gala_snapshot_cache": gala_snapshot.cache_stats(),
+    }
+    if passwords.EXTENSION_KEY in current_app.extensions:
+        gauges["gala_password_hash"] = passwords.get_hasher().stats()
+    limiter = rate_limit.get_limiter() if rate_limit.EXTENSION_KEY in current_app.extensions else None
+    if limiter is not None:
+        gauges["gala_auth_rate_limit"] = limiter.stats()
+    queue = note_queue.get_queue() if note_queue.EXTENSION_KEY in current_app.extensions else None
+    if queue is not None:
+        gauges["gala_note_queue"] = queue.stats()
+    # Fil d'import non cree tant qu'aucun fichier n'a ete televerse.
+    runner = current_app.extensions.get(import_jobs.EXTENSION_KEY)
+    if runner is not None:
+        gauges["gala_import_jobs"] = runner.stats()
+    text = registry.render(gauges)
+    return Response(text, content_type=metrics.CONTENT_TYPE)
+
+
 # ==============================
 # Admin Gala management
 # ==============================
@@ -409,6 +633,12 @@ def list_galas_admin():
 
     conn = get_db_connection()
 
+    etag = make_etag(global_version(conn))
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
+
     rows = conn.execute(
 
         """
@@ -443,7 +673,7 @@ def list_galas_admin():
 
     payload = [_serialize_gala_row(row, lock_map.get(row["id"]), submissions_map.get(row["id"], 0)) for row in rows]
 
-    return jsonify({"galas": payload})
+    return with_etag(jsonify({"galas": payload}), etag)
 
 
 
@@ -512,26 +742,12 @@ def _fetch_gala(conn, gala_id: int):
 @admin_bp.route("/api/galas/<int:gala_id>", methods=["GET"])
 def gala_detail(gala_id: int):
     conn = get_db_connection()
-    gala_row = _fetch_gala(conn, gala_id)
-    if not gala_row:
+    lock_row = _get_gala_lock(conn, gala_id)
+    structure = gala_structure.gala_structure(conn, gala_id, locked_at=lock_row["locked_at"] if lock_row else None)
+    if structure is None:
         conn.close()
         abort(404)
 
-    categories = conn.execute(
-        """
-        SELECT gc.id AS gala_categorie_id, gc.categorie_id, gc.ordre_affichage, gc.actif,
-               c.nom AS categorie_nom,
-               COUNT(q.id) AS questions_count
-        FROM gala_categorie AS gc
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        LEFT JOIN question AS q ON q.gala_categorie_id = gc.id
-        WHERE gc.gala_id = ?
-        GROUP BY gc.id
-        ORDER BY gc.ordre_affichage ASC, c.nom COLLATE NOCASE
-        """,
-        (gala_id,),
-    ).fetchall()
-
     available_categories = conn.execute(
         """
         SELECT c.id, c.nom
@@ -544,35 +760,29 @@ def gala_detail(gala_id: int):
         (gala_id,),
     ).fetchall()
 
-    lock_row = _get_gala_lock(conn, gala_id)
     submissions_count = conn.execute(
         "SELECT COUNT(*) AS total FROM juge_gala_submission WHERE gala_id = ?",
         (gala_id,),
     ).fetchone()["total"]
     conn.close()
 
-    total_questions = sum((row["questions_count"] or 0) for row in categories)
     summary_row = {
-        "id": gala_row["id"],
-        "nom": gala_row["nom"],
-        "annee": gala_row["annee"],
-        "lieu": gala_row["lieu"],
-        "date_gala": gala_row["date_gala"],
-        "categories_count": len(categories),
-        "questions_count": total_questions,
+        **structure.gala,
+        "categories_count": len(structure.categories),
+        "questions_count": structure.question_count,
     }
     gala_payload = _serialize_gala_row(summary_row, lock_row, submissions_count)
 
     categories_payload = [
         {
-            "id": row["gala_categorie_id"],
-            "categorie_id": row["categorie_id"],
-            "nom": row["categorie_nom"],
-            "ordre_affichage": row["ordre_affichage"],
-            "actif": row["actif"],
-            "questions_count": row["questions_count"],
+            "id": category.id,
+            "categorie_id": category.categorie_id,
+            "nom": category.nom,
+            "ordre_affichage": category.ordre_affichage,
+            "actif": category.actif,
+            "questions_count": category.question_count,
         }
-        for row in categories
+        for category in structure.categories
     ]
     available_payload = [
         {"id": row["id"], "nom": row["nom"]}
@@ -642,6 +852,7 @@ def update_gala(gala_id: int):
             tuple(values),
         )
         conn.commit()
+        gala_structure.invalidate(gala_id)
 
     summary_row = conn.execute(
         """
@@ -686,6 +897,9 @@ def lock_gala(gala_id: int):
 
 
 
+    # Barriere de la file d'ecriture differee : les notes deja acceptees entrent avant le verrou.
+    conn.execute("BEGIN IMMEDIATE")
+
     existing = _get_gala_lock(conn, gala_id)
 
     if existing:
@@ -696,18 +910,26 @@ def lock_gala(gala_id: int):
 
 
 
+    note_queue.flush_pending(conn)
+
     locked_by = session.get("user", {}).get("id")
 
+    locked_at = datetime.now(UTC).isoformat()
+
     conn.execute(
 
         "INSERT INTO gala_lock (gala_id, locked_at, locked_by) VALUES (?, ?, ?)",
 
-        (gala_id, datetime.now(UTC).isoformat(), locked_by),
+        (gala_id, locked_at, locked_by),
 
     )
 
+    live.publish(conn, gala_id, "lock", {"locked": True, "locked_at": locked_at})
+
     conn.commit()
 
+    gala_structure.invalidate(gala_id)
+
     conn.close()
 
     return gala_detail(gala_id)
@@ -744,8 +966,12 @@ def unlock_gala(gala_id: int):
 
     conn.execute("DELETE FROM gala_lock WHERE gala_id = ?", (gala_id,))
 
+    live.publish(conn, gala_id, "lock", {"locked": False, "locked_at": None})
+
     conn.commit()
 
+    gala_structure.invalidate(gala_id)
+
     conn.close()
 
     return gala_detail(gala_id)
@@ -797,6 +1023,7 @@ def reset_judge_submission(gala_id: int, juge_id: int):
             "DELETE FROM juge_gala_submission WHERE juge_id = ? AND gala_id = ?",
             (juge_id, gala_id),
         )
+        live.publish(conn, gala_id, "submission", {"juge_id": juge_id, "submitted": False, "submitted_at": None})
         conn.commit()
         return jsonify({"status": "ok"})
     finally:
@@ -864,6 +1091,7 @@ def add_categories_to_gala(gala_id: int):
         next_order += 1
 
     conn.commit()
+    gala_structure.invalidate(gala_id)
     conn.close()
 
     return gala_detail(gala_id)
@@ -892,6 +1120,7 @@ def remove_category_from_gala(gala_id: int, gala_categorie_id: int):
         (gala_categorie_id,),
     )
     conn.commit()
+    gala_structure.invalidate(gala_id)
     conn.close()
 
     return gala_detail(gala_id)
@@ -943,6 +1172,7 @@ def update_gala_category(gala_id: int, gala_categorie_id: int):
             tuple(values),
         )
         conn.commit()
+        gala_structure.invalidate(gala_id)
 
     conn.close()
     return gala_detail(gala_id)
@@ -978,6 +1208,7 @@ def reorder_gala_categories(gala_id: int):
             (position, gc_id),
         )
     conn.commit()
+    gala_structure.invalidate(gala_id)
     conn.close()
 
     return gala_detail(gala_id)
@@ -988,6 +1219,8 @@ def create_category():
     payload = request.get_json(silent=True) or {}
     nom = (payload.get("nom") or "").strip()
     description = (payload.get("description") or "").strip() or None
+    # Sans indication, un nom « Narratif... » marque la categorie (trigger en base).
+    is_narratif = 1 if payload.get("is_narratif") else 0
 
     if not nom:
         return jsonify({"status": "error", "message": "Le nom de la categorie est requis."}), 400
@@ -1006,14 +1239,14 @@ def create_category():
         return jsonify({"status": "error", "message": "Une categorie portant ce nom existe deja."}), 409
 
     cursor.execute(
-        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
-        (nom, description),
+        "INSERT INTO categorie (nom, description, is_narratif) VALUES (?, ?, ?)",
+        (nom, description, is_narratif),
     )
     category_id = cursor.lastrowid
     conn.commit()
 
     category_row = cursor.execute(
-        "SELECT id, nom, description FROM categorie WHERE id = ?",
+        "SELECT id, nom, description, is_narratif FROM categorie WHERE id = ?",
         (category_id,),
     ).fetchone()
     conn.close()
@@ -1022,6 +1255,7 @@ def create_category():
         "id": category_row["id"],
         "nom": category_row["nom"],
         "description": category_row["description"],
+        "is_narratif": bool(category_row["is_narratif"]),
     }
     return jsonify({"status": "ok", "category": category_payload}), 201
 
@@ -1053,36 +1287,21 @@ def _fetch_gala_category(conn, gala_id: int, gala_categorie_id: int):
 @admin_bp.route("/api/galas/<int:gala_id>/categories/<int:gala_categorie_id>/questions", methods=["GET"])
 def list_questions_for_gala_category(gala_id: int, gala_categorie_id: int):
     conn = get_db_connection()
-    gala_row = _fetch_gala(conn, gala_id)
-    if not gala_row:
-        conn.close()
-        abort(404)
-
-
-    gala_cat_row = _fetch_gala_category(conn, gala_id, gala_categorie_id)
-    if not gala_cat_row:
-        conn.close()
-        abort(404)
-
-    questions = conn.execute(
-        """
-        SELECT id, texte, ponderation
-        FROM question
-        WHERE gala_categorie_id = ?
-        ORDER BY id ASC
-        """,
-        (gala_categorie_id,),
-    ).fetchall()
+    lock_row = _get_gala_lock(conn, gala_id)
+    structure = gala_structure.gala_structure(conn, gala_id, locked_at=lock_row["locked_at"] if lock_row else None)
     conn.close()
+    category = structure.category(gala_categorie_id) if structure else None
+    if category is None:
+        abort(404)
 
     payload = [
-        {"id": row["id"], "texte": row["texte"], "ponderation": row["ponderation"]}
-        for row in questions
+        {"id": question.id, "texte": question.texte, "ponderation": question.ponderation}
+        for question in category.questions
     ]
     category_info = {
-        "id": gala_cat_row["id"],
-        "categorie_id": gala_cat_row["categorie_id"],
-        "nom": gala_cat_row["categorie_nom"],
+        "id": category.id,
+        "categorie_id": category.categorie_id,
+        "nom": category.nom,
     }
     return jsonify({"questions": payload, "category": category_info})
 
@@ -1128,6 +1347,7 @@ def create_question_for_gala_category(gala_id: int, gala_categorie_id: int):
         (gala_categorie_id, texte, ponderation_val),
     )
     conn.commit()
+    gala_structure.invalidate(gala_id)
     conn.close()
 
     return list_questions_for_gala_category(gala_id, gala_categorie_id)
@@ -1188,6 +1408,7 @@ def update_question_for_gala_category(gala_id: int, gala_categorie_id: int, ques
             tuple(values),
         )
         conn.commit()
+        gala_structure.invalidate(gala_id)
 
     conn.close()
     return list_questions_for_gala_category(gala_id, gala_categorie_id)
@@ -1219,6 +1440,7 @@ def delete_question_for_gala_category(gala_id: int, gala_categorie_id: int, ques
     cursor = conn.cursor()
     cursor.execute("DELETE FROM question WHERE id = ?", (question_id,))
     conn.commit()
+    gala_structure.invalidate(gala_id)
     conn.close()
 
     return list_questions_for_gala_category(gala_id, gala_categorie_id)
@@ -1228,22 +1450,6 @@ def delete_question_for_gala_category(gala_id: int, gala_categorie_id: int, ques
 # ==============================
 # Admin Participant management
 # ==============================
-def _fetch_narratif_gala_categories(conn) -> Dict[int, List[int]]:
-    rows = conn.execute(
-        """
-        SELECT gc.id AS gala_categorie_id, gc.gala_id
-        FROM gala_categorie AS gc
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        WHERE LOWER(c.nom) LIKE 'narratif%'
-        """
-    ).fetchall()
-
-    mapping: Dict[int, List[int]] = {}
-    for row in rows:
-        mapping.setdefault(row["gala_id"], []).append(row["gala_categorie_id"])
-    return mapping
-
-
 def _build_admin_participant_filters(conn) -> List[Dict[str, Any]]:
     gala_rows = conn.execute(
         """
@@ -1277,15 +1483,13 @@ def _build_admin_participant_filters(conn) -> List[Dict[str, Any]]:
 
     gala_ids = tuple(gala_map.keys())
     placeholders = ",".join("?" for _ in gala_ids)
-    narratif_map = _fetch_narratif_gala_categories(conn)
-    narratif_ids = {cat_id for values in narratif_map.values() for cat_id in values}
-
     category_rows = conn.execute(
         f"""
         SELECT
             gc.id,
             gc.gala_id,
             c.nom AS categorie_nom,
+            c.is_narratif,
             COUNT(DISTINCT p.id) AS participants_count
         FROM gala_categorie AS gc
         JOIN categorie AS c ON c.id = gc.categorie_id
@@ -1301,7 +1505,7 @@ def _build_admin_participant_filters(conn) -> List[Dict[str, Any]]:
         gala_entry = gala_map.get(row["gala_id"])
         if not gala_entry:
             continue
-        if row["id"] in narratif_ids:
+        if row["is_narratif"]:
             continue
         gala_entry["categories"].append(
             {
@@ -1498,18 +1702,63 @@ def create_admin_participant():
         conn.close()
 
 
+PARTICIPANTS_PAGE_DEFAULT = 50
+PARTICIPANTS_PAGE_MAX = 200
+
+# Statistiques de completion calculees en SQL : le mode resume ne lit aucun contenu.
+_PARTICIPANT_TOTAL_QUESTIONS_SQL = "(SELECT COUNT(*) FROM question AS q WHERE q.gala_categorie_id = p.gala_categorie_id)"
+_PARTICIPANT_ANSWERED_SQL = """(
+            SELECT COUNT(*)
+            FROM reponse_participant AS r
+            JOIN question AS q ON q.id = r.question_id AND q.gala_categorie_id = p.gala_categorie_id
+            WHERE r.participant_id = p.id AND TRIM(COALESCE(r.contenu, ''), ' ' || char(9, 10, 13)) != ''
+        )"""
+
+
+def _encode_participants_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_participants_cursor(cursor: str, size: int) -> Optional[List[Any]]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
 @admin_bp.route("/api/participants", methods=["GET"])
 def list_admin_participants():
     gala_id = request.args.get("gala_id", type=int)
     categorie_id = request.args.get("categorie_id", type=int)
     search = (request.args.get("q") or "").strip()
+    # Mode resume : statistiques seulement, reponses chargees a la demande
+    # via /api/participants/<id>/responses.
+    summary_mode = request.args.get("summary") in ("1", "true")
+    missing_only = request.args.get("missing_only") in ("1", "true")
+    # Pagination par curseur (keyset) des que ``limit`` est fourni.
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor") or None
+    if limit is not None:
+        limit = max(1, min(limit, PARTICIPANTS_PAGE_MAX))
+    elif cursor:
+        limit = PARTICIPANTS_PAGE_DEFAULT
 
     conn = get_db_connection()
+    etag_version = gala_version(conn, gala_id) if gala_id else global_version(conn)
+    # Les filtres listent tous les galas : la version de structure globale entre dans
+    # l'ETag d'une vue par gala. Ils ne sont calcules qu'apres le 304.
+    etag = make_etag(etag_version, global_structure_version(conn))
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
     filters_payload = _build_admin_participant_filters(conn)
-    narratif_by_gala = _fetch_narratif_gala_categories(conn)
-    narratif_ids_set = {cat_id for values in narratif_by_gala.values() for cat_id in values}
 
-    base_query = """
+    select_clause = f"""
         SELECT
             p.id AS participant_id,
             p.segment_id,
@@ -1527,18 +1776,39 @@ def list_admin_participants():
             g.id AS gala_id,
             g.nom AS gala_nom,
             g.annee AS gala_annee,
-            seg.nom AS segment_nom
+            seg.nom AS segment_nom,
+            {_PARTICIPANT_TOTAL_QUESTIONS_SQL} AS total_questions,
+            {_PARTICIPANT_ANSWERED_SQL} AS answered{{search_columns}}
+    """
+    from_clause = """
         FROM participant AS p
         JOIN compagnie AS comp ON comp.id = p.compagnie_id
         JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
         JOIN categorie AS cat ON cat.id = gc.categorie_id
         JOIN gala AS g ON g.id = gc.gala_id
-        LEFT JOIN segment AS seg ON seg.id = p.segment_id
+        LEFT JOIN segment AS seg ON seg.id = p.segment_id{search_join}
     """
 
     clauses: List[str] = []
     params: List[Any] = []
 
+    # Recherche plein texte (FTS5) : compagnie et texte des reponses, classee par pertinence.
+    match_query = build_match_query(search) if search else None
+    if match_query:
+        select_clause = select_clause.format(
+            search_columns=",\n            sh.score AS search_score,\n            sh.extrait AS search_extrait",
+        )
+        from_clause = from_clause.format(
+            search_join=f"\n        JOIN ({SEARCH_HITS_SQL}) AS sh ON sh.participant_id = p.id",
+        )
+        params.append(match_query)
+    else:
+        select_clause = select_clause.format(search_columns="")
+        from_clause = from_clause.format(search_join="")
+        if search:
+            # Saisie sans aucun terme cherchable (ponctuation seule) : aucun resultat.
+            clauses.append("0")
+
     if gala_id:
         clauses.append("g.id = ?")
         params.append(gala_id)
@@ -1547,158 +1817,175 @@ def list_admin_participants():
         clauses.append("gc.id = ?")
         params.append(categorie_id)
 
-    if search:
-        like_pattern = f"%{search}%"
-        clauses.append(
-            "("
-            "comp.nom LIKE ? OR "
-            "comp.courriel LIKE ? OR "
-            "comp.ville LIKE ? OR "
-            "comp.responsable_nom LIKE ? OR "
-            "comp.responsable_titre LIKE ? OR "
-            "comp.secteur LIKE ?"
-            ")"
-        )
-        params.extend([like_pattern] * 6)
+    # La categorie narrative n'apparait que si elle est demandee explicitement.
+    if not categorie_id:
+        clauses.append("cat.is_narratif = 0")
 
-    if not categorie_id or categorie_id not in narratif_ids_set:
-        clauses.append("LOWER(cat.nom) NOT LIKE 'narratif%'")
+    if missing_only:
+        clauses.append(f"{_PARTICIPANT_TOTAL_QUESTIONS_SQL} > {_PARTICIPANT_ANSWERED_SQL}")
+
+    # Cle de tri unique : (annee, categorie, compagnie, id) ou (pertinence, compagnie, id).
+    if match_query:
+        order_clause = " ORDER BY sh.score, comp.nom COLLATE NOCASE, p.id"
+        keyset_clause = "(sh.score, comp.nom COLLATE NOCASE, p.id) > (?, ?, ?)"
+    else:
+        order_clause = " ORDER BY g.annee DESC, cat.nom COLLATE NOCASE, comp.nom COLLATE NOCASE, p.id"
+        keyset_clause = "(g.annee < ? OR (g.annee = ? AND (cat.nom COLLATE NOCASE, comp.nom COLLATE NOCASE, p.id) > (?, ?, ?)))"
+
+    total_count: Optional[int] = None
+    if limit is not None:
+        count_where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        total_count = conn.execute(
+            "SELECT COUNT(*)" + from_clause + count_where,
+            tuple(params),
+        ).fetchone()[0]
+
+    if cursor:
+        cursor_values = _decode_participants_cursor(cursor, 3 if match_query else 4)
+        if cursor_values is None:
+            conn.close()
+            return jsonify({"status": "error", "message": "Curseur invalide."}), 400
+        clauses.append(keyset_clause)
+        if match_query:
+            params.extend(cursor_values)
+        else:
+            params.extend([cursor_values[0]] + cursor_values)
 
     where_clause = f" WHERE {' AND '.join(clauses)}" if clauses else ""
-    order_clause = " ORDER BY g.annee DESC, cat.nom COLLATE NOCASE, comp.nom COLLATE NOCASE"
+    limit_clause = f" LIMIT {limit + 1}" if limit is not None else ""
 
     participant_rows = conn.execute(
-        base_query + where_clause + order_clause,
+        select_clause + from_clause + where_clause + order_clause + limit_clause,
         tuple(params),
     ).fetchall()
 
-    participant_ids = [row["participant_id"] for row in participant_rows]
-    category_ids = [row["gala_categorie_id"] for row in participant_rows]
-
-    relevant_gala_ids = {row["gala_id"] for row in participant_rows}
-    relevant_narratif_ids = sorted(
-        {cat_id for gala in relevant_gala_ids for cat_id in narratif_by_gala.get(gala, [])}
-    )
+    next_cursor: Optional[str] = None
+    if limit is not None and len(participant_rows) > limit:
+        participant_rows = participant_rows[:limit]
+        last = participant_rows[-1]
+        if match_query:
+            next_cursor = _encode_participants_cursor(
+                [last["search_score"], last["compagnie_nom"], last["participant_id"]]
+            )
+        else:
+            next_cursor = _encode_participants_cursor(
+                [last["gala_annee"], last["categorie_nom"], last["compagnie_nom"], last["participant_id"]]
+            )
 
+    questions_map: Dict[int, List[Dict[str, Any]]] = {}
+    responses_map: Dict[int, Dict[int, Optional[str]]] = {}
     narratif_participant_map: Dict[tuple[int, int], Dict[str, int]] = {}
-    narrative_participant_ids: List[int] = []
-
-    if relevant_narratif_ids:
-        placeholders = ",".join("?" for _ in relevant_narratif_ids)
-        narratif_rows = conn.execute(
-            f"""
-            SELECT
-                p.id AS participant_id,
-                p.compagnie_id,
-                gc.gala_id,
-                gc.id AS gala_categorie_id
-            FROM participant AS p
-            JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
-            WHERE p.gala_categorie_id IN ({placeholders})
-            """,
-            tuple(relevant_narratif_ids),
-        ).fetchall()
 
-        for row in narratif_rows:
-            key = (row["gala_id"], row["compagnie_id"])
-            narratif_participant_map[key] = {
-                "participant_id": row["participant_id"],
-                "gala_categorie_id": row["gala_categorie_id"],
-            }
-            narrative_participant_ids.append(row["participant_id"])
-
-        category_ids.extend(relevant_narratif_ids)
+    if not summary_mode and participant_rows:
+        participant_ids = [row["participant_id"] for row in participant_rows]
+        category_ids = [row["gala_categorie_id"] for row in participant_rows]
 
-    all_participant_ids = participant_ids + narrative_participant_ids
+        narratif_by_gala = {
+            gala: narratif.gala_narratif(conn, gala) for gala in {row["gala_id"] for row in participant_rows}
+        }
+        narrative_participant_ids: List[int] = []
+        for row in participant_rows:
+            entry = narratif_by_gala[row["gala_id"]].participant_for(row["compagnie_id"])
+            if entry is None or entry["id"] == row["participant_id"]:
+                continue
+            narratif_participant_map[(row["gala_id"], row["compagnie_id"])] = {
+                "participant_id": entry["id"],
+                "gala_categorie_id": entry["gala_categorie_id"],
+            }
+            narrative_participant_ids.append(entry["id"])
+            category_ids.append(entry["gala_categorie_id"])
 
-    questions_map = _fetch_questions_by_category(conn, category_ids)
-    responses_map = _fetch_responses_by_participant(conn, all_participant_ids)
+        questions_map = _fetch_questions_by_category(conn, category_ids)
+        responses_map = _fetch_responses_by_participant(conn, participant_ids + narrative_participant_ids)
 
     participants_payload: List[Dict[str, Any]] = []
     for row in participant_rows:
         participant_id = row["participant_id"]
         gala_categorie_id = row["gala_categorie_id"]
-        questions = questions_map.get(gala_categorie_id, [])
-        participant_responses = responses_map.get(participant_id, {})
-
-        responses_payload: List[Dict[str, Any]] = []
-        answered_count = 0
-        for question in questions:
-            answer_text = participant_responses.get(question["id"])
-            if answer_text is not None and str(answer_text).strip():
-                answered_count += 1
-            responses_payload.append(
-                {
-                    "question_id": question["id"],
-                    "ordre": question["ordre"],
-                    "texte": question["texte"],
-                    "ponderation": question["ponderation"],
-                    "contenu": answer_text,
-                }
-            )
 
-        narratif_info = narratif_participant_map.get((row["gala_id"], row["compagnie_id"]))
-        if narratif_info:
-            narratif_questions = questions_map.get(narratif_info["gala_categorie_id"], [])
-            narratif_responses = responses_map.get(narratif_info["participant_id"], {})
-            for question in narratif_questions:
-                answer_text = narratif_responses.get(question["id"])
-                if answer_text is None:
-                    continue
-                if not str(answer_text).strip():
-                    continue
+        responses_payload: Optional[List[Dict[str, Any]]] = None
+        if not summary_mode:
+            questions = questions_map.get(gala_categorie_id, [])
+            participant_responses = responses_map.get(participant_id, {})
+            responses_payload = []
+            for question in questions:
                 responses_payload.append(
                     {
                         "question_id": question["id"],
                         "ordre": question["ordre"],
                         "texte": question["texte"],
                         "ponderation": question["ponderation"],
-                        "contenu": answer_text,
-                        "origin": "narratif",
+                        "contenu": participant_responses.get(question["id"]),
                     }
                 )
 
-        total_questions = len(questions)
+            narratif_info = narratif_participant_map.get((row["gala_id"], row["compagnie_id"]))
+            if narratif_info:
+                narratif_questions = questions_map.get(narratif_info["gala_categorie_id"], [])
+                narratif_responses = responses_map.get(narratif_info["participant_id"], {})
+                for question in narratif_questions:
+                    answer_text = narratif_responses.get(question["id"])
+                    if answer_text is None:
+                        continue
+                    if not str(answer_text).strip():
+                        continue
+                    responses_payload.append(
+                        {
+                            "question_id": question["id"],
+                            "ordre": question["ordre"],
+                            "texte": question["texte"],
+                            "ponderation": question["ponderation"],
+                            "contenu": answer_text,
+                            "origin": "narratif",
+                        }
+                    )
+
+        answered_count = row["answered"]
+        total_questions = row["total_questions"]
         completion_percent = round((answered_count / total_questions) * 100, 1) if total_questions else 0.0
 
-        participants_payload.append(
-            {
-                "id": participant_id,
-                "gala": {
-                    "id": row["gala_id"],
-                    "nom": row["gala_nom"],
-                    "annee": row["gala_annee"],
-                },
-                "categorie": {
-                    "id": gala_categorie_id,
-                    "nom": row["categorie_nom"],
-                    "segment": row["segment_nom"],
-                    "segment_id": row["segment_id"],
-                },
-                "compagnie": {
-                    "id": row["compagnie_id"],
-                    "nom": row["compagnie_nom"],
-                    "ville": row["ville"],
-                    "secteur": row["secteur"],
-                    "telephone": row["telephone"],
-                    "courriel": row["courriel"],
-                    "responsable_nom": row["responsable_nom"],
-                    "responsable_titre": row["responsable_titre"],
-                    "site_web": row["site_web"],
-                },
-                "responses": responses_payload,
-                "stats": {
-                    "answered": answered_count,
-                    "total_questions": total_questions,
-                    "missing": max(total_questions - answered_count, 0),
-                    "completion_percent": completion_percent,
-                },
-            }
-        )
+        participant_payload = {
+            "id": participant_id,
+            "gala": {
+                "id": row["gala_id"],
+                "nom": row["gala_nom"],
+                "annee": row["gala_annee"],
+            },
+            "categorie": {
+                "id": gala_categorie_id,
+                "nom": row["categorie_nom"],
+                "segment": row["segment_nom"],
+                "segment_id": row["segment_id"],
+            },
+            "compagnie": {
+                "id": row["compagnie_id"],
+                "nom": row["compagnie_nom"],
+                "ville": row["ville"],
+                "secteur": row["secteur"],
+                "telephone": row["telephone"],
+                "courriel": row["courriel"],
+                "responsable_nom": row["responsable_nom"],
+                "responsable_titre": row["responsable_titre"],
+                "site_web": row["site_web"],
+            },
+            "search": {
+                "score": round(-row["search_score"], 3),
+                "extrait_html": highlight_html(row["search_extrait"]),
+            } if match_query else None,
+            "stats": {
+                "answered": answered_count,
+                "total_questions": total_questions,
+                "missing": max(total_questions - answered_count, 0),
+                "completion_percent": completion_percent,
+            },
+        }
+        if responses_payload is not None:
+            participant_payload["responses"] = responses_payload
+        participants_payload.append(participant_payload)
 
     conn.close()
 
-    return jsonify(
+    return with_etag(jsonify(
         {
             "filters": {
                 "galas": filters_payload,
@@ -1706,14 +1993,19 @@ def list_admin_participants():
                     "gala_id": gala_id,
                     "categorie_id": categorie_id,
                     "q": search or None,
+                    "missing_only": missing_only,
                 },
             },
             "participants": participants_payload,
             "meta": {
-                "total": len(participants_payload),
+                "total": total_count if total_count is not None else len(participants_payload),
+                "count": len(participants_payload),
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "summary": summary_mode,
             },
         }
-    )
+    ), etag)
 
 
 @admin_bp.route("/api/participants/<int:participant_id>/responses", methods=["GET"])
@@ -1724,6 +2016,7 @@ def get_participant_responses(participant_id: int):
         SELECT
             p.id,
             p.gala_categorie_id,
+            p.compagnie_id,
             gc.gala_id,
             comp.nom AS compagnie_nom,
             comp.ville AS compagnie_ville,
@@ -1763,6 +2056,25 @@ def get_participant_responses(participant_id: int):
         for row in question_rows
     ]
 
+    # Reponses narratives de la meme compagnie pour ce gala (lecture seule ici).
+    narratif_rows = conn.execute(
+        """
+        SELECT q.id, q.texte, r.contenu AS reponse
+        FROM participant AS np
+        JOIN gala_categorie AS ngc ON ngc.id = np.gala_categorie_id
+        JOIN categorie AS nc ON nc.id = ngc.categorie_id
+        JOIN question AS q ON q.gala_categorie_id = np.gala_categorie_id
+        JOIN reponse_participant AS r ON r.question_id = q.id AND r.participant_id = np.id
+        WHERE np.compagnie_id = ?
+          AND ngc.gala_id = ?
+          AND np.id != ?
+          AND nc.is_narratif = 1
+          AND TRIM(COALESCE(r.contenu, '')) != ''
+        ORDER BY q.id ASC
+        """,
+        (participant_row["compagnie_id"], participant_row["gala_id"], participant_id),
+    ).fetchall()
+
     payload = {
         "participant": {
             "id": participant_row["id"],
@@ -1775,6 +2087,10 @@ def get_participant_responses(participant_id: int):
             "nom": participant_row["categorie_nom"],
         },
         "questions": questions_payload,
+        "narratif": [
+            {"id": row["id"], "texte": row["texte"], "reponse": row["reponse"]}
+            for row in narratif_rows
+        ],
     }
     conn.close()
     return jsonify(payload)
@@ -1832,6 +2148,9 @@ def update_participant_response(participant_id: int, question_id: int):
 def admin_results_dashboard():
     gala_id = request.args.get("gala_id", type=int)
     selected_category_id = request.args.get("categorie_id", type=int)
+    strategy = request.args.get("strategie") or scoring.DEFAULT_STRATEGY
+    if strategy not in scoring.STRATEGIES:
+        return jsonify({"status": "error", "message": "Strategie de score inconnue."}), 400
 
     conn = get_db_connection()
 
@@ -1863,24 +2182,29 @@ def admin_results_dashboard():
     target_gala_id = gala_id if gala_id in available_gala_ids else gala_rows[0]["id"]
     gala_info_row = next(row for row in gala_rows if row["id"] == target_gala_id)
 
-    category_rows = conn.execute(
-        """
-        SELECT
-            gc.id,
-            gc.ordre_affichage,
-            c.nom,
-            COUNT(DISTINCT q.id) AS question_count,
-            COUNT(DISTINCT p.id) AS participant_count
-        FROM gala_categorie AS gc
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        LEFT JOIN question AS q ON q.gala_categorie_id = gc.id
-        LEFT JOIN participant AS p ON p.gala_categorie_id = gc.id
-        WHERE gc.gala_id = ?
-        GROUP BY gc.id
-        ORDER BY gc.ordre_affichage, c.nom COLLATE NOCASE
-        """,
-        (target_gala_id,),
-    ).fetchall()
+    version = gala_version(conn, target_gala_id)
+    etag = make_etag(version, gala_options)
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
+
+    # Point de reprise du flux SSE : les deltas posterieurs seront rejoues.
+    live_event_id = live.latest_event_id(conn)
+
+    # Participants, compagnies, juges, coups de coeur et scores agreges : un instantane par version.
+    snap = gala_snapshot.snapshot(conn, target_gala_id, version)
+    structure = snap.structure if snap else None
+    category_rows = [
+        {
+            "id": category.id,
+            "nom": category.nom,
+            "question_count": category.question_count,
+            "participant_count": snap.participant_count(category.id),
+            "total_weight": category.total_weight,
+        }
+        for category in (structure.categories if structure else ())
+    ]
 
     category_options = [
         {
@@ -1907,7 +2231,9 @@ def admin_results_dashboard():
                     "id": gala_info_row["id"],
                     "nom": gala_info_row["nom"],
                     "annee": gala_info_row["annee"],
+                    "locked": bool(structure and structure.locked),
                 },
+                "live_event_id": live_event_id,
                 "favorite_bonus": FAVORITE_BONUS,
                 "overall_completion_percent": 0.0,
                 "overall_recorded": 0,
@@ -1928,141 +2254,37 @@ def admin_results_dashboard():
         category_ids = [selected_category_id]
     else:
         category_ids = category_ids_all[:]
+    selected_ids = set(category_ids)
 
     categories_lookup: Dict[int, Dict[str, Any]] = {}
     for row in category_rows:
+        judge_count = snap.judge_counts.get(row["id"], 0)
         categories_lookup[row["id"]] = {
             "id": row["id"],
             "nom": row["nom"],
             "question_count": row["question_count"],
             "participant_count": row["participant_count"],
-            "judge_count": 0,
-            "total_weight": 0.0,
+            "judge_count": judge_count,
+            "total_weight": row["total_weight"],
             "participants": [],
             "recorded_notes": 0,
-            "expected_notes_total": 0,
+            "expected_notes_total": row["question_count"] * row["participant_count"] * judge_count,
             "favorites_count": 0,
         }
 
-    if category_ids_all:
-        placeholders_all = ",".join("?" for _ in category_ids_all)
-        judge_counts_rows = conn.execute(
-            f"""
-            SELECT jgc.gala_categorie_id, COUNT(DISTINCT jgc.juge_id) AS judge_count
-            FROM juge_gala_categorie AS jgc
-            WHERE jgc.gala_categorie_id IN ({placeholders_all})
-            GROUP BY jgc.gala_categorie_id
-            """,
-            tuple(category_ids_all),
-        ).fetchall()
-        weight_rows = conn.execute(
-            f"""
-            SELECT gala_categorie_id, SUM(ponderation) AS total_weight
-            FROM question
-            WHERE gala_categorie_id IN ({placeholders_all})
-            GROUP BY gala_categorie_id
-            """,
-            tuple(category_ids_all),
-        ).fetchall()
-    else:
-        judge_counts_rows = []
-        weight_rows = []
-
-    judge_counts_map = {row["gala_categorie_id"]: row["judge_count"] for row in judge_counts_rows}
-    weight_map = {row["gala_categorie_id"]: row["total_weight"] or 0.0 for row in weight_rows}
-
-    for cat_id, info in categories_lookup.items():
-        judge_count = judge_counts_map.get(cat_id, 0)
-        info["judge_count"] = judge_count
-        info["total_weight"] = weight_map.get(cat_id, 0.0) or 0.0
-        info["expected_notes_total"] = info["question_count"] * info["participant_count"] * judge_count
-
-    favorite_rows = conn.execute(
-        """
-        SELECT cdc.participant_id, cdc.juge_id, per.prenom, per.nom
-        FROM coup_de_coeur AS cdc
-        JOIN juge AS j ON j.id = cdc.juge_id
-        JOIN user AS u ON u.id = j.user_id
-        JOIN personne AS per ON per.id = u.personne_id
-        WHERE cdc.gala_id = ?
-        """,
-        (target_gala_id,),
-    ).fetchall()
-
-    favorite_lists: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
-    for row in favorite_rows:
-        favorite_lists[row["participant_id"]].append(
-            {
-                "juge_id": row["juge_id"],
-                "nom": f"{row['prenom']} {row['nom']}",
-            }
-        )
-
-    judge_rows = conn.execute(
-        """
-        SELECT DISTINCT j.id AS juge_id, per.prenom, per.nom
-        FROM juge_gala_categorie AS jgc
-        JOIN juge AS j ON j.id = jgc.juge_id
-        JOIN user AS u ON u.id = j.user_id
-        JOIN personne AS per ON per.id = u.personne_id
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        WHERE gc.gala_id = ?
-        ORDER BY per.nom COLLATE NOCASE, per.prenom COLLATE NOCASE
-        """,
-        (target_gala_id,),
-    ).fetchall()
-
-    if category_ids:
-        placeholders_selected = ",".join("?" for _ in category_ids)
-        expected_rows = conn.execute(
-            f"""
-            SELECT jgc.juge_id, COUNT(*) AS total_required
-            FROM juge_gala_categorie AS jgc
-            JOIN question AS q ON q.gala_categorie_id = jgc.gala_categorie_id
-            JOIN participant AS p ON p.gala_categorie_id = jgc.gala_categorie_id
-            WHERE jgc.gala_categorie_id IN ({placeholders_selected})
-            GROUP BY jgc.juge_id
-            """,
-            tuple(category_ids),
-        ).fetchall()
-    else:
-        expected_rows = []
-
-    answered_rows = conn.execute(
-        """
-        SELECT n.juge_id, COUNT(*) AS total_answered
-        FROM note AS n
-        JOIN participant AS p ON p.id = n.participant_id
-        JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
-        WHERE gc.gala_id = ?
-        GROUP BY n.juge_id
-        """,
-        (target_gala_id,),
-    ).fetchall()
-
-    submission_rows = conn.execute(
-        "SELECT juge_id, submitted_at FROM juge_gala_submission WHERE gala_id = ?",
-        (target_gala_id,),
-    ).fetchall()
-
-    expected_map = {row["juge_id"]: row["total_required"] for row in expected_rows}
-    answered_map = {row["juge_id"]: row["total_answered"] for row in answered_rows}
-    submitted_map = {row["juge_id"]: row["submitted_at"] for row in submission_rows}
-
     judges_payload: List[Dict[str, Any]] = []
-    for row in judge_rows:
-        juge_id = row["juge_id"]
-        expected_total = expected_map.get(juge_id, 0)
-        answered_total = answered_map.get(juge_id, 0)
+    for index, judge in enumerate(snap.judges):
+        expected_total = snap.judge_expected(judge, selected_ids)
+        answered_total = snap.judge_answered[index]
         percent = round((answered_total / expected_total) * 100, 1) if expected_total else 0.0
-        submitted_at = submitted_map.get(juge_id)
+        submitted_at = snap.judge_submitted_at[index]
         submitted = submitted_at is not None
         status = "soumis" if submitted else ("en_cours" if answered_total > 0 else "en_attente")
         judges_payload.append(
             {
-                "id": juge_id,
-                "prenom": row["prenom"],
-                "nom": row["nom"],
+                "id": judge.id,
+                "prenom": judge.prenom,
+                "nom": judge.nom,
                 "answered_notes": answered_total,
                 "expected_notes": expected_total,
                 "progress_percent": percent,
@@ -2072,119 +2294,69 @@ def admin_results_dashboard():
             }
         )
 
-    if not category_ids:
-        conn.close()
-        return jsonify({
-            "filters": {
-                "galas": gala_options,
-                "categories": category_options,
-                "selected": {"gala_id": target_gala_id, "categorie_id": selected_category_id},
-            },
-            "meta": {
-                "gala": {
-                    "id": gala_info_row["id"],
-                    "nom": gala_info_row["nom"],
-                    "annee": gala_info_row["annee"],
-                },
-                "favorite_bonus": FAVORITE_BONUS,
-                "overall_completion_percent": 0.0,
-                "overall_recorded": 0,
-                "overall_expected": 0,
-                "judges_total": len(judges_payload),
-                "judges_submitted": sum(1 for judge in judges_payload if judge["submitted"]),
-                "participants_total": 0,
-                "categories_total": 0,
-            },
-            "judges": judges_payload,
-            "categories": [],
-        })
+    categories_to_include = [row for row in category_rows if row["id"] in selected_ids]
 
-    placeholders_selected = ",".join("?" for _ in category_ids)
-    participant_rows = conn.execute(
-        f"""
-        SELECT
-            p.id AS participant_id,
-            p.gala_categorie_id,
-            comp.nom AS compagnie_nom,
-            comp.ville AS compagnie_ville,
-            comp.secteur AS compagnie_secteur,
-            SUM(CASE WHEN n.valeur IS NOT NULL THEN n.valeur * q.ponderation ELSE 0 END) AS weighted_sum,
-            SUM(CASE WHEN n.valeur IS NOT NULL THEN q.ponderation ELSE 0 END) AS answered_weight,
-            COUNT(DISTINCT CASE WHEN n.valeur IS NOT NULL THEN n.juge_id END) AS judges_answered,
-            COUNT(DISTINCT CASE WHEN n.valeur IS NOT NULL THEN q.id || '-' || n.juge_id END) AS notes_recorded
-        FROM participant AS p
-        JOIN compagnie AS comp ON comp.id = p.compagnie_id
-        JOIN question AS q ON q.gala_categorie_id = p.gala_categorie_id
-        LEFT JOIN note AS n ON n.question_id = q.id AND n.participant_id = p.id
-        WHERE p.gala_categorie_id IN ({placeholders_selected})
-        GROUP BY p.id, p.gala_categorie_id, comp.nom, comp.ville, comp.secteur
-        ORDER BY comp.nom COLLATE NOCASE
-        """,
-        tuple(category_ids),
-    ).fetchall()
+    # Autre strategie : scores recalcules sur les notes brutes (la normalisation par juge porte sur tout le gala).
+    strategy_scores = None
+    if strategy != scoring.DEFAULT_STRATEGY:
+        strategy_scores = scoring.gala_scores(conn, target_gala_id, strategy)
 
-    categories_to_include = [row for row in category_rows if row["id"] in category_ids]
-
-    for info in categories_lookup.values():
-        info["recorded_notes"] = 0
-        info["favorites_count"] = 0
-
-    for row in participant_rows:
-        category_id = row["gala_categorie_id"]
-        info = categories_lookup.get(category_id)
-        if not info:
+    # Les scores sont précalculés dans score_aggregate (maintenu par triggers) et copiés dans l'instantané.
+    for category_id in category_ids:
+        info = categories_lookup[category_id]
+        if not info["question_count"]:
             continue
-        weighted_sum = row["weighted_sum"] or 0.0
-        answered_weight = row["answered_weight"] or 0.0
-        base_score = None
-        if answered_weight > 0:
-            base_score = weighted_sum / answered_weight
-        favorite_entries = favorite_lists.get(row["participant_id"], [])
-        bonus_value = len(favorite_entries) * FAVORITE_BONUS
-        final_score = base_score + bonus_value if base_score is not None else None
-
-        question_count = info["question_count"] or 0
-        judge_count = info["judge_count"] or 0
-        notes_expected = question_count * judge_count
-        notes_recorded = row["notes_recorded"] or 0
-
-        info["recorded_notes"] += notes_recorded
-        info["favorites_count"] += len(favorite_entries)
-
-        if notes_expected <= 0:
-            participant_status = "en_attente"
-        elif notes_recorded == 0:
-            participant_status = "en_attente"
-        elif notes_recorded >= notes_expected:
-            participant_status = "complet"
-        else:
-            participant_status = "en_cours"
-
-        progress_percent = round((notes_recorded / notes_expected) * 100, 1) if notes_expected else 0.0
-
-        participant_payload = {
-            "id": row["participant_id"],
-            "compagnie": {
-                "nom": row["compagnie_nom"],
-                "ville": row["compagnie_ville"],
-                "secteur": row["compagnie_secteur"],
-            },
-            "score_base": round(base_score, 2) if base_score is not None else None,
-            "score_bonus": round(bonus_value, 2) if bonus_value else 0.0,
-            "score_final": round(final_score, 2) if final_score is not None else None,
-            "score_value": final_score,
-            "status": participant_status,
-            "notes": {
-                "recorded": notes_recorded,
-                "expected": notes_expected,
-                "progress_percent": progress_percent,
-            },
-            "favorites": [fav["nom"] for fav in favorite_entries],
-            "favorites_count": len(favorite_entries),
-            "judges_answered": row["judges_answered"] or 0,
-        }
-
-        info["participants"].append(participant_payload)
+        notes_expected = info["question_count"] * info["judge_count"]
+        for index, participant in snap.category_participants(category_id):
+            answered_weight = snap.answered_weight[index]
+            base_score = None
+            if strategy_scores is not None:
+                base_score = strategy_scores.get(participant.id)
+            elif answered_weight > 0:
+                base_score = snap.weighted_sum[index] / answered_weight
+            favorite_entries = snap.favorites.get(participant.id, ())
+            bonus_value = len(favorite_entries) * FAVORITE_BONUS
+            final_score = base_score + bonus_value if base_score is not None else None
+            notes_recorded = snap.notes_recorded[index]
+
+            info["recorded_notes"] += notes_recorded
+            info["favorites_count"] += len(favorite_entries)
+
+            if notes_expected <= 0:
+                participant_status = "en_attente"
+            elif notes_recorded == 0:
+                participant_status = "en_attente"
+            elif notes_recorded >= notes_expected:
+                participant_status = "complet"
+            else:
+                participant_status = "en_cours"
+
+            progress_percent = round((notes_recorded / notes_expected) * 100, 1) if notes_expected else 0.0
+
+            company = participant.company
+            info["participants"].append(
+                {
+                    "id": participant.id,
+                    "compagnie": {
+                        "nom": company.nom,
+                        "ville": company.ville,
+                        "secteur": company.secteur,
+                    },
+                    "score_base": round(base_score, 2) if base_score is not None else None,
+                    "score_bonus": round(bonus_value, 2) if bonus_value else 0.0,
+                    "score_final": round(final_score, 2) if final_score is not None else None,
+                    "score_value": final_score,
+                    "status": participant_status,
+                    "notes": {
+                        "recorded": notes_recorded,
+                        "expected": notes_expected,
+                        "progress_percent": progress_percent,
+                    },
+                    "favorites": [fav.nom for fav in favorite_entries],
+                    "favorites_count": len(favorite_entries),
+                    "judges_answered": snap.judges_answered[index],
+                }
+            )
 
     categories_payload: List[Dict[str, Any]] = []
     participants_total = 0
@@ -2210,31 +2382,17 @@ def admin_results_dashboard():
 
 
 
-        participants_sorted = sorted(
+        participants_sorted = []
+        for rank, participant in scoring.ranked(
             info["participants"],
-            key=lambda item: (
-                item.get("score_value") is None,
-                -(item.get("score_value") or 0.0),
-                (item["compagnie"]["nom"] or "").lower(),
-            ),
-        )
+            score=lambda item: item.get("score_value"),
+            name=lambda item: item["compagnie"]["nom"],
+        ):
+            participant["rank"] = rank
+            participants_sorted.append(participant)
 
         participants_total += len(participants_sorted)
 
-        rank_counter = 0
-        current_rank = 0
-        previous_score = None
-        for participant in participants_sorted:
-            value = participant.get("score_value")
-            if value is None:
-                participant["rank"] = None
-                continue
-            rank_counter += 1
-            if previous_score is None or abs(value - previous_score) > 1e-6:
-                current_rank = rank_counter
-                previous_score = value
-            participant["rank"] = current_rank
-
         top_participant = next((p for p in participants_sorted if p.get("rank") == 1), None)
 
         for participant in participants_sorted:
@@ -2269,8 +2427,12 @@ def admin_results_dashboard():
             "id": gala_info_row["id"],
             "nom": gala_info_row["nom"],
             "annee": gala_info_row["annee"],
+            "locked": structure.locked,
         },
+        "live_event_id": live_event_id,
         "favorite_bonus": FAVORITE_BONUS,
+        "strategie": strategy,
+        "strategies": list(scoring.STRATEGIES),
         "overall_completion_percent": overall_completion_percent,
         "overall_recorded": overall_recorded_notes,
         "overall_expected": overall_expected_notes,
@@ -2295,4 +2457,293 @@ def admin_results_dashboard():
     }
 
     conn.close()
-    return jsonify(response)
+    return with_etag(jsonify(response), etag)
+
+
+# ==============================
+# 📥 Imports CSV en arriere-plan
+# ==============================
+@admin_bp.route("/api/imports", methods=["POST"])
+def start_csv_import():
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"status": "error", "message": "Fichier CSV manquant."}), 400
+    gala_nom = (request.form.get("gala") or "").strip()
+    annee = request.form.get("annee", type=int)
+    if not gala_nom or annee is None:
+        return jsonify({"status": "error", "message": "Nom du gala et annee requis."}), 400
+    lieu = (request.form.get("lieu") or "").strip() or None
+    date_gala = (request.form.get("date") or "").strip() or None
+    restart = (request.form.get("restart") or "").lower() in {"1", "true", "on"}
+
+    conn = get_db_connection()
+    gala_row = conn.execute("SELECT id FROM gala WHERE nom = ? AND annee = ?", (gala_nom, annee)).fetchone()
+    if gala_row:
+        locked_response = _ensure_gala_unlocked(conn, gala_row["id"])
+        if locked_response is not None:
+            return locked_response
+    conn.close()
+
+    runner = import_jobs.get_runner()
+    csv_path, file_hash = runner.save_upload(upload.stream)
+
+    conn = get_db_connection()
+    # Reservation en base, valable pour tous les workers (et pas seulement ce processus).
+    conn.execute("BEGIN IMMEDIATE")
+    job, claimed = runner.claim(conn, file_hash, gala_nom, annee, file_name=upload.filename, restart=restart)
+    conn.commit()
+    conn.close()
+    if job["status"] == "done":
+        return jsonify({"status": "ok", "job": job})
+    if not claimed:
+        return jsonify({"status": "error", "message": "Import deja en cours.", "job": job}), 409
+
+    future = runner.submit(
+        job["id"], csv_path, gala_nom, annee, lieu, date_gala, file_name=upload.filename, restart=restart
+    )
+    if future is None:
+        return jsonify({"status": "error", "message": "Import deja en cours.", "job": job}), 409
+    return jsonify({"status": "ok", "job": job}), 202
+
+
+@admin_bp.route("/api/imports/<int:checkpoint_id>", methods=["GET"])
+def csv_import_status(checkpoint_id: int):
+    conn = get_db_connection()
+    job = import_jobs.load_checkpoint(conn, checkpoint_id)
+    conn.close()
+    if job is None:
+        return jsonify({"status": "error", "message": "Import introuvable."}), 404
+    return jsonify({"job": job})
+
+
+# ==============================
+# 📤 Exports en flux (CSV / XLSX)
+# ==============================
+EXPORT_KINDS = {
+    "results": ("resultats", "Resultats", exports.RESULTS_HEADER),
+    "notes": ("notes", "Notes", exports.NOTES_HEADER),
+}
+
+
+def _stream_export(gala_id: int, kind: str, export_format: str, strategy: str):
+    _, sheet_name, header = EXPORT_KINDS[kind]
+    # Connexion dediee : le pool reste disponible pendant un long telechargement.
+    conn = open_standalone_connection()
+    try:
+        if kind == "results":
+            rows = exports.iter_results_rows(conn, gala_id, FAVORITE_BONUS, strategy)
+        else:
+            rows = exports.iter_notes_rows(conn, gala_id)
+        if export_format == "xlsx":
+            yield from exports.stream_xlsx(sheet_name, header, rows)
+        else:
+            yield from exports.stream_csv(header, rows)
+    finally:
+        conn.close()
+
+
+@admin_bp.route("/api/galas/<int:gala_id>/export/<kind>", methods=["GET"])
+def export_gala_data(gala_id: int, kind: str):
+    if kind not in EXPORT_KINDS:
+        abort(404)
+    export_format = (request.args.get("format") or "csv").lower()
+    if export_format not in exports.EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": "Format d'export invalide."}), 400
+    strategy = request.args.get("strategie") or scoring.DEFAULT_STRATEGY
+    if strategy not in scoring.STRATEGIES:
+        return jsonify({"status": "error", "message": "Strategie de score inconnue."}), 400
+
+    conn = get_db_connection()
+    gala_row = conn.execute("SELECT id, annee FROM gala WHERE id = ?", (gala_id,)).fetchone()
+    conn.close()
+    if not gala_row:
+        return jsonify({"status": "error", "message": "Gala introuvable."}), 404
+
+    prefix = EXPORT_KINDS[kind][0]
+    suffix = f"_{strategy}" if kind == "results" and strategy != scoring.DEFAULT_STRATEGY else ""
+    filename = f"{prefix}_gala_{gala_row['annee']}_{gala_id}{suffix}.{export_format}"
+    mimetype = exports.XLSX_MIMETYPE if export_format == "xlsx" else exports.CSV_MIMETYPE
+    response = Response(_stream_export(gala_id, kind, export_format, strategy), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+# ==============================
+# 📡 Flux temps reel des resultats (SSE)
+# ==============================
+@admin_bp.route("/api/results/stream", methods=["GET"])
+def stream_results_events():
+    gala_id = request.args.get("gala_id", type=int)
+    if not gala_id:
+        return jsonify({"status": "error", "message": "Gala invalide."}), 400
+    # EventSource renvoie Last-Event-ID a la reconnexion ; sinon point de reprise explicite.
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get("last_event_id", type=int)
+
+    conn = get_db_connection()
+    gala_row = conn.execute("SELECT id FROM gala WHERE id = ?", (gala_id,)).fetchone()
+    conn.close()
+    if not gala_row:
+        return jsonify({"status": "error", "message": "Gala introuvable."}), 404
+
+    config = {key: current_app.config.get(key, value) for key, value in live.DEFAULT_LIVE_CONFIG.items()}
+    if not live.try_open_stream(config["LIVE_MAX_STREAMS"]):
+        # Le client se rabat sur un rafraichissement periodique (ETag).
+        return jsonify({"status": "error", "message": "Trop de flux ouverts."}), 503
+
+    response = Response(
+        live.stream_events(
+            gala_id,
+            last_event_id,
+            poll_interval=config["LIVE_POLL_INTERVAL"],
+            max_seconds=config["LIVE_STREAM_MAX_SECONDS"],
+            keepalive_seconds=config["LIVE_KEEPALIVE_SECONDS"],
+        ),
+        mimetype="text/event-stream",
+    )
+    response.call_on_close(live.release_stream)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ==============================
+# 🔮 Simulation de classement (« et si »)
+# ==============================
+@admin_bp.route("/api/results/what-if", methods=["POST"])
+def results_what_if():
+    """Classement recalcule selon une strategie, sans certains juges ou avec d'autres ponderations.
+
+    Rien n'est ecrit : le classement officiel (moyenne ponderee + bonus) sert de reference.
+    """
+    payload = request.get_json(silent=True) or {}
+    strategy = payload.get("strategie") or scoring.DEFAULT_STRATEGY
+    if strategy not in scoring.STRATEGIES:
+        return jsonify({"status": "error", "message": "Strategie de score inconnue."}), 400
+    try:
+        gala_id = int(payload.get("gala_id"))
+        excluded_judges = {int(juge_id) for juge_id in payload.get("exclure_juges") or []}
+        bonus = float(payload.get("bonus", FAVORITE_BONUS))
+        weights = {int(question_id): float(weight) for question_id, weight in (payload.get("ponderations") or {}).items()}
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"status": "error", "message": "Parametres de simulation invalides."}), 400
+    if bonus < 0 or any(weight < 0 for weight in weights.values()):
+        return jsonify({"status": "error", "message": "Bonus et ponderations doivent etre positifs."}), 400
+
+    conn = get_db_connection()
+    lock_row = _get_gala_lock(conn, gala_id)
+    structure = gala_structure.gala_structure(conn, gala_id, locked_at=lock_row["locked_at"] if lock_row else None)
+    if structure is None:
+        conn.close()
+        return jsonify({"status": "error", "message": "Gala introuvable."}), 404
+
+    matrix = scoring.cached_matrix(conn, gala_id)
+    participant_rows = conn.execute(
+        """
+        SELECT p.id, p.gala_categorie_id, comp.nom AS compagnie_nom
+        FROM participant AS p
+        JOIN compagnie AS comp ON comp.id = p.compagnie_id
+        JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+        WHERE gc.gala_id = ?
+        """,
+        (gala_id,),
+    ).fetchall()
+    favorite_rows = conn.execute(
+        "SELECT participant_id, juge_id FROM coup_de_coeur WHERE gala_id = ?",
+        (gala_id,),
+    ).fetchall()
+    conn.close()
+
+    official_favorites: Dict[int, int] = defaultdict(int)
+    scenario_favorites: Dict[int, int] = defaultdict(int)
+    for row in favorite_rows:
+        official_favorites[row["participant_id"]] += 1
+        if row["juge_id"] not in excluded_judges:
+            scenario_favorites[row["participant_id"]] += 1
+
+    scenario_matrix = matrix.without_judges(excluded_judges).with_weights(weights)
+    official_scores = scoring.compute_scores(matrix)
+    scenario_scores = scoring.compute_scores(scenario_matrix, strategy)
+    note_counts = scenario_matrix.note_counts()
+
+    participants_by_category: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in participant_rows:
+        participant_id = row["id"]
+        official = official_scores.get(participant_id)
+        base_score = scenario_scores.get(participant_id)
+        notes_recorded, judges_answered = note_counts.get(participant_id, (0, 0))
+        participants_by_category[row["gala_categorie_id"]].append(
+            {
+                "id": participant_id,
+                "compagnie": row["compagnie_nom"],
+                "official_value": official + official_favorites[participant_id] * FAVORITE_BONUS if official is not None else None,
+                "score_value": base_score + scenario_favorites[participant_id] * bonus if base_score is not None else None,
+                "score_base": round(base_score, 2) if base_score is not None else None,
+                "favorites_count": scenario_favorites[participant_id],
+                "notes_recorded": notes_recorded,
+                "judges_answered": judges_answered,
+            }
+        )
+
+    categories_payload: List[Dict[str, Any]] = []
+    for category in structure.categories:
+        if not category.question_count:
+            continue
+        participants = participants_by_category.get(category.id, [])
+        official_ranks = {
+            participant["id"]: rank
+            for rank, participant in scoring.ranked(
+                participants, score=lambda item: item["official_value"], name=lambda item: item["compagnie"]
+            )
+        }
+        ranked_participants = []
+        for rank, participant in scoring.ranked(
+            participants, score=lambda item: item["score_value"], name=lambda item: item["compagnie"]
+        ):
+            official_rank = official_ranks[participant["id"]]
+            final_score = participant.pop("score_value")
+            official_score = participant.pop("official_value")
+            participant.update(
+                {
+                    "score_final": round(final_score, 2) if final_score is not None else None,
+                    "score_officiel": round(official_score, 2) if official_score is not None else None,
+                    "rank": rank,
+                    "rank_officiel": official_rank,
+                    # Positif : le participant gagne des places par rapport au classement officiel.
+                    "rank_delta": official_rank - rank if rank is not None and official_rank is not None else None,
+                }
+            )
+            ranked_participants.append(participant)
+        categories_payload.append({"id": category.id, "nom": category.nom, "participants": ranked_participants})
+
+    return jsonify({
+        "status": "ok",
+        "gala_id": gala_id,
+        "strategie": strategy,
+        "bonus": bonus,
+        "exclure_juges": sorted(excluded_judges),
+        "ponderations": {str(question_id): weight for question_id, weight in sorted(weights.items())},
+        "categories": categories_payload,
+    })
+
+
+@admin_bp.route("/api/results/rebuild", methods=["POST"])
+def rebuild_results_scoreboard():
+    payload = request.get_json(silent=True) or {}
+    gala_id = payload.get("gala_id")
+    if gala_id is not None:
+        try:
+            gala_id = int(gala_id)
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "Gala invalide."}), 400
+
+    conn = get_db_connection()
+    written = rebuild_score_aggregates(conn, gala_id)
+    workload_rows = rebuild_judge_workload(conn, gala_id)
+    # Tables derivees reecrites sans trigger de version : ETag et caches de tous les workers a refaire.
+    bump_data_version(conn, gala_id)
+    conn.commit()
+    conn.close()
+    return jsonify({"status": "ok", "rows": written, "workload_rows": workload_rows})
@@ -3,11 +3,15 @@
 from datetime import datetime, UTC
 from typing import Any, Dict, List, Tuple, Optional
 
-from flask import Blueprint, abort, jsonify, redirect, render_template, request, session, url_for
+from flask import Blueprint, abort, g, jsonify, redirect, render_template, request, session, url_for
 
-from models.db import get_db_connection
+from models import gala_snapshot, gala_structure, live, narratif, note_queue
+from models.data_version import STRUCTURE_VERSION_SQL, gala_version, galas_version, make_etag, not_modified, with_etag
+from models.db import get_db_connection, init_app as init_db_app
 
 judge_bp = Blueprint("judge", __name__, url_prefix="/judge")
+judge_bp.record_once(lambda state: init_db_app(state.app))
+judge_bp.record_once(lambda state: note_queue.init_app(state.app))
 
 
 def _current_user() -> Dict[str, Any] | None:
@@ -24,100 +28,109 @@ def _require_judge_user() -> Dict[str, Any]:
     return user
 
 
-def _get_judge_id(conn, user_id: int) -> int:
-    row = conn.execute(
-        "SELECT id FROM juge WHERE user_id = ?",
-        (user_id,),
-    ).fetchone()
-    if not row:
-        abort(403)
-    return row["id"]
-
-
-def _fetch_lock_info(conn, gala_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-    if not gala_ids:
-        return {}
-    placeholders = ",".join("?" for _ in gala_ids)
+def _load_judge_context(conn, user_id: int) -> Optional[Dict[str, Any]]:
     rows = conn.execute(
-        f"SELECT gala_id, locked_at, locked_by FROM gala_lock WHERE gala_id IN ({placeholders})",
-        tuple(gala_ids),
-    ).fetchall()
-    return {row["gala_id"]: {"locked_at": row["locked_at"], "locked_by": row["locked_by"]} for row in rows}
-
-
-def _fetch_submission_info(conn, juge_id: int, gala_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-    if not gala_ids:
-        return {}
-    placeholders = ",".join("?" for _ in gala_ids)
-    rows = conn.execute(
-        f"""
-        SELECT gala_id, submitted_at
-        FROM juge_gala_submission
-        WHERE juge_id = ? AND gala_id IN ({placeholders})
+        """
+        SELECT j.id AS juge_id,
+               gc.id AS gala_categorie_id, gc.gala_id, gc.categorie_id,
+               c.nom AS categorie_nom, g.nom AS gala_nom, g.annee AS gala_annee,
+               gl.locked_at, gl.locked_by, s.submitted_at
+        FROM juge AS j
+        LEFT JOIN juge_gala_categorie AS jgc ON jgc.juge_id = j.id
+        LEFT JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
+        LEFT JOIN gala AS g ON g.id = gc.gala_id
+        LEFT JOIN categorie AS c ON c.id = gc.categorie_id
+        LEFT JOIN gala_lock AS gl ON gl.gala_id = gc.gala_id
+        LEFT JOIN juge_gala_submission AS s ON s.juge_id = j.id AND s.gala_id = gc.gala_id
+        WHERE j.user_id = ?
+        ORDER BY g.annee DESC, c.nom COLLATE NOCASE, gc.id
         """,
-        (juge_id, *gala_ids),
+        (user_id,),
     ).fetchall()
-    return {row["gala_id"]: {"submitted_at": row["submitted_at"]} for row in rows}
+    if not rows:
+        return None
 
+    categories: Dict[int, Dict[str, Any]] = {}
+    locks: Dict[int, Dict[str, Any]] = {}
+    submissions: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        if row["gala_categorie_id"] is None:
+            continue
+        gala_id = row["gala_id"]
+        categories[row["gala_categorie_id"]] = {
+            "id": row["gala_categorie_id"],
+            "gala_id": gala_id,
+            "categorie_id": row["categorie_id"],
+            "categorie_nom": row["categorie_nom"],
+            "gala_nom": row["gala_nom"],
+            "gala_annee": row["gala_annee"],
+        }
+        if row["locked_at"] is not None:
+            locks[gala_id] = {"locked_at": row["locked_at"], "locked_by": row["locked_by"]}
+        if row["submitted_at"] is not None:
+            submissions[gala_id] = {"submitted_at": row["submitted_at"]}
+
+    return {
+        "user_id": user_id,
+        "juge_id": rows[0]["juge_id"],
+        # Categories assignees, dans l'ordre d'affichage (annee desc, nom).
+        "categories": categories,
+        "category_ids": set(categories),
+        "gala_ids": {category["gala_id"] for category in categories.values()},
+        "locks": locks,
+        "submissions": submissions,
+    }
 
-def _fetch_narratif_category_ids(conn, gala_id: int) -> List[int]:
-    rows = conn.execute(
-        """
-        SELECT gc.id
-        FROM gala_categorie AS gc
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        WHERE gc.gala_id = ? AND LOWER(c.nom) LIKE 'narratif%'
-        """,
-        (gala_id,),
-    ).fetchall()
-    return [row["id"] for row in rows]
 
+def _get_judge_context(conn, user: Dict[str, Any]) -> Dict[str, Any]:
+    """Juge, affectations, verrous et soumissions : une requete, memorisee pour la requete HTTP."""
+    context = g.get("judge_context")
+    if context is None or context["user_id"] != user["id"]:
+        context = _load_judge_context(conn, user["id"])
+        if context is None:
+            abort(403)
+        g.judge_context = context
+    return context
 
-def _find_narratif_participant(
-    conn,
-    compagnie_id: int,
-    narratif_category_ids: List[int],
-) -> Optional[Dict[str, Any]]:
-    if not narratif_category_ids:
-        return None
-    placeholders = ",".join("?" for _ in narratif_category_ids)
-    rows = conn.execute(
-        f"""
-        SELECT id, gala_categorie_id
-        FROM participant
-        WHERE compagnie_id = ? AND gala_categorie_id IN ({placeholders})
-        ORDER BY id ASC
-        LIMIT 1
-        """,
-        (compagnie_id, *narratif_category_ids),
-    ).fetchall()
-    if not rows:
-        return None
-    row = rows[0]
-    return {"id": row["id"], "gala_categorie_id": row["gala_categorie_id"]}
+
+def _sync_pending_notes(conn, user: Dict[str, Any]) -> None:
+    """Ecriture differee : applique d'abord les notes du juge encore en file (avant tout ETag)."""
+    if note_queue.get_queue() is None:
+        return
+    note_queue.sync_judge(_get_judge_context(conn, user)["juge_id"])
 
 
 def _load_questions_with_notes(
     conn,
-    participant_id: int,
     juge_id: int,
-    gala_categorie_id: int,
+    targets: List[Tuple[int, int]],
 ) -> List[Dict[str, Any]]:
+    """Questions, reponses et notes du juge pour des paires (participant, gala_categorie).
+
+    Une seule requete pour la fiche et sa partie narrative ; les lignes suivent
+    l'ordre de ``targets`` puis l'id de question.
+    """
+    values = ", ".join("(?, ?, ?)" for _ in targets)
+    params: List[Any] = []
+    for ordre, (participant_id, gala_categorie_id) in enumerate(targets):
+        params.extend((ordre, participant_id, gala_categorie_id))
     return conn.execute(
-        """
+        f"""
+        WITH target(ordre, participant_id, gala_categorie_id) AS (VALUES {values})
         SELECT q.id, q.texte, q.ponderation,
+               t.participant_id AS scope_participant_id,
                r.contenu AS reponse,
                n.valeur AS note_valeur,
                n.commentaire AS note_commentaire
-        FROM question AS q
+        FROM target AS t
+        JOIN question AS q ON q.gala_categorie_id = t.gala_categorie_id
         LEFT JOIN reponse_participant AS r
-            ON r.question_id = q.id AND r.participant_id = ?
+            ON r.question_id = q.id AND r.participant_id = t.participant_id
         LEFT JOIN note AS n
-            ON n.question_id = q.id AND n.participant_id = ? AND n.juge_id = ?
-        WHERE q.gala_categorie_id = ?
-        ORDER BY q.id ASC
+            ON n.question_id = q.id AND n.participant_id = t.participant_id AND n.juge_id = ?
+        ORDER BY t.ordre, q.id ASC
         """,
-        (participant_id, participant_id, juge_id, gala_categorie_id),
+        (*params, juge_id),
     ).fetchall()
 
 
@@ -129,22 +142,30 @@ def _get_coup_de_coeur(conn, juge_id: int, gala_id: int) -> Optional[int]:
     return row["participant_id"] if row else None
 
 
-def _compute_progress(question_count: int, participant_ids: List[int], note_counts: Dict[int, int]) -> Tuple[float, int, int, int]:
-    total_required = question_count * len(participant_ids)
-    if total_required == 0:
-        return 0.0, 0, 0, total_required
+WORKLOAD_COLUMNS = (
+    "gala_categorie_id, question_count, participant_count, expected_notes, recorded_notes, completed_participants"
+)
 
-    recorded = 0
-    completed_participants = 0
-    for participant_id in participant_ids:
-        notes = note_counts.get(participant_id, 0)
-        capped = min(notes, question_count)
-        recorded += capped
-        if question_count > 0 and notes >= question_count:
-            completed_participants += 1
 
-    percent = round((recorded / total_required) * 100, 1) if total_required else 0.0
-    return percent, completed_participants, recorded, total_required
+def _load_workload(conn, juge_id: int, gala_categorie_id: Optional[int] = None) -> Dict[int, Any]:
+    """Charge de travail du juge par categorie (table judge_workload, tenue a jour par triggers)."""
+    if gala_categorie_id is None:
+        rows = conn.execute(f"SELECT {WORKLOAD_COLUMNS} FROM judge_workload WHERE juge_id = ?", (juge_id,)).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT {WORKLOAD_COLUMNS} FROM judge_workload WHERE juge_id = ? AND gala_categorie_id = ?",
+            (juge_id, gala_categorie_id),
+        ).fetchall()
+    return {row["gala_categorie_id"]: row for row in rows}
+
+
+def _workload_progress(row) -> Tuple[float, int, int, int]:
+    """(pourcentage, participants completes, notes saisies, notes attendues) d'une categorie."""
+    if row is None or not row["expected_notes"]:
+        return 0.0, 0, 0, 0
+    recorded, total_required = row["recorded_notes"], row["expected_notes"]
+    percent = round((recorded / total_required) * 100, 1)
+    return percent, row["completed_participants"], recorded, total_required
 
 
 def _category_status(percent: float, total_required: int, recorded: int) -> str:
@@ -161,25 +182,14 @@ def _category_status(percent: float, total_required: int, recorded: int) -> str:
 def judge_root():
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    row = conn.execute(
-        """
-        SELECT gala.id
-        FROM juge_gala_categorie AS jgc
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        JOIN gala ON gala.id = gc.gala_id
-        WHERE jgc.juge_id = ?
-        ORDER BY gala.annee DESC, gala.id DESC
-        LIMIT 1
-        """,
-        (juge_id,),
-    ).fetchone()
+    context = _get_judge_context(conn, user)
     conn.close()
 
-    if not row:
+    if not context["categories"]:
         return render_template("judge/empty.html", user=user)
 
-    return redirect(url_for("judge.judge_gala_dashboard", gala_id=row["id"]))
+    latest = max(context["categories"].values(), key=lambda category: (category["gala_annee"], category["gala_id"]))
+    return redirect(url_for("judge.judge_gala_dashboard", gala_id=latest["gala_id"]))
 
 
 @judge_bp.route("/galas/<int:gala_id>")
@@ -192,8 +202,8 @@ def judge_gala_dashboard(gala_id: int):
 def judge_category_view(gala_id: int, gala_categorie_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    _ensure_category_access(context, gala_id, gala_categorie_id)
     conn.close()
     return render_template("judge/dashboard.html", user=user, gala_id=gala_id, category_id=gala_categorie_id, participant_id=None)
 
@@ -202,8 +212,8 @@ def judge_category_view(gala_id: int, gala_categorie_id: int):
 def judge_participant_view(gala_id: int, gala_categorie_id: int, participant_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    _ensure_category_access(context, gala_id, gala_categorie_id)
     participant_exists = conn.execute(
         "SELECT 1 FROM participant WHERE id = ? AND gala_categorie_id = ?",
         (participant_id, gala_categorie_id),
@@ -218,24 +228,19 @@ def judge_participant_view(gala_id: int, gala_categorie_id: int, participant_id:
 def api_list_galas():
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-
-    rows = conn.execute(
-        """
-        SELECT g.id AS gala_id, g.nom AS gala_nom, g.annee AS gala_annee,
-               gc.id AS gala_categorie_id, c.nom AS categorie_nom
-        FROM juge_gala_categorie AS jgc
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        JOIN gala AS g ON g.id = gc.gala_id
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        WHERE jgc.juge_id = ?
-        ORDER BY g.annee DESC, c.nom COLLATE NOCASE
-        """,
-        (juge_id,),
-    ).fetchall()
+    _sync_pending_notes(conn, user)
+    context = _get_judge_context(conn, user)
+    # Seuls les galas du juge comptent : les notes des autres galas ne changent pas l'ETag.
+    gala_ids = {row["gala_id"] for row in context["categories"].values()}
+    etag = make_etag(user["id"], galas_version(conn, gala_ids))
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
+    juge_id = context["juge_id"]
 
     galas: Dict[int, Dict[str, Any]] = {}
-    for row in rows:
+    for row in context["categories"].values():
         gala_id = row["gala_id"]
         if gala_id not in galas:
             galas[gala_id] = {
@@ -248,14 +253,14 @@ def api_list_galas():
             }
         galas[gala_id]["categories"].append(
             {
-                "id": row["gala_categorie_id"],
+                "id": row["id"],
                 "nom": row["categorie_nom"],
             }
         )
 
-    gala_ids = list(galas.keys())
-    locks = _fetch_lock_info(conn, gala_ids)
-    submissions = _fetch_submission_info(conn, juge_id, gala_ids)
+    locks = context["locks"]
+    submissions = context["submissions"]
+    workload = _load_workload(conn, juge_id)
 
     for gala in galas.values():
         gala["locked"] = gala["id"] in locks
@@ -268,27 +273,11 @@ def api_list_galas():
         gala_progress_total = 0
 
         for category in gala["categories"]:
-            question_count = conn.execute(
-                "SELECT COUNT(*) AS total FROM question WHERE gala_categorie_id = ?",
-                (category["id"],),
-            ).fetchone()["total"]
-            participant_rows = conn.execute(
-                "SELECT id FROM participant WHERE gala_categorie_id = ?",
-                (category["id"],),
-            ).fetchall()
-            participant_ids = [r["id"] for r in participant_rows]
-            note_counts: Dict[int, int] = {}
-            if participant_ids:
-                placeholders = ",".join("?" for _ in participant_ids)
-                note_rows = conn.execute(
-                    f"SELECT participant_id, COUNT(*) AS total FROM note WHERE juge_id = ? AND participant_id IN ({placeholders}) GROUP BY participant_id",
-                    (juge_id, *participant_ids),
-                ).fetchall()
-                note_counts = {r["participant_id"]: r["total"] for r in note_rows}
-
-            percent, completed_participants, recorded, total_required = _compute_progress(
-                question_count, participant_ids, note_counts
-            )
+            category_workload = workload.get(category["id"])
+            question_count = category_workload["question_count"] if category_workload else 0
+            participant_count = category_workload["participant_count"] if category_workload else 0
+
+            percent, completed_participants, recorded, total_required = _workload_progress(category_workload)
             status = _category_status(percent, total_required, recorded)
             gala_progress_recorded += recorded
             gala_progress_total += total_required
@@ -296,11 +285,11 @@ def api_list_galas():
             category.update(
                 {
                     "question_count": question_count,
-                    "participant_count": len(participant_ids),
+                    "participant_count": participant_count,
                     "progress": {
                         "percent": percent,
                         "completed_participants": completed_participants,
-                        "total_participants": len(participant_ids),
+                        "total_participants": participant_count,
                         "recorded": recorded,
                         "total": total_required,
                     },
@@ -332,64 +321,69 @@ def api_list_galas():
 
     payload = {"galas": sorted(galas.values(), key=lambda g: (-g["annee"], g["nom"]))}
     conn.close()
-    return jsonify(payload)
+    return with_etag(jsonify(payload), etag)
 
 
-def _ensure_category_access(conn, juge_id: int, gala_id: int, gala_categorie_id: int) -> Dict[str, Any]:
-    row = conn.execute(
-        """
-        SELECT gc.id, gc.gala_id, gc.categorie_id, c.nom AS categorie_nom,
-               g.nom AS gala_nom, g.annee AS gala_annee
-        FROM juge_gala_categorie AS jgc
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        JOIN gala AS g ON g.id = gc.gala_id
-        JOIN categorie AS c ON c.id = gc.categorie_id
-        WHERE jgc.juge_id = ? AND gc.id = ? AND gc.gala_id = ?
-        """,
-        (juge_id, gala_categorie_id, gala_id),
-    ).fetchone()
-    if not row:
+def _ensure_category_access(context: Dict[str, Any], gala_id: int, gala_categorie_id: int) -> Dict[str, Any]:
+    category = context["categories"].get(gala_categorie_id)
+    if not category or category["gala_id"] != gala_id:
         abort(404)
-    return row
+    return category
 
 
-def _is_gala_locked(conn, gala_id: int) -> bool:
-    return conn.execute(
-        "SELECT 1 FROM gala_lock WHERE gala_id = ?",
-        (gala_id,),
-    ).fetchone() is not None
+def _is_gala_locked(context: Dict[str, Any], gala_id: int) -> bool:
+    return gala_id in context["locks"]
 
 
-def _has_submitted(conn, juge_id: int, gala_id: int) -> bool:
-    return conn.execute(
-        "SELECT 1 FROM juge_gala_submission WHERE juge_id = ? AND gala_id = ?",
-        (juge_id, gala_id),
-    ).fetchone() is not None
+def _has_submitted(context: Dict[str, Any], gala_id: int) -> bool:
+    return gala_id in context["submissions"]
 
 
 @judge_bp.route("/api/galas/<int:gala_id>/categories/<int:gala_categorie_id>/participants", methods=["GET"])
 def api_list_participants(gala_id: int, gala_categorie_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    category_row = _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
-
-    question_rows = conn.execute(
-        "SELECT id FROM question WHERE gala_categorie_id = ? ORDER BY id",
-        (gala_categorie_id,),
-    ).fetchall()
-    question_count = len(question_rows)
-
-    participant_rows = conn.execute(
-        """
-        SELECT p.id, comp.nom AS compagnie_nom, comp.ville, comp.responsable_nom
-        FROM participant AS p
-        JOIN compagnie AS comp ON comp.id = p.compagnie_id
-        WHERE p.gala_categorie_id = ?
-        ORDER BY comp.nom COLLATE NOCASE
-        """,
-        (gala_categorie_id,),
-    ).fetchall()
+    _sync_pending_notes(conn, user)
+    version = gala_version(conn, gala_id)
+    etag = make_etag(user["id"], version)
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    category_row = _ensure_category_access(context, gala_id, gala_categorie_id)
+    cached = not_modified(etag)
+    if cached is not None:
+        conn.close()
+        return cached
+
+    locked_at = context["locks"].get(gala_id, {}).get("locked_at")
+    if locked_at is not None:
+        # Gala verrouille : la liste ne change plus, elle vient de l'instantane partage.
+        # (Ouvert, chaque note change la version : l'instantane serait reconstruit a chaque appel.)
+        snap = gala_snapshot.snapshot(conn, gala_id, version)
+        structure = snap.structure if snap else None
+        participant_rows = [
+            {
+                "id": participant.id,
+                "compagnie_nom": participant.company.nom,
+                "ville": participant.company.ville,
+                "responsable_nom": participant.company.responsable_nom,
+            }
+            for _, participant in (snap.category_participants(gala_categorie_id) if snap else ())
+        ]
+    else:
+        # L'ETag vient d'une version fraiche : la structure (nombre de questions) aussi.
+        structure = gala_structure.gala_structure(conn, gala_id, locked_at=locked_at, revalidate=True)
+        participant_rows = conn.execute(
+            """
+            SELECT p.id, comp.nom AS compagnie_nom, comp.ville, comp.responsable_nom
+            FROM participant AS p
+            JOIN compagnie AS comp ON comp.id = p.compagnie_id
+            WHERE p.gala_categorie_id = ?
+            ORDER BY comp.nom COLLATE NOCASE
+            """,
+            (gala_categorie_id,),
+        ).fetchall()
+    structure_category = structure.category(gala_categorie_id) if structure else None
+    question_count = structure_category.question_count if structure_category else 0
     participant_ids = [row["id"] for row in participant_rows]
 
     note_counts: Dict[int, int] = {}
@@ -401,9 +395,8 @@ def api_list_participants(gala_id: int, gala_categorie_id: int):
         ).fetchall()
         note_counts = {row["participant_id"]: row["total"] for row in rows}
 
-    percent, completed_participants, recorded, total_required = _compute_progress(
-        question_count, participant_ids, note_counts
-    )
+    category_workload = _load_workload(conn, juge_id, gala_categorie_id).get(gala_categorie_id)
+    percent, completed_participants, recorded, total_required = _workload_progress(category_workload)
     status = _category_status(percent, total_required, recorded)
 
     participants_payload = []
@@ -439,8 +432,8 @@ def api_list_participants(gala_id: int, gala_categorie_id: int):
         )
 
     favorite_participant_id = _get_coup_de_coeur(conn, juge_id, gala_id)
-    locked_flag = _is_gala_locked(conn, gala_id)
-    submitted_flag = _has_submitted(conn, juge_id, gala_id)
+    locked_flag = _is_gala_locked(context, gala_id)
+    submitted_flag = _has_submitted(context, gala_id)
 
     response = {
         "gala": {
@@ -462,11 +455,11 @@ def api_list_participants(gala_id: int, gala_categorie_id: int):
             "total": total_required,
         },
         "status": status,
-        "locked": _is_gala_locked(conn, gala_id),
-        "submitted": _has_submitted(conn, juge_id, gala_id),
+        "locked": locked_flag,
+        "submitted": submitted_flag,
     }
     conn.close()
-    return jsonify(response)
+    return with_etag(jsonify(response), etag)
 
 
 @judge_bp.route(
@@ -476,11 +469,13 @@ def api_list_participants(gala_id: int, gala_categorie_id: int):
 def api_participant_detail(gala_id: int, gala_categorie_id: int, participant_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    category_row = _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    category_row = _ensure_category_access(context, gala_id, gala_categorie_id)
 
+    # Coup de coeur et version de structure (cache narratif) viennent avec la fiche.
     participant_row = conn.execute(
-        """
+        f"""
         SELECT
             p.id,
             p.compagnie_id,
@@ -489,35 +484,37 @@ def api_participant_detail(gala_id: int, gala_categorie_id: int, participant_id:
             comp.ville,
             comp.secteur,
             comp.responsable_nom,
-            comp.responsable_titre
+            comp.responsable_titre,
+            (
+                SELECT participant_id FROM coup_de_coeur WHERE juge_id = ? AND gala_id = ?
+            ) AS favorite_participant_id,
+            {STRUCTURE_VERSION_SQL} AS structure_version
         FROM participant AS p
         JOIN compagnie AS comp ON comp.id = p.compagnie_id
         WHERE p.id = ? AND p.gala_categorie_id = ?
         """,
-        (participant_id, gala_categorie_id),
+        (juge_id, gala_id, gala_id, gala_id, participant_id, gala_categorie_id),
     ).fetchone()
     if not participant_row:
         conn.close()
         abort(404)
 
-    base_question_rows = _load_questions_with_notes(conn, participant_id, juge_id, gala_categorie_id)
-
-    narratif_questions_rows: List[Dict[str, Any]] = []
-    narratif_participant: Optional[Dict[str, Any]] = None
-    narrative_category_ids = _fetch_narratif_category_ids(conn, gala_id)
-    if narrative_category_ids and participant_row["compagnie_id"] is not None:
-        narratif_participant = _find_narratif_participant(
-            conn,
-            participant_row["compagnie_id"],
-            narrative_category_ids,
-        )
-        if narratif_participant:
-            narratif_questions_rows = _load_questions_with_notes(
-                conn,
-                narratif_participant["id"],
-                juge_id,
-                narratif_participant["gala_categorie_id"],
-            )
+    narratif_participant = narratif.gala_narratif(
+        conn, gala_id, participant_row["structure_version"]
+    ).participant_for(participant_row["compagnie_id"])
+    if narratif_participant and narratif_participant["id"] == participant_id:
+        narratif_participant = None
+
+    targets = [(participant_id, gala_categorie_id)]
+    if narratif_participant:
+        targets.append((narratif_participant["id"], narratif_participant["gala_categorie_id"]))
+    favorite_participant_id = participant_row["favorite_participant_id"]
+    # Ecriture differee : seules les notes en file de cette fiche (et le coup de coeur) attendent.
+    if note_queue.sync_judge(juge_id, [target_id for target_id, _ in targets]):
+        favorite_participant_id = _get_coup_de_coeur(conn, juge_id, gala_id)
+    question_rows = _load_questions_with_notes(conn, juge_id, targets)
+    base_question_rows = [row for row in question_rows if row["scope_participant_id"] == participant_id]
+    narratif_questions_rows = [row for row in question_rows if row["scope_participant_id"] != participant_id]
 
     questions_payload: List[Dict[str, Any]] = []
     seen_ids: Dict[int, Dict[str, Any]] = {}
@@ -576,9 +573,8 @@ def api_participant_detail(gala_id: int, gala_categorie_id: int, participant_id:
 
     percent = round((counted_completed / counted_total) * 100, 1) if counted_total else 0.0
 
-    favorite_participant_id = _get_coup_de_coeur(conn, juge_id, gala_id)
-    locked_flag = _is_gala_locked(conn, gala_id)
-    submitted_flag = _has_submitted(conn, juge_id, gala_id)
+    locked_flag = _is_gala_locked(context, gala_id)
+    submitted_flag = _has_submitted(context, gala_id)
 
     response = {
         "gala": {
@@ -617,6 +613,39 @@ def api_participant_detail(gala_id: int, gala_categorie_id: int, participant_id:
     return jsonify(response)
 
 
+NOTE_BATCH_MAX_ITEMS = 200
+
+def _parse_note_fields(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Valide les champs valeur/commentaire fournis. Retourne (champs, message d'erreur)."""
+    fields: Dict[str, Any] = {}
+    if "valeur" in payload:
+        valeur = payload.get("valeur")
+        if valeur is None or valeur == "":
+            valeur = None
+        else:
+            try:
+                valeur = int(valeur)
+            except (TypeError, ValueError):
+                return {}, "Note invalide."
+            if valeur < 1 or valeur > 6:
+                return {}, "La note doit etre comprise entre 1 et 6."
+        fields["valeur"] = valeur
+    if "commentaire" in payload:
+        commentaire = payload.get("commentaire")
+        if commentaire is not None and commentaire != "":
+            if not isinstance(commentaire, str):
+                return {}, "Commentaire invalide."
+            commentaire = commentaire.strip()
+            if len(commentaire) > 1000:
+                return {}, "Le commentaire est trop long."
+            if commentaire == "":
+                commentaire = None
+        else:
+            commentaire = None
+        fields["commentaire"] = commentaire
+    return fields, None
+
+
 @judge_bp.route(
     "/api/galas/<int:gala_id>/categories/<int:gala_categorie_id>/participants/<int:participant_id>/questions/<int:question_id>",
     methods=["PATCH"],
@@ -624,14 +653,10 @@ def api_participant_detail(gala_id: int, gala_categorie_id: int, participant_id:
 def api_update_note(gala_id: int, gala_categorie_id: int, participant_id: int, question_id: int):
     user = _require_judge_user()
     payload = request.get_json(silent=True) or {}
-    has_valeur = "valeur" in payload
-    has_commentaire = "commentaire" in payload
-    valeur = payload.get("valeur") if has_valeur else None
-    commentaire = payload.get("commentaire") if has_commentaire else None
-
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    _ensure_category_access(context, gala_id, gala_categorie_id)
 
     participant_exists = conn.execute(
         "SELECT 1 FROM participant WHERE id = ? AND gala_categorie_id = ?",
@@ -649,39 +674,18 @@ def api_update_note(gala_id: int, gala_categorie_id: int, participant_id: int, q
         conn.close()
         abort(404)
 
-    if _is_gala_locked(conn, gala_id):
+    if _is_gala_locked(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
 
-    if _has_submitted(conn, juge_id, gala_id):
+    if _has_submitted(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Vous avez deja soumis vos evaluations pour ce gala."}), 409
 
-    if has_valeur:
-        if valeur is None or valeur == "":
-            valeur = None
-        else:
-            try:
-                valeur = int(valeur)
-            except (TypeError, ValueError):
-                conn.close()
-                return jsonify({"status": "error", "message": "Note invalide."}), 400
-            if valeur < 1 or valeur > 6:
-                conn.close()
-                return jsonify({"status": "error", "message": "La note doit etre comprise entre 1 et 6."}), 400
-    if has_commentaire:
-        if commentaire is not None and commentaire != "":
-            if not isinstance(commentaire, str):
-                conn.close()
-                return jsonify({"status": "error", "message": "Commentaire invalide."}), 400
-            commentaire = commentaire.strip()
-            if len(commentaire) > 1000:
-                conn.close()
-                return jsonify({"status": "error", "message": "Le commentaire est trop long."}), 400
-            if commentaire == "":
-                commentaire = None
-        else:
-            commentaire = None
+    fields, error = _parse_note_fields(payload)
+    if error:
+        conn.close()
+        return jsonify({"status": "error", "message": error}), 400
 
     target_participant_id = participant_id
     target_participant_raw = payload.get("target_participant_id")
@@ -700,25 +704,22 @@ def api_update_note(gala_id: int, gala_categorie_id: int, participant_id: int, q
         conn.close()
         abort(404)
 
-    existing = conn.execute(
-        "SELECT valeur, commentaire FROM note WHERE juge_id = ? AND participant_id = ? AND question_id = ?",
-        (juge_id, target_participant_id, question_id),
-    ).fetchone()
-
-    valeur_to_save = valeur if has_valeur else (existing["valeur"] if existing else None)
-    if valeur_to_save is not None:
-        valeur_to_save = int(valeur_to_save)
-    commentaire_to_save = commentaire if has_commentaire else (existing["commentaire"] if existing else None)
+    queue = note_queue.get_queue()
+    if queue is not None:
+        conn.close()
+        seq = queue.submit([note_queue.note_mutation(gala_id, juge_id, target_participant_id, question_id, fields)])
+        return jsonify(
+            {
+                "status": "ok",
+                "note": {**fields, "target_participant_id": target_participant_id},
+                "queued": True,
+                "seq": seq,
+                "saved_at": datetime.now(UTC).isoformat(),
+            }
+        )
 
-    conn.execute(
-        """
-        INSERT INTO note (juge_id, participant_id, question_id, valeur, commentaire)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(juge_id, participant_id, question_id)
-        DO UPDATE SET valeur = excluded.valeur, commentaire = excluded.commentaire
-        """,
-        (juge_id, target_participant_id, question_id, valeur_to_save, commentaire_to_save),
-    )
+    conn.execute(note_queue.NOTE_UPSERT_SQL, note_queue.note_upsert_params(juge_id, target_participant_id, question_id, fields))
+    live.publish_note_changes(conn, gala_id, juge_id, [target_participant_id])
     conn.commit()
 
     notes_row = conn.execute(
@@ -741,6 +742,146 @@ def api_update_note(gala_id: int, gala_categorie_id: int, participant_id: int, q
     )
 
 
+@judge_bp.route(
+    "/api/galas/<int:gala_id>/categories/<int:gala_categorie_id>/participants/<int:participant_id>/notes",
+    methods=["PATCH"],
+)
+def api_update_notes(gala_id: int, gala_categorie_id: int, participant_id: int):
+    """Enregistre en une transaction plusieurs notes de la fiche d'un participant."""
+    user = _require_judge_user()
+    payload = request.get_json(silent=True)
+    items = payload.get("notes") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({"status": "error", "message": "Aucune note a enregistrer."}), 400
+    if len(items) > NOTE_BATCH_MAX_ITEMS:
+        return jsonify({"status": "error", "message": "Trop de notes dans une meme requete."}), 400
+
+    conn = get_db_connection()
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    _ensure_category_access(context, gala_id, gala_categorie_id)
+
+    participant_exists = conn.execute(
+        "SELECT 1 FROM participant WHERE id = ? AND gala_categorie_id = ?",
+        (participant_id, gala_categorie_id),
+    ).fetchone()
+    if not participant_exists:
+        conn.close()
+        abort(404)
+
+    if _is_gala_locked(context, gala_id):
+        conn.close()
+        return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
+
+    if _has_submitted(context, gala_id):
+        conn.close()
+        return jsonify({"status": "error", "message": "Vous avez deja soumis vos evaluations pour ce gala."}), 409
+
+    # Validation complete avant toute ecriture : le lot est accepte ou refuse en entier.
+    parsed: List[Tuple[int, int, Dict[str, Any]]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            conn.close()
+            return jsonify({"status": "error", "message": "Note invalide."}), 400
+        try:
+            question_id = int(item.get("question_id"))
+        except (TypeError, ValueError):
+            conn.close()
+            return jsonify({"status": "error", "message": "Question invalide."}), 400
+        target_participant_id = participant_id
+        if item.get("target_participant_id") is not None:
+            try:
+                target_participant_id = int(item["target_participant_id"])
+            except (TypeError, ValueError):
+                conn.close()
+                return jsonify({"status": "error", "message": "Participant cible invalide.", "question_id": question_id}), 400
+        fields, error = _parse_note_fields(item)
+        if error:
+            conn.close()
+            return jsonify({"status": "error", "message": error, "question_id": question_id}), 400
+        parsed.append((question_id, target_participant_id, fields))
+
+    question_ids = sorted({question_id for question_id, _, _ in parsed})
+    target_ids = sorted({target_id for _, target_id, _ in parsed})
+    question_placeholders = ",".join("?" for _ in question_ids)
+    target_placeholders = ",".join("?" for _ in target_ids)
+    question_categories = {
+        row["id"]: row["gala_categorie_id"]
+        for row in conn.execute(
+            f"SELECT id, gala_categorie_id FROM question WHERE id IN ({question_placeholders})",
+            tuple(question_ids),
+        ).fetchall()
+    }
+    target_categories = {
+        row["id"]: row["gala_categorie_id"]
+        for row in conn.execute(
+            f"SELECT id, gala_categorie_id FROM participant WHERE id IN ({target_placeholders})",
+            tuple(target_ids),
+        ).fetchall()
+    }
+
+    # Plusieurs modifications d'une meme note sont fusionnees dans l'ordre recu.
+    merged: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for question_id, target_participant_id, fields in parsed:
+        question_category = question_categories.get(question_id)
+        if question_category is None or target_categories.get(target_participant_id) != question_category:
+            conn.close()
+            abort(404)
+        merged.setdefault((target_participant_id, question_id), {}).update(fields)
+
+    queue = note_queue.get_queue()
+    if queue is not None:
+        # Ecriture differee : seuls les champs envoyes sont renvoyes (le client les applique).
+        conn.close()
+        seq = queue.submit(
+            note_queue.note_mutation(gala_id, juge_id, target_participant_id, question_id, fields)
+            for (target_participant_id, question_id), fields in merged.items()
+        )
+        notes_payload = [
+            {"question_id": question_id, "target_participant_id": target_participant_id, **fields}
+            for (target_participant_id, question_id), fields in merged.items()
+        ]
+        return jsonify(
+            {"status": "ok", "notes": notes_payload, "queued": True, "seq": seq, "saved_at": datetime.now(UTC).isoformat()}
+        )
+
+    conn.executemany(
+        note_queue.NOTE_UPSERT_SQL,
+        [
+            note_queue.note_upsert_params(juge_id, target_participant_id, question_id, fields)
+            for (target_participant_id, question_id), fields in merged.items()
+        ],
+    )
+    live.publish_note_changes(conn, gala_id, juge_id, target_ids)
+    conn.commit()
+
+    saved_rows = conn.execute(
+        f"""
+        SELECT participant_id, question_id, valeur, commentaire
+        FROM note
+        WHERE juge_id = ? AND participant_id IN ({target_placeholders}) AND question_id IN ({question_placeholders})
+        """,
+        (juge_id, *target_ids, *question_ids),
+    ).fetchall()
+    conn.close()
+
+    saved = {(row["participant_id"], row["question_id"]): row for row in saved_rows}
+    notes_payload = []
+    for key in merged:
+        row = saved[key]
+        notes_payload.append(
+            {
+                "question_id": row["question_id"],
+                "target_participant_id": row["participant_id"],
+                "valeur": row["valeur"],
+                "commentaire": row["commentaire"],
+            }
+        )
+
+    saved_at = datetime.now(UTC).isoformat()
+    return jsonify({"status": "ok", "notes": notes_payload, "saved_at": saved_at})
+
+
 @judge_bp.route(
     "/api/galas/<int:gala_id>/categories/<int:gala_categorie_id>/participants/<int:participant_id>/favorite",
     methods=["POST"],
@@ -748,8 +889,9 @@ def api_update_note(gala_id: int, gala_categorie_id: int, participant_id: int, q
 def api_set_favorite(gala_id: int, gala_categorie_id: int, participant_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    _ensure_category_access(context, gala_id, gala_categorie_id)
 
     participant_exists = conn.execute(
         "SELECT 1 FROM participant WHERE id = ? AND gala_categorie_id = ?",
@@ -759,27 +901,34 @@ def api_set_favorite(gala_id: int, gala_categorie_id: int, participant_id: int):
         conn.close()
         abort(404)
 
-    if _is_gala_locked(conn, gala_id):
+    if _is_gala_locked(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
 
-    if _has_submitted(conn, juge_id, gala_id):
+    if _has_submitted(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Vous avez deja soumis vos evaluations pour ce gala."}), 409
 
-    conn.execute(
-        """
-        INSERT INTO coup_de_coeur (juge_id, gala_id, participant_id)
-        VALUES (?, ?, ?)
-        ON CONFLICT(juge_id, gala_id)
-        DO UPDATE SET participant_id = excluded.participant_id, created_at = CURRENT_TIMESTAMP
-        """,
-        (juge_id, gala_id, participant_id),
-    )
+    queue = note_queue.get_queue()
+    if queue is not None:
+        conn.close()
+        seq = queue.submit([note_queue.favorite_mutation(gala_id, juge_id, participant_id)])
+        return jsonify(
+            {
+                "status": "ok",
+                "favorite": {"selected": True, "participant_id": participant_id, "allowed": True},
+                "queued": True,
+                "seq": seq,
+            }
+        )
+
+    previous_favorite_id = _get_coup_de_coeur(conn, juge_id, gala_id)
+    conn.execute(note_queue.FAVORITE_UPSERT_SQL, (juge_id, gala_id, participant_id))
+    live.publish_favorite_change(conn, gala_id, [previous_favorite_id, participant_id])
     conn.commit()
 
     favorite_participant_id = _get_coup_de_coeur(conn, juge_id, gala_id)
-    allowed_flag = not (_is_gala_locked(conn, gala_id) or _has_submitted(conn, juge_id, gala_id))
+    allowed_flag = not (_is_gala_locked(context, gala_id) or _has_submitted(context, gala_id))
     conn.close()
     return jsonify(
         {
@@ -800,8 +949,9 @@ def api_set_favorite(gala_id: int, gala_categorie_id: int, participant_id: int):
 def api_remove_favorite(gala_id: int, gala_categorie_id: int, participant_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
-    _ensure_category_access(conn, juge_id, gala_id, gala_categorie_id)
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
+    _ensure_category_access(context, gala_id, gala_categorie_id)
 
     participant_exists = conn.execute(
         "SELECT 1 FROM participant WHERE id = ? AND gala_categorie_id = ?",
@@ -811,20 +961,35 @@ def api_remove_favorite(gala_id: int, gala_categorie_id: int, participant_id: in
         conn.close()
         abort(404)
 
-    if _is_gala_locked(conn, gala_id):
+    if _is_gala_locked(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
 
-    if _has_submitted(conn, juge_id, gala_id):
+    if _has_submitted(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Vous avez deja soumis vos evaluations pour ce gala."}), 409
 
+    queue = note_queue.get_queue()
+    if queue is not None:
+        conn.close()
+        seq = queue.submit([note_queue.favorite_mutation(gala_id, juge_id, None)])
+        return jsonify(
+            {
+                "status": "ok",
+                "favorite": {"selected": False, "participant_id": None, "allowed": True},
+                "queued": True,
+                "seq": seq,
+            }
+        )
+
+    previous_favorite_id = _get_coup_de_coeur(conn, juge_id, gala_id)
     conn.execute(
         "DELETE FROM coup_de_coeur WHERE juge_id = ? AND gala_id = ?",
         (juge_id, gala_id),
     )
+    live.publish_favorite_change(conn, gala_id, [previous_favorite_id])
     conn.commit()
-    allowed_flag = not (_is_gala_locked(conn, gala_id) or _has_submitted(conn, juge_id, gala_id))
+    allowed_flag = not (_is_gala_locked(context, gala_id) or _has_submitted(context, gala_id))
     conn.close()
     return jsonify(
         {
@@ -838,78 +1003,111 @@ def api_remove_favorite(gala_id: int, gala_categorie_id: int, participant_id: in
     )
 
 
+# Etat relu sous le verrou d'ecriture (le contexte a ete charge avant la transaction).
+SUBMIT_STATE_SQL = """
+    SELECT
+        EXISTS (SELECT 1 FROM gala_lock WHERE gala_id = :gala_id) AS locked,
+        EXISTS (
+            SELECT 1 FROM juge_gala_submission WHERE juge_id = :juge_id AND gala_id = :gala_id
+        ) AS submitted
+"""
+
+# Une categorie incomplete suffit a refuser la soumission (index de judge_workload).
+SUBMIT_INCOMPLETE_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM judge_workload
+        WHERE juge_id = :juge_id AND gala_id = :gala_id AND ready_to_submit = 0
+    )
+"""
+
+# Couples (participant, question) des categories du juge sans note de sa part ;
+# detail calcule seulement quand la soumission est refusee.
+MISSING_NOTES_SQL = """
+    SELECT gc.id AS gala_categorie_id, p.id AS participant_id, comp.nom AS compagnie_nom, q.id AS question_id
+    FROM gala_categorie AS gc
+    JOIN participant AS p ON p.gala_categorie_id = gc.id
+    JOIN compagnie AS comp ON comp.id = p.compagnie_id
+    JOIN question AS q ON q.gala_categorie_id = gc.id
+    WHERE gc.gala_id = :gala_id
+      AND gc.id IN (SELECT gala_categorie_id FROM juge_gala_categorie WHERE juge_id = :juge_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM note AS n
+          WHERE n.juge_id = :juge_id AND n.participant_id = p.id AND n.question_id = q.id
+      )
+    ORDER BY gc.ordre_affichage, gc.id, comp.nom COLLATE NOCASE, p.id, q.id
+"""
+
+
+def _group_missing_notes(rows) -> List[Dict[str, Any]]:
+    """Un element par participant incomplet, dans l'ordre de la barre laterale."""
+    missing: List[Dict[str, Any]] = []
+    for row in rows:
+        if not missing or missing[-1]["participant_id"] != row["participant_id"]:
+            missing.append({
+                "gala_categorie_id": row["gala_categorie_id"],
+                "participant_id": row["participant_id"],
+                "compagnie": row["compagnie_nom"],
+                "question_ids": [],
+            })
+        missing[-1]["question_ids"].append(row["question_id"])
+    return missing
+
+
 @judge_bp.route("/api/galas/<int:gala_id>/submit", methods=["POST"])
 def api_submit_gala(gala_id: int):
     user = _require_judge_user()
     conn = get_db_connection()
-    juge_id = _get_judge_id(conn, user["id"])
+    context = _get_judge_context(conn, user)
+    juge_id = context["juge_id"]
 
     # Ensure judge has assignments for this gala
-    assigned = conn.execute(
-        """
-        SELECT 1
-        FROM juge_gala_categorie AS jgc
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        WHERE jgc.juge_id = ? AND gc.gala_id = ?
-        LIMIT 1
-        """,
-        (juge_id, gala_id),
-    ).fetchone()
-    if not assigned:
+    if gala_id not in context["gala_ids"]:
         conn.close()
         abort(404)
 
-    if _is_gala_locked(conn, gala_id):
+    if _is_gala_locked(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
 
-    if _has_submitted(conn, juge_id, gala_id):
+    if _has_submitted(context, gala_id):
         conn.close()
         return jsonify({"status": "error", "message": "Deja soumis."}), 409
 
-    # Validate completion
-    rows = conn.execute(
-        """
-        SELECT gc.id AS gala_categorie_id
-        FROM juge_gala_categorie AS jgc
-        JOIN gala_categorie AS gc ON gc.id = jgc.gala_categorie_id
-        WHERE jgc.juge_id = ? AND gc.gala_id = ?
-        """,
-        (juge_id, gala_id),
-    ).fetchall()
-    for row in rows:
-        category_id = row["gala_categorie_id"]
-        question_count = conn.execute(
-            "SELECT COUNT(*) AS total FROM question WHERE gala_categorie_id = ?",
-            (category_id,),
-        ).fetchone()["total"]
-        participant_ids = [
-            r["id"]
-            for r in conn.execute(
-                "SELECT id FROM participant WHERE gala_categorie_id = ?",
-                (category_id,),
-            ).fetchall()
-        ]
-        if question_count == 0 or not participant_ids:
-            continue
-        placeholders = ",".join("?" for _ in participant_ids)
-        note_rows = conn.execute(
-            f"SELECT participant_id, COUNT(*) AS total FROM note WHERE juge_id = ? AND participant_id IN ({placeholders}) GROUP BY participant_id",
-            (juge_id, *participant_ids),
-        ).fetchall()
-        counts = {r["participant_id"]: r["total"] for r in note_rows}
-        for participant_id in participant_ids:
-            if counts.get(participant_id, 0) < question_count:
-                conn.close()
-                return jsonify({
-                    "status": "error",
-                    "message": "Toutes les questions doivent etre notees avant la soumission.",
-                }), 400
+    # Verification et insertion dans une meme transaction d'ecriture : un second envoi
+    # ou un verrouillage simultane attend sa fin puis voit son resultat.
+    conn.execute("BEGIN IMMEDIATE")
+    state = conn.execute(SUBMIT_STATE_SQL, {"juge_id": juge_id, "gala_id": gala_id}).fetchone()
+    if state["locked"]:
+        conn.rollback()
+        conn.close()
+        return jsonify({"status": "error", "message": "Ce gala est verrouille."}), 409
+    if state["submitted"]:
+        conn.rollback()
+        conn.close()
+        return jsonify({"status": "error", "message": "Deja soumis."}), 409
 
+    # Barriere de la file d'ecriture differee : les notes acceptees comptent.
+    note_queue.flush_pending(conn)
+    params = {"juge_id": juge_id, "gala_id": gala_id}
+    missing_rows = []
+    if conn.execute(SUBMIT_INCOMPLETE_SQL, params).fetchone()[0]:
+        missing_rows = conn.execute(MISSING_NOTES_SQL, params).fetchall()
+    if missing_rows:
+        conn.rollback()
+        conn.close()
+        return jsonify({
+            "status": "error",
+            "message": "Toutes les questions doivent etre notees avant la soumission.",
+            "missing_count": len(missing_rows),
+            "missing": _group_missing_notes(missing_rows),
+        }), 400
+
+    submitted_at = datetime.now(UTC).isoformat()
     conn.execute(
         "INSERT INTO juge_gala_submission (juge_id, gala_id, submitted_at) VALUES (?, ?, ?)",
-        (juge_id, gala_id, datetime.now(UTC).isoformat()),
+        (juge_id, gala_id, submitted_at),
     )
+    live.publish(conn, gala_id, "submission", {"juge_id": juge_id, "submitted": True, "submitted_at": submitted_at})
     conn.commit()
     conn.close()
     return jsonify({"status": "ok"})
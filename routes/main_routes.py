@@ -1,10 +1,15 @@
+import math
+import sqlite3
 from datetime import datetime, UTC
 from flask import Blueprint, render_template, session, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from models.db import get_db_connection
+from models import passwords, rate_limit
+from models.db import get_db_connection, init_app as init_db_app, release_db_connection
 
 main_bp = Blueprint("main", __name__)
+main_bp.record_once(lambda state: init_db_app(state.app))
+main_bp.record_once(lambda state: passwords.init_app(state.app))
+main_bp.record_once(lambda state: rate_limit.init_app(state.app))
 
 
 def _serialize_user_row(row):
@@ -20,6 +25,25 @@ def _serialize_user_row(row):
     }
 
 
+def _throttled(username=None):
+    """Reponse 429 si l'IP (ou l'utilisateur) a epuise ses tentatives, sinon None."""
+    limiter = rate_limit.get_limiter()
+    if limiter is None:
+        return None
+    retry_after = limiter.check(request.remote_addr, username)
+    if retry_after is None:
+        return None
+    response = jsonify({"status": "error", "message": "Trop de tentatives. Reessayez plus tard."})
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+def _hasher_busy():
+    response = jsonify({"status": "error", "message": "Serveur occupe. Reessayez dans un instant."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @main_bp.route("/")
 def home():
     user = session.get("user")
@@ -50,6 +74,10 @@ def register():
     if len(password) < 8:
         return jsonify({"status": "error", "message": "Le mot de passe doit contenir au moins 8 caracteres."}), 400
 
+    throttled = _throttled()
+    if throttled is not None:
+        return throttled
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -62,10 +90,20 @@ def register():
         (username,),
     ).fetchone()
 
+    conn.close()
     if existing:
-        conn.close()
         return jsonify({"status": "error", "message": "Ce nom d'utilisateur est deja utilise."}), 409
 
+    # La connexion retourne au pool pendant le hachage (plusieurs dizaines de ms de CPU).
+    release_db_connection()
+    try:
+        password_hash = passwords.get_hasher().hash(password)
+    except passwords.HasherBusy:
+        return _hasher_busy()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
     role_name = "membre"
     role_row = cursor.execute(
         """
@@ -88,8 +126,6 @@ def register():
         )
         role_id = cursor.lastrowid
 
-    password_hash = generate_password_hash(password)
-
     cursor.execute(
         """
         INSERT INTO personne (prenom, nom, courriel, telephone)
@@ -99,13 +135,19 @@ def register():
     )
     personne_id = cursor.lastrowid
 
-    cursor.execute(
-        """
-        INSERT INTO user (personne_id, username, password_hash, role_id)
-        VALUES (?, ?, ?, ?)
-        """,
-        (personne_id, username, password_hash, role_id),
-    )
+    try:
+        cursor.execute(
+            """
+            INSERT INTO user (personne_id, username, password_hash, role_id)
+            VALUES (?, ?, ?, ?)
+            """,
+            (personne_id, username, password_hash, role_id),
+        )
+    except sqlite3.IntegrityError:
+        # Meme nom enregistre par une autre requete pendant le hachage.
+        conn.rollback()
+        conn.close()
+        return jsonify({"status": "error", "message": "Ce nom d'utilisateur est deja utilise."}), 409
     user_id = cursor.lastrowid
 
     conn.commit()
@@ -138,6 +180,10 @@ def login():
     if not username or not password:
         return jsonify({"status": "error", "message": "Nom d'utilisateur et mot de passe requis."}), 400
 
+    throttled = _throttled(username)
+    if throttled is not None:
+        return throttled
+
     conn = get_db_connection()
     cursor = conn.cursor()
     row = cursor.execute(
@@ -151,17 +197,30 @@ def login():
         (username,),
     ).fetchone()
 
+    conn.close()
     if not row or not row["actif"]:
-        conn.close()
         return jsonify({"status": "error", "message": "Identifiants invalides."}), 401
 
-    if not check_password_hash(row["password_hash"], password):
-        conn.close()
+    release_db_connection()
+    hasher = passwords.get_hasher()
+    try:
+        valid = hasher.verify(row["password_hash"], password)
+        # Parametres de hachage modifies depuis l'enregistrement : seul moment ou le mot de passe est connu.
+        new_hash = hasher.rehash(password) if valid and hasher.needs_rehash(row["password_hash"]) else None
+    except passwords.HasherBusy:
+        return _hasher_busy()
+
+    if not valid:
         return jsonify({"status": "error", "message": "Identifiants invalides."}), 401
 
-    cursor.execute(
-        "UPDATE user SET last_login = ? WHERE id = ?",
-        (datetime.now(UTC).isoformat(), row["id"]),
+    limiter = rate_limit.get_limiter()
+    if limiter is not None:
+        limiter.succeeded(username)
+
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE user SET last_login = ?, password_hash = COALESCE(?, password_hash) WHERE id = ?",
+        (datetime.now(UTC).isoformat(), new_hash, row["id"]),
     )
     conn.commit()
     conn.close()
@@ -1,21 +1,41 @@
+from typing import Any, Mapping, Optional
+import os
+
 from flask import Flask, render_template, session
-from models.init_db import init_database
+from models import init_db, metrics
+from models.db import init_app as init_db_app
 from routes.main_routes import main_bp
 from routes.admin_routes import admin_bp
 from routes.judge_routes import judge_bp
-import os
 
-app = Flask(__name__)
-app.secret_key = "secret-key-change-me"  # ⚠️ à sécuriser plus tard
 
-# Initialise la base si nécessaire
-if not os.path.exists("data/gala.db"):
-    init_database()
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
+    """Fabrique de l'application (serveur de dev, gunicorn, tests)."""
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SECRET_KEY", "secret-key-change-me")  # ⚠️ à sécuriser plus tard
+    if config:
+        app.config.update(config)
+
+    # Initialise la base si nécessaire
+    if not init_db.DB_FILE.exists():
+        init_db.init_database()
+
+    # Applique les migrations en attente (index, tables dérivées) sur une base existante
+    init_db.migrate_database()
+
+    # Pool de connexions SQLite (WAL) partagé par les requêtes
+    init_db_app(app)
+
+    # Instrumentation HTTP/SQL (METRICS_ENABLED ou GALA_METRICS=1)
+    metrics.init_app(app)
+
+    # Enregistre le blueprint des routes
+    app.register_blueprint(main_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(judge_bp)
+    return app
 
-# Enregistre le blueprint des routes
-app.register_blueprint(main_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(judge_bp)
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Serveur de développement uniquement — en production : gunicorn "run:create_app()"
+    create_app().run(debug=True)
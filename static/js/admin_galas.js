@@ -140,12 +140,12 @@
 
     function fetchGalas(options) {
         const opts = options || {};
-        fetch("/admin/api/galas")
-            .then(function (response) {
-                if (!response.ok) {
+        window.fetchJsonWithEtag("/admin/api/galas")
+            .then(function (result) {
+                if (!result.ok) {
                     throw new Error("Erreur lors du chargement des galas");
                 }
-                return response.json();
+                return result.data || {};
             })
             .then(function (payload) {
                 galas = Array.isArray(payload.galas) ? payload.galas : [];
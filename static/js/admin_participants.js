@@ -14,6 +14,7 @@
     const errorState = document.getElementById("participantsErrorState");
     const subtitle = document.getElementById("participantsSubtitle");
     const countBadge = document.getElementById("participantsCountBadge");
+    const loadMoreSentinel = document.getElementById("participantsLoadMore");
     const viewCardsButton = document.getElementById("participantsViewCardsButton");
     const viewTableButton = document.getElementById("participantsViewTableButton");
     const responsesModalEl = document.getElementById("participantResponsesModal");
@@ -52,12 +53,19 @@
         search: "",
         missingOnly: false,
         participants: [],
-        filteredParticipants: [],
+        total: 0,
+        nextCursor: null,
+        loadingMore: false,
+        requestId: 0,
+        responsesCache: new Map(),
         view: "cards",
         editingParticipantId: null,
         currentResponses: null
     };
 
+    // Taille d'une page de la liste (defilement infini).
+    const PAGE_SIZE = 50;
+
     function escapeHtml(value) {
         if (value === null || value === undefined) {
             return "";
@@ -261,6 +269,7 @@
             }
             showResponsesAlert("success", "Reponses enregistrees.");
             state.currentResponses = null;
+            state.responsesCache.delete(state.editingParticipantId);
             fetchParticipants();
         } catch (error) {
             showResponsesAlert("danger", error.message || "Echec de l'enregistrement.");
@@ -746,8 +755,72 @@ function normalizeId(value) {
         tableWrapper.classList.toggle("d-none", rows.length === 0);
     }
 
-    function renderCardView(participants) {
-        cardsContainer.innerHTML = "";
+    function formatResponsesList(responses) {
+        if (!responses.length) {
+            return '<div class="list-group-item"><span class="text-muted fst-italic">Aucune question configuree pour cette categorie.</span></div>';
+        }
+        return responses.map(function (item) {
+            if (!item) {
+                return "";
+            }
+            const missingClass = !item.contenu ? "bg-warning-subtle" : "";
+            const isNarratif = item.origin === "narratif";
+            const escapedQuestion = escapeHtml(item.texte || "");
+            const heading = isNarratif
+                ? '<span class="badge text-bg-info me-2">Narratif</span>' + escapedQuestion
+                : 'Q' + item.ordre + ': ' + escapedQuestion;
+            return (
+                `<div class="list-group-item ${missingClass}">` +
+                `<div class="fw-semibold small mb-1">${heading}</div>` +
+                `<div class="text-body-secondary small">${formatResponseContent(item.contenu)}</div>` +
+                `</div>`
+            );
+        }).join("");
+    }
+
+    async function fetchParticipantResponses(participantId) {
+        if (state.responsesCache.has(participantId)) {
+            return state.responsesCache.get(participantId);
+        }
+        const response = await fetch("/admin/api/participants/" + participantId + "/responses");
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const payload = await response.json();
+        const questions = Array.isArray(payload.questions) ? payload.questions : [];
+        const narratif = Array.isArray(payload.narratif) ? payload.narratif : [];
+        const responses = questions.map(function (question, index) {
+            return { question_id: question.id, ordre: index + 1, texte: question.texte, contenu: question.reponse };
+        }).concat(narratif.map(function (question) {
+            return { question_id: question.id, texte: question.texte, contenu: question.reponse, origin: "narratif" };
+        }));
+        state.responsesCache.set(participantId, responses);
+        return responses;
+    }
+
+    async function loadCollapseResponses(collapseEl) {
+        if (collapseEl.dataset.responsesLoaded) {
+            return;
+        }
+        const participantId = Number(collapseEl.dataset.participantId);
+        const listGroup = collapseEl.querySelector(".list-group");
+        if (!Number.isFinite(participantId) || !listGroup) {
+            return;
+        }
+        collapseEl.dataset.responsesLoaded = "1";
+        try {
+            listGroup.innerHTML = formatResponsesList(await fetchParticipantResponses(participantId));
+        } catch (error) {
+            console.error("admin_participants responses error", error);
+            collapseEl.dataset.responsesLoaded = "";
+            listGroup.innerHTML = '<div class="list-group-item"><span class="text-danger small">Impossible de charger les reponses.</span></div>';
+        }
+    }
+
+    function renderCardView(participants, append) {
+        if (!append) {
+            cardsContainer.innerHTML = "";
+        }
         if (!participants.length) {
             return;
         }
@@ -775,6 +848,10 @@ function normalizeId(value) {
             const gala = participant.gala || {};
             const categorie = participant.categorie || {};
             const responses = Array.isArray(participant.responses) ? participant.responses : [];
+            // Extrait deja echappe par le serveur (seules les balises <mark> sont conservees).
+            const searchExcerpt = participant.search && participant.search.extrait_html
+                ? `  <p class="small text-body-secondary border-start border-3 ps-2 mt-3 mb-0">${participant.search.extrait_html}</p>`
+                : "";
 
             const headerParts = [];
             if (gala.annee) {
@@ -803,25 +880,11 @@ function normalizeId(value) {
                 formatField("Site web", compagnie.site_web)
             ].filter(Boolean).join(" | ");
 
-            const responsesList = responses.length
-                ? responses.map(function (item) {
-                    if (!item) {
-                        return "";
-                    }
-                    const missingClass = !item.contenu ? "bg-warning-subtle" : "";
-                    const isNarratif = item.origin === "narratif";
-                    const escapedQuestion = escapeHtml(item.texte || "");
-                    const heading = isNarratif
-                        ? '<span class="badge text-bg-info me-2">Narratif</span>' + escapedQuestion
-                        : 'Q' + item.ordre + ': ' + escapedQuestion;
-                    return (
-                        `<div class="list-group-item ${missingClass}">` +
-                        `<div class="fw-semibold small mb-1">${heading}</div>` +
-                        `<div class="text-body-secondary small">${formatResponseContent(item.contenu)}</div>` +
-                        `</div>`
-                    );
-                }).join("")
-                : '<div class="list-group-item"><span class="text-muted fst-italic">Aucune question configuree pour cette categorie.</span></div>';
+            // En mode resume, les reponses sont chargees a l'ouverture du volet.
+            const hasResponses = Array.isArray(participant.responses);
+            const responsesList = hasResponses
+                ? formatResponsesList(responses)
+                : '<div class="list-group-item"><span class="text-muted small">Chargement des reponses...</span></div>';
 
             card.innerHTML = [
                 '<div class="card-body">',
@@ -838,11 +901,12 @@ function normalizeId(value) {
                 '    </div>',
                 '  </div>',
                 contactFields ? `  <div class="small text-muted mt-3 d-flex flex-wrap gap-2">${contactFields}</div>` : "",
+                searchExcerpt,
                 '  <div class="mt-3 d-flex flex-wrap gap-2">',
                 `    <button class="btn btn-sm btn-outline-secondary" type="button" data-action="edit-responses" data-participant-id="${participant.id}">Modifier les reponses</button>`,
                 `    <button class="btn btn-sm btn-outline-primary" type="button" data-bs-toggle="collapse" data-bs-target="#${collapseId}" aria-expanded="false">Voir les reponses</button>`,
                 '  </div>',
-                `  <div class="collapse mt-3" id="${collapseId}">`,
+                `  <div class="collapse mt-3" id="${collapseId}" data-participant-id="${participant.id}" data-responses-loaded="${hasResponses ? "1" : ""}">`,
                 '    <div class="list-group list-group-flush">',
                 responsesList,
                 '    </div>',
@@ -856,11 +920,18 @@ function normalizeId(value) {
         cardsContainer.appendChild(fragment);
     }
 
+    function updateLoadMore() {
+        countBadge.textContent = formatCountLabel(state.participants.length, state.total);
+        if (loadMoreSentinel) {
+            loadMoreSentinel.classList.toggle("d-none", !state.nextCursor);
+        }
+    }
+
     function renderParticipants() {
-        const participants = state.filteredParticipants;
+        const participants = state.participants;
         emptyState?.classList.add("d-none");
         errorState?.classList.add("d-none");
-        countBadge.textContent = formatCountLabel(participants.length, state.participants.length);
+        updateLoadMore();
         updateSubtitle();
 
         setActiveViewButton(state.view);
@@ -896,19 +967,14 @@ function normalizeId(value) {
         }
     }
 
-    function applyClientFilters() {
-        const base = Array.isArray(state.participants) ? state.participants : [];
-        state.filteredParticipants = base.filter(function (participant) {
-            if (!participant) {
-                return false;
-            }
-            if (!state.missingOnly) {
-                return true;
-            }
-            const stats = participant.stats || {};
-            return Number(stats.missing) > 0;
-        });
-        renderParticipants();
+    function appendParticipants(participants) {
+        state.participants = state.participants.concat(participants);
+        updateLoadMore();
+        if (state.view === "table") {
+            renderTableView(state.participants);
+        } else {
+            renderCardView(participants, true);
+        }
     }
 
     function syncControls() {
@@ -925,47 +991,99 @@ function normalizeId(value) {
 
     let searchDebounce = null;
 
-    async function fetchParticipants() {
-        setLoading(true);
+    function buildListParams(cursor) {
+        const params = new URLSearchParams({ summary: "1", limit: String(PAGE_SIZE) });
+        if (state.selectedGalaId) {
+            params.set("gala_id", String(state.selectedGalaId));
+        }
+        if (state.selectedCategorieId) {
+            params.set("categorie_id", String(state.selectedCategorieId));
+        }
+        if (state.search) {
+            params.set("q", state.search);
+        }
+        if (state.missingOnly) {
+            params.set("missing_only", "1");
+        }
+        if (cursor) {
+            params.set("cursor", cursor);
+        }
+        return params;
+    }
+
+    async function loadMoreParticipants() {
+        if (!state.nextCursor || state.loading || state.loadingMore) {
+            return;
+        }
+        const requestId = state.requestId;
+        state.loadingMore = true;
         try {
-            const params = new URLSearchParams();
-            if (state.selectedGalaId) {
-                params.set("gala_id", String(state.selectedGalaId));
-            }
-            if (state.selectedCategorieId) {
-                params.set("categorie_id", String(state.selectedCategorieId));
+            const result = await window.fetchJsonWithEtag(`/admin/api/participants?${buildListParams(state.nextCursor).toString()}`);
+            if (!result.ok) {
+                throw new Error(`HTTP ${result.status}`);
             }
-            if (state.search) {
-                params.set("q", state.search);
+            // Les filtres ont change pendant le chargement : page obsolete.
+            if (requestId !== state.requestId) {
+                return;
             }
+            const payload = result.data || {};
+            state.nextCursor = payload.meta?.next_cursor || null;
+            state.total = Number(payload.meta?.total) || state.total;
+            appendParticipants(Array.isArray(payload.participants) ? payload.participants : []);
+        } catch (error) {
+            console.error("admin_participants load more error", error);
+            return;
+        } finally {
+            state.loadingMore = false;
+        }
+        // L'observateur ne se redeclenche pas si la sentinelle reste visible (page courte).
+        if (loadMoreSentinel && state.nextCursor
+            && loadMoreSentinel.getBoundingClientRect().top < window.innerHeight + 400) {
+            loadMoreParticipants();
+        }
+    }
 
-            const response = await fetch(`/admin/api/participants?${params.toString()}`);
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
+    async function fetchParticipants() {
+        state.requestId += 1;
+        const requestId = state.requestId;
+        setLoading(true);
+        try {
+            const result = await window.fetchJsonWithEtag(`/admin/api/participants?${buildListParams(null).toString()}`);
+            if (!result.ok) {
+                throw new Error(`HTTP ${result.status}`);
             }
-            const payload = await response.json();
+            if (requestId !== state.requestId) {
+                return;
+            }
+            const payload = result.data;
             state.filters.galas = Array.isArray(payload?.filters?.galas) ? payload.filters.galas : [];
             const selected = payload?.filters?.selected || {};
             state.selectedGalaId = normalizeId(selected.gala_id);
             state.selectedCategorieId = normalizeId(selected.categorie_id);
             state.search = selected.q || "";
             state.participants = Array.isArray(payload?.participants) ? payload.participants : [];
+            state.total = Number(payload?.meta?.total) || state.participants.length;
+            state.nextCursor = payload?.meta?.next_cursor || null;
+            state.responsesCache.clear();
             populateCreateGalaOptions();
             populateCreateCategorieOptions();
             syncControls();
-            applyClientFilters();
+            renderParticipants();
         } catch (error) {
             console.error("admin_participants fetch error", error);
             if (errorState) {
                 errorState.classList.remove("d-none");
             }
             state.participants = [];
-            state.filteredParticipants = [];
-            listContainer.innerHTML = "";
+            state.total = 0;
+            state.nextCursor = null;
+            cardsContainer.innerHTML = "";
             emptyState?.classList.add("d-none");
-            countBadge.textContent = "0 participant";
+            updateLoadMore();
         } finally {
-            setLoading(false);
+            if (requestId === state.requestId) {
+                setLoading(false);
+            }
         }
     }
 
@@ -1000,7 +1118,7 @@ function normalizeId(value) {
     if (missingOnlySwitch) {
         missingOnlySwitch.addEventListener("change", function (event) {
             state.missingOnly = Boolean(event.target.checked);
-            applyClientFilters();
+            fetchParticipants();
         });
     }
 
@@ -1075,7 +1193,25 @@ function normalizeId(value) {
         });
     }
 
+    if (loadMoreSentinel && typeof IntersectionObserver === "function") {
+        // Page suivante des que le bas de la liste approche de l'ecran.
+        const loadMoreObserver = new IntersectionObserver(function (entries) {
+            if (entries.some(function (entry) { return entry.isIntersecting; })) {
+                loadMoreParticipants();
+            }
+        }, { rootMargin: "400px 0px" });
+        loadMoreObserver.observe(loadMoreSentinel);
+    } else if (loadMoreSentinel) {
+        loadMoreSentinel.addEventListener("click", loadMoreParticipants);
+    }
+
     if (cardsContainer) {
+        cardsContainer.addEventListener("show.bs.collapse", function (event) {
+            if (event.target && event.target.dataset.participantId) {
+                loadCollapseResponses(event.target);
+            }
+        });
+
         cardsContainer.addEventListener("click", function (event) {
             var trigger = event.target.closest('[data-action="edit-responses"]');
             if (!trigger) {
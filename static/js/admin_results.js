@@ -11,6 +11,7 @@
     const categoriesContainer = document.getElementById("resultsCategoriesContainer");
     const judgesContainer = document.getElementById("resultsJudgesContainer");
     const judgesBadge = document.getElementById("resultsJudgeProgressBadge");
+    const exportLinks = document.querySelectorAll("#resultsExportLinks [data-export-kind]");
 
     if (!galaSelect || !categorySelect) {
         return;
@@ -21,8 +22,16 @@
         selectedGalaId: null,
         selectedCategoryId: null,
         suppressEvents: false,
+        renderedUrl: null,
+        payload: null,
+        liveSource: null,
+        liveGalaId: null,
+        pollTimer: null,
     };
 
+    // Rafraichissement de repli (requete conditionnelle) si le flux SSE est indisponible.
+    const POLL_INTERVAL_MS = 15000;
+
     function formatPercent(value) {
         if (typeof value !== "number" || Number.isNaN(value)) {
             return "0%";
@@ -73,6 +82,20 @@
         }
     }
 
+    function updateExportLinks() {
+        exportLinks.forEach(function (link) {
+            if (!state.selectedGalaId) {
+                link.classList.add("disabled");
+                link.setAttribute("href", "#");
+                return;
+            }
+            const kind = link.getAttribute("data-export-kind");
+            const format = link.getAttribute("data-export-format");
+            link.classList.remove("disabled");
+            link.setAttribute("href", "/admin/api/galas/" + state.selectedGalaId + "/export/" + kind + "?format=" + format);
+        });
+    }
+
     function populateFilters(filters) {
         if (!filters) {
             return;
@@ -130,6 +153,7 @@
 
         state.selectedGalaId = galaSelect.value ? Number(galaSelect.value) : null;
         state.selectedCategoryId = categorySelect.value ? Number(categorySelect.value) : null;
+        updateExportLinks();
 
         state.suppressEvents = false;
     }
@@ -183,6 +207,9 @@
         if (galaMeta.annee) {
             subtitleParts.push("Édition " + galaMeta.annee);
         }
+        if (galaMeta.locked) {
+            subtitleParts.push("Verrouillé");
+        }
         summarySubtitle.textContent = subtitleParts.join(" • ") || "Résumé des résultats";
 
         if (bonusValueEl && typeof meta.favorite_bonus === "number") {
@@ -199,72 +226,77 @@
         emptyState.classList.add("d-none");
 
         categories.forEach(function (category) {
-            const card = document.createElement("div");
-            card.className = "card shadow-sm";
-            const progress = category.progress || {};
-            const participants = Array.isArray(category.participants) ? category.participants : [];
-            card.innerHTML = [
-                '<div class="card-body">',
-                '  <div class="d-flex flex-column flex-lg-row justify-content-between align-items-start gap-3 mb-3">',
-                '    <div>',
-                '      <h3 class="h6 mb-1">' + (category.nom || "Catégorie") + '</h3>',
-                '      <p class="text-muted small mb-0">Questions : ' + (category.question_count || 0) + ' • Participants : ' + (category.participant_count || 0) + ' • Juges : ' + (category.judge_count || 0) + '</p>',
-                '    </div>',
-                '    <div class="text-end">',
-                '      ' + formatStatusBadge(category.status || "en_attente"),
-                '      <div class="text-muted small">Progression ' + formatPercent(progress.percent || 0) + '</div>',
-                '    </div>',
-                '  </div>',
-                '  <div class="table-responsive">',
-                '    <table class="table table-sm align-middle">',
-                '      <thead class="table-light">',
-                '        <tr>',
-                '          <th scope="col">Rang</th>',
-                '          <th scope="col">Participant</th>',
-                '          <th scope="col">Score</th>',
-                '          <th scope="col">Bonus</th>',
-                '          <th scope="col">Score final</th>',
-                '          <th scope="col">Notes</th>',
-                '          <th scope="col">Statut</th>',
-                '          <th scope="col">Favoris</th>',
-                '        </tr>',
-                '      </thead>',
-                '      <tbody id="resultsCategoryBody-' + category.id + '"></tbody>',
-                '    </table>',
-                '  </div>',
-                '</div>',
-            ].join("");
+            categoriesContainer.appendChild(buildCategoryCard(category));
+        });
+    }
 
-            const tbody = card.querySelector("tbody");
-            participants.forEach(function (participant) {
-                const favorites = Array.isArray(participant.favorites) ? participant.favorites : [];
-                const notes = participant.notes || {};
-                const judgesAnswered = participant.judges_answered || 0;
-                const row = document.createElement("tr");
-                row.innerHTML = [
-                    '<td>' + (participant.rank || "—") + '</td>',
-                    '<td>',
-                    '  <div class="fw-semibold">' + (participant.compagnie && participant.compagnie.nom ? participant.compagnie.nom : "Participant #" + participant.id) + '</div>',
-                    '  <div class="text-muted small">' + [participant.compagnie && participant.compagnie.ville || "", participant.compagnie && participant.compagnie.secteur || ""].filter(Boolean).join(" • ") + '</div>',
-                    '</td>',
-                    '<td>' + formatScore(participant.score_base) + '</td>',
-                    '<td>' + formatScore(participant.score_bonus) + '</td>',
-                    '<td><span class="fw-semibold">' + formatScore(participant.score_final) + '</span></td>',
-                    '<td>' + (notes.recorded || 0) + ' / ' + (notes.expected || 0) + '<div class="text-muted small">' + formatPercent(notes.progress_percent || 0) + '</div></td>',
-                    '<td>' + formatStatusBadge(participant.status || "en_attente") + '</td>',
-                    '<td>' + (favorites.length ? favorites.join(", ") : "—") + '<div class="text-muted small">' + judgesAnswered + ' juge(s)</div></td>',
-                ].join("");
-                tbody.appendChild(row);
-            });
+    function buildCategoryCard(category) {
+        const card = document.createElement("div");
+        card.className = "card shadow-sm";
+        card.setAttribute("data-category-id", String(category.id));
+        const progress = category.progress || {};
+        const participants = Array.isArray(category.participants) ? category.participants : [];
+        card.innerHTML = [
+            '<div class="card-body">',
+            '  <div class="d-flex flex-column flex-lg-row justify-content-between align-items-start gap-3 mb-3">',
+            '    <div>',
+            '      <h3 class="h6 mb-1">' + (category.nom || "Catégorie") + '</h3>',
+            '      <p class="text-muted small mb-0">Questions : ' + (category.question_count || 0) + ' • Participants : ' + (category.participant_count || 0) + ' • Juges : ' + (category.judge_count || 0) + '</p>',
+            '    </div>',
+            '    <div class="text-end">',
+            '      ' + formatStatusBadge(category.status || "en_attente"),
+            '      <div class="text-muted small">Progression ' + formatPercent(progress.percent || 0) + '</div>',
+            '    </div>',
+            '  </div>',
+            '  <div class="table-responsive">',
+            '    <table class="table table-sm align-middle">',
+            '      <thead class="table-light">',
+            '        <tr>',
+            '          <th scope="col">Rang</th>',
+            '          <th scope="col">Participant</th>',
+            '          <th scope="col">Score</th>',
+            '          <th scope="col">Bonus</th>',
+            '          <th scope="col">Score final</th>',
+            '          <th scope="col">Notes</th>',
+            '          <th scope="col">Statut</th>',
+            '          <th scope="col">Favoris</th>',
+            '        </tr>',
+            '      </thead>',
+            '      <tbody id="resultsCategoryBody-' + category.id + '"></tbody>',
+            '    </table>',
+            '  </div>',
+            '</div>',
+        ].join("");
+
+        const tbody = card.querySelector("tbody");
+        participants.forEach(function (participant) {
+            const favorites = Array.isArray(participant.favorites) ? participant.favorites : [];
+            const notes = participant.notes || {};
+            const judgesAnswered = participant.judges_answered || 0;
+            const row = document.createElement("tr");
+            row.innerHTML = [
+                '<td>' + (participant.rank || "—") + '</td>',
+                '<td>',
+                '  <div class="fw-semibold">' + (participant.compagnie && participant.compagnie.nom ? participant.compagnie.nom : "Participant #" + participant.id) + '</div>',
+                '  <div class="text-muted small">' + [participant.compagnie && participant.compagnie.ville || "", participant.compagnie && participant.compagnie.secteur || ""].filter(Boolean).join(" • ") + '</div>',
+                '</td>',
+                '<td>' + formatScore(participant.score_base) + '</td>',
+                '<td>' + formatScore(participant.score_bonus) + '</td>',
+                '<td><span class="fw-semibold">' + formatScore(participant.score_final) + '</span></td>',
+                '<td>' + (notes.recorded || 0) + ' / ' + (notes.expected || 0) + '<div class="text-muted small">' + formatPercent(notes.progress_percent || 0) + '</div></td>',
+                '<td>' + formatStatusBadge(participant.status || "en_attente") + '</td>',
+                '<td>' + (favorites.length ? favorites.join(", ") : "—") + '<div class="text-muted small">' + judgesAnswered + ' juge(s)</div></td>',
+            ].join("");
+            tbody.appendChild(row);
+        });
 
-            if (!participants.length) {
-                const row = document.createElement("tr");
-                row.innerHTML = '<td colspan="8" class="text-muted text-center small">Aucun participant pour cette catégorie.</td>';
-                tbody.appendChild(row);
-            }
+        if (!participants.length) {
+            const row = document.createElement("tr");
+            row.innerHTML = '<td colspan="8" class="text-muted text-center small">Aucun participant pour cette catégorie.</td>';
+            tbody.appendChild(row);
+        }
 
-            categoriesContainer.appendChild(card);
-        });
+        return card;
     }
 
     function renderJudges(judges, meta) {
@@ -282,36 +314,263 @@
         }
 
         judges.forEach(function (judge) {
-            const card = document.createElement("div");
-            card.className = "card border-0 border-bottom rounded-0";
-            const submittedInfo = judge.submitted && judge.submitted_at ? '<div class="text-muted small">Soumis</div>' : '';
-            const unlockButton = judge.submitted
-                ? '<button class="btn btn-outline-danger btn-sm mt-2" type="button" data-action="reset-submission" data-judge-id="' + judge.id + '">Debloquer</button>'
-                : '';
-            card.innerHTML = [
-                '<div class="card-body py-3">',
-                '  <div class="d-flex justify-content-between align-items-start gap-3">',
-                '    <div>',
-                '      <div class="fw-semibold">' + (judge.prenom || "") + ' ' + (judge.nom || "") + '</div>',
-                '      <div class="text-muted small">' + (judge.answered_notes || 0) + ' / ' + (judge.expected_notes || 0) + ' notes • ' + formatPercent(judge.progress_percent || 0) + '</div>',
-                '    </div>',
-                '    <div class="text-end">',
-                formatStatusBadge(judge.status || "en_attente"),
-                submittedInfo,
-                unlockButton,
-                '    </div>',
-                '  </div>',
-                '</div>',
-            ].join("");
-            judgesContainer.appendChild(card);
+            judgesContainer.appendChild(buildJudgeCard(judge));
+        });
+    }
+
+    function buildJudgeCard(judge) {
+        const card = document.createElement("div");
+        card.className = "card border-0 border-bottom rounded-0";
+        card.setAttribute("data-judge-card", String(judge.id));
+        const submittedInfo = judge.submitted && judge.submitted_at ? '<div class="text-muted small">Soumis</div>' : '';
+        const unlockButton = judge.submitted
+            ? '<button class="btn btn-outline-danger btn-sm mt-2" type="button" data-action="reset-submission" data-judge-id="' + judge.id + '">Debloquer</button>'
+            : '';
+        card.innerHTML = [
+            '<div class="card-body py-3">',
+            '  <div class="d-flex justify-content-between align-items-start gap-3">',
+            '    <div>',
+            '      <div class="fw-semibold">' + (judge.prenom || "") + ' ' + (judge.nom || "") + '</div>',
+            '      <div class="text-muted small">' + (judge.answered_notes || 0) + ' / ' + (judge.expected_notes || 0) + ' notes • ' + formatPercent(judge.progress_percent || 0) + '</div>',
+            '    </div>',
+            '    <div class="text-end">',
+            formatStatusBadge(judge.status || "en_attente"),
+            submittedInfo,
+            unlockButton,
+            '    </div>',
+            '  </div>',
+            '</div>',
+        ].join("");
+        return card;
+    }
+
+    // ==============================
+    // Deltas temps reel (SSE) : mise a jour en place, sans recharger la vue
+    // ==============================
+    function progressStatus(recorded, expected) {
+        if (expected <= 0 || recorded === 0) {
+            return "en_attente";
+        }
+        return recorded >= expected ? "complet" : "en_cours";
+    }
+
+    function progressPercent(recorded, expected) {
+        return expected ? Math.round((recorded / expected) * 1000) / 10 : 0;
+    }
+
+    function rankParticipants(category) {
+        const participants = category.participants || [];
+        participants.sort(function (a, b) {
+            const aMissing = a.score_final === null || a.score_final === undefined;
+            const bMissing = b.score_final === null || b.score_final === undefined;
+            if (aMissing !== bMissing) {
+                return aMissing ? 1 : -1;
+            }
+            if (!aMissing && a.score_final !== b.score_final) {
+                return b.score_final - a.score_final;
+            }
+            const aName = ((a.compagnie && a.compagnie.nom) || "").toLowerCase();
+            const bName = ((b.compagnie && b.compagnie.nom) || "").toLowerCase();
+            return aName < bName ? -1 : (aName > bName ? 1 : 0);
+        });
+        let counter = 0;
+        let currentRank = 0;
+        let previous = null;
+        participants.forEach(function (participant) {
+            if (participant.score_final === null || participant.score_final === undefined) {
+                participant.rank = null;
+                return;
+            }
+            counter += 1;
+            if (previous === null || Math.abs(participant.score_final - previous) > 1e-6) {
+                currentRank = counter;
+                previous = participant.score_final;
+            }
+            participant.rank = currentRank;
+        });
+        category.top_participant = participants.find(function (p) { return p.rank === 1; }) || null;
+    }
+
+    function refreshTotals() {
+        const payload = state.payload;
+        const meta = payload.meta || {};
+        let recordedTotal = 0;
+        (payload.categories || []).forEach(function (category) {
+            const recorded = (category.participants || []).reduce(function (sum, p) {
+                return sum + ((p.notes && p.notes.recorded) || 0);
+            }, 0);
+            const expected = (category.progress && category.progress.expected) || 0;
+            category.progress = { percent: progressPercent(recorded, expected), recorded: recorded, expected: expected };
+            category.status = progressStatus(recorded, expected);
+            category.favorites_count = (category.participants || []).reduce(function (sum, p) {
+                return sum + (p.favorites_count || 0);
+            }, 0);
+            recordedTotal += recorded;
+        });
+        meta.overall_recorded = recordedTotal;
+        meta.overall_completion_percent = progressPercent(recordedTotal, meta.overall_expected || 0);
+        meta.judges_submitted = (payload.judges || []).filter(function (j) { return j.submitted; }).length;
+        renderSummary(meta);
+        judgesBadge.textContent = (meta.judges_submitted || 0) + " / " + (meta.judges_total || 0);
+    }
+
+    function replaceCard(container, selector, element) {
+        const current = container.querySelector(selector);
+        if (current) {
+            current.replaceWith(element);
+        }
+    }
+
+    function applyParticipantScore(delta) {
+        const category = (state.payload.categories || []).find(function (c) {
+            return Number(c.id) === Number(delta.gala_categorie_id);
+        });
+        const participant = category && (category.participants || []).find(function (p) {
+            return Number(p.id) === Number(delta.participant_id);
         });
+        if (!participant) {
+            return;
+        }
+        const expected = (participant.notes && participant.notes.expected) || 0;
+        participant.score_base = delta.score_base;
+        participant.score_bonus = delta.score_bonus;
+        participant.score_final = delta.score_final;
+        participant.judges_answered = delta.judges_answered;
+        participant.favorites = delta.favorites || [];
+        participant.favorites_count = participant.favorites.length;
+        participant.notes = {
+            recorded: delta.notes_recorded,
+            expected: expected,
+            progress_percent: progressPercent(delta.notes_recorded, expected),
+        };
+        participant.status = progressStatus(delta.notes_recorded, expected);
+        rankParticipants(category);
+        refreshTotals();
+        replaceCard(categoriesContainer, '[data-category-id="' + category.id + '"]', buildCategoryCard(category));
     }
 
-    async function fetchResults() {
+    function findJudge(judgeId) {
+        return (state.payload.judges || []).find(function (j) { return Number(j.id) === Number(judgeId); });
+    }
+
+    function judgeStatus(judge) {
+        if (judge.submitted) {
+            return "soumis";
+        }
+        return judge.answered_notes > 0 ? "en_cours" : "en_attente";
+    }
+
+    function applyJudgeProgress(delta) {
+        const judge = findJudge(delta.juge_id);
+        if (!judge) {
+            return;
+        }
+        judge.answered_notes = delta.answered_notes;
+        judge.progress_percent = progressPercent(judge.answered_notes, judge.expected_notes || 0);
+        judge.status = judgeStatus(judge);
+        replaceCard(judgesContainer, '[data-judge-card="' + judge.id + '"]', buildJudgeCard(judge));
+    }
+
+    function applySubmission(delta) {
+        const judge = findJudge(delta.juge_id);
+        if (!judge) {
+            return;
+        }
+        judge.submitted = Boolean(delta.submitted);
+        judge.submitted_at = delta.submitted_at || null;
+        judge.status = judgeStatus(judge);
+        refreshTotals();
+        replaceCard(judgesContainer, '[data-judge-card="' + judge.id + '"]', buildJudgeCard(judge));
+    }
+
+    function applyLock(delta) {
+        const meta = state.payload.meta || {};
+        meta.gala = Object.assign({}, meta.gala, { locked: Boolean(delta.locked) });
+        renderSummary(meta);
+    }
+
+    const liveHandlers = {
+        participant_score: applyParticipantScore,
+        judge_progress: applyJudgeProgress,
+        submission: applySubmission,
+        lock: applyLock,
+    };
+
+    function stopPolling() {
+        if (state.pollTimer) {
+            window.clearInterval(state.pollTimer);
+            state.pollTimer = null;
+        }
+    }
+
+    function startPolling() {
+        if (!state.pollTimer) {
+            state.pollTimer = window.setInterval(function () {
+                fetchResults({ silent: true });
+            }, POLL_INTERVAL_MS);
+        }
+    }
+
+    function disconnectLiveFeed() {
+        if (state.liveSource) {
+            state.liveSource.close();
+            state.liveSource = null;
+        }
+        state.liveGalaId = null;
+    }
+
+    function connectLiveFeed(meta) {
+        const galaId = meta && meta.gala ? meta.gala.id : null;
+        if (!galaId || typeof window.EventSource !== "function") {
+            disconnectLiveFeed();
+            startPolling();
+            return;
+        }
+        if (state.liveSource && state.liveGalaId === galaId && state.liveSource.readyState !== EventSource.CLOSED) {
+            return;
+        }
+        disconnectLiveFeed();
+        const params = new URLSearchParams({ gala_id: String(galaId) });
+        if (meta.live_event_id !== null && meta.live_event_id !== undefined) {
+            params.set("last_event_id", String(meta.live_event_id));
+        }
+        const source = new EventSource("/admin/api/results/stream?" + params.toString());
+        state.liveSource = source;
+        state.liveGalaId = galaId;
+        Object.keys(liveHandlers).forEach(function (kind) {
+            source.addEventListener(kind, function (event) {
+                if (!state.payload || state.liveSource !== source) {
+                    return;
+                }
+                try {
+                    liveHandlers[kind](JSON.parse(event.data));
+                } catch (error) {
+                    console.error("admin_results live delta error", error);
+                }
+            });
+        });
+        source.addEventListener("resync", function () {
+            fetchResults({ silent: true });
+        });
+        source.addEventListener("open", stopPolling);
+        source.addEventListener("error", function () {
+            // EventSource se reconnecte seul ; s'il abandonne (ex. 503), on interroge periodiquement.
+            if (source.readyState === EventSource.CLOSED) {
+                startPolling();
+            }
+        });
+    }
+
+    async function fetchResults(options) {
+        const opts = options || {};
         if (state.loading) {
             return;
         }
-        setLoading(true);
+        if (opts.silent) {
+            state.loading = true;
+        } else {
+            setLoading(true);
+        }
         try {
             const params = new URLSearchParams();
             if (state.selectedGalaId) {
@@ -321,12 +580,18 @@
                 params.set("categorie_id", String(state.selectedCategoryId));
             }
             const query = params.toString();
-            const response = await fetch("/admin/api/results" + (query ? "?" + query : ""));
-            if (!response.ok) {
+            const url = "/admin/api/results" + (query ? "?" + query : "");
+            const result = await window.fetchJsonWithEtag(url);
+            if (!result.ok) {
                 throw new Error("Réponse invalide du serveur");
             }
-            const payload = await response.json();
             errorState.classList.add("d-none");
+            // Rafraichissement de fond : rien n'a change depuis le dernier rendu.
+            if (opts.silent && result.notModified && state.renderedUrl === url) {
+                connectLiveFeed(state.payload && state.payload.meta);
+                return;
+            }
+            const payload = result.data || {};
             populateFilters(payload.filters || {});
             renderSummary(payload.meta || {});
             renderCategories(payload.categories || []);
@@ -334,10 +599,19 @@
             if (Array.isArray(payload.categories) && payload.categories.length > 0) {
                 emptyState.classList.add("d-none");
             }
+            state.renderedUrl = url;
+            state.payload = payload;
+            connectLiveFeed(payload.meta || {});
         } catch (error) {
+            console.error("admin_results load error", error);
+            if (opts.silent) {
+                return;
+            }
+            state.renderedUrl = null;
+            state.payload = null;
+            disconnectLiveFeed();
             clearContainers();
             errorState.classList.remove("d-none");
-            console.error("admin_results load error", error);
         } finally {
             setLoading(false);
         }
@@ -313,6 +313,7 @@
                     }
                     showAssignmentsFeedback('success', 'Assignations mises a jour.');
                     await loadUserDetail(user.id, { preserveSelection: true, skipSelectionUpdate: true });
+                    await loadAssignmentMatrix(matrixGalaId);
                 } catch (error) {
                     console.error(error);
                     showAssignmentsFeedback('error', "Erreur reseau lors de l'enregistrement.");
@@ -356,6 +357,211 @@
         }
     }
 
+    // ==============================
+    // Matrice des assignations (juges x categories d'un gala)
+    // ==============================
+    const matrixTable = document.getElementById("matrixTable");
+    const matrixGalaSelect = document.getElementById("matrixGalaSelect");
+    const saveMatrixButton = document.getElementById("saveMatrixBtn");
+    const matrixFeedback = document.getElementById("matrixFeedback");
+
+    // juge_id -> Set des gala_categorie_id enregistres / coches
+    let matrixSaved = new Map();
+    let matrixDraft = new Map();
+    let matrixGalaId = null;
+
+    function showMatrixFeedback(kind, message) {
+        if (!matrixFeedback) {
+            return;
+        }
+        matrixFeedback.textContent = message;
+        matrixFeedback.classList.remove("d-none", "alert-success", "alert-danger");
+        matrixFeedback.classList.add(kind === "success" ? "alert-success" : "alert-danger");
+    }
+
+    function hideMatrixFeedback() {
+        if (matrixFeedback) {
+            matrixFeedback.classList.add("d-none");
+            matrixFeedback.textContent = "";
+        }
+    }
+
+    function sameSet(a, b) {
+        if (a.size !== b.size) {
+            return false;
+        }
+        for (const value of a) {
+            if (!b.has(value)) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    function changedJudgeIds() {
+        const changed = [];
+        matrixDraft.forEach(function (draft, judgeId) {
+            if (!sameSet(draft, matrixSaved.get(judgeId) || new Set())) {
+                changed.push(judgeId);
+            }
+        });
+        return changed;
+    }
+
+    function refreshMatrixState() {
+        const changed = new Set(changedJudgeIds());
+        matrixTable.querySelectorAll("tr[data-judge-id]").forEach(function (row) {
+            row.classList.toggle("table-warning", changed.has(Number(row.dataset.judgeId)));
+        });
+        if (saveMatrixButton) {
+            saveMatrixButton.disabled = changed.size === 0;
+        }
+    }
+
+    function renderMatrix(payload) {
+        const categories = Array.isArray(payload.categories) ? payload.categories : [];
+        const judges = Array.isArray(payload.judges) ? payload.judges : [];
+        const locked = Boolean(payload.gala && payload.gala.locked);
+
+        matrixGalaId = payload.gala ? payload.gala.id : null;
+        matrixSaved = new Map();
+        matrixDraft = new Map();
+        judges.forEach(function (judge) {
+            matrixSaved.set(Number(judge.id), new Set((judge.categories || []).map(Number)));
+            matrixDraft.set(Number(judge.id), new Set((judge.categories || []).map(Number)));
+        });
+
+        if (matrixGalaSelect) {
+            matrixGalaSelect.innerHTML = (payload.galas || []).map(function (gala) {
+                const selected = Number(gala.id) === Number(matrixGalaId) ? " selected" : "";
+                return '<option value="' + gala.id + '"' + selected + '>' + escapeHtml(gala.nom) + ' (' + escapeHtml(gala.annee) + ')</option>';
+            }).join("");
+        }
+
+        if (!judges.length || !categories.length) {
+            matrixTable.innerHTML = '<tbody><tr><td class="text-muted small">' +
+                (judges.length ? "Aucune categorie pour ce gala." : "Aucun juge.") + '</td></tr></tbody>';
+            refreshMatrixState();
+            return;
+        }
+
+        const header = '<thead class="table-light"><tr><th scope="col">Juge</th>' + categories.map(function (category) {
+            return '<th scope="col" class="text-center small">' + escapeHtml(category.nom) + '</th>';
+        }).join("") + '</tr></thead>';
+        const body = '<tbody>' + judges.map(function (judge) {
+            const assigned = matrixSaved.get(Number(judge.id));
+            const cells = categories.map(function (category) {
+                const checked = assigned.has(Number(category.id)) ? " checked" : "";
+                const disabled = locked ? " disabled" : "";
+                return '<td class="text-center"><input class="form-check-input matrix-checkbox" type="checkbox"' +
+                    ' data-judge-id="' + judge.id + '" value="' + category.id + '"' + checked + disabled +
+                    ' aria-label="' + escapeHtml(category.nom) + '"></td>';
+            }).join("");
+            return '<tr data-judge-id="' + judge.id + '"><td>' + formatFullName(judge) + '</td>' + cells + '</tr>';
+        }).join("") + '</tbody>';
+        matrixTable.innerHTML = header + body;
+        if (locked) {
+            showMatrixFeedback("error", "Ce gala est verrouille : les assignations ne peuvent plus etre modifiees.");
+        }
+        refreshMatrixState();
+    }
+
+    async function loadAssignmentMatrix(galaId) {
+        if (!matrixTable) {
+            return;
+        }
+        const query = galaId ? "?gala_id=" + encodeURIComponent(galaId) : "";
+        try {
+            const response = await fetch("/admin/api/assignments" + query);
+            if (!response.ok) {
+                throw new Error("Impossible de charger la matrice");
+            }
+            hideMatrixFeedback();
+            renderMatrix(await response.json());
+        } catch (error) {
+            console.error(error);
+            matrixTable.innerHTML = '<tbody><tr><td class="text-danger small">Erreur lors du chargement des assignations.</td></tr></tbody>';
+        }
+    }
+
+    function applyMatrixDelta(delta, key, present) {
+        (delta[key] || []).forEach(function (pair) {
+            const saved = matrixSaved.get(Number(pair[0]));
+            if (saved) {
+                if (present) {
+                    saved.add(Number(pair[1]));
+                } else {
+                    saved.delete(Number(pair[1]));
+                }
+            }
+        });
+    }
+
+    async function handleMatrixSave() {
+        const changed = changedJudgeIds();
+        if (!changed.length || matrixGalaId === null) {
+            return;
+        }
+        const assignments = {};
+        changed.forEach(function (judgeId) {
+            assignments[judgeId] = Array.from(matrixDraft.get(judgeId));
+        });
+        saveMatrixButton.disabled = true;
+        hideMatrixFeedback();
+        try {
+            const response = await fetch("/admin/api/assignments", {
+                method: "PUT",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ gala_id: matrixGalaId, assignments: assignments })
+            });
+            const payload = await response.json();
+            if (!response.ok || payload.status !== "ok") {
+                showMatrixFeedback("error", payload && payload.message ? payload.message : "Impossible d'enregistrer les assignations.");
+                refreshMatrixState();
+                return;
+            }
+            applyMatrixDelta(payload, "added", true);
+            applyMatrixDelta(payload, "removed", false);
+            showMatrixFeedback("success", "Assignations mises a jour (" + (payload.added || []).length + " ajout(s), " + (payload.removed || []).length + " retrait(s)).");
+            refreshMatrixState();
+            if (selectedUserId !== null) {
+                await loadUserDetail(selectedUserId, { preserveSelection: true, skipSelectionUpdate: true });
+            }
+        } catch (error) {
+            console.error(error);
+            showMatrixFeedback("error", "Erreur reseau lors de l'enregistrement.");
+            refreshMatrixState();
+        }
+    }
+
+    if (matrixTable) {
+        matrixTable.addEventListener("change", function (event) {
+            const input = event.target;
+            if (!input.classList || !input.classList.contains("matrix-checkbox")) {
+                return;
+            }
+            const draft = matrixDraft.get(Number(input.dataset.judgeId));
+            if (!draft) {
+                return;
+            }
+            if (input.checked) {
+                draft.add(Number(input.value));
+            } else {
+                draft.delete(Number(input.value));
+            }
+            refreshMatrixState();
+        });
+    }
+    if (matrixGalaSelect) {
+        matrixGalaSelect.addEventListener("change", function () {
+            loadAssignmentMatrix(matrixGalaSelect.value);
+        });
+    }
+    if (saveMatrixButton) {
+        saveMatrixButton.addEventListener("click", handleMatrixSave);
+    }
+
     clearDetail();
     fetchUsers(false);
+    loadAssignmentMatrix(null);
 })();
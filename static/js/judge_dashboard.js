@@ -583,13 +583,25 @@
             statusEl.textContent = message || '';
         }
 
+        // Modifications en attente, par question : un seul lot PATCH .../notes par sauvegarde.
+        const saveUrl = '/judge/api/galas/' + state.galaId + '/categories/' + state.categoryId + '/participants/' + state.participantId + '/notes';
         let pendingTimer = null;
-        let pendingQuestionId = null;
-        let pendingPayload = {};
+        let pendingEdits = {};
 
-        function resetPendingState() {
-            pendingQuestionId = null;
-            pendingPayload = {};
+        function takePendingEdits() {
+            const edits = Object.keys(pendingEdits).map(function (key) {
+                return pendingEdits[key];
+            });
+            pendingEdits = {};
+            return edits;
+        }
+
+        function requeueEdits(edits) {
+            edits.forEach(function (edit) {
+                const key = String(edit.question_id);
+                // Les modifications plus recentes deja en file l'emportent.
+                pendingEdits[key] = Object.assign({}, edit, pendingEdits[key] || {});
+            });
         }
 
         function flushPendingSave(options) {
@@ -598,14 +610,11 @@
                 clearTimeout(pendingTimer);
                 pendingTimer = null;
             }
-
-
-            if (pendingQuestionId !== null && pendingPayload && Object.keys(pendingPayload).length) {
-                const payload = Object.assign({}, pendingPayload);
-                const targetId = pendingQuestionId;
-                resetPendingState();
-                persistNote(targetId, payload, opts);
+            const edits = takePendingEdits();
+            if (!edits.length) {
+                return Promise.resolve(true);
             }
+            return persistNotes(edits, opts);
         }
 
 
@@ -625,69 +634,63 @@
             if (!questionId) {
                 return;
             }
-            if (pendingTimer && pendingQuestionId !== null && pendingQuestionId !== questionId && pendingPayload && Object.keys(pendingPayload).length) {
-                flushPendingSave({ silent: true });
-            }
-            if (pendingQuestionId !== questionId) {
-                pendingPayload = {};
+            const key = String(questionId);
+            const entry = pendingEdits[key] || { question_id: Number(questionId) };
+            const questionMeta = findQuestionById(questionId);
+            if (questionMeta && questionMeta.scope_participant_id && Number(questionMeta.scope_participant_id) !== Number(state.participantId)) {
+                entry.target_participant_id = Number(questionMeta.scope_participant_id);
             }
-            pendingQuestionId = questionId;
-            pendingPayload = Object.assign({}, pendingPayload, partialPayload || {});
+            pendingEdits[key] = Object.assign(entry, partialPayload || {});
             if (pendingTimer) {
                 clearTimeout(pendingTimer);
             }
             pendingTimer = window.setTimeout(function () {
-                const payload = Object.assign({}, pendingPayload);
-                const targetId = pendingQuestionId;
                 pendingTimer = null;
-                resetPendingState();
-                persistNote(targetId, payload);
+                flushPendingSave();
             }, 2000);
             showQuestionStatus('Sauvegarde dans 2 secondes...', false);
         }
 
-        async function persistNote(questionId, payload, options) {
-            if (!questionId || !payload || !Object.keys(payload).length) {
-                return;
-            }
+        async function persistNotes(edits, options) {
             const opts = options || {};
             if (state.saving) {
-                window.setTimeout(function () {
-                    persistNote(questionId, payload, opts);
-                }, 250);
-                return;
+                requeueEdits(edits);
+                return new Promise(function (resolve) {
+                    window.setTimeout(function () {
+                        resolve(flushPendingSave(opts));
+                    }, 250);
+                });
             }
             state.saving = true;
             if (!opts.silent) {
                 showQuestionStatus('Enregistrement...', false);
             }
             try {
-                const questionMeta = findQuestionById(questionId);
-                let targetParticipantId = state.participantId;
-                if (questionMeta && questionMeta.scope_participant_id && Number(questionMeta.scope_participant_id) !== Number(state.participantId)) {
-                    targetParticipantId = Number(questionMeta.scope_participant_id);
-                }
-                const body = Object.assign({}, payload);
-                if (Number(targetParticipantId) !== Number(state.participantId)) {
-                    body.target_participant_id = targetParticipantId;
-                }
-                const response = await fetch('/judge/api/galas/' + state.galaId + '/categories/' + state.categoryId + '/participants/' + state.participantId + '/questions/' + questionId, {
+                const response = await fetch(saveUrl, {
                     method: 'PATCH',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(body),
+                    body: JSON.stringify({ notes: edits }),
+                    keepalive: Boolean(opts.keepalive),
                 });
                 const result = await response.json().catch(function () { return null; });
                 if (!response.ok || !result || result.status !== 'ok') {
                     const message = result && result.message ? result.message : 'Erreur lors de la sauvegarde.';
                     showQuestionStatus(message, true);
-                    return;
+                    return false;
                 }
-                applyNoteUpdate(questionId, result.note || {});
-                if (!opts.silent) {
-                    showQuestionStatus('Enregistre', false);
+                // La fiche a pu etre quittee pendant l'envoi : on ne touche plus a l'affichage.
+                if (state.participantData === data) {
+                    (result.notes || []).forEach(function (note) {
+                        applyNoteUpdate(note.question_id, note);
+                    });
+                    if (!opts.silent) {
+                        showQuestionStatus('Enregistre', false);
+                    }
                 }
+                return true;
             } catch (error) {
                 showQuestionStatus('Erreur reseau.', true);
+                return false;
             } finally {
                 state.saving = false;
             }
@@ -710,7 +713,9 @@
                 questionMeta.scope_participant_id = notePayload.target_participant_id;
             }
             recalculateParticipantMetrics();
-            if (questions[state.currentQuestionIndex] && Number(questions[state.currentQuestionIndex].id) === Number(questionId)) {
+            const commentInput = questionContainer ? questionContainer.querySelector('#judgeQuestionComment') : null;
+            const editingComment = commentInput && document.activeElement === commentInput;
+            if (!editingComment && questions[state.currentQuestionIndex] && Number(questions[state.currentQuestionIndex].id) === Number(questionId)) {
                 renderQuestion();
             }
         }
@@ -805,14 +810,14 @@
                         });
                         question.note = value;
                         recalculateParticipantMetrics();
-                        persistNote(question.id, { valeur: value });
+                        queuePersist(question.id, { valeur: value });
                     });
                 });
                 const commentInput = questionContainer.querySelector('#judgeQuestionComment');
                 if (commentInput) {
                     commentInput.addEventListener('blur', function () {
                         const value = commentInput.value.trim();
-                        persistNote(question.id, { commentaire: value || null });
+                        queuePersist(question.id, { commentaire: value || null });
                     });
                 }
             }
@@ -839,11 +844,11 @@
     }
 
     async function fetchGalaSummary() {
-        const response = await fetch('/judge/api/galas');
-        if (!response.ok) {
+        const result = await window.fetchJsonWithEtag('/judge/api/galas');
+        if (!result.ok) {
             throw new Error('Impossible de charger les galas.');
         }
-        const payload = await response.json();
+        const payload = result.data || {};
         const galas = Array.isArray(payload.galas) ? payload.galas : [];
         const gala = galas.find(function (item) { return Number(item.id) === Number(state.galaId); });
         if (!gala) {
@@ -853,13 +858,12 @@
     }
 
     async function fetchCategoryData(categoryId) {
-        const response = await fetch('/judge/api/galas/' + state.galaId + '/categories/' + categoryId + '/participants');
-        if (!response.ok) {
-            const payload = await response.json().catch(function () { return null; });
-            const message = payload && payload.message ? payload.message : 'Impossible de charger la categorie.';
+        const result = await window.fetchJsonWithEtag('/judge/api/galas/' + state.galaId + '/categories/' + categoryId + '/participants');
+        if (!result.ok) {
+            const message = result.data && result.data.message ? result.data.message : 'Impossible de charger la categorie.';
             throw new Error(message);
         }
-        const payload = await response.json();
+        const payload = result.data;
         state.categoryData = payload;
         state.categoryId = categoryId;
         state.participantId = null;
@@ -960,8 +964,16 @@
         }
     }
 
+    function flushPendingSaves(options) {
+        if (typeof state.flushPendingSaves === 'function') {
+            return state.flushPendingSaves(options);
+        }
+        return Promise.resolve(true);
+    }
+
     async function navigateToCategory(categoryId, options) {
         const opts = options || {};
+        await flushPendingSaves({ silent: true });
         const push = opts.push !== false;
         const targetUrl = '/judge/galas/' + state.galaId + '/categories/' + categoryId;
         if (push) {
@@ -991,6 +1003,7 @@
 
     async function navigateToParticipant(participantId, options) {
         const opts = options || {};
+        await flushPendingSaves({ silent: true });
         const push = opts.push !== false;
         const targetUrl = '/judge/galas/' + state.galaId + '/categories/' + state.categoryId + '/participants/' + participantId;
         if (push) {
@@ -1023,12 +1036,24 @@
         }
         elements.submitButton.disabled = true;
         try {
+            // Les notes encore en attente doivent etre enregistrees avant la soumission.
+            await flushPendingSaves({ silent: true });
             const response = await fetch('/judge/api/galas/' + state.galaId + '/submit', {
                 method: 'POST',
             });
             const payload = await response.json().catch(function () { return null; });
             if (!response.ok || !payload || payload.status !== 'ok') {
                 const message = payload && payload.message ? payload.message : 'Impossible de soumettre.';
+                const missing = payload && Array.isArray(payload.missing) ? payload.missing : [];
+                if (missing.length) {
+                    // Amene le juge sur la premiere fiche incomplete (la navigation efface le message).
+                    const first = missing[0];
+                    if (String(first.gala_categorie_id) === String(state.categoryId)) {
+                        await navigateToParticipant(first.participant_id);
+                    } else {
+                        await navigateToCategory(first.gala_categorie_id, { participantId: first.participant_id });
+                    }
+                }
                 showFeedback('error', message);
                 elements.submitButton.disabled = false;
                 return;
@@ -1114,5 +1139,9 @@
         });
     }
 
+    window.addEventListener('pagehide', function () {
+        flushPendingSaves({ silent: true, keepalive: true });
+    });
+
     initialise();
 })();
@@ -11,6 +11,38 @@
             .replaceAll("'", "&#39;");
     }
 
+    // Lectures conditionnelles : on renvoie l'ETag recu, le serveur repond 304
+    // tant que les donnees n'ont pas change et l'on reutilise la copie locale.
+    const etagCache = new Map();
+
+    async function fetchJsonWithEtag(url, options) {
+        const cached = etagCache.get(url);
+        const headers = new Headers((options && options.headers) || {});
+        if (cached) {
+            headers.set("If-None-Match", cached.etag);
+        }
+        const response = await fetch(url, Object.assign({}, options, { headers: headers, cache: "no-store" }));
+        if (response.status === 304 && cached) {
+            return { ok: true, status: 304, notModified: true, data: JSON.parse(cached.body) };
+        }
+        const body = await response.text();
+        let data = null;
+        try {
+            data = body ? JSON.parse(body) : null;
+        } catch (error) {
+            data = null;
+        }
+        const etag = response.headers.get("ETag");
+        if (response.ok && etag) {
+            etagCache.set(url, { etag: etag, body: body });
+        } else {
+            etagCache.delete(url);
+        }
+        return { ok: response.ok, status: response.status, notModified: false, data: data };
+    }
+
+    window.fetchJsonWithEtag = fetchJsonWithEtag;
+
     const authArea = document.getElementById("auth-area");
     const loginForm = document.getElementById("loginForm");
     const registerForm = document.getElementById("registerForm");
@@ -63,11 +95,11 @@
             '</li>'
         ].join("");
         try {
-            const response = await fetch('/judge/api/galas');
-            if (!response.ok) {
+            const result = await fetchJsonWithEtag('/judge/api/galas');
+            if (!result.ok) {
                 throw new Error('Erreur de chargement');
             }
-            const payload = await response.json();
+            const payload = result.data || {};
             const galas = Array.isArray(payload.galas) ? payload.galas : [];
             if (!galas.length) {
                 menu.innerHTML = '<li class="nav-item"><span class="nav-link disabled text-muted">Aucun gala</span></li>';
@@ -176,6 +208,8 @@
         container.textContent = "";
     }
 
+    const AUTH_BUSY_RETRIES = 4;
+
     async function submitAuthForm(form, endpoint, feedbackContainer, onSuccess) {
         if (!form) {
             return;
@@ -188,11 +222,22 @@
         }
 
         try {
-            const response = await fetch(endpoint, {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify(formData)
-            });
+            let response = null;
+            // 503 : file de hachage pleine, on réessaie après le délai indiqué par le serveur.
+            for (let attempt = 0; attempt < AUTH_BUSY_RETRIES; attempt += 1) {
+                response = await fetch(endpoint, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify(formData)
+                });
+                if (response.status !== 503 || attempt === AUTH_BUSY_RETRIES - 1) {
+                    break;
+                }
+                const retryAfter = Number(response.headers.get("Retry-After")) || 1;
+                await new Promise(function (resolve) {
+                    setTimeout(resolve, (retryAfter + Math.random()) * 1000);
+                });
+            }
             const payload = await response.json();
             if (!response.ok || payload.status !== "ok") {
                 const message = payload && payload.message ? payload.message : "Une erreur est survenue.";
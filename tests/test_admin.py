@@ -1,3 +1,4 @@
+import routes.admin_routes as admin_routes
 from models import db as db_module
 from tests.helpers import seed_roles, create_user, set_session
 
@@ -201,6 +202,110 @@ def test_admin_update_assignments_requires_judge_role(client):
     assert "juge" in payload["message"].lower()
 
 
+def test_admin_assignment_matrix_applies_only_the_diff(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    julie_id = create_user(conn, "Julie", "Juge", "juliejuge", roles["juge"])
+    marc_id = create_user(conn, "Marc", "Arbitre", "marcarbitre", roles["juge"])
+
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Distinction", 2025, "Quebec", "2025-05-01"),
+    ).lastrowid
+    other_gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Precedent", 2024, "Quebec", "2024-05-01"),
+    ).lastrowid
+    cat_a = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Innovation", "")).lastrowid
+    cat_b = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Croissance", "")).lastrowid
+    gala_cat_a = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, cat_a, 1),
+    ).lastrowid
+    gala_cat_b = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, cat_b, 2),
+    ).lastrowid
+    other_gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (other_gala_id, cat_a, 1),
+    ).lastrowid
+
+    julie_judge = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (julie_id,)).lastrowid
+    marc_judge = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (marc_id,)).lastrowid
+    conn.executemany(
+        "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+        [(julie_judge, gala_cat_a), (julie_judge, other_gala_cat), (marc_judge, gala_cat_b)],
+    )
+    conn.commit()
+    conn.close()
+
+    admin_session(client, admin_id, prenom="Admin", nom="Chef", username="adminchef")
+
+    matrix_resp = client.get(f"/admin/api/assignments?gala_id={gala_id}")
+    assert matrix_resp.status_code == 200
+    matrix = matrix_resp.get_json()
+    assert matrix["gala"]["id"] == gala_id
+    assert [category["id"] for category in matrix["categories"]] == [gala_cat_a, gala_cat_b]
+    by_judge = {judge["id"]: judge["categories"] for judge in matrix["judges"]}
+    assert by_judge == {julie_judge: [gala_cat_a], marc_judge: [gala_cat_b]}
+
+    etag = matrix_resp.headers["ETag"]
+    assert client.get(f"/admin/api/assignments?gala_id={gala_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    update_resp = client.put(
+        "/admin/api/assignments",
+        json={"gala_id": gala_id, "assignments": {str(julie_judge): [gala_cat_b], str(marc_judge): [gala_cat_b]}},
+    )
+    assert update_resp.status_code == 200
+    update_payload = update_resp.get_json()
+    assert update_payload["added"] == [[julie_judge, gala_cat_b]]
+    assert update_payload["removed"] == [[julie_judge, gala_cat_a]]
+
+    conn = db_module.get_db_connection()
+    saved = {
+        (row["juge_id"], row["gala_categorie_id"])
+        for row in conn.execute("SELECT juge_id, gala_categorie_id FROM juge_gala_categorie")
+    }
+    conn.close()
+    # Les assignations d'un autre gala ne sont pas touchees.
+    assert saved == {(julie_judge, gala_cat_b), (julie_judge, other_gala_cat), (marc_judge, gala_cat_b)}
+
+    assert client.get(f"/admin/api/assignments?gala_id={gala_id}", headers={"If-None-Match": etag}).status_code == 200
+
+    # Categorie ajoutee par un autre worker (cache local non invalide) : colonne visible.
+    matrix_etag = client.get(f"/admin/api/assignments?gala_id={gala_id}").headers["ETag"]
+    conn = db_module.get_db_connection()
+    cat_c = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Relève", "")).lastrowid
+    gala_cat_c = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, cat_c, 3),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    grown = client.get(f"/admin/api/assignments?gala_id={gala_id}", headers={"If-None-Match": matrix_etag})
+    assert grown.status_code == 200
+    assert [category["id"] for category in grown.get_json()["categories"]] == [gala_cat_a, gala_cat_b, gala_cat_c]
+
+    foreign_resp = client.put(
+        "/admin/api/assignments",
+        json={"gala_id": gala_id, "assignments": {str(marc_judge): [other_gala_cat]}},
+    )
+    assert foreign_resp.status_code == 400
+    assert foreign_resp.get_json()["gala_categorie_ids"] == [other_gala_cat]
+
+    invalid_resp = client.put("/admin/api/assignments", json={"gala_id": gala_id, "assignments": [1, 2]})
+    assert invalid_resp.status_code == 400
+
+    assert client.post(f"/admin/api/galas/{gala_id}/lock").status_code == 200
+    locked_resp = client.put(
+        "/admin/api/assignments",
+        json={"gala_id": gala_id, "assignments": {str(marc_judge): []}},
+    )
+    assert locked_resp.status_code == 409
+
+
 def test_admin_create_and_list_galas(client):
     conn = db_module.get_db_connection()
     roles = seed_roles(conn)
@@ -339,6 +444,86 @@ def test_admin_add_categories_and_questions(client):
     assert counts_after_delete[gala_cat_id] == 0
 
 
+def test_admin_gala_structure_cache_hits_and_invalidation(app, client, monkeypatch):
+    from models import gala_structure
+
+    monkeypatch.setattr(gala_structure, "UNLOCKED_TTL_SECONDS", 60.0)
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Cache", "admincache", roles["admin"])
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Cache", 2026, "Laval", "2026-05-01"),
+    ).lastrowid
+    categorie_id = conn.execute(
+        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+        ("Export", ""),
+    ).lastrowid
+    gala_cat_id = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, 1)",
+        (gala_id, categorie_id),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat_id, "Marches vises", 2.0),
+    )
+    conn.commit()
+    conn.close()
+
+    statements = []
+    db_module.get_pool(app).add_connect_hook(lambda pooled: pooled.set_trace_callback(statements.append))
+    admin_session(client, admin_id, prenom="Admin", nom="Cache", username="admincache")
+    url = f"/admin/api/galas/{gala_id}/categories/{gala_cat_id}/questions"
+    before = client.get("/admin/api/cache/structure").get_json()["structure_cache"]
+
+    assert len(client.get(url).get_json()["questions"]) == 1
+    statements.clear()
+    assert len(client.get(url).get_json()["questions"]) == 1
+    assert not any("question" in sql for sql in statements)
+
+    # Ecriture hors routes admin : reprise telle quelle pendant le TTL, puis revalidee.
+    conn = db_module.get_db_connection()
+    conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat_id, "Reseau", 1.0),
+    )
+    conn.commit()
+    conn.close()
+    assert len(client.get(url).get_json()["questions"]) == 1
+    monkeypatch.setattr(gala_structure, "UNLOCKED_TTL_SECONDS", 0.0)
+    assert len(client.get(url).get_json()["questions"]) == 2
+    monkeypatch.setattr(gala_structure, "UNLOCKED_TTL_SECONDS", 60.0)
+
+    # Les routes admin invalident la structure du gala qu'elles modifient.
+    created = client.post(url, json={"texte": "Logistique", "ponderation": 3})
+    assert [q["texte"] for q in created.get_json()["questions"]] == ["Marches vises", "Reseau", "Logistique"]
+    detail = client.get(f"/admin/api/galas/{gala_id}").get_json()
+    assert detail["gala"]["questions_count"] == 3
+
+    # Gala verrouille : structure immuable, servie sans meme verifier sa version.
+    assert client.post(f"/admin/api/galas/{gala_id}/lock").status_code == 200
+    monkeypatch.setattr(gala_structure, "UNLOCKED_TTL_SECONDS", 0.0)
+    client.get(url)
+    statements.clear()
+    assert len(client.get(url).get_json()["questions"]) == 3
+    assert not any("structure_version" in sql for sql in statements)
+
+    after = client.get("/admin/api/cache/structure").get_json()["structure_cache"]
+    assert after["hits"] - before["hits"] >= 4
+    assert after["misses"] - before["misses"] >= 3
+    assert after["revalidations"] == before["revalidations"]
+    assert after["invalidations"] - before["invalidations"] >= 2
+
+    # Deverrouillage et modification par un autre worker (sans invalidate ici).
+    conn = db_module.get_db_connection()
+    conn.execute("DELETE FROM gala_lock WHERE gala_id = ?", (gala_id,))
+    conn.execute("UPDATE question SET texte = 'Reseau local' WHERE texte = 'Reseau'")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(gala_structure, "UNLOCKED_TTL_SECONDS", 60.0)
+    assert "Reseau local" in [q["texte"] for q in client.get(url).get_json()["questions"]]
+
+
 def test_admin_create_category_and_attach(client):
     conn = db_module.get_db_connection()
     roles = seed_roles(conn)
@@ -638,6 +823,215 @@ def test_admin_participants_api_returns_responses_and_filters(client):
     assert search_payload["meta"]["total"] == 1
     assert search_payload["participants"][0]["compagnie"]["nom"] == "Beta Corp."
 
+    for punctuation in ("-", "@", "%22"):
+        punctuation_resp = client.get(f"/admin/api/participants?q={punctuation}&limit=10")
+        assert punctuation_resp.status_code == 200
+        punctuation_payload = punctuation_resp.get_json()
+        assert punctuation_payload["participants"] == []
+        assert punctuation_payload["meta"]["total"] == 0
+        assert len(punctuation_payload["filters"]["galas"]) == 1
+
+    # Reponses a la demande : la narrative de la compagnie accompagne les questions.
+    detail = client.get(f"/admin/api/participants/{participant_alpha}/responses").get_json()
+    assert [question["id"] for question in detail["questions"]] == [question_innov_a, question_innov_b]
+    assert [item["id"] for item in detail["narratif"]] == [question_narratif]
+    assert client.get(f"/admin/api/participants/{participant_beta}/responses").get_json()["narratif"] == []
+
+
+def test_admin_participants_full_text_search_ranks_and_highlights(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Recherche", 2026, "Quebec", "2026-05-15"),
+    ).lastrowid
+    gala_cats = {}
+    for ordre, nom in enumerate(("Innovation", "Narratif (general)")):
+        categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, '')", (nom,)).lastrowid
+        gala_cats[nom] = conn.execute(
+            "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+            (gala_id, categorie_id, ordre),
+        ).lastrowid
+    participants = {}
+    for nom in ("Économie Verte", "Atelier <Bois>", "Gamma Tech"):
+        compagnie_id = conn.execute("INSERT INTO compagnie (nom, ville) VALUES (?, 'Quebec')", (nom,)).lastrowid
+        participants[nom] = conn.execute(
+            "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+            (compagnie_id, gala_cats["Innovation"]),
+        ).lastrowid
+    gamma_compagnie = conn.execute(
+        "SELECT compagnie_id FROM participant WHERE id = ?", (participants["Gamma Tech"],)
+    ).fetchone()[0]
+    gamma_narratif = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (gamma_compagnie, gala_cats["Narratif (general)"]),
+    ).lastrowid
+    question_innov = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Innovation ?')", (gala_cats["Innovation"],)
+    ).lastrowid
+    question_narratif = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Histoire ?')", (gala_cats["Narratif (general)"],)
+    ).lastrowid
+    conn.executemany(
+        "INSERT INTO reponse_participant (participant_id, question_id, contenu) VALUES (?, ?, ?)",
+        [
+            (participants["Atelier <Bois>"], question_innov, "Nous réduisons l'empreinte écologique <du> meuble."),
+            (gamma_narratif, question_narratif, "Fondée par deux ingénieures écologistes."),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    admin_session(client, admin_id, prenom="Admin", nom="Chef", username="adminchef")
+
+    # Préfixe et accents repliés : « econ » trouve « Économie », « ecolog » le texte des réponses.
+    payload = client.get("/admin/api/participants?q=econ").get_json()
+    assert [p["id"] for p in payload["participants"]] == [participants["Économie Verte"]]
+    assert "<mark>Économie</mark>" in payload["participants"][0]["search"]["extrait_html"]
+
+    payload = client.get("/admin/api/participants?q=ÉCOLOG").get_json()
+    found = {p["id"]: p["search"] for p in payload["participants"]}
+    # La réponse narrative fait remonter la candidature Innovation de Gamma Tech.
+    assert set(found) == {participants["Atelier <Bois>"], participants["Gamma Tech"]}
+    extrait = found[participants["Atelier <Bois>"]]["extrait_html"]
+    assert "<mark>écologique</mark>" in extrait
+    assert "&lt;du&gt;" in extrait
+
+    payload = client.get("/admin/api/participants?q=reduisons%20meuble").get_json()
+    assert [p["id"] for p in payload["participants"]] == [participants["Atelier <Bois>"]]
+    assert client.get('/admin/api/participants?q="NEAR(-').status_code == 200
+
+    # Les triggers suivent les modifications de la compagnie et des réponses.
+    conn = db_module.get_db_connection()
+    conn.execute("UPDATE compagnie SET nom = 'Delta Solaire' WHERE id = ?", (gamma_compagnie,))
+    conn.execute("DELETE FROM reponse_participant WHERE participant_id = ?", (participants["Atelier <Bois>"],))
+    conn.commit()
+    conn.close()
+    assert [p["id"] for p in client.get("/admin/api/participants?q=solaire").get_json()["participants"]] == [
+        participants["Gamma Tech"]
+    ]
+    assert client.get("/admin/api/participants?q=meuble").get_json()["participants"] == []
+
+
+def test_admin_participants_etag_skips_filters_and_follows_other_galas(client, monkeypatch):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Distinction", 2025, "Quebec", "2025-05-01"),
+    ).lastrowid
+    cat_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Innovation", "")).lastrowid
+    gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, cat_id, 1),
+    ).lastrowid
+    compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Alpha Inc.",)).lastrowid
+    conn.execute("INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)", (compagnie_id, gala_cat))
+    conn.commit()
+    conn.close()
+
+    admin_session(client, admin_id, prenom="Admin", nom="Chef", username="adminchef")
+    url = f"/admin/api/participants?gala_id={gala_id}&summary=1"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    def fail_filters(conn):
+        raise AssertionError("filtres calcules pour un 304")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(admin_routes, "_build_admin_participant_filters", fail_filters)
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Un autre gala apparait dans les filtres : la vue par gala doit etre rechargee.
+    conn = db_module.get_db_connection()
+    conn.execute("INSERT INTO gala (nom, annee) VALUES (?, ?)", ("Gala Suivant", 2026))
+    conn.commit()
+    conn.close()
+    refreshed = client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert len(refreshed.get_json()["filters"]["galas"]) == 2
+
+
+def test_admin_participants_keyset_pagination_and_summary_mode(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    gala_cats = []
+    for annee in (2025, 2026):
+        gala_id = conn.execute(
+            "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, 'Quebec', ?)",
+            (f"Gala {annee}", annee, f"{annee}-05-15"),
+        ).lastrowid
+        for ordre, nom in enumerate(("Innovation", "Croissance", "Narratif")):
+            categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, '')", (nom,)).lastrowid
+            gala_cat = conn.execute(
+                "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+                (gala_id, categorie_id, ordre),
+            ).lastrowid
+            if nom != "Narratif":
+                gala_cats.append(gala_cat)
+    expected_order = []
+    for gala_cat in (gala_cats[3], gala_cats[2], gala_cats[1], gala_cats[0]):
+        question_id = conn.execute(
+            "INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Q1')", (gala_cat,)
+        ).lastrowid
+        for index, nom in enumerate(("delta", "Alpha", "charlie", "Bravo")):
+            compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", (f"{nom} {gala_cat}",)).lastrowid
+            participant_id = conn.execute(
+                "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+                (compagnie_id, gala_cat),
+            ).lastrowid
+            if index % 2:
+                conn.execute(
+                    "INSERT INTO reponse_participant (participant_id, question_id, contenu) VALUES (?, ?, ?)",
+                    (participant_id, question_id, "Reponse complete"),
+                )
+            expected_order.append((gala_cat, nom.lower(), participant_id))
+    conn.commit()
+    conn.close()
+    admin_session(client, admin_id, prenom="Admin", nom="Chef", username="adminchef")
+
+    # Ordre attendu : annee desc, categorie, compagnie (Croissance avant Innovation).
+    expected_ids = [
+        pid for _, _, pid in sorted(
+            expected_order,
+            key=lambda item: (-2026 if item[0] in gala_cats[2:] else -2025, item[0] in (gala_cats[0], gala_cats[2]), item[1]),
+        )
+    ]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = "/admin/api/participants?summary=1&limit=5" + (f"&cursor={cursor}" if cursor else "")
+        payload = client.get(url).get_json()
+        pages += 1
+        assert payload["meta"]["total"] == 16
+        assert all("responses" not in participant for participant in payload["participants"])
+        seen.extend(participant["id"] for participant in payload["participants"])
+        cursor = payload["meta"]["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 4
+    assert seen == expected_ids
+
+    first = client.get("/admin/api/participants?summary=1&limit=5").get_json()["participants"][0]
+    assert first["compagnie"]["nom"].startswith("Alpha")
+    assert first["stats"] == {"answered": 1, "total_questions": 1, "missing": 0, "completion_percent": 100.0}
+
+    missing = client.get(f"/admin/api/participants?missing_only=1&limit=50&gala_id={gala_id}").get_json()
+    assert missing["meta"]["total"] == 4
+    assert {p["stats"]["answered"] for p in missing["participants"]} == {0}
+    assert all("responses" in participant for participant in missing["participants"])
+
+    search_page = client.get("/admin/api/participants?q=alpha&limit=3").get_json()
+    assert search_page["meta"]["total"] == 4
+    rest = client.get(f"/admin/api/participants?q=alpha&limit=3&cursor={search_page['meta']['next_cursor']}").get_json()
+    assert len({p["id"] for p in search_page["participants"] + rest["participants"]}) == 4
+    assert rest["meta"]["next_cursor"] is None
+
+    assert client.get("/admin/api/participants?limit=5&cursor=pas-un-curseur").status_code == 400
+
 
 def test_admin_can_update_participant_response(client):
     conn = db_module.get_db_connection()
@@ -1,5 +1,8 @@
+import pytest
+
 from routes.admin_routes import FAVORITE_BONUS
 from models import db as db_module
+from models import gala_snapshot
 from tests.helpers import seed_roles, create_user, set_session
 
 
@@ -189,3 +192,513 @@ def test_admin_results_api_returns_scores_and_progress(client):
     filtered_payload = resp_filtered.get_json()
     assert len(filtered_payload["categories"]) == 1
     assert filtered_payload["filters"]["selected"]["categorie_id"] == gala_cat_innov
+
+
+def _seed_scoreboard_gala(conn):
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Alice", "Admin", "aliceadmin", roles["admin"])
+    judge_user = create_user(conn, "Jean", "Juge", "jg", roles["juge"])
+    juge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Scores", 2025, "Quebec", "2025-06-01"),
+    ).lastrowid
+    categorie_id = conn.execute(
+        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+        ("Innovation", ""),
+    ).lastrowid
+    gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_id, 1),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+        (juge_id, gala_cat),
+    )
+    compagnie_id = conn.execute(
+        "INSERT INTO compagnie (nom) VALUES (?)",
+        ("Alpha Inc.",),
+    ).lastrowid
+    participant_id = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    q1 = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Q1", 1.0),
+    ).lastrowid
+    q2 = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Q2", 2.0),
+    ).lastrowid
+    return admin_id, juge_id, gala_id, participant_id, q1, q2
+
+
+def _score_row(participant_id):
+    conn = db_module.get_db_connection()
+    row = conn.execute(
+        "SELECT weighted_sum, answered_weight, notes_recorded, judges_answered FROM score_aggregate WHERE participant_id = ?",
+        (participant_id,),
+    ).fetchone()
+    conn.close()
+    return tuple(row) if row else None
+
+
+def test_score_aggregate_follows_note_writes(client):
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q1, 6),
+    )
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q2, 3),
+    )
+    conn.commit()
+    assert _score_row(participant_id) == (12.0, 3.0, 2, 1)
+
+    conn.execute(
+        "UPDATE note SET valeur = NULL WHERE participant_id = ? AND question_id = ?",
+        (participant_id, q2),
+    )
+    conn.commit()
+    assert _score_row(participant_id) == (6.0, 1.0, 1, 1)
+
+    conn.execute("UPDATE question SET ponderation = 3.0 WHERE id = ?", (q1,))
+    conn.commit()
+    assert _score_row(participant_id) == (18.0, 3.0, 1, 1)
+
+    conn.execute("DELETE FROM note WHERE participant_id = ?", (participant_id,))
+    conn.commit()
+    conn.close()
+    assert _score_row(participant_id) == (0.0, 0.0, 0, 0)
+
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+    payload = client.get(f"/admin/api/results?gala_id={gala_id}").get_json()
+    participant = payload["categories"][0]["participants"][0]
+    assert participant["score_base"] is None
+    assert participant["notes"]["recorded"] == 0
+
+
+def test_score_aggregate_rebuild_repairs_drift(client):
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q1, 4),
+    )
+    conn.execute("DELETE FROM score_aggregate")
+    conn.commit()
+    conn.close()
+
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+    url = f"/admin/api/results?gala_id={gala_id}"
+    drifted = client.get(url)
+    assert drifted.get_json()["categories"][0]["participants"][0]["judges_answered"] == 0
+
+    resp = client.post("/admin/api/results/rebuild", json={"gala_id": gala_id})
+    assert resp.status_code == 200
+    assert resp.get_json()["rows"] == 1
+    assert _score_row(participant_id) == (4.0, 1.0, 1, 1)
+
+    # Nouvelle version : pas de 304 sur le classement faux, instantane reconstruit.
+    repaired = client.get(url, headers={"If-None-Match": drifted.headers["ETag"]})
+    assert repaired.status_code == 200
+    participant = repaired.get_json()["categories"][0]["participants"][0]
+    assert participant["score_base"] == 4.0
+    assert participant["judges_answered"] == 1
+
+    # Reconstruction complete : la version globale avance aussi.
+    conn = db_module.get_db_connection()
+    before = conn.execute("SELECT version FROM data_version WHERE scope = 0").fetchone()[0]
+    conn.close()
+    assert client.post("/admin/api/results/rebuild", json={}).status_code == 200
+    conn = db_module.get_db_connection()
+    assert conn.execute("SELECT version FROM data_version WHERE scope = 0").fetchone()[0] == before + 1
+    conn.close()
+
+
+def _workload_row(juge_id, gala_cat):
+    conn = db_module.get_db_connection()
+    row = conn.execute(
+        "SELECT question_count, participant_count, expected_notes, recorded_notes, completed_participants, ready_to_submit "
+        "FROM judge_workload WHERE juge_id = ? AND gala_categorie_id = ?",
+        (juge_id, gala_cat),
+    ).fetchone()
+    conn.close()
+    return tuple(row) if row else None
+
+
+def test_judge_workload_follows_structure_and_note_writes(client):
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    gala_cat = conn.execute("SELECT gala_categorie_id FROM participant WHERE id = ?", (participant_id,)).fetchone()[0]
+    conn.commit()
+    assert _workload_row(juge_id, gala_cat) == (2, 1, 2, 0, 0, 0)
+
+    for question_id in (q1, q2):
+        conn.execute(
+            "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+            (juge_id, participant_id, question_id, 4),
+        )
+    conn.commit()
+    assert _workload_row(juge_id, gala_cat) == (2, 1, 2, 2, 1, 1)
+
+    # Nouveau participant puis nouvelle question : la categorie redevient incomplete.
+    compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Beta",)).lastrowid
+    other = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    conn.commit()
+    assert _workload_row(juge_id, gala_cat) == (2, 2, 4, 2, 1, 0)
+    q3 = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Q3", 1.0),
+    ).lastrowid
+    conn.commit()
+    assert _workload_row(juge_id, gala_cat) == (3, 2, 6, 2, 0, 0)
+
+    conn.execute("DELETE FROM question WHERE id = ?", (q3,))
+    conn.execute("DELETE FROM participant WHERE id = ?", (other,))
+    conn.execute("DELETE FROM note WHERE question_id = ?", (q2,))
+    conn.commit()
+    assert _workload_row(juge_id, gala_cat) == (2, 1, 2, 1, 0, 0)
+
+    # Reconstruction identique a l'etat tenu par les triggers.
+    conn.execute("UPDATE judge_workload SET recorded_notes = 0")
+    conn.commit()
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+    resp = client.post("/admin/api/results/rebuild", json={"gala_id": gala_id})
+    assert resp.get_json()["workload_rows"] == 1
+    assert _workload_row(juge_id, gala_cat) == (2, 1, 2, 1, 0, 0)
+    judge = client.get(f"/admin/api/results?gala_id={gala_id}").get_json()["judges"][0]
+    assert (judge["answered_notes"], judge["expected_notes"], judge["status"]) == (1, 2, "en_cours")
+
+    conn = db_module.get_db_connection()
+    conn.execute("DELETE FROM juge_gala_categorie WHERE juge_id = ?", (juge_id,))
+    conn.commit()
+    conn.close()
+    assert _workload_row(juge_id, gala_cat) is None
+
+
+def _seed_export_gala(conn):
+    admin_id, juge_id, gala_id, participant_a, q1, q2 = _seed_scoreboard_gala(conn)
+    gala_cat = conn.execute("SELECT gala_categorie_id FROM participant WHERE id = ?", (participant_a,)).fetchone()[0]
+    compagnie_b = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Beta; \"Solutions\"",)).lastrowid
+    participant_b = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_b, gala_cat),
+    ).lastrowid
+    conn.executemany(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur, commentaire) VALUES (?, ?, ?, ?, ?)",
+        [
+            (juge_id, participant_a, q1, 4, "Bon\x0bdossier"),
+            (juge_id, participant_a, q2, 4, None),
+            (juge_id, participant_b, q1, 5, "Très solide"),
+        ],
+    )
+    conn.execute(
+        "INSERT INTO coup_de_coeur (juge_id, gala_id, participant_id) VALUES (?, ?, ?)",
+        (juge_id, gala_id, participant_a),
+    )
+    conn.commit()
+    return admin_id, gala_id, participant_a, participant_b
+
+
+def test_results_and_notes_export_csv_streams_ranked_rows(client):
+    import csv
+    import io
+
+    conn = db_module.get_db_connection()
+    admin_id, gala_id, participant_a, participant_b = _seed_export_gala(conn)
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    resp = client.get(f"/admin/api/galas/{gala_id}/export/results?format=csv")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "text/csv"
+    assert "attachment" in resp.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(resp.get_data().decode("utf-8-sig"))))
+    assert rows[0][:3] == ["categorie", "rang", "participant_id"]
+    # A : 4.0 + bonus 0.5 = 4.5 ; B : 5.0 sans bonus -> B premier
+    assert [(row[1], row[2], row[6], row[7], row[8]) for row in rows[1:]] == [
+        ("1", str(participant_b), "5.0", "0.0", "5.0"),
+        ("2", str(participant_a), "4.0", str(round(FAVORITE_BONUS, 2)), "4.5"),
+    ]
+
+    resp = client.get(f"/admin/api/galas/{gala_id}/export/notes")
+    assert resp.status_code == 200
+    rows = list(csv.reader(io.StringIO(resp.get_data().decode("utf-8-sig"))))
+    assert len(rows) == 4
+    assert rows[0][-2:] == ["valeur", "commentaire"]
+    assert rows[-1][3] == str(participant_b)
+    assert rows[-1][-1] == "Très solide"
+
+
+def test_results_export_xlsx_is_valid_workbook(client):
+    import io
+    import zipfile
+    from xml.etree import ElementTree
+
+    conn = db_module.get_db_connection()
+    admin_id, gala_id, participant_a, participant_b = _seed_export_gala(conn)
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    for kind, expected_rows in (("results", 3), ("notes", 4)):
+        resp = client.get(f"/admin/api/galas/{gala_id}/export/{kind}?format=xlsx")
+        assert resp.status_code == 200
+        assert resp.mimetype.endswith("spreadsheetml.sheet")
+        archive = zipfile.ZipFile(io.BytesIO(resp.get_data()))
+        assert archive.testzip() is None
+        assert "xl/workbook.xml" in archive.namelist()
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        ns = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+        assert len(sheet.findall("s:sheetData/s:row", ns)) == expected_rows
+
+    assert client.get(f"/admin/api/galas/{gala_id}/export/results?format=pdf").status_code == 400
+    assert client.get(f"/admin/api/galas/{gala_id}/export/inconnu").status_code == 404
+    assert client.get("/admin/api/galas/9999/export/results").status_code == 404
+
+
+def test_stream_csv_yields_bounded_chunks():
+    from models.exports import stream_csv
+
+    rows = ([index, "x" * 10] for index in range(2000))
+    chunks = list(stream_csv(["id", "texte"], rows, chunk_rows=100))
+    assert len(chunks) == 21
+    assert max(len(chunk) for chunk in chunks) < 2000
+
+
+def test_results_etag_answers_not_modified_until_gala_data_changes(client):
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    other_gala = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Archive", 2020, "Quebec", "2020-06-01"),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    url = f"/admin/api/results?gala_id={gala_id}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.get_data() == b""
+
+    # Une écriture sur un autre gala ne change pas la version de celui-ci.
+    conn = db_module.get_db_connection()
+    conn.execute("INSERT INTO gala_lock (gala_id, locked_at) VALUES (?, ?)", (other_gala, "2020-06-02T00:00:00Z"))
+    conn.commit()
+    conn.close()
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    conn = db_module.get_db_connection()
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q1, 5),
+    )
+    conn.commit()
+    conn.close()
+    refreshed = client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.get_json()["categories"][0]["participants"][0]["score_base"] == 5.0
+
+    galas_etag = client.get("/admin/api/galas").headers["ETag"]
+    assert client.get("/admin/api/galas", headers={"If-None-Match": galas_etag}).status_code == 304
+
+
+def test_results_served_from_snapshot_rebuilt_on_version_change(client):
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q1, 4),
+    )
+    conn.commit()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    url = f"/admin/api/results?gala_id={gala_id}"
+    before = gala_snapshot.cache_stats()
+    first = client.get(url).get_json()
+    assert first["categories"][0]["participants"][0]["score_base"] == 4.0
+    snap = gala_snapshot.snapshot(conn, gala_id)
+    assert snap.participants[0].company.nom == "Alpha Inc."
+    assert list(snap.notes_recorded) == [1]
+
+    # Meme version : l'instantane est reutilise, meme pour une autre vue (categorie filtree).
+    client.get(f"{url}&categorie_id={snap.structure.categories[0].id}")
+    stats = gala_snapshot.cache_stats()
+    assert stats["builds"] == before["builds"] + 1
+    assert stats["hits"] >= before["hits"] + 2
+    assert gala_snapshot.snapshot(conn, gala_id) is snap
+
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q2, 1),
+    )
+    conn.execute("INSERT INTO gala_lock (gala_id, locked_at) VALUES (?, ?)", (gala_id, "2025-06-02T00:00:00Z"))
+    conn.commit()
+    refreshed = client.get(url).get_json()
+    assert refreshed["categories"][0]["participants"][0]["score_base"] == 2.0
+    assert refreshed["categories"][0]["progress"]["recorded"] == 2
+    assert refreshed["meta"]["gala"]["locked"] is True
+    assert gala_snapshot.cache_stats()["builds"] == before["builds"] + 2
+    # L'ancien instantane, deja remplace, reste coherent pour qui le tient encore.
+    assert list(snap.notes_recorded) == [1]
+    assert gala_snapshot.snapshot(conn, gala_id).locked
+    conn.close()
+
+
+def test_scoring_strategies_and_what_if_rankings(client):
+    from models import scoring
+
+    conn = db_module.get_db_connection()
+    admin_id, juge_a, gala_id, participant_a, q1, q2 = _seed_scoreboard_gala(conn)
+    roles = {row["nom"]: row["id"] for row in conn.execute("SELECT id, nom FROM role")}
+    juge_b = conn.execute(
+        "INSERT INTO juge (user_id) VALUES (?)",
+        (create_user(conn, "Sev", "Ere", "severe", roles["juge"]),),
+    ).lastrowid
+    gala_cat = conn.execute("SELECT gala_categorie_id FROM participant WHERE id = ?", (participant_a,)).fetchone()[0]
+    participant_b, participant_c = (
+        conn.execute(
+            "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+            (conn.execute("INSERT INTO compagnie (nom) VALUES (?)", (nom,)).lastrowid, gala_cat),
+        ).lastrowid
+        for nom in ("Beta", "Gamma")
+    )
+    # Juge A : A=4, B=5, C=3 ; juge B (severe) : A=2, B=1, C=1 -> moyennes A=3, B=3, C=2.
+    notes = {juge_a: {participant_a: 4, participant_b: 5, participant_c: 3}, juge_b: {participant_a: 2, participant_b: 1, participant_c: 1}}
+    conn.executemany(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        [(juge, participant, question, value) for juge, values in notes.items() for participant, value in values.items() for question in (q1, q2)],
+    )
+    conn.commit()
+
+    matrix = scoring.load_matrix(conn, gala_id)
+    assert len(matrix) == 12
+    assert matrix.note_counts()[participant_a] == (4, 2)
+    weighted = scoring.compute_scores(matrix)
+    for participant_id, score in weighted.items():
+        weighted_sum, answered_weight = _score_row(participant_id)[:2]
+        assert score == pytest.approx(weighted_sum / answered_weight)
+    assert scoring.compute_scores(matrix, "moyenne_tronquee") == pytest.approx(weighted)
+    assert scoring.compute_scores(matrix, "mediane") == pytest.approx(weighted)
+    # Normalise par juge, l'ecart que le juge severe met entre A et B compte autant que celui du juge A.
+    zscores = scoring.compute_scores(matrix, "zscore_juge")
+    assert zscores[participant_a] > zscores[participant_b] > zscores[participant_c]
+    assert scoring.compute_scores(matrix.with_weights({q2: 0.0}))[participant_a] == pytest.approx(3.0)
+    with pytest.raises(ValueError):
+        scoring.compute_scores(matrix, "inconnue")
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    official = client.get(f"/admin/api/results?gala_id={gala_id}").get_json()
+    assert [(p["id"], p["rank"]) for p in official["categories"][0]["participants"]] == [
+        (participant_a, 1), (participant_b, 1), (participant_c, 3),
+    ]
+    normalized = client.get(f"/admin/api/results?gala_id={gala_id}&strategie=zscore_juge").get_json()
+    assert normalized["meta"]["strategie"] == "zscore_juge"
+    assert [p["rank"] for p in normalized["categories"][0]["participants"]] == [1, 2, 3]
+    assert client.get(f"/admin/api/results?gala_id={gala_id}&strategie=inconnue").status_code == 400
+
+    resp = client.get(f"/admin/api/galas/{gala_id}/export/results?strategie=zscore_juge")
+    assert resp.status_code == 200
+    assert "zscore_juge" in resp.headers["Content-Disposition"]
+    lines = resp.get_data().decode("utf-8-sig").splitlines()
+    assert [line.split(",")[1:3] for line in lines[1:]] == [["1", str(participant_a)], ["2", str(participant_b)], ["3", str(participant_c)]]
+
+    resp = client.post("/admin/api/results/what-if", json={"gala_id": gala_id, "exclure_juges": [juge_b]})
+    assert resp.status_code == 200
+    participants = resp.get_json()["categories"][0]["participants"]
+    assert [(p["id"], p["rank"], p["rank_officiel"], p["rank_delta"]) for p in participants] == [
+        (participant_b, 1, 1, 0), (participant_a, 2, 1, -1), (participant_c, 3, 3, 0),
+    ]
+    assert participants[0]["score_final"] == 5.0 and participants[0]["judges_answered"] == 1
+    assert client.post("/admin/api/results/what-if", json={"gala_id": gala_id, "strategie": "x"}).status_code == 400
+    assert client.post("/admin/api/results/what-if", json={"gala_id": "abc"}).status_code == 400
+
+
+def test_judge_progress_delta_counts_assigned_categories_only(client):
+    from models import live
+
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    # Categorie du meme gala non affectee au juge : ses notes ne comptent pas.
+    other_categorie = conn.execute("INSERT INTO categorie (nom) VALUES ('Croissance')").lastrowid
+    other_gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, other_categorie, 2),
+    ).lastrowid
+    other_participant = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES ((SELECT MIN(id) FROM compagnie), ?)",
+        (other_gala_cat,),
+    ).lastrowid
+    other_question = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Q autre')", (other_gala_cat,)
+    ).lastrowid
+    conn.executemany(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        [(juge_id, participant_id, q1, 5), (juge_id, other_participant, other_question, 4)],
+    )
+    payload = live.judge_progress_payload(conn, juge_id, gala_id)
+    conn.commit()
+    conn.close()
+
+    assert payload == {"juge_id": juge_id, "answered_notes": 1, "expected_notes": 2}
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+    judge = client.get(f"/admin/api/results?gala_id={gala_id}").get_json()["judges"][0]
+    assert (judge["answered_notes"], judge["expected_notes"]) == (payload["answered_notes"], payload["expected_notes"])
+
+
+def test_results_stream_replays_live_deltas(app, client):
+    from models import live
+
+    app.config.update(LIVE_POLL_INTERVAL=0.01, LIVE_STREAM_MAX_SECONDS=0.1)
+    conn = db_module.get_db_connection()
+    admin_id, juge_id, gala_id, participant_id, q1, q2 = _seed_scoreboard_gala(conn)
+    conn.commit()
+    conn.close()
+    admin_session(client, admin_id, prenom="Alice", nom="Admin", username="aliceadmin")
+
+    start_id = client.get(f"/admin/api/results?gala_id={gala_id}").get_json()["meta"]["live_event_id"]
+
+    conn = db_module.get_db_connection()
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+        (juge_id, participant_id, q1, 5),
+    )
+    live.publish_note_changes(conn, gala_id, juge_id, [participant_id])
+    conn.commit()
+    conn.close()
+    assert client.post(f"/admin/api/galas/{gala_id}/lock").status_code == 200
+
+    resp = client.get(f"/admin/api/results/stream?gala_id={gala_id}&last_event_id={start_id}")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+    body = resp.get_data(as_text=True)
+    assert body.startswith("retry: ")
+    assert "event: participant_score" in body
+    assert '"score_base":5.0' in body
+    assert "event: judge_progress" in body
+    assert "event: lock" in body
+
+    # Reprise via Last-Event-ID : rien n'est rejoué.
+    last_id = int([line for line in body.splitlines() if line.startswith("id: ")][-1][4:])
+    resumed = client.get(f"/admin/api/results/stream?gala_id={gala_id}", headers={"Last-Event-ID": str(last_id)})
+    assert "event:" not in resumed.get_data(as_text=True)
+
+    assert client.get(f"/admin/api/results?gala_id={gala_id}").get_json()["meta"]["gala"]["locked"] is True
+    assert client.get("/admin/api/results/stream").status_code == 400
+    assert client.get("/admin/api/results/stream?gala_id=9999").status_code == 404
@@ -0,0 +1,114 @@
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+
+from models import db as db_module
+from models import init_db as init_db_module
+from models.metrics import normalize_sql
+from tests.helpers import create_user, seed_roles, set_session
+
+
+def _create_app(tmp_path, monkeypatch, **config):
+    db_path = tmp_path / "gala.db"
+    monkeypatch.setattr(db_module, "DB_PATH", db_path)
+    monkeypatch.setattr(init_db_module, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(init_db_module, "DB_FILE", db_path)
+    from run import create_app
+
+    return create_app({"TESTING": True, **config}), db_path
+
+
+def test_create_app_initialises_database_and_blueprints(tmp_path, monkeypatch):
+    app, db_path = _create_app(tmp_path, monkeypatch)
+
+    assert db_path.exists()
+    assert {"main", "admin", "judge"} <= set(app.blueprints)
+    assert app.config["TESTING"] is True
+    assert app.config["DB_POOL_SIZE"] == db_module.DEFAULT_POOL_CONFIG["DB_POOL_SIZE"]
+
+    conn = db_module.get_db_connection()
+    assert init_db_module.get_schema_version(conn) == init_db_module.SCHEMA_VERSION
+    conn.close()
+
+    # Deux fabriques successives ne partagent pas leur pool.
+    other, _ = _create_app(tmp_path, monkeypatch)
+    assert db_module.get_pool(other) is not db_module.get_pool(app)
+
+
+def test_gunicorn_hooks_warm_and_close_the_pool(tmp_path, monkeypatch):
+    app, _ = _create_app(tmp_path, monkeypatch)
+    config = runpy.run_path(str(Path(__file__).resolve().parents[1] / "gunicorn.conf.py"))
+
+    assert config["worker_class"] == "gthread"
+    assert config["keepalive"] > 0
+    assert config["workers"] >= 3
+
+    logged = []
+    worker = SimpleNamespace(wsgi=app, log=SimpleNamespace(info=lambda *args: logged.append(args)))
+    config["post_worker_init"](worker)
+    stats = db_module.get_pool_stats(app)
+    assert stats["idle"] == min(config["threads"], stats["max_size"])
+    assert logged
+
+    config["worker_exit"](None, worker)
+    assert db_module.get_pool_stats(app)["opened"] == 0
+
+
+def test_metrics_count_queries_per_request_and_export_prometheus_text(tmp_path, monkeypatch):
+    app, _ = _create_app(tmp_path, monkeypatch, METRICS_ENABLED=True)
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_user_id = create_user(conn, "Ada", "Admin", "adametrics", roles["admin"])
+    judge_user_id = create_user(conn, "Jo", "Juge", "jometrics", roles["juge"])
+    juge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    for index in range(3):
+        gala_id = conn.execute(
+            "INSERT INTO gala (nom, annee) VALUES (?, ?)", (f"Gala {index}", 2020 + index)
+        ).lastrowid
+        categorie_id = conn.execute("INSERT INTO categorie (nom) VALUES (?)", (f"Categorie {index}",)).lastrowid
+        gala_cat = conn.execute(
+            "INSERT INTO gala_categorie (gala_id, categorie_id) VALUES (?, ?)", (gala_id, categorie_id)
+        ).lastrowid
+        conn.execute("INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Q')", (gala_cat,))
+        conn.execute("INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)", (juge_id, gala_cat))
+    conn.commit()
+    conn.close()
+
+    client = app.test_client()
+    set_session(client, {"id": judge_user_id, "username": "jometrics", "prenom": "Jo", "nom": "Juge", "role": "juge"})
+    client.get("/judge/api/galas")
+    response = client.get("/judge/api/galas", headers={"If-None-Match": "autre"})
+    assert response.status_code == 200
+    # Structure en cache : contexte du juge, version, progression. Pas une requete par gala.
+    assert int(response.headers["X-Query-Count"]) <= 3
+    assert float(response.headers["X-SQL-Time-Ms"]) >= 0
+
+    assert client.get("/admin/api/metrics").status_code == 403
+    set_session(client, {"id": admin_user_id, "username": "adametrics", "prenom": "Ada", "nom": "Admin", "role": "admin"})
+    export = client.get("/admin/api/metrics")
+    assert export.status_code == 200
+    assert export.content_type.startswith("text/plain; version=0.0.4")
+    text = export.get_data(as_text=True)
+    labels = 'endpoint="judge.api_list_galas",method="GET"'
+    assert f"gala_http_request_duration_seconds_count{{{labels}}} 2" in text
+    assert f'gala_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"gala_sql_queries_per_request_count{{{labels}}} 2" in text
+    assert 'gala_http_responses_total{endpoint="admin.metrics_export",method="GET",status="403"} 1' in text
+    slowest = next(line for line in text.splitlines() if line.startswith(f"gala_sql_slowest_statement_seconds{{{labels}"))
+    assert 'statement="SELECT ' in slowest
+
+    assert normalize_sql("SELECT *\n  FROM note WHERE juge_id = 12 AND participant_id IN (?, ?, ?) AND x = 'a''b'") == (
+        "SELECT * FROM note WHERE juge_id = ? AND participant_id IN (?...) AND x = ?"
+    )
+    assert "gala_db_pool_max_size" in text
+
+
+def test_metrics_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("GALA_METRICS", raising=False)
+    app, _ = _create_app(tmp_path, monkeypatch)
+    client = app.test_client()
+    set_session(client, {"id": 1, "username": "admin", "prenom": "A", "nom": "B", "role": "admin"})
+
+    response = client.get("/admin/api/metrics")
+    assert response.status_code == 404
+    assert "X-Query-Count" not in response.headers
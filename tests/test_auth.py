@@ -1,4 +1,6 @@
 import sqlite3
+
+import pytest
 from werkzeug.security import generate_password_hash
 
 from models import db as db_module
@@ -105,3 +107,103 @@ def test_login_rejects_bad_password(client):
     data = response.get_json()
     assert data["status"] == "error"
     assert "Identifiants invalides" in data["message"]
+
+
+def _create_member(username, password):
+    conn = db_module.get_db_connection()
+    membre_role = conn.execute(
+        "INSERT INTO role (nom, description) VALUES (?, ?)",
+        ("membre", "Role par defaut"),
+    ).lastrowid
+    personne_id = conn.execute(
+        "INSERT INTO personne (prenom, nom, courriel, telephone) VALUES (?, ?, ?, ?)",
+        ("Eve", "Martel", "eve@example.com", None),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO user (personne_id, username, password_hash, role_id) VALUES (?, ?, ?, ?)",
+        (personne_id, username, generate_password_hash(password, method="pbkdf2:sha256:1000"), membre_role),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _stored_hash(username):
+    conn = db_module.get_db_connection()
+    value = conn.execute("SELECT password_hash FROM user WHERE username = ?", (username,)).fetchone()[0]
+    conn.close()
+    return value
+
+
+def test_login_rehashes_password_when_hash_parameters_change(app, client):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    _create_member("evemartel", "motdepasse123")
+    assert _stored_hash("evemartel").startswith("pbkdf2:sha256:1000$")
+
+    assert client.post("/auth/login", json={"username": "evemartel", "password": "motdepasse123"}).status_code == 200
+    rehashed = _stored_hash("evemartel")
+    assert rehashed.startswith("pbkdf2:sha256:2000$")
+
+    # Hash a jour : pas de nouveau calcul a la connexion suivante.
+    assert client.post("/auth/login", json={"username": "evemartel", "password": "motdepasse123"}).status_code == 200
+    assert _stored_hash("evemartel") == rehashed
+
+    from models import passwords
+    stats = passwords.get_hasher(app).stats()
+    assert stats["rehashed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_login_throttles_repeated_failures_per_username(app, client):
+    app.config.update(AUTH_RATE_LIMIT_USER_BURST=3, AUTH_RATE_LIMIT_USER_PER_MINUTE=1.0)
+    _create_member("evemartel", "motdepasse123")
+
+    for _ in range(3):
+        assert client.post("/auth/login", json={"username": "evemartel", "password": "mauvais"}).status_code == 401
+    blocked = client.post("/auth/login", json={"username": "EveMartel", "password": "motdepasse123"})
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+
+    # Les autres comptes (meme IP) restent accessibles.
+    assert client.post("/auth/login", json={"username": "autre", "password": "mauvais"}).status_code == 401
+
+
+def test_token_bucket_refills_and_evicts_oldest_keys():
+    from models.rate_limit import TokenBucketLimiter
+
+    limiter = TokenBucketLimiter(capacity=2, per_minute=60.0, max_keys=2)
+    assert limiter.consume("a", now=0.0) == (True, 0.0)
+    assert limiter.consume("a", now=0.0)[0] is True
+    allowed, retry_after = limiter.consume("a", now=0.5)
+    assert not allowed and retry_after == pytest.approx(0.5)
+    assert limiter.consume("a", now=1.0)[0] is True
+
+    limiter.consume("b", now=1.0)
+    limiter.consume("c", now=1.0)
+    assert limiter.stats()["keys"] == 2
+    assert limiter.stats()["evictions"] == 1
+    # « a » (le moins recemment utilise) a ete oublie : seau plein.
+    assert limiter.consume("a", now=1.0)[0] is True
+
+
+def test_password_hasher_rejects_work_beyond_its_queue():
+    import threading
+
+    from models.passwords import HasherBusy, PasswordHasher
+
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=(blocking,))
+    worker.start()
+    assert started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.hash("motdepasse123")
+    release.set()
+    worker.join(5)
+    assert hasher.stats()["rejected_busy"] == 1
+    assert hasher.stats()["in_flight"] == 0
+    hasher.shutdown()
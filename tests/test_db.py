@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from models import db as db_module
+from tests.helpers import seed_roles, create_user, set_session
+
+
+def test_pooled_connection_is_reused_across_requests(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Alice", "Admin", "aliceadmin", roles["admin"])
+    conn.commit()
+    conn.close()
+
+    set_session(client, {
+        "id": admin_id,
+        "username": "aliceadmin",
+        "prenom": "Alice",
+        "nom": "Admin",
+        "role": "admin",
+    })
+
+    for _ in range(3):
+        assert client.get("/admin/api/users").status_code == 200
+
+    response = client.get("/admin/api/db/pool")
+    assert response.status_code == 200
+    stats = response.get_json()["pool"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+    assert stats["in_use"] == 0
+    assert stats["waits"] == 0
+
+
+def test_pooled_connection_is_configured_once(app):
+    with app.app_context():
+        conn = db_module.get_db_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == app.config["DB_BUSY_TIMEOUT_MS"]
+        # close() dans une route ne doit pas fermer la connexion du pool
+        conn.close()
+        assert db_module.get_db_connection() is conn
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_pool_is_created_once_under_concurrent_first_requests(app, monkeypatch):
+    original_init = db_module.ConnectionPool.__init__
+
+    def slow_init(self, *args, **kwargs):
+        time.sleep(0.02)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(db_module.ConnectionPool, "__init__", slow_init)
+    barrier = threading.Barrier(6)
+    pools = []
+
+    def first_request():
+        barrier.wait()
+        pools.append(db_module.get_pool(app))
+
+    threads = [threading.Thread(target=first_request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(pool) for pool in pools}) == 1
+
+
+def test_close_rolls_back_uncommitted_work(app):
+    with app.app_context():
+        conn = db_module.get_db_connection()
+        conn.execute("INSERT INTO role (nom, description) VALUES ('temp', 'x')")
+        conn.close()
+        assert conn.execute("SELECT COUNT(*) FROM role").fetchone()[0] == 0
+
+
+def test_pool_waits_then_times_out_when_exhausted(tmp_path):
+    pool = db_module.ConnectionPool(tmp_path / "pool.db", max_size=1, timeout=0.05)
+    first = pool.acquire()
+    with pytest.raises(db_module.PoolTimeoutError):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["hits"] == 1
+    pool.close_all()
@@ -0,0 +1,306 @@
+import csv
+import hashlib
+import io
+import json
+import sqlite3
+import time
+
+import pytest
+
+from import_csv import CATEGORY_COLUMNS_CANDIDATES, CATEGORY_QUESTIONS, GENERAL_QUESTIONS, GalaLockedError, import_csv
+from models import db as db_module
+from models import gala_structure, import_jobs
+from models import init_db as init_db_module
+from tests.helpers import create_user, seed_roles, set_session
+
+NAME_COL = "Nom de l'entreprise ou organisme"
+EMAIL_COL = "Courriel de la personne responsable du dossier"
+SECTOR_COL = "Secteur d'activité de l'entreprise"
+CATEGORY_COL = CATEGORY_COLUMNS_CANDIDATES[2]
+INNOVATION_QUESTIONS = CATEGORY_QUESTIONS["Innovation"]
+
+
+def _write_csv(path, rows):
+    headers = [NAME_COL, EMAIL_COL, SECTOR_COL, CATEGORY_COL, *GENERAL_QUESTIONS, *INNOVATION_QUESTIONS]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def _row(nom, courriel, secteur, categories, reponse="Reponse"):
+    row = {NAME_COL: nom, EMAIL_COL: courriel, SECTOR_COL: secteur, CATEGORY_COL: json.dumps(categories)}
+    row[GENERAL_QUESTIONS[0]] = f"{reponse} narratif"
+    row[INNOVATION_QUESTIONS[0]] = f"{reponse} innovation"
+    return row
+
+
+def test_import_csv_bulk_is_idempotent(tmp_path):
+    db_path = tmp_path / "gala.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(init_db_module.SCHEMA_SQL)
+    conn.close()
+
+    csv_path = tmp_path / "candidatures.csv"
+    _write_csv(csv_path, [
+        _row("Alpha", "a@example.com", "Tech", ["Innovation", "Reprenariat"]),
+        _row("Beta", "b@example.com", "Commerce", ["Innovation"]),
+        _row("Sans categorie", "", "Services", []),
+        _row("", "x@example.com", "Tech", ["Innovation"]),
+    ])
+    import_csv(db_path, csv_path, "Gala Test", 2025, "Portneuf", "2025-11-15")
+
+    # Ré-import : la même compagnie est mise à jour, les réponses remplacées.
+    _write_csv(csv_path, [
+        _row("Alpha", "a@example.com", "Manufacture", ["Innovation", "Reprenariat"], reponse="Nouvelle"),
+        _row("Beta", "b@example.com", "Commerce", ["Innovation"]),
+        _row("Sans categorie", "", "Services", []),
+    ])
+    import_csv(db_path, csv_path, "Gala Test", 2025, "Portneuf", "2025-11-15")
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    companies = dict(conn.execute("SELECT nom, secteur FROM compagnie").fetchall())
+    assert companies == {"Alpha": "Manufacture", "Beta": "Commerce", "Sans categorie": "Services"}
+
+    participations = conn.execute(
+        """
+        SELECT comp.nom, c.nom
+        FROM participant AS p
+        JOIN compagnie AS comp ON comp.id = p.compagnie_id
+        JOIN gala_categorie AS gc ON gc.id = p.gala_categorie_id
+        JOIN categorie AS c ON c.id = gc.categorie_id
+        ORDER BY comp.nom, c.nom
+        """
+    ).fetchall()
+    assert participations == [
+        ("Alpha", "Innovation"),
+        ("Alpha", "Narratif (général)"),
+        ("Alpha", "Repreneuriat"),
+        ("Beta", "Innovation"),
+        ("Beta", "Narratif (général)"),
+        ("Sans categorie", "Narratif (général)"),
+    ]
+
+    reponses = conn.execute(
+        """
+        SELECT r.contenu
+        FROM reponse_participant AS r
+        JOIN participant AS p ON p.id = r.participant_id
+        JOIN compagnie AS comp ON comp.id = p.compagnie_id
+        WHERE comp.nom = 'Alpha'
+        ORDER BY r.contenu
+        """
+    ).fetchall()
+    assert [row[0] for row in reponses] == ["Nouvelle innovation", "Nouvelle narratif"]
+    assert conn.execute("SELECT COUNT(*) FROM reponse_participant").fetchone()[0] == 5
+    conn.close()
+
+
+def test_import_csv_resumes_from_checkpoint_after_failure(tmp_path):
+    db_path = tmp_path / "gala.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(init_db_module.SCHEMA_SQL)
+    conn.close()
+
+    csv_path = tmp_path / "candidatures.csv"
+    _write_csv(csv_path, [
+        _row(f"Compagnie {index}", f"c{index}@example.com", "Tech", ["Innovation"]) for index in range(5)
+    ])
+
+    def fail_after_first_chunk(report):
+        raise RuntimeError("coupure")
+
+    with pytest.raises(RuntimeError):
+        import_csv(db_path, csv_path, "Gala Test", 2025, None, None, chunk_size=2, progress=fail_after_first_chunk)
+
+    conn = sqlite3.connect(db_path)
+    status, rows_done, error = conn.execute("SELECT status, rows_done, error FROM import_checkpoint").fetchone()
+    assert (status, rows_done, error) == ("failed", 2, "coupure")
+    assert conn.execute("SELECT COUNT(*) FROM compagnie").fetchone()[0] == 2
+    conn.close()
+
+    seen = []
+    report = import_csv(
+        db_path, csv_path, "Gala Test", 2025, None, None, chunk_size=2, progress=lambda r: seen.append(r.rows_done)
+    )
+    assert (report.rows_resumed, report.rows_read, report.chunks) == (2, 3, 2)
+    assert seen == [4, 5]
+    assert report.new_companies == 3
+    assert report.rows_per_second > 0
+
+    conn = sqlite3.connect(db_path)
+    status, rows_done, finished_at = conn.execute("SELECT status, rows_done, finished_at FROM import_checkpoint").fetchone()
+    assert (status, rows_done) == ("done", 5)
+    assert finished_at is not None
+    assert conn.execute("SELECT COUNT(*) FROM compagnie").fetchone()[0] == 5
+    assert conn.execute("SELECT COUNT(*) FROM participant").fetchone()[0] == 10
+    conn.close()
+
+    # Fichier déjà importé : rien n'est relu, sauf avec restart.
+    assert import_csv(db_path, csv_path, "Gala Test", 2025, None, None).already_done
+    restarted = import_csv(db_path, csv_path, "Gala Test", 2025, None, None, restart=True)
+    assert (restarted.rows_resumed, restarted.rows_read, restarted.new_companies) == (0, 5, 0)
+
+
+def test_import_csv_stops_when_gala_gets_locked(tmp_path):
+    db_path = tmp_path / "gala.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(init_db_module.SCHEMA_SQL)
+    conn.close()
+
+    csv_path = tmp_path / "candidatures.csv"
+    _write_csv(csv_path, [
+        _row(f"Compagnie {index}", f"c{index}@example.com", "Tech", ["Innovation"]) for index in range(5)
+    ])
+
+    def lock_after_first_chunk(report):
+        locker = sqlite3.connect(db_path)
+        locker.execute("INSERT INTO gala_lock (gala_id, locked_at) VALUES (?, ?)", (report.gala_id, "2025-06-01T00:00:00Z"))
+        locker.commit()
+        locker.close()
+
+    with pytest.raises(GalaLockedError):
+        import_csv(db_path, csv_path, "Gala Test", 2025, None, None, chunk_size=2, progress=lock_after_first_chunk)
+
+    conn = sqlite3.connect(db_path)
+    status, rows_done = conn.execute("SELECT status, rows_done FROM import_checkpoint").fetchone()
+    assert (status, rows_done) == ("failed", 2)
+    assert conn.execute("SELECT COUNT(*) FROM compagnie").fetchone()[0] == 2
+    conn.close()
+
+    # Reprise refusée tant que le gala reste verrouillé.
+    with pytest.raises(GalaLockedError):
+        import_csv(db_path, csv_path, "Gala Test", 2025, None, None, chunk_size=2)
+
+
+def _wait_for_job(client, job):
+    deadline = time.monotonic() + 10
+    while job["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/admin/api/imports/{job['id']}").get_json()["job"]
+    return job
+
+
+def test_admin_upload_refuses_locked_gala_and_refreshes_structure(client, tmp_path):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    gala_id = conn.execute("INSERT INTO gala (nom, annee) VALUES ('Gala Web', 2026)").lastrowid
+    conn.commit()
+    assert gala_structure.gala_structure(conn, gala_id).categories == ()
+    conn.execute("INSERT INTO gala_lock (gala_id, locked_at) VALUES (?, ?)", (gala_id, "2026-06-01T00:00:00Z"))
+    conn.commit()
+    conn.close()
+    set_session(client, {"id": admin_id, "username": "adminchef", "prenom": "Admin", "nom": "Chef", "role": "admin"})
+
+    csv_path = tmp_path / "televerse.csv"
+    _write_csv(csv_path, [_row("Alpha", "a@example.com", "Tech", ["Innovation"])])
+
+    def form():
+        return {"file": (io.BytesIO(csv_path.read_bytes()), "candidatures.csv"), "gala": "Gala Web", "annee": "2026"}
+
+    locked = client.post("/admin/api/imports", data=form(), content_type="multipart/form-data")
+    assert locked.status_code == 409
+    conn = db_module.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM import_checkpoint").fetchone()[0] == 0
+    conn.execute("DELETE FROM gala_lock WHERE gala_id = ?", (gala_id,))
+    conn.commit()
+    conn.close()
+
+    response = client.post("/admin/api/imports", data=form(), content_type="multipart/form-data")
+    assert response.status_code == 202
+    assert _wait_for_job(client, response.get_json()["job"])["status"] == "done"
+
+    # Structure mise en cache avant l'import : oubliée à la fin de la tâche.
+    conn = db_module.get_db_connection()
+    assert gala_structure.gala_structure(conn, gala_id).categories != ()
+    conn.close()
+
+
+def test_admin_upload_runs_import_in_background(client, tmp_path, monkeypatch):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    conn.commit()
+    conn.close()
+    set_session(client, {"id": admin_id, "username": "adminchef", "prenom": "Admin", "nom": "Chef", "role": "admin"})
+
+    csv_path = tmp_path / "televerse.csv"
+    _write_csv(csv_path, [_row("Alpha", "a@example.com", "Tech", ["Innovation"])])
+    form = {"file": (io.BytesIO(csv_path.read_bytes()), "candidatures.csv"), "gala": "Gala Web", "annee": "2026"}
+
+    response = client.post("/admin/api/imports", data=form, content_type="multipart/form-data")
+    assert response.status_code == 202
+    job = response.get_json()["job"]
+    assert job["status"] == "running"
+    assert job["file_name"] == "candidatures.csv"
+
+    job = _wait_for_job(client, job)
+    assert job["status"] == "done"
+    assert job["rows_done"] == 1
+
+    conn = db_module.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM compagnie WHERE nom = 'Alpha'").fetchone()[0] == 1
+    conn.close()
+
+    # Même fichier, même gala : déjà importé, pas de nouvelle tâche.
+    form["file"] = (io.BytesIO(csv_path.read_bytes()), "candidatures.csv")
+    again = client.post("/admin/api/imports", data=form, content_type="multipart/form-data")
+    assert again.status_code == 200
+    assert again.get_json()["job"]["id"] == job["id"]
+
+    # restart : transmis jusqu'a import_csv, qui relit le fichier depuis la premiere ligne.
+    calls = []
+
+    def recording_import(*args, **kwargs):
+        calls.append(kwargs["restart"])
+        return import_csv(*args, **kwargs)
+
+    monkeypatch.setattr(import_jobs, "import_csv", recording_import)
+    form["file"] = (io.BytesIO(csv_path.read_bytes()), "candidatures.csv")
+    restarted = client.post("/admin/api/imports", data={**form, "restart": "1"}, content_type="multipart/form-data")
+    assert restarted.status_code == 202
+    assert _wait_for_job(client, restarted.get_json()["job"])["status"] == "done"
+    assert calls == [True]
+
+    missing = client.post("/admin/api/imports", data={"gala": "Gala Web", "annee": "2026"})
+    assert missing.status_code == 400
+    assert client.get("/admin/api/imports/9999").status_code == 404
+
+
+def test_admin_upload_refuses_job_running_in_another_worker(app, client, tmp_path):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_id = create_user(conn, "Admin", "Chef", "adminchef", roles["admin"])
+    csv_path = tmp_path / "televerse.csv"
+    _write_csv(csv_path, [_row("Alpha", "a@example.com", "Tech", ["Innovation"])])
+    # Ligne réservée par un autre worker, qui vient de valider un lot.
+    checkpoint_id = conn.execute(
+        "INSERT INTO import_checkpoint (file_hash, gala_nom, annee, status) VALUES (?, 'Gala Web', 2026, 'running')",
+        (hashlib.sha256(csv_path.read_bytes()).hexdigest(),),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    set_session(client, {"id": admin_id, "username": "adminchef", "prenom": "Admin", "nom": "Chef", "role": "admin"})
+
+    def form():
+        return {"file": (io.BytesIO(csv_path.read_bytes()), "candidatures.csv"), "gala": "Gala Web", "annee": "2026"}
+
+    runner = import_jobs.get_runner(app)
+    submitted = runner.stats()["submitted"]
+    busy = client.post("/admin/api/imports", data=form(), content_type="multipart/form-data")
+    assert busy.status_code == 409
+    assert busy.get_json()["job"]["id"] == checkpoint_id
+    assert runner.stats()["submitted"] == submitted
+
+    # Worker arrêté sans finir : la ligne n'avance plus et peut être reprise.
+    conn = db_module.get_db_connection()
+    conn.execute("UPDATE import_checkpoint SET updated_at = datetime('now', '-1 day') WHERE id = ?", (checkpoint_id,))
+    conn.commit()
+    conn.close()
+    resumed = client.post("/admin/api/imports", data=form(), content_type="multipart/form-data")
+    assert resumed.status_code == 202
+    assert _wait_for_job(client, resumed.get_json()["job"])["status"] == "done"
+    assert runner.stats()["submitted"] == submitted + 1
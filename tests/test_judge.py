@@ -145,6 +145,15 @@ def test_judge_dashboard_summary_and_participant_flow(client):
     assert note_row["valeur"] == 6
     assert note_row["commentaire"] == "Solide"
 
+    incomplete_resp = client.post(f"/judge/api/galas/{gala_id}/submit")
+    assert incomplete_resp.status_code == 400
+    incomplete_payload = incomplete_resp.get_json()
+    assert incomplete_payload["missing_count"] == 3
+    assert incomplete_payload["missing"] == [
+        {"gala_categorie_id": gala_cat_id, "participant_id": participant_a, "compagnie": "Alpha", "question_ids": [question_2]},
+        {"gala_categorie_id": gala_cat_id, "participant_id": participant_b, "compagnie": "Beta", "question_ids": [question_1, question_2]},
+    ]
+
     client.patch(
         f"/judge/api/galas/{gala_id}/categories/{gala_cat_id}/participants/{participant_a}/questions/{question_2}",
         json={"valeur": 5},
@@ -333,3 +342,540 @@ def test_judge_narratif_questions_shared_across_categories(client):
     assert remove_resp.status_code == 200
     remove_payload = remove_resp.get_json()
     assert remove_payload["favorite"]["selected"] is False
+
+
+def test_judge_gala_summary_progress_per_category(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Paul", "Juge", "pauljuge", roles["juge"])
+    judge_id = conn.execute(
+        "INSERT INTO juge (user_id) VALUES (?)",
+        (judge_user_id,),
+    ).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Progression", 2025, "Quebec", "2025-06-01"),
+    ).lastrowid
+
+    gala_cats = {}
+    for ordre, nom in enumerate(["Alpha", "Beta", "Gamma"], start=1):
+        categorie_id = conn.execute(
+            "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+            (nom, ""),
+        ).lastrowid
+        gala_cats[nom] = conn.execute(
+            "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+            (gala_id, categorie_id, ordre),
+        ).lastrowid
+        conn.execute(
+            "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+            (judge_id, gala_cats[nom]),
+        )
+
+    compagnie_id = conn.execute(
+        "INSERT INTO compagnie (nom) VALUES (?)",
+        ("Compagnie P",),
+    ).lastrowid
+    participants_alpha = [
+        conn.execute(
+            "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+            (compagnie_id, gala_cats["Alpha"]),
+        ).lastrowid
+        for _ in range(2)
+    ]
+    conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cats["Gamma"]),
+    )
+    questions_alpha = [
+        conn.execute(
+            "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+            (gala_cats["Alpha"], f"Question {index}", 1.0),
+        ).lastrowid
+        for index in range(2)
+    ]
+    conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cats["Beta"], "Question Beta", 1.0),
+    )
+    for participant_id, question_id in [
+        (participants_alpha[0], questions_alpha[0]),
+        (participants_alpha[0], questions_alpha[1]),
+        (participants_alpha[1], questions_alpha[0]),
+    ]:
+        conn.execute(
+            "INSERT INTO note (juge_id, participant_id, question_id, valeur) VALUES (?, ?, ?, ?)",
+            (judge_id, participant_id, question_id, 4),
+        )
+    conn.commit()
+    conn.close()
+
+    judge_session(client, judge_user_id, prenom="Paul", username="pauljuge")
+
+    payload = client.get("/judge/api/galas").get_json()
+    gala_entry = next(item for item in payload["galas"] if item["id"] == gala_id)
+    categories = {item["id"]: item for item in gala_entry["categories"]}
+
+    alpha = categories[gala_cats["Alpha"]]
+    assert alpha["question_count"] == 2
+    assert alpha["participant_count"] == 2
+    assert alpha["progress"]["recorded"] == 3
+    assert alpha["progress"]["total"] == 4
+    assert alpha["progress"]["completed_participants"] == 1
+    assert alpha["status"] == "en_cours"
+
+    assert categories[gala_cats["Beta"]]["participant_count"] == 0
+    assert categories[gala_cats["Beta"]]["status"] == "non_disponible"
+    assert categories[gala_cats["Gamma"]]["question_count"] == 0
+    assert categories[gala_cats["Gamma"]]["status"] == "non_disponible"
+
+    assert gala_entry["progress"] == {"percent": 75.0, "recorded": 3, "total": 4}
+    assert gala_entry["status"] == "en_cours"
+
+
+def test_judge_batch_note_save(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Bruno", "Juge", "brunojuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Lot", 2025, "Quebec", "2025-06-01"),
+    ).lastrowid
+    categorie_innov = conn.execute(
+        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+        ("Innovation", ""),
+    ).lastrowid
+    categorie_narratif = conn.execute(
+        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+        ("Narratif (general)", ""),
+    ).lastrowid
+    gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_innov, 1),
+    ).lastrowid
+    gala_cat_narratif = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_narratif, 0),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+        (judge_id, gala_cat),
+    )
+
+    compagnie_id = conn.execute(
+        "INSERT INTO compagnie (nom, secteur) VALUES (?, ?)",
+        ("Compagnie Lot", "Tech"),
+    ).lastrowid
+    participant_id = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    participant_narratif = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat_narratif),
+    ).lastrowid
+
+    question_1 = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Question 1", 1.0),
+    ).lastrowid
+    question_2 = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Question 2", 1.0),
+    ).lastrowid
+    question_narratif = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat_narratif, "Narratif", 1.0),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO note (juge_id, participant_id, question_id, valeur, commentaire) VALUES (?, ?, ?, ?, ?)",
+        (judge_id, participant_id, question_2, 2, "Deja commente"),
+    )
+    conn.commit()
+    conn.close()
+
+    judge_session(client, judge_user_id, prenom="Bruno", username="brunojuge")
+    url = f"/judge/api/galas/{gala_id}/categories/{gala_cat}/participants/{participant_id}/notes"
+
+    resp = client.patch(url, json={"notes": [
+        {"question_id": question_1, "valeur": 3},
+        {"question_id": question_1, "commentaire": "  Solide  "},
+        {"question_id": question_2, "valeur": "5"},
+        {"question_id": question_narratif, "target_participant_id": participant_narratif, "valeur": 6},
+    ]})
+    assert resp.status_code == 200
+    payload = resp.get_json()
+    assert payload["status"] == "ok"
+    assert payload["notes"] == [
+        {"question_id": question_1, "target_participant_id": participant_id, "valeur": 3, "commentaire": "Solide"},
+        {"question_id": question_2, "target_participant_id": participant_id, "valeur": 5, "commentaire": "Deja commente"},
+        {"question_id": question_narratif, "target_participant_id": participant_narratif, "valeur": 6, "commentaire": None},
+    ]
+
+    # Une entree invalide refuse tout le lot.
+    invalid = client.patch(url, json={"notes": [
+        {"question_id": question_1, "valeur": 1},
+        {"question_id": question_2, "valeur": 9},
+    ]})
+    assert invalid.status_code == 400
+    assert invalid.get_json()["question_id"] == question_2
+
+    # Question d'une autre categorie sans participant cible correspondant.
+    assert client.patch(url, json=[{"question_id": question_narratif, "valeur": 2}]).status_code == 404
+    assert client.patch(url, json={"notes": []}).status_code == 400
+
+    conn = db_module.get_db_connection()
+    rows = conn.execute(
+        "SELECT participant_id, question_id, valeur FROM note WHERE juge_id = ? ORDER BY question_id",
+        (judge_id,),
+    ).fetchall()
+    conn.execute(
+        "INSERT INTO gala_lock (gala_id, locked_at, locked_by) VALUES (?, ?, ?)",
+        (gala_id, "2025-06-01T20:00:00", judge_user_id),
+    )
+    conn.commit()
+    conn.close()
+    assert [(row["participant_id"], row["question_id"], row["valeur"]) for row in rows] == [
+        (participant_id, question_1, 3),
+        (participant_id, question_2, 5),
+        (participant_narratif, question_narratif, 6),
+    ]
+
+    locked = client.patch(url, json={"notes": [{"question_id": question_1, "valeur": 4}]})
+    assert locked.status_code == 409
+
+    # Gala verrouille : la liste vient de l'instantane partage, progression du juge comprise.
+    listing = client.get(f"/judge/api/galas/{gala_id}/categories/{gala_cat}/participants").get_json()
+    assert listing["locked"] is True
+    assert [p["id"] for p in listing["participants"]] == [participant_id]
+    assert listing["participants"][0]["status"] == "termine"
+
+
+def test_judge_context_loaded_once_per_request(app, client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Carla", "Juge", "carlajuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Contexte", 2025, "Levis", "2025-09-01"),
+    ).lastrowid
+    categorie_id = conn.execute(
+        "INSERT INTO categorie (nom, description) VALUES (?, ?)",
+        ("Innovation", ""),
+    ).lastrowid
+    gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_id, 1),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)",
+        (judge_id, gala_cat),
+    )
+    compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Compagnie C",)).lastrowid
+    participant_id = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Question", 1.0),
+    )
+    conn.execute(
+        "INSERT INTO juge_gala_submission (juge_id, gala_id, submitted_at) VALUES (?, ?, ?)",
+        (judge_id, gala_id, "2025-09-01T21:00:00"),
+    )
+    conn.commit()
+    conn.close()
+
+    statements = []
+    db_module.get_pool(app).add_connect_hook(lambda pooled: pooled.set_trace_callback(statements.append))
+    judge_session(client, judge_user_id, prenom="Carla", username="carlajuge")
+
+    base = f"/judge/api/galas/{gala_id}/categories/{gala_cat}/participants"
+    for url in ("/judge/api/galas", base, f"{base}/{participant_id}"):
+        statements.clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        payload = response.get_json()
+        lock_queries = [sql for sql in statements if "gala_lock" in sql or "juge_gala_submission" in sql]
+        assert len(lock_queries) == 1, url
+        assert sum("FROM juge AS j" in sql for sql in statements) == 1
+
+    assert payload["submitted"] is True
+    assert payload["locked"] is False
+    assert client.get(f"/judge/api/galas/{gala_id}/categories/{gala_cat + 1}/participants").status_code == 404
+
+
+def test_judge_participant_detail_uses_cached_narratif_mapping(app, client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Nora", "Juge", "norajuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Narratif", 2025, "Levis", "2025-09-01"),
+    ).lastrowid
+    gala_cats = {}
+    for ordre, nom in enumerate(("Narratif (général)", "Innovation")):
+        categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, '')", (nom,)).lastrowid
+        gala_cats[nom] = conn.execute(
+            "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+            (gala_id, categorie_id, ordre),
+        ).lastrowid
+    gala_cat = gala_cats["Innovation"]
+    conn.execute("INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)", (judge_id, gala_cat))
+    compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Compagnie N",)).lastrowid
+    participant_id = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    conn.execute("INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Specifique')", (gala_cat,))
+    conn.execute("INSERT INTO question (gala_categorie_id, texte) VALUES (?, 'Histoire')", (gala_cats["Narratif (général)"],))
+    conn.commit()
+    assert conn.execute("SELECT SUM(is_narratif) FROM categorie").fetchone()[0] == 1
+    conn.close()
+
+    statements = []
+    db_module.get_pool(app).add_connect_hook(lambda pooled: pooled.set_trace_callback(statements.append))
+    judge_session(client, judge_user_id, prenom="Nora", username="norajuge")
+    url = f"/judge/api/galas/{gala_id}/categories/{gala_cat}/participants/{participant_id}"
+
+    assert [q["source"] for q in client.get(url).get_json()["questions"]] == [None]
+
+    # Un participant narratif ajoute apres coup change la version de structure du gala.
+    conn = db_module.get_db_connection()
+    narratif_participant = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cats["Narratif (général)"]),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    questions = client.get(url).get_json()["questions"]
+    assert [(q["source"], q["scope_participant_id"]) for q in questions] == [
+        (None, participant_id),
+        ("narratif", narratif_participant),
+    ]
+
+    # Cache chaud : contexte du juge, fiche (+ coup de coeur, version), questions.
+    statements.clear()
+    assert client.get(url).status_code == 200
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+    assert len(selects) == 3
+    assert not any("LIKE 'narratif%'" in sql for sql in statements)
+
+
+def test_judge_participants_list_supports_conditional_get(client):
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Rita", "Juge", "ritajuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala ETag", 2025, "Quebec", "2025-06-01"),
+    ).lastrowid
+    categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Innovation", "")).lastrowid
+    gala_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_id, 1),
+    ).lastrowid
+    conn.execute("INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)", (judge_id, gala_cat))
+    compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", ("Compagnie ETag",)).lastrowid
+    participant_id = conn.execute(
+        "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+        (compagnie_id, gala_cat),
+    ).lastrowid
+    question_id = conn.execute(
+        "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)",
+        (gala_cat, "Q1", 1.0),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+
+    judge_session(client, judge_user_id, prenom="Rita", username="ritajuge")
+    url = f"/judge/api/galas/{gala_id}/categories/{gala_cat}/participants"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    galas_etag = client.get("/judge/api/galas").headers["ETag"]
+    assert client.get("/judge/api/galas", headers={"If-None-Match": galas_etag}).status_code == 304
+
+    # Ecritures dans un gala ou le juge n'est pas affecte : l'ETag de son tableau de bord ne bouge pas.
+    conn = db_module.get_db_connection()
+    other_gala = conn.execute("INSERT INTO gala (nom, annee) VALUES (?, ?)", ("Autre gala", 2025)).lastrowid
+    other_cat = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (other_gala, categorie_id, 1),
+    ).lastrowid
+    conn.execute("INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)", (compagnie_id, other_cat))
+    conn.commit()
+    conn.close()
+    assert client.get("/judge/api/galas", headers={"If-None-Match": galas_etag}).status_code == 304
+
+    resp = client.patch(
+        f"{url}/{participant_id}/questions/{question_id}",
+        json={"valeur": 4},
+    )
+    assert resp.status_code == 200
+
+    refreshed = client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.get_json()["participants"][0]["progress"]["completed_questions"] == 1
+    assert client.get("/judge/api/galas", headers={"If-None-Match": galas_etag}).status_code == 200
+
+    # Question ajoutee par un autre worker (sans invalidate local) : la structure en
+    # cache est revalidee, le nouvel ETag ne fige pas l'ancien nombre de questions.
+    conn = db_module.get_db_connection()
+    conn.execute("INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, ?)", (gala_cat, "Q2", 1.0))
+    conn.commit()
+    conn.close()
+    etag = refreshed.headers["ETag"]
+    updated = client.get(url, headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.get_json()["category"]["question_count"] == 2
+    assert updated.get_json()["participants"][0]["progress"]["total_questions"] == 2
+
+
+def test_judge_submit_waits_for_concurrent_lock(client):
+    import threading
+    import time
+
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    judge_user_id = create_user(conn, "Julie", "Juge", "juliejuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala Verrou", 2025, "Quebec", "2025-05-01"),
+    ).lastrowid
+    categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Innovation", "")).lastrowid
+    gala_cat_id = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_id, 1),
+    ).lastrowid
+    conn.execute("INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)", (judge_id, gala_cat_id))
+    conn.commit()
+    conn.close()
+    judge_session(client, judge_user_id)
+
+    # L'admin verrouille le gala pendant que le juge soumet : la soumission attend
+    # la fin de la transaction d'ecriture et voit le verrou.
+    locked = threading.Event()
+
+    def lock_gala():
+        locker = db_module.get_db_connection()
+        locker.execute("BEGIN IMMEDIATE")
+        locker.execute("INSERT INTO gala_lock (gala_id, locked_at) VALUES (?, ?)", (gala_id, "2025-05-01T20:00:00Z"))
+        locked.set()
+        time.sleep(0.3)
+        locker.commit()
+        locker.close()
+
+    locker_thread = threading.Thread(target=lock_gala)
+    locker_thread.start()
+    locked.wait(5)
+    resp = client.post(f"/judge/api/galas/{gala_id}/submit")
+    locker_thread.join()
+
+    assert resp.status_code == 409
+    assert "verrouille" in resp.get_json()["message"]
+    check = db_module.get_db_connection()
+    assert check.execute("SELECT COUNT(*) FROM juge_gala_submission").fetchone()[0] == 0
+    check.close()
+
+
+def test_judge_write_behind_queue_barriers_and_replay(app, client, monkeypatch):
+    from models import note_queue
+
+    conn = db_module.get_db_connection()
+    roles = seed_roles(conn)
+    admin_user_id = create_user(conn, "Ada", "Admin", "adaqueue", roles["admin"])
+    judge_user_id = create_user(conn, "Julie", "Juge", "juliejuge", roles["juge"])
+    judge_id = conn.execute("INSERT INTO juge (user_id) VALUES (?)", (judge_user_id,)).lastrowid
+    gala_id = conn.execute(
+        "INSERT INTO gala (nom, annee, lieu, date_gala) VALUES (?, ?, ?, ?)",
+        ("Gala File", 2025, "Quebec", "2025-06-01"),
+    ).lastrowid
+    categorie_id = conn.execute("INSERT INTO categorie (nom, description) VALUES (?, ?)", ("Innovation", "")).lastrowid
+    gala_cat_id = conn.execute(
+        "INSERT INTO gala_categorie (gala_id, categorie_id, ordre_affichage) VALUES (?, ?, ?)",
+        (gala_id, categorie_id, 1),
+    ).lastrowid
+    participants = []
+    for nom in ("Alpha", "Beta"):
+        compagnie_id = conn.execute("INSERT INTO compagnie (nom) VALUES (?)", (nom,)).lastrowid
+        participants.append(conn.execute(
+            "INSERT INTO participant (compagnie_id, gala_categorie_id) VALUES (?, ?)",
+            (compagnie_id, gala_cat_id),
+        ).lastrowid)
+    question_1, question_2 = (
+        conn.execute(
+            "INSERT INTO question (gala_categorie_id, texte, ponderation) VALUES (?, ?, 1)", (gala_cat_id, texte)
+        ).lastrowid
+        for texte in ("Q1", "Q2")
+    )
+    conn.execute("INSERT INTO juge_gala_categorie (juge_id, gala_categorie_id) VALUES (?, ?)", (judge_id, gala_cat_id))
+    conn.commit()
+    conn.close()
+
+    # Sans fil ecrivain : seules les barrieres (lecture, soumission, verrou) appliquent le journal.
+    monkeypatch.setattr(note_queue.NoteQueue, "_ensure_writer", lambda self: None)
+    app.config["NOTE_WRITE_BEHIND"] = True
+    with app.app_context():
+        queue = note_queue.get_queue()
+    assert queue.journal_path == db_module.DB_PATH.with_name("test.db-notes")
+
+    def note_count():
+        check = db_module.get_db_connection()
+        total = check.execute("SELECT COUNT(*) FROM note").fetchone()[0]
+        check.close()
+        return total
+
+    judge_session(client, judge_user_id)
+    base = f"/judge/api/galas/{gala_id}/categories/{gala_cat_id}/participants"
+    resp = client.patch(f"{base}/{participants[0]}/notes", json={"notes": [{"question_id": question_1, "valeur": 5}]})
+    payload = resp.get_json()
+    assert resp.status_code == 200
+    assert payload["queued"] is True and payload["seq"] == 1
+    assert payload["notes"] == [{"question_id": question_1, "target_participant_id": participants[0], "valeur": 5}]
+    assert note_count() == 0
+
+    # Le juge relit toujours ce qu'il vient d'enregistrer.
+    detail = client.get(f"{base}/{participants[0]}").get_json()
+    assert [question["note"] for question in detail["questions"]] == [5, None]
+    assert note_count() == 1
+
+    client.patch(f"{base}/{participants[1]}/notes", json={"notes": [{"question_id": question_1, "valeur": 4}]})
+    favorite = client.post(f"{base}/{participants[1]}/favorite").get_json()
+    assert favorite["queued"] is True and favorite["favorite"]["participant_id"] == participants[1]
+
+    # La soumission voit les notes en file ; refusee, sa transaction (et leur application) est annulee.
+    submit_resp = client.post(f"/judge/api/galas/{gala_id}/submit")
+    assert submit_resp.status_code == 400
+    assert submit_resp.get_json()["missing_count"] == 2
+    assert note_count() == 1
+
+    # Redemarrage : une nouvelle file sur le meme journal rejoue les mutations acceptees, une seule fois.
+    replay = note_queue.NoteQueue(db_module.DB_PATH, queue.journal_path)
+    assert replay.drain() == 2
+    assert queue.drain() == 0
+    assert note_count() == 2
+    check = db_module.get_db_connection()
+    assert check.execute("SELECT participant_id FROM coup_de_coeur WHERE juge_id = ?", (judge_id,)).fetchone()[0] == participants[1]
+    assert check.execute("SELECT applied_seq FROM note_queue_cursor").fetchone()[0] == 3
+    check.close()
+
+    # Le verrouillage applique les notes deja acceptees ; celles qui arrivent apres sont ecartees.
+    client.patch(f"{base}/{participants[0]}/notes", json={"notes": [{"question_id": question_2, "valeur": 3}]})
+    set_session(client, {"id": admin_user_id, "username": "adaqueue", "prenom": "Ada", "nom": "Admin", "role": "admin"})
+    assert client.post(f"/admin/api/galas/{gala_id}/lock").status_code == 200
+    assert note_count() == 3
+    queue.submit([note_queue.note_mutation(gala_id, judge_id, participants[1], question_2, {"valeur": 6})])
+    assert queue.drain() == 1
+    assert note_count() == 3
+    stats = queue.stats()
+    assert stats["rejected"] == 1 and stats["barrier_flushes"] == 2 and stats["pending"] == 0
+    assert stats["accepted"] == 5
+    replay.shutdown(flush=False)
+    queue.shutdown(flush=False)
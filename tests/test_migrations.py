@@ -0,0 +1,69 @@
+import sqlite3
+
+from benchmarks import query_plans
+from benchmarks.seed import seed_database
+from models import db as db_module
+from models import init_db as init_db_module
+
+
+def _index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_migrations_upgrade_existing_database(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    legacy_schema = init_db_module.SCHEMA_SQL.replace(
+        init_db_module.SCORE_AGGREGATE_SQL
+        + init_db_module.INDEX_SQL
+        + init_db_module.DATA_VERSION_SQL
+        + init_db_module.LIVE_EVENT_SQL
+        + init_db_module.SEARCH_SQL
+        + init_db_module.STRUCTURE_VERSION_SQL
+        + init_db_module.NARRATIF_SQL
+        + init_db_module.NOTE_QUEUE_SQL
+        + init_db_module.JUDGE_WORKLOAD_SQL
+        + init_db_module.IMPORT_CHECKPOINT_SQL,
+        "",
+    ).replace("    description TEXT,\n    is_narratif INTEGER NOT NULL DEFAULT 0\n", "    description TEXT\n")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(legacy_schema)
+    conn.execute("INSERT INTO categorie (nom) VALUES ('Narratif (général)')")
+    conn.commit()
+    assert init_db_module.get_schema_version(conn) == 0
+    assert "idx_note_participant" not in _index_names(conn)
+    conn.close()
+
+    assert init_db_module.migrate_database(db_path) == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert init_db_module.migrate_database(db_path) == []
+
+    conn = sqlite3.connect(db_path)
+    assert init_db_module.get_schema_version(conn) == init_db_module.SCHEMA_VERSION
+    assert {"idx_note_participant", "idx_jgc_juge_categorie", "idx_participant_gala_categorie"} <= _index_names(conn)
+    assert conn.execute("SELECT COUNT(*) FROM score_aggregate").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM judge_workload").fetchone()[0] == 0
+    versions_sql = "SELECT (SELECT version FROM data_version WHERE scope = 0), (SELECT version FROM structure_version WHERE scope = 0)"
+    data_before, structure_before = conn.execute(versions_sql).fetchone()
+    conn.execute("INSERT INTO gala (nom, annee) VALUES ('Gala', 2025)")
+    assert conn.execute(versions_sql).fetchone() == (data_before + 1, (structure_before or 0) + 1)
+    assert conn.execute("SELECT is_narratif FROM categorie").fetchone()[0] == 1
+    conn.close()
+
+
+def test_judge_and_results_routes_avoid_full_scans(tmp_path, monkeypatch):
+    db_path = tmp_path / "plans.db"
+    monkeypatch.setattr(db_module, "DB_PATH", db_path)
+    monkeypatch.setattr(init_db_module, "DB_FILE", db_path)
+    # 40 juges : avec une poignée de juges, parcourir la table juge reste le meilleur plan.
+    summary = seed_database(db_path, galas=2, participants_per_category=10, judges=40)
+
+    plans = query_plans.capture_plans(db_path, summary)
+
+    assert {endpoint.name for endpoint in plans} == {
+        "judge.galas",
+        "judge.participants",
+        "judge.participant_detail",
+        "admin.results",
+        "admin.results_category",
+    }
+    assert all(endpoint.statements for endpoint in plans)
+    assert [scan for endpoint in plans for scan in endpoint.full_scans] == []